@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+import json
 import os
 import dj_database_url
 from pathlib import Path
@@ -47,6 +48,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files (compressed, immutable cache for hashed names)
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Counts SQL queries per request (Server-Timing, N+1 log, per-view budgets)
+    'nucleo.consultas.OrcamentoConsultasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -94,6 +99,39 @@ if 'DATABASE_URL' in os.environ:
         conn_health_checks=True,
     )
 
+# Sessions live in a signed cookie: the anonymous cart (nucleo/carrinho.py, CarrinhoSessao)
+# and logins never write to the database. The cookie is signed with SECRET_KEY, not
+# encrypted, and only holds small values (cart ids and quantities, auth ids)
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+
+# Cache (product card fragments, search statistics, facet cube, catalog version)
+# Every process must see the same entries: gunicorn workers and the workers started by
+# iniciar.sh (processar_exclusoes bumps card versions, for instance). Set REDIS_URL
+# (Redis) or CACHE_DIR (shared files); outside DEBUG the default is a file cache on the
+# container's local disk, shared by the processes of iniciar.sh. Local memory only in
+# development, where a single runserver process uses it
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+elif os.environ.get('CACHE_DIR') or not DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, 'privado', 'cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'nerdhub',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -133,6 +171,17 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'nucleo/static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Minified CSS bundles written by `manage.py empacotar_css` (see nucleo/estaticos.py)
+ESTATICOS_BUILD_DIR = os.path.join(BASE_DIR, 'build', 'static')
+if os.path.isdir(ESTATICOS_BUILD_DIR):
+    STATICFILES_DIRS.append(ESTATICOS_BUILD_DIR)
+
+# collectstatic writes content-hashed copies plus .gz/.br variants
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'nucleo.estaticos.ArquivosEstaticos'},
+}
+
 # For Railway deployment
 if 'RAILWAY_STATIC_URL' in os.environ:
     STATIC_URL = f"{os.environ.get('RAILWAY_STATIC_URL')}/"
@@ -141,6 +190,25 @@ if 'RAILWAY_STATIC_URL' in os.environ:
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Avatar uploads are resized by the processar_avatares worker (it reads the originals from
+# MEDIA_ROOT, so it must share that disk with web: same machine, see iniciar.sh, or a shared
+# storage). AVATARES_FILA=false resizes them during the upload request: dev/tests only
+AVATARES_FILA = os.environ.get('AVATARES_FILA', 'True').lower() == 'true'
+
+# LGPD data exports (usuarios/exportacao_dados.py): private storage, never served
+# from MEDIA_URL, and days a finished archive stays available for download.
+# The processar_exportacoes worker writes the archives and web serves them, so both
+# must see the same storage: the local folder only works on one machine (iniciar.sh);
+# for separate processes use a shared backend, e.g.
+#   EXPORTACOES_DADOS_STORAGE=storages.backends.s3.S3Storage
+#   EXPORTACOES_DADOS_STORAGE_OPTIONS='{"bucket_name": "nerdhub-privado", "location": "exportacoes"}'
+EXPORTACOES_DADOS_ROOT = os.environ.get('EXPORTACOES_DADOS_ROOT', os.path.join(BASE_DIR, 'privado', 'exportacoes'))
+EXPORTACOES_DADOS_STORAGE = {
+    'BACKEND': os.environ.get('EXPORTACOES_DADOS_STORAGE', 'django.core.files.storage.FileSystemStorage'),
+    'OPTIONS': json.loads(os.environ.get('EXPORTACOES_DADOS_STORAGE_OPTIONS', '{}')),
+}
+EXPORTACAO_DADOS_VALIDADE_DIAS = int(os.environ.get('EXPORTACAO_DADOS_VALIDADE_DIAS', 7))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -149,4 +217,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Authentication settings
 LOGIN_URL = '/usuario/conta/'
 LOGIN_REDIRECT_URL = '/'
-LOGOUT_REDIRECT_URL = '/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/'
+
+# Stock reservations: seconds a cart hold keeps units away from other buyers
+RESERVA_ESTOQUE_TTL = int(os.environ.get('RESERVA_ESTOQUE_TTL', 15 * 60))
+
+# Responsive image derivatives: threads generating thumbnails/WebP/AVIF after each upload
+IMAGENS_WORKERS = int(os.environ.get('IMAGENS_WORKERS', 2))
+
+# Query budget middleware (nucleo/consultas.py)
+CONSULTAS_LIMIAR_REPETICAO = int(os.environ.get('CONSULTAS_LIMIAR_REPETICAO', 5))  # same SQL shape N times = N+1
+CONSULTAS_SERVER_TIMING = os.environ.get('CONSULTAS_SERVER_TIMING', str(DEBUG)).lower() == 'true'
+CONSULTAS_MODO_ESTRITO = os.environ.get('CONSULTAS_MODO_ESTRITO', 'False').lower() == 'true'  # raise when a view exceeds its budget
+
+# Per-process LRU of slug -> id for brand/product URLs (nucleo/slugs.py), entries per model
+SLUGS_CACHE_TAMANHO = int(os.environ.get('SLUGS_CACHE_TAMANHO', 2048))
@@ -0,0 +1,15 @@
+"""
+Benchmarks do NerdHub
+
+Gera um catálogo sintético em um banco de testes descartável e mede os
+cenários principais (catálogo, detalhe, carrinho, checkout, perfil).
+
+Uso:
+    python -m benchmarks
+    python -m benchmarks --escala media --repeticoes 50 --saida base.json
+    python -m benchmarks --escala media --comparar base.json
+
+Com --comparar, o processo termina com código 1 se algum cenário piorar
+(mais consultas, ou p95/memória acima da tolerância), para rodar antes do
+deploy.
+"""
@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+
+
+def ler_argumentos():
+    from benchmarks.cenarios import CENARIOS
+    from benchmarks.gerador import ESCALAS
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Benchmarks do NerdHub")
+    parser.add_argument('--escala', choices=ESCALAS, default='pequena', help="Tamanho do catálogo gerado")
+    for campo in ('marcas', 'categorias', 'produtos', 'usuarios'):
+        parser.add_argument(f'--{campo}', type=int, help=f"Sobrescreve a quantidade de {campo} da escala")
+    parser.add_argument('--repeticoes', type=int, default=30, help="Requisições cronometradas por cenário")
+    parser.add_argument('--cenarios', nargs='+', choices=CENARIOS, default=list(CENARIOS), help="Cenários a executar")
+    parser.add_argument('--semente', type=int, default=42, help="Semente do gerador de dados")
+    parser.add_argument('--saida', help="Grava os resultados em JSON")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior; falha se houver regressão")
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="Piora relativa aceita em p95 e memória")
+    return parser.parse_args()
+
+
+def main():
+    django.setup()
+    argumentos = ler_argumentos()
+
+    from benchmarks import cenarios, gerador
+
+    escala = dict(gerador.ESCALAS[argumentos.escala])
+    for campo in escala:
+        if getattr(argumentos, campo) is not None:
+            escala[campo] = getattr(argumentos, campo)
+
+    with gerador.banco_descartavel():
+        inicio = time.monotonic()
+        totais = gerador.gerar_dados(semente=argumentos.semente, saida=lambda mensagem: print(f"  gerando {mensagem}"), **escala)
+        print(f"Dados gerados em {time.monotonic() - inicio:.1f}s: "
+              + ', '.join(f"{quantidade} {modelo}" for modelo, quantidade in totais.items()))
+
+        contexto = cenarios.Contexto()
+        resultados = [
+            cenarios.executar_cenario(nome, contexto, repeticoes=argumentos.repeticoes)
+            for nome in argumentos.cenarios
+        ]
+
+    print(f"\n{'cenário':<18}{'p50 ms':>9}{'p95 ms':>9}{'máx ms':>9}{'consultas':>11}{'orçamento':>11}{'memória KB':>12}")
+    for resultado in resultados:
+        print(f"{resultado['cenario']:<18}{resultado['p50_ms']:>9}{resultado['p95_ms']:>9}{resultado['max_ms']:>9}"
+              f"{resultado['consultas']:>11}{str(resultado['orcamento'] or '-'):>11}{resultado['pico_memoria_kb']:>12}")
+
+    if argumentos.saida:
+        with open(argumentos.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump({'escala': escala, 'resultados': resultados}, arquivo, ensure_ascii=False, indent=2)
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        if base['escala'] != escala:
+            print(f"Aviso: a base foi gerada com outra escala ({base['escala']})")
+        regressoes = cenarios.comparar(resultados, base['resultados'], argumentos.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO {regressao}")
+        if regressoes:
+            sys.exit(1)
+        print("\nSem regressões em relação à base")
+
+
+if __name__ == '__main__':
+    main()
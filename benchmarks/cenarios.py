@@ -0,0 +1,185 @@
+"""
+Cenários cronometrados dos benchmarks
+
+Cada cenário faz a mesma requisição várias vezes com o Client de testes
+(passando por todos os middlewares e templates) e mede:
+
+- latência p50/p95/máxima;
+- consultas SQL por requisição (ColetorConsultas, o mesmo contador do
+  middleware de orçamento) e o orçamento declarado na view;
+- pico de memória alocada em uma execução extra sob tracemalloc (fora da
+  cronometragem, que ficaria distorcida).
+"""
+
+import math
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import resolve, reverse
+
+from nucleo.consultas import ColetorConsultas
+from nucleo.models import Marca, Produto
+
+from . import gerador
+
+# Dados enviados no cenário de finalização do pedido
+DADOS_ENTREGA = {
+    'endereco_destinatario': 'Cliente Benchmark',
+    'endereco_rua': 'Rua dos Testes',
+    'endereco_numero': '100',
+    'endereco_bairro': 'Centro',
+    'endereco_cidade': 'São Paulo',
+    'endereco_estado': 'SP',
+    'endereco_cep': '01000-000',
+    'endereco_telefone': '(11) 99999-0000',
+    'forma_pagamento': 'pix',
+}
+
+# Diferenças menores que isso são ruído, não regressão
+RUIDO_MS = 5.0
+
+
+class Contexto:
+    """Cliente autenticado e objetos usados pelos cenários"""
+
+    def __init__(self):
+        self.usuario, self.produtos_carrinho = gerador.criar_cliente_benchmark()
+        self.client = Client()
+        self.client.force_login(self.usuario)
+        self.produtos_detalhe = list(
+            Produto.objects.order_by('-estatistica_avaliacao__total_avaliacoes', 'id').values_list('slug', flat=True)[:20]
+        )
+        self.marca = Marca.objects.annotate(total=Count('produto')).order_by('-total', 'id').first()
+
+    def encher_carrinho(self, repeticao):
+        gerador.preencher_carrinho(self.usuario, self.produtos_carrinho)
+
+
+# nome -> (método, função que monta a URL, função de preparo ou None)
+CENARIOS = {
+    'catalogo': ('GET', lambda contexto, repeticao: reverse('nucleo:index'), None),
+    'marca': ('GET', lambda contexto, repeticao: reverse('nucleo:produtos_por_marca', args=[contexto.marca.slug]), None),
+    'facetas': (
+        'GET',
+        lambda contexto, repeticao: f"{reverse('nucleo:produtos_facetados')}?marca={contexto.marca.slug}&em_estoque=1",
+        None,
+    ),
+    'detalhe_produto': (
+        'GET',
+        lambda contexto, repeticao: reverse(
+            'nucleo:detalhe_produto', args=[contexto.produtos_detalhe[repeticao % len(contexto.produtos_detalhe)]]
+        ),
+        None,
+    ),
+    'carrinho': ('GET', lambda contexto, repeticao: reverse('nucleo:ver_carrinho'), None),
+    'checkout': ('GET', lambda contexto, repeticao: reverse('nucleo:checkout'), None),
+    'finalizar_pedido': ('POST', lambda contexto, repeticao: reverse('nucleo:finalizar_pedido'), Contexto.encher_carrinho),
+    'perfil': ('GET', lambda contexto, repeticao: reverse('usuario:perfil'), None),
+    'perfil_pedidos': ('GET', lambda contexto, repeticao: reverse('usuario:perfil_pedidos'), None),
+}
+
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo"""
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+def _requisitar(contexto, metodo, url):
+    coletor = ColetorConsultas()
+    with ExitStack() as pilha:
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(coletor))
+        inicio = time.perf_counter()
+        if metodo == 'POST':
+            response = contexto.client.post(url, DADOS_ENTREGA)
+        else:
+            response = contexto.client.get(url)
+        duracao = time.perf_counter() - inicio
+    if response.status_code >= 400:
+        raise RuntimeError(f"{metodo} {url} respondeu {response.status_code}")
+    return duracao, coletor.quantidade
+
+
+def executar_cenario(nome, contexto, repeticoes=30, aquecimento=2):
+    """
+    Executa um cenário e resume as medições
+
+    Args:
+        nome: Chave de CENARIOS
+        contexto: Contexto com o cliente autenticado
+        repeticoes: Requisições cronometradas
+        aquecimento: Requisições descartadas antes (caches, templates)
+
+    Returns:
+        Dict com p50_ms, p95_ms, max_ms, consultas, orcamento e pico_memoria_kb
+    """
+    metodo, montar_url, preparar = CENARIOS[nome]
+    duracoes = []
+    consultas = 0
+    for repeticao in range(aquecimento + repeticoes + 1):
+        url = montar_url(contexto, repeticao)
+        if preparar:
+            preparar(contexto, repeticao)
+        if repeticao < aquecimento + repeticoes:
+            duracao, quantidade = _requisitar(contexto, metodo, url)
+            if repeticao >= aquecimento:
+                duracoes.append(duracao * 1000)
+                consultas = max(consultas, quantidade)
+        else:
+            tracemalloc.start()
+            try:
+                _requisitar(contexto, metodo, url)
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+    return {
+        'cenario': nome,
+        'url': url,
+        'repeticoes': repeticoes,
+        'p50_ms': round(percentil(duracoes, 50), 2),
+        'p95_ms': round(percentil(duracoes, 95), 2),
+        'max_ms': round(max(duracoes), 2),
+        'consultas': consultas,
+        'orcamento': getattr(resolve(url.split('?')[0]).func, 'orcamento_consultas', None),
+        'pico_memoria_kb': round(pico / 1024, 1),
+    }
+
+
+def comparar(resultados, base, tolerancia=0.25):
+    """
+    Aponta regressões em relação a uma execução anterior
+
+    Latência (p95) e memória podem crescer até 'tolerancia' (fração);
+    consultas não podem crescer.
+
+    Args:
+        resultados: Lista retornada por executar_cenario
+        base: Lista de uma execução anterior (mesma escala)
+        tolerancia: Crescimento relativo aceito
+
+    Returns:
+        Lista de mensagens, vazia se não houver regressão
+    """
+    anteriores = {resultado['cenario']: resultado for resultado in base}
+    regressoes = []
+    for resultado in resultados:
+        anterior = anteriores.get(resultado['cenario'])
+        if anterior is None:
+            continue
+        nome = resultado['cenario']
+        if resultado['consultas'] > anterior['consultas']:
+            regressoes.append(f"{nome}: consultas {anterior['consultas']} -> {resultado['consultas']}")
+        limite_p95 = max(anterior['p95_ms'] * (1 + tolerancia), anterior['p95_ms'] + RUIDO_MS)
+        if resultado['p95_ms'] > limite_p95:
+            regressoes.append(f"{nome}: p95 {anterior['p95_ms']}ms -> {resultado['p95_ms']}ms")
+        if resultado['pico_memoria_kb'] > anterior['pico_memoria_kb'] * (1 + tolerancia):
+            regressoes.append(
+                f"{nome}: memória {anterior['pico_memoria_kb']}KB -> {resultado['pico_memoria_kb']}KB"
+            )
+    return regressoes
@@ -0,0 +1,101 @@
+"""
+Vazão da exportação de dados pessoais (LGPD) para clientes com histórico longo
+
+Gera o catálogo sintético em um banco descartável, cria um cliente para
+cada tamanho de histórico pedido (pedidos com itens e avaliações) e mede a
+geração do zip (usuarios/exportacao_dados.py): tempo, registros por
+segundo, tamanho do arquivo e pico de memória alocada. Com a leitura em
+lotes, o pico para de crescer quando o histórico passa de um lote
+(exportacao_dados.TAMANHO_LOTE linhas): ~2,9 MB tanto com 2.000 quanto
+com 8.000 pedidos na escala pequena.
+
+Uso:
+    python -m benchmarks.exportacao_dados
+    python -m benchmarks.exportacao_dados --pedidos 100 1000 10000 --escala media
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+
+# Avaliações escritas pelo cliente para cada 10 pedidos
+REVIEWS_POR_10_PEDIDOS = 3
+
+
+def criar_cliente(nome, pedidos):
+    """Cliente com 'pedidos' pedidos e avaliações proporcionais ao histórico"""
+    from nucleo.models import Produto, Review
+    from benchmarks import fabricas, gerador
+
+    [usuario] = gerador.criar_usuarios([nome])
+    produtos = gerador.Sorteio(list(Produto.objects.all()))
+    gerador.criar_pedidos([usuario] * pedidos, produtos)
+    gerador._gravar(Review, [
+        fabricas.ReviewFactory.build(produto=produtos.um(), usuario=usuario)
+        for _ in range(pedidos * REVIEWS_POR_10_PEDIDOS // 10)
+    ])
+    return usuario
+
+
+def medir_exportacao(usuario):
+    """
+    Gera o zip de um usuário em um arquivo temporário e mede a geração
+
+    Returns:
+        Dict com registros, kb, segundos, registros_por_segundo e pico_memoria_kb
+    """
+    from usuarios import exportacao_dados
+    from usuarios.models import Perfil
+
+    perfil = Perfil.objects.select_related('user').get(user=usuario)
+    with tempfile.TemporaryFile() as destino:
+        tracemalloc.start()
+        try:
+            inicio = time.perf_counter()
+            registros = exportacao_dados.gerar_arquivo(perfil, destino)
+            segundos = time.perf_counter() - inicio
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        tamanho = destino.tell()
+    return {
+        'registros': registros,
+        'kb': round(tamanho / 1024, 1),
+        'segundos': round(segundos, 3),
+        'registros_por_segundo': round(registros / max(segundos, 1e-6)),
+        'pico_memoria_kb': round(pico / 1024, 1),
+    }
+
+
+def main():
+    django.setup()
+    from benchmarks import gerador
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.exportacao_dados', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--escala', choices=gerador.ESCALAS, default='pequena', help="Tamanho do catálogo gerado")
+    parser.add_argument('--pedidos', type=int, nargs='+', default=[100, 1000, 5000], help="Tamanhos de histórico medidos")
+    argumentos = parser.parse_args()
+
+    with gerador.banco_descartavel():
+        gerador.gerar_dados(saida=lambda mensagem: print(f"  gerando {mensagem}"), **gerador.ESCALAS[argumentos.escala])
+        resultados = []
+        for pedidos in argumentos.pedidos:
+            usuario = criar_cliente(f'lgpd{pedidos}', pedidos)
+            resultados.append((pedidos, medir_exportacao(usuario)))
+
+    print(f"\n{'pedidos':>9}{'registros':>11}{'segundos':>10}{'registros/s':>13}{'zip KB':>10}{'memória KB':>12}")
+    for pedidos, resultado in resultados:
+        print(f"{pedidos:>9}{resultado['registros']:>11}{resultado['segundos']:>10}"
+              f"{resultado['registros_por_segundo']:>13}{resultado['kb']:>10}{resultado['pico_memoria_kb']:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Fábricas (factory-boy) dos modelos do NerdHub
+
+Usadas pelo gerador de dados dos benchmarks. Para volumes grandes o
+gerador chama .build() e grava com bulk_create; .create() continua
+disponível para montar cenários pequenos (ex: o cliente do benchmark).
+"""
+
+import random
+from decimal import Decimal
+
+import factory
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils.text import slugify
+
+from nucleo.models import (
+    Marca, Categoria, Produto, Estoque, Review, Carrinho, ItemCarrinho, Pedido, ItemPedido,
+)
+from usuarios.models import Perfil, Endereco
+
+
+# Imagem usada por todos os produtos gerados (não passa pelo armazenamento
+# por conteúdo: bulk_create não dispara sinais nem grava arquivos)
+IMAGEM_PRODUTO = 'produtos/test_image.jpg'
+
+# Senha de todos os usuários gerados; o hash é calculado uma única vez
+SENHA_PADRAO = 'benchmark123'
+_HASH_SENHA = None
+
+# Distribuição das notas: avaliações de e-commerce concentram-se em 4 e 5
+PESOS_NOTAS = {1: 5, 2: 7, 3: 13, 4: 30, 5: 45}
+
+TIPOS_PRODUTO = ['Funko Pop', 'Action Figure', 'Camiseta', 'Caneca', 'Chaveiro', 'Pelúcia', 'Quadro', 'Boné']
+
+
+def faker(campo, **kwargs):
+    """factory.Faker com dados brasileiros (nomes, CEPs, UFs)"""
+    return factory.Faker(campo, locale='pt_BR', **kwargs)
+
+
+def hash_senha():
+    """Hash de SENHA_PADRAO (make_password é lento de propósito)"""
+    global _HASH_SENHA
+    if _HASH_SENHA is None:
+        _HASH_SENHA = make_password(SENHA_PADRAO)
+    return _HASH_SENHA
+
+
+def preco_realista():
+    """Preço com distribuição log-normal (mediana ~R$ 90, cauda longa)"""
+    preco = min(max(random.lognormvariate(4.5, 0.7), 9.9), 2999.9)
+    return Decimal(f'{preco:.2f}')
+
+
+class UsuarioFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = User
+        django_get_or_create = ('username',)
+
+    username = factory.Sequence(lambda n: f'cliente{n}')
+    email = factory.LazyAttribute(lambda usuario: f'{usuario.username}@exemplo.com.br')
+    first_name = faker('first_name')
+    last_name = faker('last_name')
+    password = factory.LazyFunction(hash_senha)
+
+
+class PerfilFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Perfil
+        # O sinal post_save de User já cria o perfil
+        django_get_or_create = ('user',)
+
+    user = factory.SubFactory(UsuarioFactory)
+    display_name = factory.LazyAttribute(lambda perfil: perfil.user.first_name)
+    first_name = factory.LazyAttribute(lambda perfil: perfil.user.first_name)
+    last_name = factory.LazyAttribute(lambda perfil: perfil.user.last_name)
+    phone = faker('cellphone_number')
+
+
+class EnderecoFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Endereco
+
+    perfil = factory.SubFactory(PerfilFactory)
+    label = factory.Iterator(['Casa', 'Trabalho', 'Casa dos pais'])
+    recipient_name = faker('name')
+    street = faker('street_name')
+    number = faker('building_number')
+    neighborhood = faker('bairro')
+    city = faker('city')
+    state = faker('estado_sigla')
+    postal_code = faker('postcode')
+
+
+class MarcaFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Marca
+
+    nome = factory.Sequence(lambda n: f'Marca {n}')
+    # bulk_create não passa pelo sinal que gera o slug
+    slug = factory.LazyAttribute(lambda marca: slugify(marca.nome))
+
+
+class CategoriaFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Categoria
+
+    nome = factory.Sequence(lambda n: f'{TIPOS_PRODUTO[n % len(TIPOS_PRODUTO)]} {n}')
+    slug = factory.LazyAttribute(lambda categoria: slugify(categoria.nome))
+
+
+class ProdutoFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Produto
+
+    nome = factory.LazyAttributeSequence(
+        lambda produto, n: f'{TIPOS_PRODUTO[n % len(TIPOS_PRODUTO)]} {produto.marca.nome if produto.marca else ""} #{n}'
+    )
+    slug = factory.LazyAttribute(lambda produto: slugify(produto.nome))
+    descricao = faker('paragraph', nb_sentences=4)
+    preco = factory.LazyFunction(preco_realista)
+    imagem_principal = IMAGEM_PRODUTO
+    marca = factory.SubFactory(MarcaFactory)
+    categoria = factory.SubFactory(CategoriaFactory)
+
+
+class EstoqueFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Estoque
+
+    produto = factory.SubFactory(ProdutoFactory)
+    # ~10% dos produtos esgotados
+    quantidade = factory.LazyFunction(lambda: 0 if random.random() < 0.1 else random.randint(1, 200))
+
+
+class ReviewFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Review
+
+    produto = factory.SubFactory(ProdutoFactory)
+    usuario = factory.SubFactory(UsuarioFactory)
+    comentario = faker('sentence', nb_words=14)
+    nota = factory.LazyFunction(lambda: random.choices(list(PESOS_NOTAS), weights=list(PESOS_NOTAS.values()))[0])
+
+
+class CarrinhoFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Carrinho
+        django_get_or_create = ('usuario',)
+
+    usuario = factory.SubFactory(UsuarioFactory)
+
+
+class ItemCarrinhoFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = ItemCarrinho
+
+    carrinho = factory.SubFactory(CarrinhoFactory)
+    produto = factory.SubFactory(ProdutoFactory)
+    quantidade = factory.LazyFunction(lambda: random.choices([1, 2, 3], weights=[80, 15, 5])[0])
+
+
+class PedidoFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Pedido
+
+    usuario = factory.SubFactory(UsuarioFactory)
+    finalizado = True
+    endereco_destinatario = faker('name')
+    endereco_rua = faker('street_name')
+    endereco_numero = faker('building_number')
+    endereco_bairro = faker('bairro')
+    endereco_cidade = faker('city')
+    endereco_estado = faker('estado_sigla')
+    endereco_cep = faker('postcode')
+    forma_pagamento = factory.Iterator(['pix', 'credito', 'credito', 'boleto', 'debito'])
+
+
+class ItemPedidoFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = ItemPedido
+
+    pedido = factory.SubFactory(PedidoFactory)
+    produto = factory.SubFactory(ProdutoFactory)
+    quantidade = factory.LazyFunction(lambda: random.choices([1, 2, 3], weights=[80, 15, 5])[0])
+    preco_unitario = factory.LazyAttribute(lambda item: item.produto.preco)
@@ -0,0 +1,261 @@
+"""
+Gerador de catálogo sintético para os benchmarks
+
+Cria N marcas, categorias, produtos, usuários, avaliações, carrinhos e
+pedidos com distribuições parecidas com as de produção:
+
+- popularidade de produtos e marcas segue uma lei de Zipf (poucos itens
+  concentram a maior parte das avaliações, carrinhos e vendas);
+- preços log-normais, notas concentradas em 4 e 5, ~10% de produtos
+  esgotados;
+- a atividade dos usuários também é Zipf: a maioria tem poucos pedidos e
+  alguns clientes compram muito;
+- datas espalhadas nos últimos dois anos.
+
+Os objetos são montados com as fábricas (FACTORY.build) e gravados com
+bulk_create em lotes; sinais não são disparados, então os agregados de
+avaliação, as estatísticas de clientes e o índice de busca são
+reconstruídos depois.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+import factory.random
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from nucleo import busca, clientes
+from nucleo.avaliacoes import recalcular_estatisticas
+from nucleo.models import Marca, Categoria, Produto, Estoque, Review, Carrinho, ItemCarrinho, Pedido, ItemPedido
+from usuarios.models import Perfil, Endereco, Notificacao
+
+from . import fabricas
+
+# Escalas prontas (--escala); cada valor pode ser sobrescrito na linha de comando
+ESCALAS = {
+    'pequena': {'marcas': 10, 'categorias': 8, 'produtos': 500, 'usuarios': 200},
+    'media': {'marcas': 40, 'categorias': 20, 'produtos': 5000, 'usuarios': 2000},
+    'grande': {'marcas': 120, 'categorias': 40, 'produtos': 50000, 'usuarios': 20000},
+}
+
+# Médias por entidade
+REVIEWS_POR_PRODUTO = 4
+PEDIDOS_POR_USUARIO = 3
+FRACAO_COM_CARRINHO = 0.3
+
+# Expoente da lei de Zipf (1.0 = clássica; maior = mais concentrado)
+EXPOENTE_ZIPF = 1.1
+
+# Objetos por INSERT
+TAMANHO_LOTE = 1000
+
+USUARIO_BENCHMARK = 'benchmark'
+
+
+class Sorteio:
+    """Sorteia elementos com pesos de Zipf (ranking embaralhado)"""
+
+    def __init__(self, elementos, expoente=EXPOENTE_ZIPF):
+        self.elementos = list(elementos)
+        random.shuffle(self.elementos)
+        acumulado = 0.0
+        self.pesos_acumulados = []
+        for posicao in range(len(self.elementos)):
+            acumulado += 1 / (posicao + 1) ** expoente
+            self.pesos_acumulados.append(acumulado)
+
+    def um(self):
+        return random.choices(self.elementos, cum_weights=self.pesos_acumulados)[0]
+
+    def varios(self, quantidade):
+        """Até 'quantidade' elementos distintos"""
+        quantidade = min(quantidade, len(self.elementos))
+        escolhidos = {}
+        while len(escolhidos) < quantidade:
+            elemento = self.um()
+            escolhidos[elemento.pk] = elemento
+        return list(escolhidos.values())
+
+
+@contextmanager
+def banco_descartavel():
+    """Cria um banco de testes vazio e o apaga ao final (o banco real não é tocado)"""
+    setup_test_environment()
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        teardown_test_environment()
+
+
+def _gravar(modelo, objetos):
+    return modelo.objects.bulk_create(objetos, batch_size=TAMANHO_LOTE)
+
+
+def _data_passada(dias):
+    return timezone.now() - timedelta(seconds=random.randint(0, dias * 86400))
+
+
+def _retroagir(modelo, objetos, dias):
+    """Espalha criado_em (auto_now_add) nos últimos 'dias' dias"""
+    for objeto in objetos:
+        objeto.criado_em = _data_passada(dias)
+    modelo.objects.bulk_update(objetos, ['criado_em'], batch_size=TAMANHO_LOTE)
+
+
+def criar_usuarios(nomes):
+    """Usuários com perfil, preferências de notificação e 1 a 3 endereços"""
+    usuarios = _gravar(User, [fabricas.UsuarioFactory.build(username=nome) for nome in nomes])
+    perfis = _gravar(Perfil, [fabricas.PerfilFactory.build(user=usuario) for usuario in usuarios])
+    _gravar(Notificacao, [Notificacao(perfil=perfil) for perfil in perfis])
+    enderecos = []
+    for perfil in perfis:
+        for indice in range(random.choices([1, 2, 3], weights=[60, 30, 10])[0]):
+            enderecos.append(fabricas.EnderecoFactory.build(perfil=perfil, is_default_shipping=indice == 0))
+    _gravar(Endereco, enderecos)
+    return usuarios
+
+
+def _itens_pedido(sorteio_produtos, pedido):
+    quantidade = random.choices([1, 2, 3, 4], weights=[55, 25, 12, 8])[0]
+    return [
+        fabricas.ItemPedidoFactory.build(pedido=pedido, produto=produto)
+        for produto in sorteio_produtos.varios(quantidade)
+    ]
+
+
+def criar_pedidos(usuarios_por_pedido, sorteio_produtos):
+    """
+    Um pedido finalizado para cada usuário da lista (repetições = mais pedidos)
+
+    Returns:
+        Lista de pedidos criados
+    """
+    pedidos = []
+    itens_por_pedido = []
+    for usuario in usuarios_por_pedido:
+        pedido = fabricas.PedidoFactory.build(usuario=usuario)
+        itens = _itens_pedido(sorteio_produtos, pedido)
+        pedido.total = sum(item.preco_unitario * item.quantidade for item in itens)
+        pedidos.append(pedido)
+        itens_por_pedido.append(itens)
+    _gravar(Pedido, pedidos)
+    itens = []
+    for pedido, itens_do_pedido in zip(pedidos, itens_por_pedido):
+        for item in itens_do_pedido:
+            item.pedido = pedido
+            itens.append(item)
+    _gravar(ItemPedido, itens)
+    _retroagir(Pedido, pedidos, 365)
+    # Estatísticas dos compradores (o checkout não foi usado)
+    usuario_ids = sorted({pedido.usuario_id for pedido in pedidos})
+    for inicio in range(0, len(usuario_ids), TAMANHO_LOTE):
+        clientes.recalcular_clientes(usuario_ids[inicio:inicio + TAMANHO_LOTE])
+    return pedidos
+
+
+def preencher_carrinho(usuario, produtos):
+    """Carrinho do usuário com os produtos informados (substitui o anterior)"""
+    carrinho, _ = Carrinho.objects.get_or_create(usuario=usuario)
+    carrinho.itens.all().delete()
+    _gravar(ItemCarrinho, [fabricas.ItemCarrinhoFactory.build(carrinho=carrinho, produto=produto) for produto in produtos])
+    return carrinho
+
+
+def gerar_dados(marcas, categorias, produtos, usuarios, semente=42, saida=None):
+    """
+    Popula o banco com um catálogo sintético
+
+    Args:
+        marcas, categorias, produtos, usuarios: Quantidades a criar
+        semente: Semente dos sorteios (mesma semente = mesmos dados)
+        saida: Função chamada com mensagens de progresso (opcional)
+
+    Returns:
+        Dict com a quantidade de objetos criados por modelo
+    """
+    saida = saida or (lambda mensagem: None)
+    random.seed(semente)
+    factory.random.reseed_random(semente)
+    for fabrica in (fabricas.MarcaFactory, fabricas.CategoriaFactory, fabricas.ProdutoFactory):
+        fabrica.reset_sequence()
+
+    with transaction.atomic():
+        saida(f"{marcas} marcas e {categorias} categorias")
+        lista_marcas = _gravar(Marca, [fabricas.MarcaFactory.build() for _ in range(marcas)])
+        lista_categorias = _gravar(Categoria, [fabricas.CategoriaFactory.build() for _ in range(categorias)])
+        sorteio_marcas = Sorteio(lista_marcas)
+
+        saida(f"{produtos} produtos")
+        lista_produtos = _gravar(Produto, [
+            fabricas.ProdutoFactory.build(marca=sorteio_marcas.um(), categoria=random.choice(lista_categorias))
+            for _ in range(produtos)
+        ])
+        _retroagir(Produto, lista_produtos, 730)
+        _gravar(Estoque, [fabricas.EstoqueFactory.build(produto=produto) for produto in lista_produtos])
+        sorteio_produtos = Sorteio(lista_produtos)
+
+        saida(f"{usuarios} usuários")
+        lista_usuarios = criar_usuarios(f'cliente{indice}' for indice in range(usuarios))
+        sorteio_usuarios = Sorteio(lista_usuarios)
+
+        total_reviews = produtos * REVIEWS_POR_PRODUTO
+        saida(f"{total_reviews} avaliações")
+        reviews = _gravar(Review, [
+            fabricas.ReviewFactory.build(produto=sorteio_produtos.um(), usuario=sorteio_usuarios.um())
+            for _ in range(total_reviews)
+        ])
+        _retroagir(Review, reviews, 730)
+
+        saida("carrinhos")
+        com_carrinho = random.sample(lista_usuarios, int(len(lista_usuarios) * FRACAO_COM_CARRINHO))
+        carrinhos = _gravar(Carrinho, [Carrinho(usuario=usuario) for usuario in com_carrinho])
+        _gravar(ItemCarrinho, [
+            fabricas.ItemCarrinhoFactory.build(carrinho=carrinho, produto=produto)
+            for carrinho in carrinhos
+            for produto in sorteio_produtos.varios(random.randint(1, 5))
+        ])
+
+        total_pedidos = usuarios * PEDIDOS_POR_USUARIO
+        saida(f"{total_pedidos} pedidos")
+        criar_pedidos([sorteio_usuarios.um() for _ in range(total_pedidos)], sorteio_produtos)
+
+        saida("agregados de avaliação e índice de busca")
+        ids = [produto.pk for produto in lista_produtos]
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            recalcular_estatisticas(ids[inicio:inicio + TAMANHO_LOTE])
+        busca.reindexar_queryset(Produto.objects.all())
+
+    return {
+        modelo.__name__: modelo.objects.count()
+        for modelo in (Marca, Categoria, Produto, User, Review, Carrinho, ItemCarrinho, Pedido, ItemPedido)
+    }
+
+
+def criar_cliente_benchmark(pedidos=20, itens_carrinho=8):
+    """
+    Cliente usado pelos cenários: histórico longo e carrinho cheio
+
+    Compra e tem no carrinho os produtos mais avaliados (os que mais
+    aparecem em produção), com estoque de sobra para os checkouts.
+
+    Returns:
+        (usuario, produtos do carrinho)
+    """
+    User.objects.filter(username=USUARIO_BENCHMARK).delete()
+    [usuario] = criar_usuarios([USUARIO_BENCHMARK])
+
+    populares = list(
+        Produto.objects.order_by('-estatistica_avaliacao__total_avaliacoes', 'id')[:max(itens_carrinho, 20)]
+    )
+    Estoque.objects.filter(produto__in=populares).update(quantidade=10 ** 6)
+    criar_pedidos([usuario] * pedidos, Sorteio(populares))
+    produtos_carrinho = populares[:itens_carrinho]
+    preencher_carrinho(usuario, produtos_carrinho)
+    return usuario, produtos_carrinho
@@ -0,0 +1,115 @@
+"""
+Planos de execução das consultas mais frequentes, com e sem os índices
+
+Gera o catálogo sintético em um banco descartável, mostra o EXPLAIN e o
+tempo mediano de cada consulta com os índices compostos e repete tudo
+depois de remover esses índices, para comparar os planos.
+
+Uso:
+    python -m benchmarks.planos
+    python -m benchmarks.planos --escala grande --repeticoes 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+
+# (app_label.Modelo, nome do índice) comparados por este script
+INDICES = [
+    ('nucleo.Produto', 'produto_recentes_idx'),
+    ('nucleo.Produto', 'produto_marca_recentes_idx'),
+    ('nucleo.Produto', 'produto_atualizado_idx'),
+    ('nucleo.Produto', 'produto_marca_atualizado_idx'),
+    ('nucleo.Pedido', 'pedido_usuario_recentes_idx'),
+    ('nucleo.Marca', 'marca_nome_lower_idx'),
+    ('nucleo.Review', 'review_produto_recentes_idx'),
+    ('usuarios.Endereco', 'endereco_perfil_ordem_idx'),
+]
+
+
+def consultas_frequentes():
+    """nome -> QuerySet, reproduzindo as consultas das views"""
+    from django.db.models import Count, Value
+    from django.db.models.functions import Lower
+    from nucleo.models import Marca, Produto, Pedido, Review, Carrinho, ItemCarrinho
+    from usuarios.models import Endereco
+
+    marca = Marca.objects.annotate(total=Count('produto')).order_by('-total', 'id').first()
+    cliente = Pedido.objects.values('usuario').annotate(total=Count('id')).order_by('-total').first()['usuario']
+    produto = Produto.objects.annotate(total=Count('reviews')).order_by('-total', 'id').first()
+    carrinho = Carrinho.objects.filter(itens__isnull=False).first()
+    return {
+        'catalogo': Produto.objects.order_by('-criado_em', '-id')[:24],
+        'por_marca': Produto.objects.filter(marca=marca)[:24],
+        # Equivalentes ao MAX(atualizado_em) dos carimbos de nucleo/condicional.py
+        'carimbo_catalogo': Produto.objects.order_by('-atualizado_em').values('atualizado_em')[:1],
+        'carimbo_marca': Produto.objects.filter(marca=marca).order_by('-atualizado_em').values('atualizado_em')[:1],
+        'marca_por_nome': Marca.objects.alias(nome_minusculo=Lower('nome')).filter(
+            nome_minusculo=Lower(Value(marca.nome.upper()))
+        ),
+        'pedidos_cliente': Pedido.objects.filter(usuario_id=cliente),
+        'reviews_produto': Review.objects.filter(produto=produto).order_by('-criado_em', '-id')[:10],
+        'enderecos_perfil': Endereco.objects.filter(perfil__user_id=cliente),
+        'item_carrinho': ItemCarrinho.objects.filter(carrinho=carrinho, produto_id=carrinho.itens.first().produto_id),
+    }
+
+
+def medir(consultas, repeticoes):
+    """nome -> (plano, mediana em ms)"""
+    medidas = {}
+    for nome, queryset in consultas.items():
+        list(queryset.all())  # aquecimento (cache de páginas do banco)
+        duracoes = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            list(queryset.all())
+            duracoes.append((time.perf_counter() - inicio) * 1000)
+        medidas[nome] = (queryset.explain(), statistics.median(duracoes))
+    return medidas
+
+
+def remover_indices():
+    """Remove os índices de INDICES (o banco descartável é apagado depois)"""
+    from django.apps import apps
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for modelo, nome in INDICES:
+            Modelo = apps.get_model(modelo)
+            [indice] = [indice for indice in Modelo._meta.indexes if indice.name == nome]
+            editor.remove_index(Modelo, indice)
+
+
+def main():
+    django.setup()
+    from benchmarks import gerador
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.planos', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--escala', choices=gerador.ESCALAS, default='media', help="Tamanho do catálogo gerado")
+    parser.add_argument('--repeticoes', type=int, default=20, help="Execuções por consulta (mediana)")
+    argumentos = parser.parse_args()
+
+    with gerador.banco_descartavel():
+        gerador.gerar_dados(saida=lambda mensagem: print(f"  gerando {mensagem}"), **gerador.ESCALAS[argumentos.escala])
+        consultas = consultas_frequentes()
+        com_indices = medir(consultas, argumentos.repeticoes)
+        remover_indices()
+        sem_indices = medir(consultas, argumentos.repeticoes)
+
+    for nome in consultas:
+        plano_com, tempo_com = com_indices[nome]
+        plano_sem, tempo_sem = sem_indices[nome]
+        print(f"\n=== {nome}: {tempo_sem:.2f}ms sem índices -> {tempo_com:.2f}ms com índices")
+        print(f"--- sem índices\n{plano_sem}")
+        print(f"--- com índices\n{plano_com}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+#!/bin/sh
+# Inicia o NerdHub em um único container (Railway, ver railway.json)
+#
+# Os workers rodam ao lado do gunicorn, na mesma máquina, porque dividem
+# arquivos com o web no disco local (MEDIA_ROOT, EXPORTACOES_DADOS_ROOT e o
+# cache em arquivos, que é o padrão sem REDIS_URL).
+# Cada worker é reiniciado se cair. Em deploys com processos separados
+# (procfile), storage e cache precisam ser compartilhados (ver Nerdhub/settings.py).
+set -e
+
+python manage.py migrate
+python manage.py empacotar_css
+python manage.py collectstatic --noinput
+
+manter() {
+    while true; do
+        python manage.py "$@" || echo "$1 terminou com erro; reiniciando em 5s" >&2
+        sleep 5
+    done
+}
+
+manter processar_exportacoes &
+manter processar_exclusoes &
+manter processar_avatares &
+
+exec gunicorn Nerdhub.wsgi:application --bind "0.0.0.0:$PORT"
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Produto, ImagemProduto, Marca, Categoria
+from .models import Produto, ImagemProduto, Marca, Categoria, EstatisticaCliente
 
 class ImagemProdutoInline(admin.TabularInline):
     model = ImagemProduto
@@ -8,6 +8,18 @@ class ImagemProdutoInline(admin.TabularInline):
 class ProdutoAdmin(admin.ModelAdmin):
     inlines = [ImagemProdutoInline]
 
+class EstatisticaClienteAdmin(admin.ModelAdmin):
+    # Somente leitura: mantida pelo checkout e pelo comando recalcular_clientes
+    list_display = ['usuario', 'total_pedidos', 'total_gasto', 'ultimo_pedido_em', 'marca_favorita']
+    list_select_related = ['usuario', 'marca_favorita']
+    ordering = ['-total_gasto']
+    search_fields = ['usuario__username', 'usuario__email']
+    readonly_fields = list_display + ['unidades_por_marca']
+
+    def has_add_permission(self, request):
+        return False
+
 admin.site.register(Produto, ProdutoAdmin)
 admin.site.register(Marca)
 admin.site.register(Categoria)
+admin.site.register(EstatisticaCliente, EstatisticaClienteAdmin)
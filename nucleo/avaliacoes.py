@@ -0,0 +1,88 @@
+"""
+Agregados de avaliações - NerdHub E-commerce
+
+Mantém EstatisticaAvaliacao em dia a cada review criada, alterada ou
+removida, com um único UPDATE atômico (expressões F()) por operação.
+Assim a média e o histograma nunca são recalculados varrendo as reviews.
+"""
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+from .models import EstatisticaAvaliacao, Review
+
+
+def normalizar_nota(nota):
+    """Garante uma nota inteira entre 1 e 5"""
+    return min(max(int(nota), 1), 5)
+
+
+def ajustar_estatistica(produto_id, nota, delta):
+    """
+    Soma (delta=1) ou subtrai (delta=-1) uma nota dos agregados do produto
+
+    O UPDATE usa os valores atuais da linha (F()), então duas reviews
+    simultâneas nunca sobrescrevem a contagem uma da outra.
+
+    Args:
+        produto_id: ID do produto avaliado
+        nota: Nota da review (1 a 5)
+        delta: 1 para review nova, -1 para review removida
+    """
+    nota = normalizar_nota(nota)
+    campo_histograma = f'notas_{nota}'
+    nova_media = Case(
+        When(total_avaliacoes=-delta, then=Value(0.0)),
+        default=Cast(F('soma_notas') + delta * nota, FloatField()) / (F('total_avaliacoes') + delta),
+        output_field=FloatField(),
+    )
+    with transaction.atomic():
+        atualizados = EstatisticaAvaliacao.objects.filter(produto_id=produto_id).update(
+            total_avaliacoes=F('total_avaliacoes') + delta,
+            soma_notas=F('soma_notas') + delta * nota,
+            media=nova_media,
+            **{campo_histograma: F(campo_histograma) + delta},
+        )
+        if not atualizados and delta > 0:
+            # Produto sem estatística (ex: criado com bulk_create): montar do zero
+            recalcular_estatisticas([produto_id])
+
+
+def recalcular_estatisticas(produto_ids):
+    """
+    Reconstrói os agregados dos produtos a partir das reviews existentes
+
+    Usa uma consulta agrupada por (produto, nota) e um upsert em massa.
+
+    Args:
+        produto_ids: Lista de IDs de produtos
+    """
+    estatisticas = {
+        produto_id: EstatisticaAvaliacao(produto_id=produto_id)
+        for produto_id in produto_ids
+    }
+    contagens = (
+        Review.objects.filter(produto_id__in=produto_ids)
+        .values('produto_id', 'nota')
+        .annotate(total=Count('id'))
+    )
+    for linha in contagens:
+        nota = normalizar_nota(linha['nota'])
+        estatistica = estatisticas[linha['produto_id']]
+        campo_histograma = f'notas_{nota}'
+        setattr(estatistica, campo_histograma, getattr(estatistica, campo_histograma) + linha['total'])
+        estatistica.total_avaliacoes += linha['total']
+        estatistica.soma_notas += nota * linha['total']
+
+    for estatistica in estatisticas.values():
+        if estatistica.total_avaliacoes:
+            estatistica.media = estatistica.soma_notas / estatistica.total_avaliacoes
+
+    EstatisticaAvaliacao.objects.bulk_create(
+        estatisticas.values(),
+        update_conflicts=True,
+        unique_fields=['produto'],
+        update_fields=['total_avaliacoes', 'soma_notas', 'media',
+                       'notas_1', 'notas_2', 'notas_3', 'notas_4', 'notas_5'],
+    )
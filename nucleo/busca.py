@@ -0,0 +1,338 @@
+"""
+Motor de busca de produtos - NerdHub E-commerce
+
+Mantém um índice invertido (tabela TermoIndice) com os termos de
+Produto.nome, Produto.descricao, Marca.nome e Categoria.nome.
+
+- Normalização: minúsculas, remoção de acentos e stopwords
+- Radicalização: versão enxuta do stemmer RSLP para português
+- Ranking: BM25 calculado no banco (uma única consulta agrupada)
+- Autocompletar: busca por prefixo do último termo digitado
+
+Nenhuma consulta usa LIKE '%...%': a busca é uma igualdade indexada em
+'termo' e o autocompletar é um prefixo (LIKE 'abc%'), que também usa índice.
+"""
+
+import math
+import re
+import unicodedata
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Case, Count, ExpressionWrapper, F, FloatField, Q, Sum, Value, When
+
+from .models import DocumentoBusca, Produto, TermoIndice
+
+
+# Parâmetros do BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Peso de cada campo na frequência do termo (nome conta mais que descrição)
+PESOS_CAMPOS = {
+    'nome': 3,
+    'marca': 2,
+    'categoria': 2,
+    'descricao': 1,
+}
+
+# Tamanho máximo de um termo (igual ao max_length de TermoIndice.termo)
+TAMANHO_MAXIMO_TERMO = 60
+
+CHAVE_ESTATISTICAS = 'busca:estatisticas'
+TEMPO_CACHE_ESTATISTICAS = 300  # segundos
+
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e em entre na nas no nos o os ou para
+pela pelas pelo pelos por que se sem sob sobre um uma umas uns the of and
+""".split())
+
+
+# ============================================
+# NORMALIZAÇÃO E RADICALIZAÇÃO
+# ============================================
+
+def remover_acentos(texto):
+    """Converte para minúsculas e remove acentos ('Ação' -> 'acao')"""
+    decomposto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+# Regras do stemmer: (sufixo, tamanho mínimo do radical, substituição).
+# Aplicadas sobre texto sem acentos, na ordem das etapas do RSLP.
+_REGRAS_PLURAL = [
+    ('ns', 1, 'm'), ('oes', 3, 'ao'), ('aes', 1, 'ao'), ('ais', 1, 'al'),
+    ('eis', 2, 'el'), ('ois', 2, 'ol'), ('is', 2, 'il'), ('les', 3, 'l'),
+    ('res', 3, 'r'), ('s', 2, ''),
+]
+_REGRAS_FEMININO = [
+    ('ona', 3, 'ao'), ('ora', 3, 'or'), ('inha', 3, 'inho'), ('esa', 3, 'es'),
+    ('osa', 3, 'oso'), ('ada', 2, 'ado'), ('ida', 3, 'ido'), ('ica', 3, 'ico'),
+]
+_REGRAS_AUMENTATIVO = [
+    ('issimo', 3, ''), ('issima', 3, ''), ('zinho', 2, ''), ('zinha', 2, ''),
+    ('inho', 3, ''), ('inha', 3, ''), ('zao', 2, ''), ('ao', 3, ''),
+]
+_REGRAS_SUBSTANTIVO = [
+    ('amento', 3, ''), ('imento', 3, ''), ('idade', 4, ''), ('mente', 4, ''),
+    ('acao', 3, ''), ('icao', 3, ''), ('encia', 3, ''), ('ancia', 3, ''),
+    ('avel', 2, ''), ('ivel', 3, ''), ('ismo', 3, ''), ('ista', 4, ''),
+    ('ador', 3, ''), ('edor', 3, ''), ('ante', 2, ''), ('oso', 3, ''),
+    ('al', 4, ''),
+]
+_REGRAS_VERBO = [
+    ('aram', 2, ''), ('eram', 3, ''), ('iram', 3, ''), ('ando', 2, ''),
+    ('endo', 3, ''), ('indo', 3, ''), ('ava', 2, ''), ('ado', 2, ''),
+    ('ido', 3, ''), ('ar', 2, ''), ('er', 2, ''), ('ir', 3, ''),
+]
+
+
+def _aplicar_regras(palavra, regras):
+    """Aplica a primeira regra cujo sufixo casa e respeita o radical mínimo"""
+    for sufixo, minimo, substituicao in regras:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= minimo:
+            return palavra[:-len(sufixo)] + substituicao, True
+    return palavra, False
+
+
+def radicalizar(palavra):
+    """
+    Reduz uma palavra (já sem acentos) ao seu radical
+
+    Ex: 'camisetas' -> 'camiset', 'colecionaveis' -> 'colecion'
+    """
+    if len(palavra) < 4 or palavra.isdigit():
+        return palavra
+    palavra, _ = _aplicar_regras(palavra, _REGRAS_PLURAL)
+    palavra, _ = _aplicar_regras(palavra, _REGRAS_FEMININO)
+    palavra, _ = _aplicar_regras(palavra, _REGRAS_AUMENTATIVO)
+    palavra, alterou = _aplicar_regras(palavra, _REGRAS_SUBSTANTIVO)
+    if not alterou:
+        palavra, _ = _aplicar_regras(palavra, _REGRAS_VERBO)
+    # Remoção da vogal temática final
+    if len(palavra) > 3 and palavra[-1] in 'aeo':
+        palavra = palavra[:-1]
+    return palavra
+
+
+def normalizar_palavras(texto):
+    """
+    Quebra um texto em palavras sem acentos, ignorando stopwords
+
+    Returns:
+        Lista de palavras (com repetições, na ordem do texto)
+    """
+    if not texto:
+        return []
+    return [
+        palavra[:TAMANHO_MAXIMO_TERMO]
+        for palavra in re.findall(r'[a-z0-9]+', remover_acentos(texto))
+        if palavra not in STOPWORDS and (len(palavra) >= 2 or palavra.isdigit())
+    ]
+
+
+def extrair_termos(texto):
+    """
+    Quebra um texto em termos normalizados e radicalizados
+
+    Returns:
+        Lista de termos (com repetições, na ordem do texto)
+    """
+    return [radicalizar(palavra) for palavra in normalizar_palavras(texto)]
+
+
+# ============================================
+# INDEXAÇÃO
+# ============================================
+
+def _frequencias_produto(produto):
+    """Calcula a frequência ponderada de cada termo de um produto"""
+    campos = {
+        'nome': produto.nome,
+        'descricao': produto.descricao,
+        'marca': produto.marca.nome if produto.marca_id else '',
+        'categoria': produto.categoria.nome if produto.categoria_id else '',
+    }
+    frequencias = {}
+    for campo, texto in campos.items():
+        for termo in extrair_termos(texto):
+            frequencias[termo] = frequencias.get(termo, 0) + PESOS_CAMPOS[campo]
+    return frequencias
+
+
+def indexar_produtos(produtos):
+    """
+    (Re)indexa um lote de produtos
+
+    Substitui os termos antigos dos produtos em três consultas por lote:
+    um DELETE, um INSERT em massa dos termos e um upsert dos documentos.
+
+    Args:
+        produtos: Iterável de Produto (de preferência com select_related
+                  de 'marca' e 'categoria')
+    """
+    termos = []
+    documentos = []
+    ids = []
+    for produto in produtos:
+        frequencias = _frequencias_produto(produto)
+        comprimento = sum(frequencias.values())
+        ids.append(produto.id)
+        documentos.append(DocumentoBusca(produto_id=produto.id, comprimento=comprimento))
+        termos.extend(
+            TermoIndice(termo=termo, produto_id=produto.id, frequencia=frequencia,
+                        comprimento_documento=comprimento)
+            for termo, frequencia in frequencias.items()
+        )
+
+    if not ids:
+        return
+
+    with transaction.atomic():
+        TermoIndice.objects.filter(produto_id__in=ids).delete()
+        TermoIndice.objects.bulk_create(termos, batch_size=1000)
+        DocumentoBusca.objects.bulk_create(
+            documentos,
+            update_conflicts=True,
+            unique_fields=['produto'],
+            update_fields=['comprimento'],
+        )
+    cache.delete(CHAVE_ESTATISTICAS)
+
+
+def indexar_produto(produto):
+    """Atalho para (re)indexar um único produto"""
+    indexar_produtos([produto])
+
+
+def reindexar_queryset(queryset, tamanho_lote=500):
+    """
+    Reindexa todos os produtos de um queryset em lotes
+
+    Usa iterator() para não carregar o catálogo inteiro na memória.
+
+    Returns:
+        Quantidade de produtos indexados
+    """
+    queryset = queryset.select_related('marca', 'categoria').order_by('id')
+    lote = []
+    total = 0
+    for produto in queryset.iterator(chunk_size=tamanho_lote):
+        lote.append(produto)
+        if len(lote) >= tamanho_lote:
+            indexar_produtos(lote)
+            total += len(lote)
+            lote = []
+    indexar_produtos(lote)
+    return total + len(lote)
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def _estatisticas():
+    """Retorna (total de documentos, comprimento médio), com cache curto"""
+    estatisticas = cache.get(CHAVE_ESTATISTICAS)
+    if estatisticas is None:
+        dados = DocumentoBusca.objects.aggregate(total=Count('id'), media=Avg('comprimento'))
+        estatisticas = (dados['total'], dados['media'] or 1.0)
+        cache.set(CHAVE_ESTATISTICAS, estatisticas, TEMPO_CACHE_ESTATISTICAS)
+    return estatisticas
+
+
+def _idf(total_documentos, frequencia_documentos):
+    """IDF do BM25 (variante sempre positiva)"""
+    return math.log(1 + (total_documentos - frequencia_documentos + 0.5) / (frequencia_documentos + 0.5))
+
+
+def _pontuacao_bm25(idfs, comprimento_medio):
+    """Expressão SQL com a contribuição BM25 de cada linha de TermoIndice"""
+    idf = Case(
+        *[When(termo=termo, then=Value(valor)) for termo, valor in idfs.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return ExpressionWrapper(
+        idf * F('frequencia') * Value(BM25_K1 + 1)
+        / (F('frequencia') + Value(BM25_K1) * (
+            Value(1 - BM25_B) + Value(BM25_B) * F('comprimento_documento') / Value(float(comprimento_medio))
+        )),
+        output_field=FloatField(),
+    )
+
+
+def _produtos_ordenados(linhas):
+    """Carrega os produtos das linhas (produto_id, pontuacao) mantendo a ordem"""
+    ids = [linha['produto_id'] for linha in linhas]
+    produtos = Produto.objects.in_bulk(ids)
+    return [produtos[i] for i in ids if i in produtos]
+
+
+def buscar(consulta, limite=48):
+    """
+    Busca produtos pela consulta, ordenados por relevância (BM25)
+
+    Args:
+        consulta: Texto digitado pelo usuário
+        limite: Quantidade máxima de resultados
+
+    Returns:
+        Lista de Produto, do mais relevante para o menos relevante
+    """
+    termos = set(extrair_termos(consulta))
+    if not termos:
+        return []
+
+    total_documentos, comprimento_medio = _estatisticas()
+    frequencias_documentos = dict(
+        TermoIndice.objects.filter(termo__in=termos)
+        .values('termo').annotate(total=Count('id')).values_list('termo', 'total')
+    )
+    if not frequencias_documentos:
+        return []
+
+    idfs = {
+        termo: _idf(total_documentos, frequencia)
+        for termo, frequencia in frequencias_documentos.items()
+    }
+    linhas = (
+        TermoIndice.objects.filter(termo__in=idfs.keys())
+        .values('produto_id')
+        .annotate(pontuacao=Sum(_pontuacao_bm25(idfs, comprimento_medio)))
+        .order_by('-pontuacao', 'produto_id')[:limite]
+    )
+    return _produtos_ordenados(linhas)
+
+
+def autocompletar(prefixo, limite=8):
+    """
+    Sugestões de produtos para o texto parcial digitado
+
+    Todos os termos, menos o último, precisam casar inteiros; o último é
+    tratado como prefixo. Os resultados são ordenados pela soma das
+    frequências ponderadas (nome pesa mais), sem cálculo de BM25.
+
+    Returns:
+        Lista de Produto
+    """
+    palavras = normalizar_palavras(prefixo)
+    if not palavras or len(palavras[-1]) < 2:
+        return []
+
+    *completas, parcial = palavras
+    # A palavra parcial ainda não tem sufixo completo: casar tanto a forma
+    # digitada ('camis' -> 'camiset') quanto o radical ('camisetas' -> 'camiset')
+    candidatos = TermoIndice.objects.filter(
+        Q(termo__startswith=parcial) | Q(termo__startswith=radicalizar(parcial))
+    )
+    for termo in set(radicalizar(palavra) for palavra in completas):
+        candidatos = candidatos.filter(
+            produto_id__in=TermoIndice.objects.filter(termo=termo).values('produto_id')
+        )
+    linhas = (
+        candidatos.values('produto_id')
+        .annotate(pontuacao=Sum('frequencia'))
+        .order_by('-pontuacao', 'produto_id')[:limite]
+    )
+    return _produtos_ordenados(linhas)
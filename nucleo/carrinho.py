@@ -0,0 +1,389 @@
+"""
+Carrinho de compras - NerdHub E-commerce
+
+Dois armazenamentos com a mesma interface, escolhidos por obter_carrinho():
+
+- CarrinhoSessao: visitantes anônimos. Os itens ficam na sessão
+  ({produto_id: quantidade}); nada é gravado nas tabelas de carrinho e
+  nenhuma reserva de estoque é feita.
+- CarrinhoBanco: usuários autenticados. Usa Carrinho/ItemCarrinho e
+  reserva o estoque (ver nucleo/reservas.py).
+
+Ao fazer login, mesclar_carrinho_sessao() move os itens da sessão para o
+banco com um único upsert em massa (sinal user_logged_in).
+
+O resumo (linhas, subtotais e total geral) sai de uma única consulta:
+produto e marca vêm por JOIN (select_related) e, no banco, os valores são
+calculados com quantidade x preço por linha e uma soma em janela.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum, Window
+from django.http import Http404
+
+from . import reservas
+from .models import Carrinho, ItemCarrinho, Produto
+
+
+# Chave da sessão onde o carrinho anônimo é guardado
+CHAVE_SESSAO = 'carrinho'
+
+# Máximo de unidades de um produto em um carrinho. Vale mesmo para produtos
+# sem linha de Estoque, e mantém a quantidade longe do limite da coluna
+QUANTIDADE_MAXIMA = 99
+
+
+# quantidade x preço calculado no banco
+SUBTOTAL_ITEM = ExpressionWrapper(
+    F('quantidade') * F('produto__preco'),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+def resumir_carrinho(usuario):
+    """
+    Calcula o resumo do carrinho do usuário em uma consulta
+
+    Não cria o Carrinho: um usuário sem carrinho tem um resumo vazio.
+
+    Args:
+        usuario: User dono do carrinho
+
+    Returns:
+        Dict com:
+        - itens_com_total: Lista de dicts {'item': ItemCarrinho, 'total': Decimal}
+        - total: Total geral do carrinho (Decimal)
+        - quantidade_total: Soma das quantidades de todos os itens
+    """
+    itens = list(
+        ItemCarrinho.objects.filter(carrinho__usuario=usuario)
+        .select_related('produto', 'produto__marca')
+        .annotate(
+            subtotal=SUBTOTAL_ITEM,
+            total_geral=Window(Sum(SUBTOTAL_ITEM)),
+        )
+        .order_by('id')
+    )
+    return {
+        'itens_com_total': [{'item': item, 'total': item.subtotal} for item in itens],
+        'total': itens[0].total_geral if itens else Decimal('0.00'),
+        'quantidade_total': sum(item.quantidade for item in itens),
+    }
+
+
+class CarrinhoBanco:
+    """
+    Carrinho persistido em Carrinho/ItemCarrinho (usuário autenticado)
+
+    O Carrinho só é criado quando o primeiro item é adicionado.
+    """
+
+    def __init__(self, usuario):
+        self.usuario = usuario
+
+    def adicionar(self, produto_id):
+        """
+        Adiciona uma unidade do produto, reservando o estoque
+
+        Returns:
+            Nova quantidade do produto no carrinho, ou 0 se não há estoque livre
+            ou o item já está em QUANTIDADE_MAXIMA
+        """
+        item = ItemCarrinho.objects.filter(carrinho__usuario=self.usuario, produto_id=produto_id).first()
+        nova_quantidade = item.quantidade + 1 if item else 1
+        if nova_quantidade > QUANTIDADE_MAXIMA:
+            return 0
+        if not reservas.reservar(self.usuario, produto_id, nova_quantidade):
+            return 0
+        if item:
+            item.quantidade = nova_quantidade
+            item.save(update_fields=['quantidade'])
+        else:
+            carrinho, _ = Carrinho.objects.get_or_create(usuario=self.usuario)
+            ItemCarrinho.objects.create(carrinho=carrinho, produto_id=produto_id, quantidade=1)
+        return nova_quantidade
+
+    def obter_item(self, item_id):
+        """
+        Busca um item do carrinho pelo ID do ItemCarrinho
+
+        Returns:
+            ItemCarrinho, ou None se o item pertence a outro usuário
+
+        Raises:
+            Http404: Se o item não existe
+        """
+        item = ItemCarrinho.objects.select_related('carrinho').filter(id=item_id).first()
+        if item is None:
+            raise Http404("Item não encontrado no carrinho")
+        if item.carrinho.usuario_id != self.usuario.id:
+            return None
+        return item
+
+    def definir_quantidade(self, item, quantidade):
+        """
+        Altera a quantidade de um item, renovando a reserva
+
+        Reduções sempre são aplicadas (a reserva diminui junto).
+
+        Returns:
+            True se alterado, False se não há estoque livre ou a quantidade
+            passa de QUANTIDADE_MAXIMA
+        """
+        if quantidade > QUANTIDADE_MAXIMA:
+            return False
+        reduzindo = quantidade < item.quantidade
+        if not reservas.reservar(self.usuario, item.produto_id, quantidade, reduzindo=reduzindo):
+            return False
+        item.quantidade = quantidade
+        item.save(update_fields=['quantidade'])
+        return True
+
+    def remover(self, item):
+        """Remove o item e libera a reserva do produto"""
+        item.delete()
+        reservas.liberar(self.usuario, [item.produto_id])
+
+    def atualizar_quantidades(self, novas):
+        """
+        Aplica várias alterações de quantidade de uma vez
+
+        Estoque conferido e reservas renovadas em uma consulta + um upsert
+        (reservar_varios); quantidades gravadas com um único bulk_update.
+        Só os aumentos podem faltar estoque; reduções sempre são aplicadas.
+
+        Args:
+            novas: Dict {item_id: nova quantidade}; 0 remove o item. A view
+                já recusa quantidades acima de QUANTIDADE_MAXIMA
+
+        Returns:
+            Lista de IDs de itens sem estoque suficiente (vazia se tudo foi
+            aplicado; caso contrário nada é alterado)
+
+        Raises:
+            Http404: Se algum item não pertence ao carrinho do usuário
+        """
+        with transaction.atomic():
+            itens = ItemCarrinho.objects.filter(carrinho__usuario=self.usuario, id__in=novas)
+            itens = {item.id: item for item in itens}
+            if len(itens) != len(novas):
+                raise Http404("Item não encontrado no carrinho")
+
+            alterados = [item for item_id, item in itens.items() if novas[item_id] > 0]
+            removidos = [item for item_id, item in itens.items() if novas[item_id] == 0]
+
+            faltando = reservas.reservar_varios(
+                self.usuario,
+                {item.produto_id: novas[item.id] for item in alterados},
+                reducoes={item.produto_id for item in alterados if novas[item.id] < item.quantidade},
+            )
+            if faltando:
+                return [item.id for item in alterados if item.produto_id in faltando]
+
+            for item in alterados:
+                item.quantidade = novas[item.id]
+            ItemCarrinho.objects.bulk_update(alterados, ['quantidade'])
+            if removidos:
+                ItemCarrinho.objects.filter(id__in=[item.id for item in removidos]).delete()
+                reservas.liberar(self.usuario, [item.produto_id for item in removidos])
+        return []
+
+    def resumo(self):
+        """Resumo do carrinho (ver resumir_carrinho)"""
+        return resumir_carrinho(self.usuario)
+
+
+class CarrinhoSessao:
+    """
+    Carrinho guardado na sessão (visitante anônimo)
+
+    Os itens são representados por ItemCarrinho não salvos cujo id é o ID
+    do produto, para que templates e URLs funcionem como no CarrinhoBanco.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    @property
+    def itens(self):
+        """Dict {produto_id (str): quantidade} armazenado na sessão"""
+        return self.session.get(CHAVE_SESSAO, {})
+
+    def _salvar(self, itens):
+        self.session[CHAVE_SESSAO] = itens
+
+    def _quantidade(self, produto_id):
+        """Quantidade do produto no carrinho (0 se ausente)"""
+        return self.itens.get(str(produto_id), 0)
+
+    def _ha_estoque(self, produto_id, quantidade):
+        """Confere o estoque livre sem reservar (uma consulta)"""
+        disponivel = reservas.estoque_disponivel([produto_id])
+        return produto_id not in disponivel or disponivel[produto_id] >= quantidade
+
+    def adicionar(self, produto_id):
+        """
+        Adiciona uma unidade do produto
+
+        Returns:
+            Nova quantidade do produto no carrinho, ou 0 se não há estoque livre
+            ou o item já está em QUANTIDADE_MAXIMA
+        """
+        nova_quantidade = self._quantidade(produto_id) + 1
+        if nova_quantidade > QUANTIDADE_MAXIMA:
+            return 0
+        if not self._ha_estoque(produto_id, nova_quantidade):
+            return 0
+        self._salvar({**self.itens, str(produto_id): nova_quantidade})
+        return nova_quantidade
+
+    def obter_item(self, item_id):
+        """
+        Busca um item pelo ID do produto
+
+        Raises:
+            Http404: Se o produto não está no carrinho
+        """
+        quantidade = self._quantidade(item_id)
+        if not quantidade:
+            raise Http404("Item não encontrado no carrinho")
+        return ItemCarrinho(id=item_id, produto_id=item_id, quantidade=quantidade)
+
+    def definir_quantidade(self, item, quantidade):
+        """
+        Altera a quantidade de um item
+
+        Returns:
+            True se alterado, False se não há estoque livre ou a quantidade
+            passa de QUANTIDADE_MAXIMA
+        """
+        if quantidade > QUANTIDADE_MAXIMA:
+            return False
+        if quantidade > item.quantidade and not self._ha_estoque(item.produto_id, quantidade):
+            return False
+        item.quantidade = quantidade
+        self._salvar({**self.itens, str(item.produto_id): quantidade})
+        return True
+
+    def remover(self, item):
+        """Remove o item do carrinho"""
+        itens = dict(self.itens)
+        itens.pop(str(item.produto_id), None)
+        self._salvar(itens)
+
+    def atualizar_quantidades(self, novas):
+        """
+        Aplica várias alterações de quantidade de uma vez
+
+        Apenas os aumentos são conferidos contra o estoque livre, em uma
+        única consulta.
+
+        Args:
+            novas: Dict {produto_id: nova quantidade}; 0 remove o item. A view
+                já recusa quantidades acima de QUANTIDADE_MAXIMA
+
+        Returns:
+            Lista de IDs sem estoque suficiente (vazia se tudo foi aplicado;
+            caso contrário nada é alterado)
+
+        Raises:
+            Http404: Se algum produto não está no carrinho
+        """
+        itens = dict(self.itens)
+        if any(str(produto_id) not in itens for produto_id in novas):
+            raise Http404("Item não encontrado no carrinho")
+
+        aumentos = {
+            produto_id: quantidade for produto_id, quantidade in novas.items()
+            if quantidade > itens[str(produto_id)]
+        }
+        disponivel = reservas.estoque_disponivel(list(aumentos)) if aumentos else {}
+        faltando = [
+            produto_id for produto_id, quantidade in aumentos.items()
+            if produto_id in disponivel and disponivel[produto_id] < quantidade
+        ]
+        if faltando:
+            return faltando
+
+        for produto_id, quantidade in novas.items():
+            if quantidade:
+                itens[str(produto_id)] = quantidade
+            else:
+                del itens[str(produto_id)]
+        self._salvar(itens)
+        return []
+
+    def resumo(self):
+        """
+        Resumo do carrinho da sessão em uma consulta (produtos + marcas)
+
+        Produtos removidos do catálogo são ignorados.
+        """
+        quantidades = {int(produto_id): quantidade for produto_id, quantidade in self.itens.items()}
+        produtos = Produto.objects.select_related('marca').in_bulk(list(quantidades))
+        itens_com_total = []
+        for produto_id, quantidade in quantidades.items():
+            if produto_id not in produtos:
+                continue
+            item = ItemCarrinho(id=produto_id, produto=produtos[produto_id], quantidade=quantidade)
+            itens_com_total.append({'item': item, 'total': item.produto.preco * quantidade})
+        return {
+            'itens_com_total': itens_com_total,
+            'total': sum((linha['total'] for linha in itens_com_total), Decimal('0.00')),
+            'quantidade_total': sum(linha['item'].quantidade for linha in itens_com_total),
+        }
+
+
+def obter_carrinho(request):
+    """
+    Retorna o carrinho adequado à requisição
+
+    Returns:
+        CarrinhoBanco para usuários autenticados, CarrinhoSessao para anônimos
+    """
+    if request.user.is_authenticated:
+        return CarrinhoBanco(request.user)
+    return CarrinhoSessao(request.session)
+
+
+def mesclar_carrinho_sessao(session, usuario):
+    """
+    Move o carrinho anônimo da sessão para o carrinho do usuário
+
+    As quantidades de produtos presentes nos dois carrinhos são somadas
+    (limitadas a QUANTIDADE_MAXIMA).
+    Todos os itens são gravados com um único bulk_create com
+    update_conflicts (upsert sobre a restrição única carrinho + produto).
+
+    Args:
+        session: Sessão da requisição de login
+        usuario: Usuário que acabou de entrar
+    """
+    itens_sessao = session.pop(CHAVE_SESSAO, None)
+    if not itens_sessao:
+        return
+    quantidades = {int(produto_id): quantidade for produto_id, quantidade in itens_sessao.items()}
+
+    carrinho, _ = Carrinho.objects.get_or_create(usuario=usuario)
+    # Produtos ainda existentes e quantidade já presente no carrinho do usuário
+    existentes = dict(
+        Produto.objects.filter(id__in=quantidades)
+        .annotate(no_carrinho=Sum('itemcarrinho__quantidade', filter=Q(itemcarrinho__carrinho=carrinho)))
+        .values_list('id', 'no_carrinho')
+    )
+    ItemCarrinho.objects.bulk_create(
+        [
+            ItemCarrinho(
+                carrinho=carrinho,
+                produto_id=produto_id,
+                quantidade=min(quantidade + (existentes[produto_id] or 0), QUANTIDADE_MAXIMA),
+            )
+            for produto_id, quantidade in quantidades.items()
+            if produto_id in existentes
+        ],
+        update_conflicts=True,
+        unique_fields=['carrinho', 'produto'],
+        update_fields=['quantidade'],
+    )
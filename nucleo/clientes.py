@@ -0,0 +1,172 @@
+"""
+Agregados de pedidos por cliente - NerdHub E-commerce
+
+Mantém EstatisticaCliente (quantidade de pedidos, total gasto, último
+pedido e marca favorita) e Perfil.last_order_at em dia dentro da própria
+transação do checkout. O perfil e as listas do admin leem uma linha por
+cliente em vez de agregar todo o histórico de pedidos a cada visita.
+
+A marca favorita é a de mais unidades compradas. As unidades por marca
+ficam na própria estatística (JSON), então um pedido novo só precisa
+comparar as marcas que comprou com a favorita atual. Se a favorita for
+removida do catálogo (SET_NULL), a escolha passa a considerar apenas as
+marcas dos pedidos seguintes até o próximo recalcular_clientes.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+
+from usuarios.models import Perfil
+
+from .models import EstatisticaCliente, ItemPedido, Pedido
+
+
+def _marca_favorita(unidades_por_marca, candidatas):
+    """
+    Marca com mais unidades entre as candidatas (empate: menor ID)
+
+    Args:
+        unidades_por_marca: Dict {str(marca_id): unidades}
+        candidatas: Chaves de unidades_por_marca a comparar
+
+    Returns:
+        ID da marca ou None se não houver candidatas
+    """
+    candidatas = [marca for marca in candidatas if marca in unidades_por_marca]
+    if not candidatas:
+        return None
+    return int(max(candidatas, key=lambda marca: (unidades_por_marca[marca], -int(marca))))
+
+
+def registrar_pedido(pedido, unidades_por_marca):
+    """
+    Soma um pedido finalizado aos agregados do cliente
+
+    Deve ser chamada na transação que criou o pedido e seus itens. A linha
+    da estatística é travada (SELECT ... FOR UPDATE) antes da leitura, então
+    dois checkouts simultâneos do mesmo cliente não perdem a soma um do outro.
+
+    Args:
+        pedido: Pedido recém-criado (com total e criado_em)
+        unidades_por_marca: Dict {marca_id: unidades compradas no pedido}
+    """
+    with transaction.atomic():
+        estatistica = (
+            EstatisticaCliente.objects.select_for_update()
+            .filter(usuario_id=pedido.usuario_id)
+            .first()
+        )
+        if estatistica is None:
+            # Cliente sem estatística (primeiro pedido ou histórico criado com
+            # bulk_create): montar do zero, já incluindo este pedido
+            recalcular_clientes([pedido.usuario_id])
+            return
+
+        unidades = estatistica.unidades_por_marca
+        for marca_id, quantidade in unidades_por_marca.items():
+            unidades[str(marca_id)] = unidades.get(str(marca_id), 0) + quantidade
+        candidatas = {str(marca_id) for marca_id in unidades_por_marca}
+        if estatistica.marca_favorita_id is not None:
+            candidatas.add(str(estatistica.marca_favorita_id))
+
+        estatistica.total_pedidos += 1
+        estatistica.total_gasto += pedido.total
+        estatistica.ultimo_pedido_em = pedido.criado_em
+        estatistica.marca_favorita_id = _marca_favorita(unidades, candidatas)
+        estatistica.save(update_fields=[
+            'total_pedidos', 'total_gasto', 'ultimo_pedido_em', 'marca_favorita', 'unidades_por_marca',
+        ])
+        Perfil.objects.filter(user_id=pedido.usuario_id).update(last_order_at=pedido.criado_em)
+
+
+def recalcular_clientes(usuario_ids):
+    """
+    Reconstrói os agregados dos clientes a partir do histórico de pedidos
+
+    Trava as estatísticas existentes antes de ler o histórico, para que um
+    checkout em andamento não seja sobrescrito por uma soma antiga. Usa uma
+    consulta agrupada por cliente, outra por (cliente, marca), um upsert em
+    massa e um UPDATE para Perfil.last_order_at.
+
+    Args:
+        usuario_ids: Lista de IDs de usuários
+    """
+    usuario_ids = list(usuario_ids)
+    with transaction.atomic():
+        list(
+            EstatisticaCliente.objects.select_for_update()
+            .filter(usuario_id__in=usuario_ids)
+            .order_by('usuario_id')
+            .values_list('id', flat=True)
+        )
+        estatisticas = {
+            usuario_id: EstatisticaCliente(usuario_id=usuario_id)
+            for usuario_id in usuario_ids
+        }
+        pedidos = Pedido.objects.filter(usuario_id__in=usuario_ids, finalizado=True)
+        totais = (
+            pedidos.values('usuario_id')
+            .annotate(quantidade=Count('id'), gasto=Sum('total'), ultimo=Max('criado_em'))
+            .order_by()
+        )
+        for linha in totais:
+            estatistica = estatisticas[linha['usuario_id']]
+            estatistica.total_pedidos = linha['quantidade']
+            estatistica.total_gasto = linha['gasto'] or 0
+            estatistica.ultimo_pedido_em = linha['ultimo']
+
+        unidades = (
+            ItemPedido.objects.filter(pedido__in=pedidos, produto__marca__isnull=False)
+            .values_list('pedido__usuario_id', 'produto__marca_id')
+            .annotate(unidades=Sum('quantidade'))
+            .order_by()
+        )
+        for usuario_id, marca_id, quantidade in unidades:
+            estatisticas[usuario_id].unidades_por_marca[str(marca_id)] = quantidade
+
+        for estatistica in estatisticas.values():
+            estatistica.marca_favorita_id = _marca_favorita(
+                estatistica.unidades_por_marca, estatistica.unidades_por_marca
+            )
+
+        EstatisticaCliente.objects.bulk_create(
+            estatisticas.values(),
+            update_conflicts=True,
+            unique_fields=['usuario'],
+            update_fields=['total_pedidos', 'total_gasto', 'ultimo_pedido_em',
+                           'marca_favorita', 'unidades_por_marca'],
+        )
+        ultimo_pedido = (
+            Pedido.objects.filter(usuario_id=OuterRef('user_id'), finalizado=True)
+            .order_by('-criado_em')
+            .values('criado_em')[:1]
+        )
+        Perfil.objects.filter(user_id__in=usuario_ids).update(last_order_at=Subquery(ultimo_pedido))
+
+
+def recalcular_todos(tamanho_lote=500):
+    """
+    Reconstrói os agregados de todos os usuários, em lotes
+
+    Os usuários são percorridos por faixa de ID (id > último do lote
+    anterior), sem OFFSET e sem carregar a lista inteira na memória; cada
+    lote é uma transação curta.
+
+    Args:
+        tamanho_lote: Usuários recalculados por transação
+
+    Returns:
+        Quantidade de usuários processados
+    """
+    total = 0
+    ultimo_id = 0
+    while True:
+        ids = list(
+            User.objects.filter(id__gt=ultimo_id).order_by('id').values_list('id', flat=True)[:tamanho_lote]
+        )
+        if not ids:
+            return total
+        recalcular_clientes(ids)
+        total += len(ids)
+        ultimo_id = ids[-1]
@@ -0,0 +1,125 @@
+"""
+Respostas condicionais (ETag / Last-Modified) - NerdHub E-commerce
+
+O catálogo, a página de marca e a página de produto respondem 304 Not
+Modified, sem renderizar templates, quando nada mudou desde a última
+visita do navegador. A decisão usa um "carimbo" (data da última
+alteração) obtido com uma única consulta indexada:
+
+- catálogo: MAX(Produto.atualizado_em) (índice produto_atualizado_idx);
+- marca: o mesmo, só nos produtos da marca (produto_marca_atualizado_idx);
+- produto: o produto e os relacionados da mesma marca (mesmo índice).
+
+Produto.atualizado_em muda em todo save do produto e é "tocado"
+(tocar_produtos) quando mudam reviews, estoque ou imagens. O que não
+cabe em um produto - remoções, marcas e categorias, que aparecem no menu
+e nos cards - avança a versão do catálogo, guardada no cache padrão; se
+ela for despejada, uma nova é criada e as páginas apenas deixam de bater.
+
+As páginas têm partes pessoais (cabeçalho do usuário, mensagens, token
+CSRF). Por isso só visitantes anônimos sem mensagens pendentes recebem
+respostas condicionais, e o ETag inclui a URL completa e o cookie CSRF.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Max, Q
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .models import Produto
+
+
+CHAVE_VERSAO_CATALOGO = 'catalogo-versao'
+
+# Segundos; a versão só serve para comparação, o prazo limita a memória usada
+TEMPO_VERSAO_CATALOGO = 60 * 60 * 24
+
+
+def versao_catalogo():
+    """Momento da última mudança geral do catálogo (criado se não estiver no cache)"""
+    versao = cache.get(CHAVE_VERSAO_CATALOGO)
+    if versao is None:
+        versao = timezone.now()
+        cache.set(CHAVE_VERSAO_CATALOGO, versao, TEMPO_VERSAO_CATALOGO)
+    return versao
+
+
+def invalidar_catalogo():
+    """Avança a versão do catálogo (todas as páginas deixam de bater)"""
+    cache.delete(CHAVE_VERSAO_CATALOGO)
+
+
+def tocar_produtos(produto_ids):
+    """
+    Marca os produtos como alterados agora (um UPDATE, sem disparar sinais)
+
+    Args:
+        produto_ids: Lista de IDs de produtos
+    """
+    produto_ids = list(produto_ids)
+    if produto_ids:
+        Produto.objects.filter(id__in=produto_ids).update(atualizado_em=timezone.now())
+
+
+def carimbo_catalogo():
+    """Última alteração entre todos os produtos"""
+    return Produto.objects.aggregate(ultima=Max('atualizado_em'))['ultima']
+
+
+def carimbo_marca(marca_id):
+    """Última alteração entre os produtos da marca"""
+    return Produto.objects.filter(marca_id=marca_id).aggregate(ultima=Max('atualizado_em'))['ultima']
+
+
+def carimbo_produto(produto_id):
+    """Última alteração do produto ou dos relacionados (mesma marca)"""
+    marca = Produto.objects.filter(id=produto_id).order_by().values('marca_id')[:1]
+    return Produto.objects.filter(Q(id=produto_id) | Q(marca_id=marca)).aggregate(
+        ultima=Max('atualizado_em')
+    )['ultima']
+
+
+def _pode_responder_304(request):
+    """Só páginas iguais para qualquer visitante: anônimo e sem mensagens pendentes"""
+    if request.user.is_authenticated:
+        return False
+    mensagens = getattr(request, '_messages', None)
+    return mensagens is None or len(mensagens) == 0
+
+
+def resposta_condicional(carimbo):
+    """
+    Decorador que adiciona ETag/Last-Modified a uma view GET
+
+    Args:
+        carimbo: Função chamada com os argumentos da URL (sem o request)
+            que retorna a data da última alteração da página, ou None para
+            responder normalmente (ex: slug desconhecido)
+
+    Returns:
+        Decorador (django.views.decorators.http.condition)
+    """
+    def ultima_alteracao(request, *args, **kwargs):
+        # ETag e Last-Modified usam o mesmo carimbo: uma consulta por requisição
+        if not hasattr(request, '_carimbo_condicional'):
+            request._carimbo_condicional = None
+            if _pode_responder_304(request):
+                ultima = carimbo(*args, **kwargs)
+                if ultima is not None:
+                    request._carimbo_condicional = max(ultima, versao_catalogo())
+        return request._carimbo_condicional
+
+    def etag(request, *args, **kwargs):
+        ultima = ultima_alteracao(request, *args, **kwargs)
+        if ultima is None:
+            return None
+        # Garante o segredo CSRF antes do hash: o token dos formulários da
+        # página já é o do cookie enviado nesta resposta
+        get_token(request)
+        base = f"{ultima.isoformat()}|{request.get_full_path()}|{request.META['CSRF_COOKIE']}"
+        return hashlib.md5(base.encode()).hexdigest()
+
+    return condition(etag_func=etag, last_modified_func=ultima_alteracao)
@@ -0,0 +1,143 @@
+"""
+Orçamento de consultas por requisição - NerdHub E-commerce
+
+OrcamentoConsultasMiddleware conta as consultas SQL e o tempo gasto no
+banco em cada requisição (connection.execute_wrapper, sem depender de
+DEBUG) e:
+
+- adiciona o cabeçalho Server-Timing (db e app) quando
+  CONSULTAS_SERVER_TIMING está ativo;
+- registra uma linha JSON no logger 'nucleo.consultas' (WARNING quando há
+  suspeita de N+1 ou o orçamento foi estourado);
+- detecta N+1: o mesmo formato de SQL (literais e listas IN normalizados)
+  repetido CONSULTAS_LIMIAR_REPETICAO vezes ou mais;
+- confere o orçamento declarado na view com @orcamento_consultas(n); com
+  CONSULTAS_MODO_ESTRITO (ativado nos testes, ver tests/conftest.py)
+  estourar o orçamento levanta OrcamentoConsultasExcedido.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('nucleo.consultas')
+
+
+class OrcamentoConsultasExcedido(AssertionError):
+    """Requisição com mais consultas que o orçamento da view (modo estrito)"""
+
+
+def orcamento_consultas(maximo):
+    """
+    Declara o número máximo de consultas SQL de uma view
+
+    Args:
+        maximo: Consultas permitidas por requisição (inclui sessão e usuário)
+    """
+    def decorador(view):
+        # Os decoradores do Django (login_required, require_POST...) usam
+        # functools.wraps e preservam o atributo em qualquer ordem
+        view.orcamento_consultas = maximo
+        return view
+    return decorador
+
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTA_IN = re.compile(r'\bIN \((?:[^()]*)\)', re.I)
+
+
+def formato_sql(sql):
+    """
+    Normaliza um SQL para comparar consultas "iguais" com valores diferentes
+
+    Literais viram '?' e listas IN (...) viram IN (...), de modo que
+    SELECT ... WHERE id = 1 e WHERE id = 2 têm o mesmo formato.
+    """
+    sql = _LITERAL.sub('?', sql)
+    return _LISTA_IN.sub('IN (...)', sql)
+
+
+class ColetorConsultas:
+    """execute_wrapper que acumula quantidade, duração e formato das consultas"""
+
+    def __init__(self):
+        self.quantidade = 0
+        self.duracao = 0.0
+        self.formatos = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracao += time.perf_counter() - inicio
+            self.quantidade += 1
+            self.formatos[formato_sql(sql)] += 1
+
+    def repetidas(self, limiar):
+        """Formatos executados 'limiar' vezes ou mais (suspeitas de N+1)"""
+        return [(sql, vezes) for sql, vezes in self.formatos.most_common() if vezes >= limiar]
+
+
+class OrcamentoConsultasMiddleware:
+    """
+    Mede as consultas de cada requisição e confere o orçamento da view
+
+    Deve vir logo após SecurityMiddleware/WhiteNoise para contar também as
+    consultas de sessão e autenticação.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        coletor = ColetorConsultas()
+        request.orcamento_consultas = None
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(coletor))
+            response = self.get_response(request)
+        duracao_total = time.perf_counter() - inicio
+
+        limiar = getattr(settings, 'CONSULTAS_LIMIAR_REPETICAO', 5)
+        repetidas = coletor.repetidas(limiar)
+        orcamento = request.orcamento_consultas
+        estourou = orcamento is not None and coletor.quantidade > orcamento
+
+        if getattr(settings, 'CONSULTAS_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'db;dur={coletor.duracao * 1000:.1f};desc="{coletor.quantidade} consultas", '
+                f'app;dur={duracao_total * 1000:.1f}'
+            )
+
+        registro = {
+            'metodo': request.method,
+            'caminho': request.path,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'consultas': coletor.quantidade,
+            'orcamento': orcamento,
+            'tempo_db_ms': round(coletor.duracao * 1000, 1),
+            'tempo_total_ms': round(duracao_total * 1000, 1),
+            'repetidas': [{'sql': sql[:300], 'vezes': vezes} for sql, vezes in repetidas],
+        }
+        nivel = logging.WARNING if (repetidas or estourou) else logging.INFO
+        logger.log(nivel, json.dumps(registro, ensure_ascii=False))
+
+        if estourou and getattr(settings, 'CONSULTAS_MODO_ESTRITO', False):
+            raise OrcamentoConsultasExcedido(
+                f"{registro['view']}: {coletor.quantidade} consultas (orçamento {orcamento}); "
+                f"repetidas: {registro['repetidas']}"
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.orcamento_consultas = getattr(view_func, 'orcamento_consultas', None)
+        return None
@@ -0,0 +1,147 @@
+"""
+Pipeline de arquivos estáticos - NerdHub E-commerce
+
+1. empacotar_css (comando): junta os CSS de cada página em um pacote
+   minificado (PACOTES_CSS) em ESTATICOS_BUILD_DIR/css/pacotes/.
+2. collectstatic: ArquivosEstaticos (STORAGES['staticfiles']) copia tudo
+   com o hash do conteúdo no nome (style.3f2a9c.css) e gera as versões
+   .gz e .br (brotli) de cada arquivo.
+3. WhiteNoise (MIDDLEWARE) serve os arquivos, escolhendo a versão
+   comprimida aceita pelo navegador, com cache imutável para nomes com hash.
+
+Nos templates, {% css_pacote 'nome' %} (templatetags/estaticos.py) emite
+um único <link> para o pacote; em DEBUG ou antes do empacotamento, um
+<link> por arquivo de origem.
+"""
+
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+# Pacotes de CSS por página: nome -> arquivos de origem (na ordem de carga)
+PACOTES_CSS = {
+    'base': ['css/style.css'],
+    'index': ['css/style_index.css'],
+    'por_marca': ['css/style_por_marca.css'],
+    'detalhe_produto': ['css/detalhe_produto.css'],
+    'carrinho': ['css/style_carrinho.css'],
+    'checkout': ['css/style_checkout.css'],
+    'sobre': ['css/style_sobre.css'],
+    'suporte': ['css/style_suporte.css'],
+    'login_cadastro': ['css/style_login_cadastro.css'],
+    'enderecos': ['css/style_perfil.css'],
+    'painel': ['css/style_perfil_novo.css'],
+    'perfil': [
+        'css/style_perfil_novo.css',
+        'css/style_seguranca.css',
+        'css/style_endereco.css',
+        'css/style_pedidos.css',
+    ],
+}
+
+PASTA_PACOTES = 'css/pacotes'
+
+_COMENTARIO = re.compile(r'/\*.*?\*/', re.S)
+# A URL é casada como um token inteiro: URLs do Google Fonts têm ';' (wght@300;400)
+_IMPORT = re.compile(r'@import\s+(?:url\([^)]*\)|\'[^\']*\'|"[^"]*")[^;]*;')
+_ESPACOS = re.compile(r'\s+')
+# Espaços em volta de pontuação que não muda de sentido sem eles (+ e -
+# ficam de fora por causa do calc(); antes de ':' o espaço separa seletores)
+_PONTUACAO = re.compile(r'\s*([{};,>~])\s*')
+_DOIS_PONTOS = re.compile(r':\s+')
+
+
+def caminho_pacote(nome):
+    """Caminho (relativo ao STATIC_URL) do pacote minificado"""
+    return f'{PASTA_PACOTES}/{nome}.min.css'
+
+
+def minificar_css(css):
+    """
+    Minificação conservadora de CSS
+
+    Remove comentários e espaços supérfluos; não reescreve valores.
+
+    Args:
+        css: Texto CSS
+
+    Returns:
+        CSS minificado
+    """
+    css = _COMENTARIO.sub('', css)
+    css = _ESPACOS.sub(' ', css)
+    css = _PONTUACAO.sub(r'\1', css)
+    css = _DOIS_PONTOS.sub(':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def montar_pacote(arquivos):
+    """
+    Concatena e minifica os arquivos CSS de um pacote
+
+    As regras @import são movidas para o início (só valem lá) e repetições
+    são descartadas.
+
+    Args:
+        arquivos: Caminhos estáticos de origem (ex: 'css/style.css')
+
+    Returns:
+        CSS do pacote
+    """
+    importacoes = []
+    corpos = []
+    for arquivo in arquivos:
+        caminho = finders.find(arquivo)
+        if caminho is None:
+            raise FileNotFoundError(f"Arquivo estático não encontrado: {arquivo}")
+        with open(caminho, encoding='utf-8') as entrada:
+            css = _COMENTARIO.sub('', entrada.read())
+        for importacao in _IMPORT.findall(css):
+            if importacao not in importacoes:
+                importacoes.append(importacao)
+        corpos.append(_IMPORT.sub('', css))
+    return minificar_css('\n'.join(importacoes + corpos))
+
+
+def empacotar_css(destino=None):
+    """
+    Gera todos os pacotes de PACOTES_CSS
+
+    Args:
+        destino: Pasta raiz de saída (padrão: settings.ESTATICOS_BUILD_DIR)
+
+    Returns:
+        Dict {nome: (bytes de origem, bytes do pacote)}
+    """
+    destino = destino or settings.ESTATICOS_BUILD_DIR
+    os.makedirs(os.path.join(destino, PASTA_PACOTES), exist_ok=True)
+    tamanhos = {}
+    for nome, arquivos in PACOTES_CSS.items():
+        css = montar_pacote(arquivos)
+        with open(os.path.join(destino, caminho_pacote(nome)), 'w', encoding='utf-8') as saida:
+            saida.write(css)
+        origem = sum(os.path.getsize(finders.find(arquivo)) for arquivo in arquivos)
+        tamanhos[nome] = (origem, len(css.encode('utf-8')))
+    return tamanhos
+
+
+class ArquivosEstaticos(CompressedManifestStaticFilesStorage):
+    """
+    Storage do collectstatic: nomes com hash + versões gzip/brotli
+
+    Diferente do manifesto estrito, um arquivo ausente do manifesto (ex:
+    testes e ambientes sem collectstatic) gera a URL sem hash em vez de
+    erro; o WhiteNoise serve esses arquivos com cache curto.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
@@ -0,0 +1,228 @@
+"""
+Exportação de pedidos (CSV / JSONL) - NerdHub E-commerce
+
+Usada pela view admin_exportar_pedidos e pelo comando exportar_pedidos.
+Pedidos, itens, usuário e produto vêm de uma única consulta com JOINs
+(uma linha por item), lida com .iterator(chunk_size=...): no PostgreSQL
+é um cursor no servidor e, nos demais bancos, leituras em lotes do
+cursor. O texto é gerado aos poucos e entregue em blocos, então a memória
+usada não depende da quantidade de pedidos exportados.
+
+Formatos:
+- csv: uma linha por item, com os dados do pedido repetidos (pedidos sem
+  itens aparecem em uma linha com as colunas de item vazias); textos que
+  começam com =, +, - ou @ recebem um ' na frente para não serem
+  executados como fórmula ao abrir o arquivo em uma planilha;
+- jsonl: um objeto JSON por pedido, com a lista 'itens'.
+"""
+
+import csv
+import datetime
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Pedido
+
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Filtro de status: valor na URL/comando -> Pedido.finalizado
+STATUS = {
+    'finalizado': True,
+    'aberto': False,
+}
+
+# Linhas lidas do banco por vez
+TAMANHO_LOTE_EXPORTACAO = 2000
+
+# Caracteres acumulados antes de entregar um bloco ao cliente
+TAMANHO_BLOCO = 64 * 1024
+
+# Início de célula que planilhas interpretam como fórmula (injeção de CSV)
+INICIO_FORMULA = ('=', '+', '-', '@')
+
+# (coluna exportada, campo na consulta de Pedido)
+CAMPOS_PEDIDO = [
+    ('pedido_id', 'id'),
+    ('criado_em', 'criado_em'),
+    ('usuario_id', 'usuario_id'),
+    ('usuario', 'usuario__username'),
+    ('finalizado', 'finalizado'),
+    ('forma_pagamento', 'forma_pagamento'),
+    ('total', 'total'),
+    ('endereco_destinatario', 'endereco_destinatario'),
+    ('endereco_rua', 'endereco_rua'),
+    ('endereco_numero', 'endereco_numero'),
+    ('endereco_complemento', 'endereco_complemento'),
+    ('endereco_bairro', 'endereco_bairro'),
+    ('endereco_cidade', 'endereco_cidade'),
+    ('endereco_estado', 'endereco_estado'),
+    ('endereco_cep', 'endereco_cep'),
+    ('endereco_telefone', 'endereco_telefone'),
+]
+CAMPOS_ITEM = [
+    ('produto_id', 'itens__produto_id'),
+    ('produto', 'itens__produto__nome'),
+    ('quantidade', 'itens__quantidade'),
+    ('preco_unitario', 'itens__preco_unitario'),
+]
+
+
+class FiltroInvalido(ValueError):
+    """Parâmetro de exportação (formato, data ou status) inválido"""
+
+
+def _ler_data(valor, nome):
+    if not valor:
+        return None
+    try:
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        raise FiltroInvalido(f"Data inválida em '{nome}' (use AAAA-MM-DD)")
+
+
+def ler_filtros(parametros):
+    """
+    Lê e valida os parâmetros da exportação
+
+    Args:
+        parametros: Mapping (request.GET ou opções do comando) com, todos opcionais:
+            - formato: Chave de FORMATOS (padrão 'csv')
+            - inicio: Primeiro dia (AAAA-MM-DD, inclusivo)
+            - fim: Último dia (AAAA-MM-DD, inclusivo)
+            - status: Chave de STATUS (vazio = todos)
+
+    Returns:
+        Dict com 'formato', 'inicio', 'fim' (date ou None) e 'status'
+
+    Raises:
+        FiltroInvalido: Se algum valor não puder ser interpretado
+    """
+    formato = parametros.get('formato') or 'csv'
+    if formato not in FORMATOS:
+        raise FiltroInvalido(f"Formato desconhecido: {formato}")
+    status = parametros.get('status') or None
+    if status is not None and status not in STATUS:
+        raise FiltroInvalido(f"Status desconhecido: {status}")
+    inicio = _ler_data(parametros.get('inicio'), 'inicio')
+    fim = _ler_data(parametros.get('fim'), 'fim')
+    if inicio and fim and inicio > fim:
+        raise FiltroInvalido("'inicio' é posterior a 'fim'")
+    return {'formato': formato, 'inicio': inicio, 'fim': fim, 'status': status}
+
+
+def _meia_noite(dia):
+    return timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min))
+
+
+def filtrar_pedidos(inicio=None, fim=None, status=None):
+    """
+    Pedidos do período (no fuso do projeto) e status informados
+
+    Args:
+        inicio, fim: date ou None (intervalo inclusivo de dias)
+        status: Chave de STATUS ou None para todos
+
+    Returns:
+        QuerySet de Pedido
+    """
+    pedidos = Pedido.objects.all()
+    if inicio is not None:
+        pedidos = pedidos.filter(criado_em__gte=_meia_noite(inicio))
+    # O último dia representável não tem "dia seguinte": nesse caso não há limite
+    if fim is not None and fim < datetime.date.max:
+        pedidos = pedidos.filter(criado_em__lt=_meia_noite(fim + datetime.timedelta(days=1)))
+    if status is not None:
+        pedidos = pedidos.filter(finalizado=STATUS[status])
+    return pedidos
+
+
+def _linhas(pedidos, tamanho_lote):
+    """Uma tupla por item (LEFT JOIN: pedidos sem itens vêm com None), em ordem de pedido"""
+    campos = [campo for _, campo in CAMPOS_PEDIDO + CAMPOS_ITEM]
+    return (
+        pedidos.values_list(*campos)
+        .order_by('criado_em', 'id', 'itens__id')
+        .iterator(chunk_size=tamanho_lote)
+    )
+
+
+def _em_blocos(textos):
+    """Junta pedaços de texto em blocos de ~TAMANHO_BLOCO caracteres"""
+    bloco = io.StringIO()
+    for texto in textos:
+        bloco.write(texto)
+        if bloco.tell() >= TAMANHO_BLOCO:
+            yield bloco.getvalue()
+            bloco = io.StringIO()
+    if bloco.tell():
+        yield bloco.getvalue()
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime.datetime):
+        return timezone.localtime(valor).isoformat()
+    # Texto digitado pelo cliente (usuário, endereço) não pode virar fórmula
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def _textos_csv(pedidos, tamanho_lote):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def linha(valores):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerow(valores)
+        return buffer.getvalue()
+
+    yield linha([coluna for coluna, _ in CAMPOS_PEDIDO + CAMPOS_ITEM])
+    for valores in _linhas(pedidos, tamanho_lote):
+        yield linha([_valor_csv(valor) for valor in valores])
+
+
+def _textos_jsonl(pedidos, tamanho_lote):
+    colunas_pedido = [coluna for coluna, _ in CAMPOS_PEDIDO]
+    colunas_item = [coluna for coluna, _ in CAMPOS_ITEM]
+    quantidade = len(colunas_pedido)
+    atual = None
+    for valores in _linhas(pedidos, tamanho_lote):
+        # As linhas do mesmo pedido chegam juntas (ordenadas por pedido)
+        if atual is None or atual['pedido_id'] != valores[0]:
+            if atual is not None:
+                yield json.dumps(atual, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+            atual = dict(zip(colunas_pedido, valores[:quantidade]))
+            atual['criado_em'] = timezone.localtime(atual['criado_em'])
+            atual['itens'] = []
+        item = dict(zip(colunas_item, valores[quantidade:]))
+        if item['produto_id'] is not None:
+            atual['itens'].append(item)
+    if atual is not None:
+        yield json.dumps(atual, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def exportar(pedidos, formato, tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    """
+    Gera a exportação dos pedidos aos poucos
+
+    Args:
+        pedidos: QuerySet de Pedido (ex: filtrar_pedidos)
+        formato: Chave de FORMATOS
+        tamanho_lote: Linhas lidas do banco por vez
+
+    Returns:
+        Iterador de strings (blocos de texto), para StreamingHttpResponse
+        ou escrita em arquivo
+    """
+    textos = _textos_csv if formato == 'csv' else _textos_jsonl
+    return _em_blocos(textos(pedidos, tamanho_lote))
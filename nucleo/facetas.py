@@ -0,0 +1,203 @@
+"""
+Navegação facetada do catálogo - NerdHub E-commerce
+
+O catálogo pode ser filtrado por qualquer combinação de marca, categoria,
+faixa de preço e disponibilidade em estoque. Para a barra lateral, cada
+opção mostra quantos produtos existiriam se ela fosse marcada, mantendo
+os filtros das outras dimensões (a própria dimensão é ignorada, para que
+as demais opções continuem visíveis).
+
+Em vez de um COUNT por opção, uma única consulta agrupa o catálogo por
+(marca, categoria, faixa de preço, em estoque) - o "cubo" de contagens.
+Todas as contagens de todas as seleções saem desse cubo em Python. O cubo
+fica no cache padrão do Django (CHAVE_CUBO) e é descartado pelos sinais de
+Produto, Estoque, Marca e Categoria e pelo checkout quando um estoque
+chega a zero; o prazo TEMPO_CACHE_FACETAS cobre alterações feitas por
+UPDATE em lote, que não disparam sinais.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, CharField, Count, Q, Value, When
+
+from .models import Produto
+
+
+# (valor na URL, rótulo, preço mínimo inclusivo, preço máximo exclusivo)
+FAIXAS_PRECO = [
+    ('ate-50', 'Até R$ 50', None, Decimal('50')),
+    ('50-100', 'R$ 50 a R$ 100', Decimal('50'), Decimal('100')),
+    ('100-200', 'R$ 100 a R$ 200', Decimal('100'), Decimal('200')),
+    ('200-500', 'R$ 200 a R$ 500', Decimal('200'), Decimal('500')),
+    ('acima-500', 'Acima de R$ 500', Decimal('500'), None),
+]
+
+CHAVE_CUBO = 'facetas:cubo'
+
+# Segundos; as invalidações por sinal cobrem quase tudo, o prazo é a rede de segurança
+TEMPO_CACHE_FACETAS = 5 * 60
+
+# Máximo de valores aceitos por dimensão na URL
+VALORES_POR_FACETA = 50
+
+
+def _faixa_q(minimo, maximo):
+    filtro = Q()
+    if minimo is not None:
+        filtro &= Q(preco__gte=minimo)
+    if maximo is not None:
+        filtro &= Q(preco__lt=maximo)
+    return filtro
+
+
+# Produtos sem registro de Estoque não têm controle de estoque: contam como disponíveis
+EM_ESTOQUE = Q(estoque__isnull=True) | Q(estoque__quantidade__gt=0)
+
+
+def ler_selecao(parametros):
+    """
+    Lê os filtros facetados da query string
+
+    Args:
+        parametros: QueryDict (request.GET) com, todos opcionais e repetíveis:
+            - marca: Slug da marca
+            - categoria: Slug da categoria
+            - faixa: Valor de FAIXAS_PRECO
+            - em_estoque: '1' para apenas produtos disponíveis
+
+    Returns:
+        Dict com 'marca', 'categoria' e 'faixa' (conjuntos) e 'em_estoque' (bool);
+        valores de faixa desconhecidos são ignorados
+    """
+    faixas = {valor for valor, _, _, _ in FAIXAS_PRECO}
+    return {
+        'marca': set(parametros.getlist('marca')[:VALORES_POR_FACETA]),
+        'categoria': set(parametros.getlist('categoria')[:VALORES_POR_FACETA]),
+        'faixa': set(parametros.getlist('faixa')[:VALORES_POR_FACETA]) & faixas,
+        'em_estoque': parametros.get('em_estoque') in ('1', 'true', 'on'),
+    }
+
+
+def filtro_produtos(selecao):
+    """
+    Q equivalente à seleção (OU dentro de cada dimensão, E entre dimensões)
+
+    Args:
+        selecao: Dict retornado por ler_selecao
+
+    Returns:
+        Q aplicável a Produto.objects
+    """
+    filtro = Q()
+    if selecao['marca']:
+        filtro &= Q(marca__slug__in=selecao['marca'])
+    if selecao['categoria']:
+        filtro &= Q(categoria__slug__in=selecao['categoria'])
+    if selecao['faixa']:
+        faixas = Q()
+        for valor, _, minimo, maximo in FAIXAS_PRECO:
+            if valor in selecao['faixa']:
+                faixas |= _faixa_q(minimo, maximo)
+        filtro &= faixas
+    if selecao['em_estoque']:
+        filtro &= EM_ESTOQUE
+    return filtro
+
+
+def calcular_cubo():
+    """
+    Conta os produtos agrupados por marca, categoria, faixa de preço e estoque
+
+    Uma única consulta (GROUP BY); nomes e slugs de marcas e categorias vêm
+    no mesmo SELECT pelos JOINs, sem consulta extra para montar as opções.
+
+    Returns:
+        Lista de tuplas (marca_slug, marca_nome, categoria_slug,
+        categoria_nome, faixa, em_estoque, total)
+    """
+    faixa = Case(
+        *[When(_faixa_q(minimo, maximo), then=Value(valor)) for valor, _, minimo, maximo in FAIXAS_PRECO],
+        output_field=CharField(),
+    )
+    em_estoque = Case(When(EM_ESTOQUE, then=Value(True)), default=Value(False), output_field=BooleanField())
+    return [
+        tuple(linha) for linha in
+        Produto.objects.annotate(faixa=faixa, em_estoque=em_estoque)
+        .values_list('marca__slug', 'marca__nome', 'categoria__slug', 'categoria__nome', 'faixa', 'em_estoque')
+        .annotate(total=Count('id'))
+        .order_by()
+    ]
+
+
+def obter_cubo():
+    """Cubo de contagens do cache, calculando-o se necessário"""
+    cubo = cache.get(CHAVE_CUBO)
+    if cubo is None:
+        cubo = calcular_cubo()
+        cache.set(CHAVE_CUBO, cubo, TEMPO_CACHE_FACETAS)
+    return cubo
+
+
+def invalidar_facetas():
+    """Descarta o cubo em cache (recalculado na próxima leitura)"""
+    cache.delete(CHAVE_CUBO)
+
+
+def _opcoes(contagens, rotulos, selecionados):
+    return [
+        {'valor': valor, 'rotulo': rotulo, 'total': contagens.get(valor, 0), 'selecionado': valor in selecionados}
+        for valor, rotulo in rotulos.items()
+    ]
+
+
+def contar_facetas(selecao):
+    """
+    Contagens de todas as opções de todas as dimensões para uma seleção
+
+    Args:
+        selecao: Dict retornado por ler_selecao
+
+    Returns:
+        Dict com:
+        - total: Produtos que atendem à seleção inteira
+        - marcas, categorias, faixas: Listas de {valor, rotulo, total, selecionado}
+          (marcas e categorias em ordem alfabética, só as que têm produtos)
+        - em_estoque: {total, selecionado}
+    """
+    rotulos = {'marca': {}, 'categoria': {}}
+    contagens = {'marca': {}, 'categoria': {}, 'faixa': {}, 'em_estoque': 0}
+    total = 0
+
+    for marca, marca_nome, categoria, categoria_nome, faixa, em_estoque, quantidade in obter_cubo():
+        valores = {'marca': marca, 'categoria': categoria, 'faixa': faixa}
+        if marca is not None:
+            rotulos['marca'][marca] = marca_nome
+        if categoria is not None:
+            rotulos['categoria'][categoria] = categoria_nome
+        # Dimensões cujo filtro esta linha não atende
+        falhas = {dimensao for dimensao, valor in valores.items() if selecao[dimensao] and valor not in selecao[dimensao]}
+        if selecao['em_estoque'] and not em_estoque:
+            falhas.add('em_estoque')
+
+        if not falhas:
+            total += quantidade
+        for dimensao, valor in valores.items():
+            # A contagem de uma opção ignora só o filtro da própria dimensão
+            if valor is not None and falhas <= {dimensao}:
+                contagens[dimensao][valor] = contagens[dimensao].get(valor, 0) + quantidade
+        if em_estoque and falhas <= {'em_estoque'}:
+            contagens['em_estoque'] += quantidade
+
+    def em_ordem(nomes):
+        return dict(sorted(nomes.items(), key=lambda item: (item[1].lower(), item[0])))
+
+    return {
+        'total': total,
+        'marcas': _opcoes(contagens['marca'], em_ordem(rotulos['marca']), selecao['marca']),
+        'categorias': _opcoes(contagens['categoria'], em_ordem(rotulos['categoria']), selecao['categoria']),
+        'faixas': _opcoes(
+            contagens['faixa'], {valor: rotulo for valor, rotulo, _, _ in FAIXAS_PRECO}, selecao['faixa']
+        ),
+        'em_estoque': {'total': contagens['em_estoque'], 'selecionado': selecao['em_estoque']},
+    }
@@ -0,0 +1,151 @@
+"""
+Cache de fragmentos (cards de produtos) - NerdHub E-commerce
+
+Cada card é guardado no cache com a chave
+
+    card:<template>:<produto_id>:<versão>
+
+A versão de cada produto fica no próprio cache (card-versao:<produto_id>).
+Os sinais de Produto, Estoque, Marca, ImagemProduto e Review apagam a
+versão (invalidar_cards); na próxima renderização uma versão nova é gerada
+e os fragmentos antigos simplesmente deixam de ser lidos até expirarem.
+Se a versão for despejada do cache, o efeito é o mesmo: nunca se serve
+um card desatualizado.
+
+Uma lista de cards custa duas leituras em lote (versões e fragmentos) e,
+havendo faltas, uma escrita em lote.
+
+O backend é o cache padrão do Django (ver CACHES em settings): memória
+local só em desenvolvimento (DEBUG); fora dele, Redis (REDIS_URL) ou
+arquivos (CACHE_DIR, por padrão no disco local do container), para que web
+e workers enxerguem as mesmas versões.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+
+# Tempo de vida dos cards e das versões (segundos); chaves versionadas nunca
+# ficam desatualizadas, o prazo só limita a memória usada
+TEMPO_CACHE_CARDS = 60 * 60 * 24
+
+CHAVE_ACERTOS = 'card-estatisticas:acertos'
+CHAVE_FALTAS = 'card-estatisticas:faltas'
+
+
+def _chave_versao(produto_id):
+    return f'card-versao:{produto_id}'
+
+
+def versoes_cards(produto_ids):
+    """
+    Retorna a versão atual de cada produto, criando as que faltam
+
+    Args:
+        produto_ids: Lista de IDs de produtos
+
+    Returns:
+        Dict {produto_id: versão}
+    """
+    chaves = {produto_id: _chave_versao(produto_id) for produto_id in produto_ids}
+    encontradas = cache.get_many(chaves.values())
+    versoes = {}
+    novas = {}
+    for produto_id, chave in chaves.items():
+        versao = encontradas.get(chave)
+        if versao is None:
+            versao = uuid.uuid4().hex[:12]
+            novas[chave] = versao
+        versoes[produto_id] = versao
+    if novas:
+        cache.set_many(novas, TEMPO_CACHE_CARDS)
+    return versoes
+
+
+def invalidar_cards(produto_ids):
+    """
+    Descarta os cards em cache dos produtos (nova versão na próxima leitura)
+
+    Args:
+        produto_ids: Lista de IDs de produtos
+    """
+    produto_ids = list(produto_ids)
+    if produto_ids:
+        cache.delete_many([_chave_versao(produto_id) for produto_id in produto_ids])
+
+
+def _contar(chave, quantidade):
+    """Soma 'quantidade' a um contador no cache"""
+    if not quantidade:
+        return
+    cache.add(chave, 0, timeout=None)
+    try:
+        cache.incr(chave, quantidade)
+    except ValueError:
+        # Contador despejado entre o add e o incr
+        cache.set(chave, quantidade, timeout=None)
+
+
+def renderizar_cards(produtos, template_name):
+    """
+    Renderiza um card por produto, reaproveitando os fragmentos em cache
+
+    Args:
+        produtos: Lista de Produtos (com os relacionamentos usados pelo
+            template já carregados)
+        template_name: Template de um card; recebe 'produto' no contexto
+
+    Returns:
+        HTML de todos os cards, na ordem recebida
+    """
+    produtos = list(produtos)
+    if not produtos:
+        return ''
+    versoes = versoes_cards([produto.id for produto in produtos])
+    chaves = {
+        produto.id: f'card:{template_name}:{produto.id}:{versoes[produto.id]}'
+        for produto in produtos
+    }
+    fragmentos = cache.get_many(chaves.values())
+
+    novos = {}
+    partes = []
+    for produto in produtos:
+        chave = chaves[produto.id]
+        html = fragmentos.get(chave)
+        if html is None:
+            html = render_to_string(template_name, {'produto': produto})
+            novos[chave] = html
+        partes.append(html)
+
+    if novos:
+        cache.set_many(novos, TEMPO_CACHE_CARDS)
+    _contar(CHAVE_ACERTOS, len(produtos) - len(novos))
+    _contar(CHAVE_FALTAS, len(novos))
+    return mark_safe(''.join(partes))
+
+
+def estatisticas_cache_cards():
+    """
+    Contadores de acertos e faltas do cache de cards
+
+    Returns:
+        Dict com 'acertos', 'faltas' e 'taxa_acerto' (0 a 1)
+    """
+    valores = cache.get_many([CHAVE_ACERTOS, CHAVE_FALTAS])
+    acertos = valores.get(CHAVE_ACERTOS, 0)
+    faltas = valores.get(CHAVE_FALTAS, 0)
+    total = acertos + faltas
+    return {
+        'acertos': acertos,
+        'faltas': faltas,
+        'taxa_acerto': round(acertos / total, 4) if total else 0.0,
+    }
+
+
+def zerar_estatisticas_cache_cards():
+    """Zera os contadores de acertos e faltas"""
+    cache.delete_many([CHAVE_ACERTOS, CHAVE_FALTAS])
@@ -0,0 +1,237 @@
+"""
+Derivados de imagens de produtos - NerdHub E-commerce
+
+Gera versões redimensionadas de Produto.imagem_principal e
+ImagemProduto.imagem em larguras fixas (TAMANHOS) e nos formatos AVIF
+(quando o Pillow tem suporte), WebP e JPEG. Os arquivos ficam em
+media/derivados/ e o caminho de cada um é guardado no campo JSON
+'derivados' do modelo (o manifesto), usado pela tag {% imagem_responsiva %}
+para emitir <picture> com srcset.
+
+A geração roda fora da requisição: o sinal post_save agenda o trabalho
+com transaction.on_commit em um pool de threads (o Pillow libera o GIL ao
+decodificar, redimensionar e codificar). O comando gerar_derivados_imagens
+processa as imagens já existentes.
+
+Formato do manifesto:
+
+    {
+        "origem": "produtos/foto.png",
+        "larguras": {"thumb": 160, "card": 400, "zoom": 1200},
+        "arquivos": {"thumb": {"avif": "...", "webp": "...", "jpeg": "..."}, ...}
+    }
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from . import fragmentos
+
+logger = logging.getLogger(__name__)
+
+
+# Largura máxima (px) de cada derivado; imagens menores não são ampliadas
+TAMANHOS = {
+    'thumb': 160,
+    'card': 400,
+    'zoom': 1200,
+}
+
+# Formatos gerados, do mais eficiente para o mais compatível (JPEG é o fallback)
+FORMATOS = (['avif'] if features.check('avif') else []) + ['webp', 'jpeg']
+
+QUALIDADE = {'avif': 55, 'webp': 80, 'jpeg': 82}
+
+TIPOS_MIME = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+PASTA_DERIVADOS = 'derivados'
+
+# Campo de imagem de cada modelo com derivados
+CAMPOS_IMAGEM = {
+    'nucleo.Produto': 'imagem_principal',
+    'nucleo.ImagemProduto': 'imagem',
+}
+
+_executor = None
+
+
+def _pool():
+    """Pool de threads compartilhado (criado no primeiro uso)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGENS_WORKERS,
+            thread_name_prefix='derivados',
+        )
+    return _executor
+
+
+def _abrir(nome, largura_maxima, armazenamento):
+    """
+    Abre a imagem original já orientada (EXIF)
+
+    Para JPEGs, draft() decodifica direto em escala reduzida quando a maior
+    largura pedida permite, poupando memória com originais grandes.
+    """
+    with armazenamento.open(nome, 'rb') as arquivo:
+        imagem = Image.open(arquivo)
+        if imagem.format == 'JPEG':
+            imagem.draft('RGB', (largura_maxima, 1))
+        imagem.load()
+    return ImageOps.exif_transpose(imagem)
+
+
+def _sem_transparencia(imagem):
+    """Aplica fundo branco em imagens com transparência (necessário para JPEG)"""
+    if imagem.mode == 'P':
+        imagem = imagem.convert('RGBA')
+    if imagem.mode in ('RGBA', 'LA'):
+        fundo = Image.new('RGB', imagem.size, (255, 255, 255))
+        fundo.paste(imagem, mask=imagem.split()[-1])
+        return fundo
+    return imagem.convert('RGB')
+
+
+def _codificar(imagem, formato):
+    """Codifica a imagem no formato pedido e retorna os bytes"""
+    if formato == 'jpeg':
+        imagem = _sem_transparencia(imagem)
+    elif imagem.mode not in ('RGB', 'RGBA'):
+        # WebP e AVIF preservam transparência
+        tem_alfa = imagem.mode in ('LA', 'PA') or 'transparency' in imagem.info
+        imagem = imagem.convert('RGBA' if tem_alfa else 'RGB')
+    saida = BytesIO()
+    opcoes = {'quality': QUALIDADE[formato]}
+    if formato == 'jpeg':
+        opcoes.update(optimize=True, progressive=True)
+    elif formato == 'webp':
+        opcoes['method'] = 4
+    imagem.save(saida, format=formato.upper(), **opcoes)
+    return saida.getvalue()
+
+
+def gerar_derivados(nome, origem=None):
+    """
+    Gera todos os derivados de uma imagem do storage
+
+    Não acessa o banco: pode rodar em qualquer thread ou processo.
+
+    Args:
+        nome: Nome do arquivo original no storage (ex: 'produtos/foto.png')
+        origem: Storage do original (o do campo de imagem, ver
+            armazenamento_original); padrão default_storage
+
+    Returns:
+        Manifesto (dict) com 'origem', 'larguras' e 'arquivos'
+    """
+    original = _abrir(nome, max(TAMANHOS.values()), origem or default_storage)
+    base = f'{PASTA_DERIVADOS}/{os.path.splitext(nome)[0]}'
+    manifesto = {'origem': nome, 'larguras': {}, 'arquivos': {}}
+
+    for tamanho, largura_maxima in TAMANHOS.items():
+        largura = min(largura_maxima, original.width)
+        altura = max(1, round(original.height * largura / original.width))
+        redimensionada = original.resize((largura, altura), Image.Resampling.LANCZOS)
+        manifesto['larguras'][tamanho] = largura
+        manifesto['arquivos'][tamanho] = {}
+        for formato in FORMATOS:
+            caminho = f'{base}/{tamanho}.{"jpg" if formato == "jpeg" else formato}'
+            if default_storage.exists(caminho):
+                default_storage.delete(caminho)
+            manifesto['arquivos'][tamanho][formato] = default_storage.save(
+                caminho, ContentFile(_codificar(redimensionada, formato))
+            )
+    return manifesto
+
+
+def armazenamento_original(modelo):
+    """Storage do campo de imagem do modelo (armazenamento por conteúdo)"""
+    return modelo._meta.get_field(CAMPOS_IMAGEM[modelo._meta.label]).storage
+
+
+def precisa_derivados(instancia):
+    """Indica se a imagem do objeto ainda não tem derivados atualizados"""
+    campo = getattr(instancia, CAMPOS_IMAGEM[instancia._meta.label])
+    return bool(campo.name) and not manifesto_valido(campo, instancia.derivados)
+
+
+def processar(modelo, pk):
+    """
+    Gera os derivados de um objeto e grava o manifesto
+
+    O UPDATE só acontece se a imagem não mudou enquanto os derivados eram
+    gerados (senão um novo processamento já foi agendado).
+
+    Args:
+        modelo: Rótulo do modelo ('nucleo.Produto' ou 'nucleo.ImagemProduto')
+        pk: Chave primária do objeto
+
+    Returns:
+        Manifesto gerado, ou None se o objeto não existe ou não tem imagem
+    """
+    Modelo = apps.get_model(modelo)
+    campo = CAMPOS_IMAGEM[modelo]
+    objeto = Modelo.objects.filter(pk=pk).first()
+    if objeto is None or not getattr(objeto, campo).name:
+        return None
+
+    nome = getattr(objeto, campo).name
+    manifesto = gerar_derivados(nome, getattr(objeto, campo).storage)
+    Modelo.objects.filter(pk=pk, **{campo: nome}).update(derivados=manifesto)
+    produto_id = objeto.produto_id if modelo == 'nucleo.ImagemProduto' else objeto.pk
+    fragmentos.invalidar_cards([produto_id])
+    # Novo srcset na página do produto: atualiza o carimbo das respostas condicionais
+    apps.get_model('nucleo.Produto').objects.filter(pk=produto_id).update(atualizado_em=timezone.now())
+    return manifesto
+
+
+def _processar_em_segundo_plano(modelo, pk):
+    """Executa processar() em uma thread do pool, com conexões próprias"""
+    try:
+        processar(modelo, pk)
+    except Exception:
+        logger.exception("Falha ao gerar derivados de %s #%s", modelo, pk)
+    finally:
+        # Conexões abertas por esta thread não são reaproveitadas pelo Django
+        connections.close_all()
+
+
+def agendar(instancia):
+    """
+    Agenda a geração de derivados para depois do commit da transação atual
+
+    Args:
+        instancia: Produto ou ImagemProduto recém-salvo
+    """
+    modelo, pk = instancia._meta.label, instancia.pk
+    transaction.on_commit(lambda: _pool().submit(_processar_em_segundo_plano, modelo, pk))
+
+
+def srcset(manifesto, formato):
+    """
+    Monta o atributo srcset de um formato a partir do manifesto
+
+    Returns:
+        String 'url 160w, url 400w, ...' (larguras repetidas aparecem uma vez)
+    """
+    partes = {}
+    for tamanho, largura in manifesto['larguras'].items():
+        caminho = manifesto['arquivos'][tamanho].get(formato)
+        if caminho and largura not in partes:
+            partes[largura] = f'{default_storage.url(caminho)} {largura}w'
+    return ', '.join(partes[largura] for largura in sorted(partes))
+
+
+def manifesto_valido(campo, manifesto):
+    """Indica se o manifesto corresponde ao arquivo atual do campo de imagem"""
+    return bool(manifesto) and bool(campo) and manifesto.get('origem') == campo.name
@@ -0,0 +1,38 @@
+"""
+Comando para apagar arquivos de imagem que não são mais usados
+
+Uso:
+    python manage.py coletar_blobs
+    python manage.py coletar_blobs --recontar --carencia 86400
+    python manage.py coletar_blobs --simular
+
+Remove os blobs do armazenamento por conteúdo (nucleo/storage.py) sem
+referências em Produto, ImagemProduto ou Marca, junto com seus derivados.
+--recontar corrige os contadores a partir dos campos de imagem antes da
+coleta (ex: após edições feitas direto no banco). Pode ser agendado
+(ex: cron diário).
+"""
+
+from django.core.management.base import BaseCommand
+
+from nucleo import storage
+
+
+class Command(BaseCommand):
+    help = "Apaga os arquivos de imagem sem referências (armazenamento por conteúdo)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--carencia', type=int, default=3600, help="Idade mínima (s) dos arquivos apagados")
+        parser.add_argument('--recontar', action='store_true', help="Recalcula as referências antes de coletar")
+        parser.add_argument('--simular', action='store_true', help="Apenas informa o que seria apagado")
+
+    def handle(self, *args, **options):
+        if options['recontar']:
+            corrigidos = storage.recontar_referencias()
+            self.stdout.write(f"{corrigidos} contadores de referência corrigidos")
+
+        apagados, liberados = storage.coletar_blobs(options['carencia'], simular=options['simular'])
+        verbo = "seriam apagados" if options['simular'] else "apagados"
+        self.stdout.write(self.style.SUCCESS(
+            f"{apagados} arquivos {verbo} ({liberados / 1024 / 1024:.1f} MB)"
+        ))
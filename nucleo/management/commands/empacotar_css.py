@@ -0,0 +1,32 @@
+"""
+Comando para gerar os pacotes de CSS minificados
+
+Uso:
+    python manage.py empacotar_css
+    python manage.py empacotar_css --destino build/static
+
+Deve rodar antes do collectstatic (ver procfile): os pacotes são gerados
+em ESTATICOS_BUILD_DIR, que faz parte de STATICFILES_DIRS, e o
+collectstatic aplica o hash no nome e a compressão gzip/brotli.
+"""
+
+from django.core.management.base import BaseCommand
+
+from nucleo import estaticos
+
+
+class Command(BaseCommand):
+    help = "Junta e minifica o CSS de cada página (PACOTES_CSS)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destino', help="Pasta de saída (padrão: ESTATICOS_BUILD_DIR)")
+
+    def handle(self, *args, **options):
+        tamanhos = estaticos.empacotar_css(options['destino'])
+        for nome, (origem, pacote) in tamanhos.items():
+            self.stdout.write(f"{estaticos.caminho_pacote(nome)}: {origem} -> {pacote} bytes")
+        total_origem = sum(origem for origem, _ in tamanhos.values())
+        total_pacotes = sum(pacote for _, pacote in tamanhos.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(tamanhos)} pacotes gerados ({total_origem} -> {total_pacotes} bytes)"
+        ))
@@ -0,0 +1,22 @@
+"""
+Comando para apagar reservas de estoque vencidas
+
+Uso:
+    python manage.py expirar_reservas
+
+Reservas vencidas já não contam no estoque disponível (expiração
+preguiçosa); este comando apenas remove as linhas antigas para manter a
+tabela pequena. Pode ser agendado (ex: cron a cada 5 minutos).
+"""
+
+from django.core.management.base import BaseCommand
+
+from nucleo import reservas
+
+
+class Command(BaseCommand):
+    help = "Remove as reservas de estoque cujo prazo já expirou"
+
+    def handle(self, *args, **options):
+        removidas = reservas.expirar_reservas()
+        self.stdout.write(self.style.SUCCESS(f"{removidas} reservas expiradas removidas"))
@@ -0,0 +1,51 @@
+"""
+Comando para exportar pedidos e itens em CSV ou JSONL
+
+Uso:
+    python manage.py exportar_pedidos > pedidos.csv
+    python manage.py exportar_pedidos --formato jsonl --saida pedidos.jsonl
+    python manage.py exportar_pedidos --inicio 2026-01-01 --fim 2026-01-31 --status finalizado
+
+A saída é escrita em blocos conforme os pedidos são lidos do banco, com
+a mesma geração da exportação do painel (nucleo/exportacao.py).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nucleo import exportacao
+
+
+class Command(BaseCommand):
+    help = "Exporta pedidos e itens (CSV ou JSONL) com filtros de período e status"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=list(exportacao.FORMATOS), default='csv')
+        parser.add_argument('--inicio', help="Primeiro dia (AAAA-MM-DD)")
+        parser.add_argument('--fim', help="Último dia (AAAA-MM-DD)")
+        parser.add_argument('--status', choices=list(exportacao.STATUS), help="Padrão: todos")
+        parser.add_argument('--saida', help="Arquivo de saída (padrão: saída padrão)")
+        parser.add_argument(
+            '--lote', type=int, default=exportacao.TAMANHO_LOTE_EXPORTACAO, help="Linhas lidas do banco por vez"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            filtros = exportacao.ler_filtros(options)
+        except exportacao.FiltroInvalido as erro:
+            raise CommandError(str(erro))
+
+        formato = filtros.pop('formato')
+        blocos = exportacao.exportar(exportacao.filtrar_pedidos(**filtros), formato, tamanho_lote=options['lote'])
+        if not options['saida']:
+            for bloco in blocos:
+                self.stdout.write(bloco, ending='')
+            return
+
+        inicio = time.monotonic()
+        with open(options['saida'], 'w', encoding='utf-8', newline='') as arquivo:
+            for bloco in blocos:
+                arquivo.write(bloco)
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(f"Pedidos exportados para {options['saida']} em {duracao:.1f}s"))
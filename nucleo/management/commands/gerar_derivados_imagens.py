@@ -0,0 +1,71 @@
+"""
+Comando para gerar os derivados responsivos das imagens já cadastradas
+
+Uso:
+    python manage.py gerar_derivados_imagens
+    python manage.py gerar_derivados_imagens --workers 4 --forcar
+
+Novas imagens são processadas automaticamente após o commit (ver
+nucleo/imagens.py); este comando faz a carga inicial do catálogo ou
+refaz tudo após mudar TAMANHOS/FORMATOS (--forcar). A geração roda em
+paralelo em um pool de threads; os manifestos são gravados com
+bulk_update na thread principal, em lotes.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from nucleo import fragmentos, imagens
+from nucleo.models import ImagemProduto, Produto
+
+
+class Command(BaseCommand):
+    help = "Gera miniaturas e versões WebP/AVIF das imagens de produtos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Threads gerando imagens em paralelo")
+        parser.add_argument('--lote', type=int, default=100, help="Objetos gravados por lote")
+        parser.add_argument('--forcar', action='store_true', help="Regera mesmo imagens com derivados atualizados")
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        total = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for modelo in (Produto, ImagemProduto):
+                total += self._processar_modelo(modelo, executor, options)
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(f"{total} imagens processadas em {duracao:.1f}s"))
+
+    def _processar_modelo(self, modelo, executor, options):
+        """Gera os derivados de um modelo, lote a lote; retorna quantos deram certo"""
+        campo = imagens.CAMPOS_IMAGEM[modelo._meta.label]
+        pendentes = [
+            objeto for objeto in modelo.objects.exclude(**{campo: ''}).order_by('pk').iterator()
+            if options['forcar'] or imagens.precisa_derivados(objeto)
+        ]
+        total = 0
+        for inicio in range(0, len(pendentes), options['lote']):
+            lote = pendentes[inicio:inicio + options['lote']]
+            nomes = [getattr(objeto, campo).name for objeto in lote]
+            origens = [imagens.armazenamento_original(modelo)] * len(lote)
+            processados = []
+            for objeto, resultado in zip(lote, executor.map(self._gerar, nomes, origens)):
+                if resultado is not None:
+                    objeto.derivados = resultado
+                    processados.append(objeto)
+            modelo.objects.bulk_update(processados, ['derivados'])
+            total += len(processados)
+            fragmentos.invalidar_cards({
+                objeto.produto_id if modelo is ImagemProduto else objeto.pk for objeto in processados
+            })
+        return total
+
+    def _gerar(self, nome, origem):
+        """Gera os derivados de um arquivo; erros são reportados e pulados"""
+        try:
+            return imagens.gerar_derivados(nome, origem)
+        except Exception as erro:
+            self.stderr.write(f"Falha ao processar {nome}: {erro}")
+            return None
@@ -0,0 +1,56 @@
+"""
+Comando para mover as imagens antigas para o armazenamento por conteúdo
+
+Uso:
+    python manage.py importar_midia
+    python manage.py importar_midia --remover-antigos
+
+Imagens enviadas antes do armazenamento por conteúdo (produtos/...,
+marcas/...) são regravadas pelo hash: cópias idênticas passam a apontar
+para um único arquivo. Os objetos são atualizados com um UPDATE por nome
+antigo e as referências recontadas ao final. Com --remover-antigos os
+arquivos antigos importados são apagados. Depois, rode
+gerar_derivados_imagens para refazer as miniaturas.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from nucleo import fragmentos, storage
+
+
+class Command(BaseCommand):
+    help = "Converte imagens antigas para o armazenamento por conteúdo (deduplicando)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--remover-antigos', action='store_true', help="Apaga os arquivos antigos importados")
+
+    def handle(self, *args, **options):
+        armazenamento = storage.armazenamento_conteudo()
+        importados = {}
+        for modelo, campo in storage.CAMPOS_REFERENCIA.items():
+            Modelo = apps.get_model(modelo)
+            antigos = (
+                Modelo.objects.exclude(**{f'{campo}__startswith': f'{storage.PASTA_CONTEUDO}/'})
+                .exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+                .values_list(campo, flat=True).distinct()
+            )
+            for antigo in list(antigos):
+                if antigo not in importados:
+                    if not armazenamento.exists(antigo):
+                        self.stderr.write(f"Arquivo não encontrado: {antigo}")
+                        continue
+                    with armazenamento.open(antigo, 'rb') as arquivo:
+                        importados[antigo] = armazenamento.save(antigo, arquivo)
+                Modelo.objects.filter(**{campo: antigo}).update(**{campo: importados[antigo]})
+
+        storage.recontar_referencias()
+        fragmentos.invalidar_cards(apps.get_model('nucleo', 'Produto').objects.values_list('id', flat=True))
+
+        if options['remover_antigos']:
+            for antigo in importados:
+                armazenamento.delete(antigo)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(importados)} arquivos importados em {len(set(importados.values()))} blobs"
+        ))
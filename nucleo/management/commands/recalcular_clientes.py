@@ -0,0 +1,32 @@
+"""
+Comando para reconstruir as estatísticas de pedidos dos clientes
+
+Uso:
+    python manage.py recalcular_clientes
+    python manage.py recalcular_clientes --lote 1000
+
+As estatísticas são mantidas pelo checkout; este comando serve para a
+carga inicial de históricos existentes, pedidos importados em lote ou
+correções manuais na base. Também atualiza Perfil.last_order_at.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from nucleo import clientes
+
+
+class Command(BaseCommand):
+    help = "Recalcula total de pedidos, total gasto, último pedido e marca favorita de todos os clientes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help="Usuários recalculados por transação")
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        total = clientes.recalcular_todos(tamanho_lote=options['lote'])
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} clientes recalculados em {duracao:.1f}s"
+        ))
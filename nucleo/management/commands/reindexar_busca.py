@@ -0,0 +1,33 @@
+"""
+Comando para reconstruir o índice de busca de produtos
+
+Uso:
+    python manage.py reindexar_busca
+    python manage.py reindexar_busca --lote 1000
+
+O índice é mantido automaticamente ao salvar produtos, marcas e
+categorias; este comando serve para a carga inicial de catálogos
+existentes ou após mudanças nas regras de normalização.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from nucleo import busca
+from nucleo.models import Produto
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice invertido de busca para todos os produtos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help="Produtos indexados por lote")
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        total = busca.reindexar_queryset(Produto.objects.all(), tamanho_lote=options['lote'])
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} produtos indexados em {duracao:.1f}s"
+        ))
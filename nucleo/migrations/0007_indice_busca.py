@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0006_alter_carrinho_options_alter_categoria_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comprimento', models.PositiveIntegerField(default=0)),
+                ('produto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='documento_busca', to='nucleo.produto')),
+            ],
+            options={
+                'verbose_name': 'Documento de Busca',
+                'verbose_name_plural': 'Documentos de Busca',
+            },
+        ),
+        migrations.CreateModel(
+            name='TermoIndice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termo', models.CharField(db_index=True, max_length=60)),
+                ('frequencia', models.PositiveIntegerField(default=1)),
+                ('comprimento_documento', models.PositiveIntegerField(default=0)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos_busca', to='nucleo.produto')),
+            ],
+            options={
+                'verbose_name': 'Termo do Índice',
+                'verbose_name_plural': 'Termos do Índice',
+                'constraints': [models.UniqueConstraint(fields=('termo', 'produto'), name='termo_indice_termo_produto_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_estatisticas(apps, schema_editor):
+    """Cria a estatística de cada produto existente a partir das reviews atuais"""
+    Produto = apps.get_model('nucleo', 'Produto')
+    Review = apps.get_model('nucleo', 'Review')
+    EstatisticaAvaliacao = apps.get_model('nucleo', 'EstatisticaAvaliacao')
+
+    estatisticas = {
+        produto_id: EstatisticaAvaliacao(produto_id=produto_id)
+        for produto_id in Produto.objects.values_list('id', flat=True)
+    }
+    contagens = Review.objects.values('produto_id', 'nota').annotate(total=models.Count('id'))
+    for linha in contagens:
+        nota = min(max(linha['nota'], 1), 5)
+        estatistica = estatisticas[linha['produto_id']]
+        setattr(estatistica, f'notas_{nota}', getattr(estatistica, f'notas_{nota}') + linha['total'])
+        estatistica.total_avaliacoes += linha['total']
+        estatistica.soma_notas += nota * linha['total']
+    for estatistica in estatisticas.values():
+        if estatistica.total_avaliacoes:
+            estatistica.media = estatistica.soma_notas / estatistica.total_avaliacoes
+    EstatisticaAvaliacao.objects.bulk_create(estatisticas.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0007_indice_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaAvaliacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_avaliacoes', models.PositiveIntegerField(default=0)),
+                ('soma_notas', models.PositiveIntegerField(default=0)),
+                ('notas_1', models.PositiveIntegerField(default=0)),
+                ('notas_2', models.PositiveIntegerField(default=0)),
+                ('notas_3', models.PositiveIntegerField(default=0)),
+                ('notas_4', models.PositiveIntegerField(default=0)),
+                ('notas_5', models.PositiveIntegerField(default=0)),
+                ('media', models.FloatField(db_index=True, default=0)),
+                ('produto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estatistica_avaliacao', to='nucleo.produto')),
+            ],
+            options={
+                'verbose_name': 'Estatística de Avaliação',
+                'verbose_name_plural': 'Estatísticas de Avaliação',
+            },
+        ),
+        migrations.RunPython(preencher_estatisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0008_estatistica_avaliacao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['produto', '-criado_em', '-id'], name='review_produto_recentes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['produto', '-nota', '-criado_em', '-id'], name='review_produto_nota_idx'),
+        ),
+    ]
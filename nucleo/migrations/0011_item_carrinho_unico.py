@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+def unificar_itens_duplicados(apps, schema_editor):
+    """Soma as quantidades de itens repetidos (mesmo carrinho e produto) em uma única linha"""
+    ItemCarrinho = apps.get_model('nucleo', 'ItemCarrinho')
+    duplicados = (
+        ItemCarrinho.objects.values('carrinho_id', 'produto_id')
+        .annotate(linhas=models.Count('id'), total=models.Sum('quantidade'), manter=models.Min('id'))
+        .filter(linhas__gt=1)
+    )
+    for grupo in duplicados:
+        ItemCarrinho.objects.filter(id=grupo['manter']).update(quantidade=grupo['total'])
+        ItemCarrinho.objects.filter(
+            carrinho_id=grupo['carrinho_id'], produto_id=grupo['produto_id']
+        ).exclude(id=grupo['manter']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0010_reserva_estoque'),
+    ]
+
+    operations = [
+        migrations.RunPython(unificar_itens_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='itemcarrinho',
+            constraint=models.UniqueConstraint(fields=('carrinho', 'produto'), name='item_carrinho_produto_unico'),
+        ),
+    ]
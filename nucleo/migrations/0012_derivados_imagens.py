@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0011_item_carrinho_unico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemproduto',
+            name='derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
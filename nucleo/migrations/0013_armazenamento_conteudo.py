@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:16
+
+import nucleo.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0012_derivados_imagens'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagemproduto',
+            name='imagem',
+            field=models.ImageField(storage=nucleo.storage.armazenamento_conteudo, upload_to='produtos/adicionais/'),
+        ),
+        migrations.AlterField(
+            model_name='marca',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=nucleo.storage.armazenamento_conteudo, upload_to='marcas/'),
+        ),
+        migrations.AlterField(
+            model_name='produto',
+            name='imagem_principal',
+            field=models.ImageField(storage=nucleo.storage.armazenamento_conteudo, upload_to='produtos/'),
+        ),
+        migrations.CreateModel(
+            name='BlobConteudo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=120, unique=True)),
+                ('tamanho', models.PositiveBigIntegerField(default=0)),
+                ('referencias', models.IntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Blob de Conteúdo',
+                'verbose_name_plural': 'Blobs de Conteúdo',
+                'indexes': [models.Index(fields=['referencias', 'criado_em'], name='blob_conteudo_coleta')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:32
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0013_armazenamento_conteudo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='marca',
+            index=models.Index(django.db.models.functions.text.Lower('nome'), name='marca_nome_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['usuario', '-criado_em'], name='pedido_usuario_recentes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['-criado_em', '-id'], name='produto_recentes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['marca', '-criado_em'], name='produto_marca_recentes_idx'),
+        ),
+    ]
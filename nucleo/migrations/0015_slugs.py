@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+from nucleo.slugs import slug_disponivel
+
+
+def preencher_slugs(apps, schema_editor):
+    """Gera o slug de cada marca, categoria e produto existente"""
+    for nome_modelo in ('Marca', 'Categoria', 'Produto'):
+        Modelo = apps.get_model('nucleo', nome_modelo)
+        tamanho = Modelo._meta.get_field('slug').max_length
+        usados = set()
+        objetos = list(Modelo.objects.order_by('id'))
+        for objeto in objetos:
+            objeto.slug = slug_disponivel(objeto.nome, usados.__contains__, tamanho)
+            usados.add(objeto.slug)
+        Modelo.objects.bulk_update(objetos, ['slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0014_indices_consultas'),
+    ]
+
+    operations = [
+        # 1. Coluna sem restrição, 2. preenchimento, 3. índice único
+        migrations.AddField(
+            model_name='marca',
+            name='slug',
+            field=models.SlugField(blank=True, db_index=False, max_length=120, null=True),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='slug',
+            field=models.SlugField(blank=True, db_index=False, max_length=120, null=True),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='slug',
+            field=models.SlugField(blank=True, db_index=False, max_length=220, null=True),
+        ),
+        migrations.RunPython(preencher_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='marca',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=120, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='categoria',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=120, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='produto',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=220, unique=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copiar_criado_em(apps, schema_editor):
+    """Produtos existentes começam com atualizado_em = criado_em"""
+    Produto = apps.get_model('nucleo', 'Produto')
+    Produto.objects.update(atualizado_em=models.F('criado_em'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0015_slugs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copiar_criado_em, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['atualizado_em'], name='produto_atualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['marca', 'atualizado_em'], name='produto_marca_atualizado_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0016_produto_atualizado_em'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaCliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_pedidos', models.PositiveIntegerField(default=0)),
+                ('total_gasto', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('ultimo_pedido_em', models.DateTimeField(blank=True, null=True)),
+                ('unidades_por_marca', models.JSONField(blank=True, default=dict)),
+                ('marca_favorita', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='nucleo.marca')),
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estatistica_cliente', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Estatística de Cliente',
+                'verbose_name_plural': 'Estatísticas de Clientes',
+                'indexes': [models.Index(fields=['-total_gasto'], name='cliente_total_gasto_idx')],
+            },
+        ),
+    ]
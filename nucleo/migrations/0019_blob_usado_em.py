@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copiar_criado_em(apps, schema_editor):
+    """Blobs existentes começam com usado_em = criado_em"""
+    BlobConteudo = apps.get_model('nucleo', 'BlobConteudo')
+    BlobConteudo.objects.update(usado_em=models.F('criado_em'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0018_indice_pedido_criado'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='blobconteudo',
+            name='blob_conteudo_coleta',
+        ),
+        migrations.AddField(
+            model_name='blobconteudo',
+            name='usado_em',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copiar_criado_em, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='blobconteudo',
+            index=models.Index(fields=['referencias', 'usado_em'], name='blob_conteudo_coleta'),
+        ),
+    ]
@@ -6,8 +6,13 @@ incluindo produtos, marcas, categorias, carrinho de compras, pedidos e reviews.
 """
 
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.urls import reverse
+from django.utils import timezone
+
+from .storage import armazenamento_conteudo
 
 # ============================================
 # MODELOS DE CATÁLOGO
@@ -19,17 +24,27 @@ class Marca(models.Model):
     
     Atributos:
         nome: Nome da marca (ex: "PlayStation")
-        logo: Imagem do logo da marca (opcional)
+        slug: Identificador da URL (/marca/playstation/), gerado do nome
+        logo: Imagem do logo da marca (opcional; armazenada por conteúdo,
+            ver nucleo/storage.py)
     """
     nome = models.CharField(max_length=100)
-    logo = models.ImageField(upload_to='marcas/', blank=True, null=True)
+    slug = models.SlugField(max_length=120, unique=True, blank=True)
+    logo = models.ImageField(upload_to='marcas/', storage=armazenamento_conteudo, blank=True, null=True)
 
     def __str__(self):
         return self.nome
+
+    def get_absolute_url(self):
+        return reverse('nucleo:produtos_por_marca', args=[self.slug])
     
     class Meta:
         verbose_name = "Marca"
         verbose_name_plural = "Marcas"
+        indexes = [
+            # Busca case-insensitive da página da marca (ver produtos_por_marca)
+            models.Index(Lower('nome'), name='marca_nome_lower_idx'),
+        ]
 
 
 class Categoria(models.Model):
@@ -38,8 +53,10 @@ class Categoria(models.Model):
     
     Atributos:
         nome: Nome da categoria
+        slug: Identificador para URLs, gerado do nome
     """
     nome = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=120, unique=True, blank=True)
 
     def __str__(self):
         return self.nome
@@ -55,17 +72,25 @@ class Produto(models.Model):
     
     Atributos:
         nome: Nome do produto
+        slug: Identificador da URL (/produto/<slug>/), gerado do nome
         descricao: Descrição detalhada do produto
         preco: Preço em formato decimal (ex: 199.90)
-        imagem_principal: Imagem principal do produto
+        imagem_principal: Imagem principal do produto (armazenada por
+            conteúdo, ver nucleo/storage.py)
         marca: Relação com a marca (ForeignKey)
         categoria: Relação com a categoria (ForeignKey, opcional)
         criado_em: Data e hora de criação automática
+        atualizado_em: Última alteração do produto ou do que aparece na sua
+            página (reviews, estoque, imagens); base das respostas
+            condicionais (ver nucleo/condicional.py)
+        derivados: Manifesto das versões redimensionadas da imagem principal
+            (gerado em segundo plano, ver nucleo/imagens.py)
     """
     nome = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=220, unique=True, blank=True)
     descricao = models.TextField(blank=True)
     preco = models.DecimalField(max_digits=8, decimal_places=2)  # Permite valores até 999,999.99
-    imagem_principal = models.ImageField(upload_to='produtos/')
+    imagem_principal = models.ImageField(upload_to='produtos/', storage=armazenamento_conteudo)
     marca = models.ForeignKey(Marca, on_delete=models.CASCADE, null=True)
     categoria = models.ForeignKey(
         Categoria, 
@@ -75,14 +100,28 @@ class Produto(models.Model):
         related_name='produtos'
     )
     criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    derivados = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.nome
+
+    def get_absolute_url(self):
+        return reverse('nucleo:detalhe_produto', args=[self.slug])
     
     class Meta:
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
         ordering = ['-criado_em']  # Ordenar por mais recente primeiro
+        indexes = [
+            # Catálogo paginado por cursor (ORDENACOES_CATALOGO['recentes'])
+            models.Index(fields=['-criado_em', '-id'], name='produto_recentes_idx'),
+            # Página da marca: filtro por marca já na ordem padrão
+            models.Index(fields=['marca', '-criado_em'], name='produto_marca_recentes_idx'),
+            # Carimbos das respostas condicionais: MAX(atualizado_em) lido direto do índice
+            models.Index(fields=['atualizado_em'], name='produto_atualizado_idx'),
+            models.Index(fields=['marca', 'atualizado_em'], name='produto_marca_atualizado_idx'),
+        ]
 
 
 class ImagemProduto(models.Model):
@@ -92,9 +131,11 @@ class ImagemProduto(models.Model):
     Atributos:
         produto: Produto ao qual a imagem pertence
         imagem: Arquivo de imagem
+        derivados: Manifesto das versões redimensionadas (ver nucleo/imagens.py)
     """
     produto = models.ForeignKey(Produto, related_name='imagens_adicionais', on_delete=models.CASCADE)
-    imagem = models.ImageField(upload_to='produtos/adicionais/')
+    imagem = models.ImageField(upload_to='produtos/adicionais/', storage=armazenamento_conteudo)
+    derivados = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Imagem extra de {self.produto.nome}"
@@ -135,6 +176,57 @@ class Review(models.Model):
         verbose_name = "Review"
         verbose_name_plural = "Reviews"
         ordering = ['-criado_em']  # Mais recentes primeiro
+        indexes = [
+            # Feed de reviews do produto (paginação por cursor, ver detalhe_produto)
+            models.Index(fields=['produto', '-criado_em', '-id'], name='review_produto_recentes_idx'),
+            models.Index(fields=['produto', '-nota', '-criado_em', '-id'], name='review_produto_nota_idx'),
+        ]
+
+
+class EstatisticaAvaliacao(models.Model):
+    """
+    Agregados das avaliações de um produto, mantidos incrementalmente
+    
+    Atualizado pelos sinais de Review (ver nucleo/avaliacoes.py), para que
+    cards e página de detalhe exibam a nota sem consultar todas as reviews.
+    
+    Atributos:
+        produto: Produto avaliado (OneToOne)
+        total_avaliacoes: Quantidade de reviews
+        soma_notas: Soma de todas as notas
+        notas_1 ... notas_5: Histograma (quantidade de reviews por nota)
+        media: Nota média (soma_notas / total_avaliacoes), indexada para ordenação
+    """
+    produto = models.OneToOneField(Produto, on_delete=models.CASCADE, related_name='estatistica_avaliacao')
+    total_avaliacoes = models.PositiveIntegerField(default=0)
+    soma_notas = models.PositiveIntegerField(default=0)
+    notas_1 = models.PositiveIntegerField(default=0)
+    notas_2 = models.PositiveIntegerField(default=0)
+    notas_3 = models.PositiveIntegerField(default=0)
+    notas_4 = models.PositiveIntegerField(default=0)
+    notas_5 = models.PositiveIntegerField(default=0)
+    media = models.FloatField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"{self.produto.nome}: {self.media:.1f} ({self.total_avaliacoes} avaliações)"
+    
+    def histograma(self):
+        """
+        Retorna a distribuição das notas, da maior para a menor
+        
+        Returns:
+            Lista de dicts com 'nota', 'quantidade' e 'percentual' (0-100)
+        """
+        linhas = []
+        for nota in range(5, 0, -1):
+            quantidade = getattr(self, f'notas_{nota}')
+            percentual = round(100 * quantidade / self.total_avaliacoes) if self.total_avaliacoes else 0
+            linhas.append({'nota': nota, 'quantidade': quantidade, 'percentual': percentual})
+        return linhas
+    
+    class Meta:
+        verbose_name = "Estatística de Avaliação"
+        verbose_name_plural = "Estatísticas de Avaliação"
 
 
 # ============================================
@@ -160,6 +252,42 @@ class Estoque(models.Model):
         verbose_name_plural = "Estoques"
 
 
+class ReservaEstoque(models.Model):
+    """
+    Reserva temporária de estoque feita ao colocar um produto no carrinho
+
+    Enquanto não expira, a quantidade reservada não pode ser vendida para
+    outros usuários. Reservas vencidas são simplesmente ignoradas pelas
+    consultas (expiração preguiçosa) e apagadas pelo comando expirar_reservas.
+
+    Atributos:
+        produto: Produto reservado
+        usuario: Usuário dono da reserva (uma reserva por produto e usuário)
+        quantidade: Quantidade reservada (igual à quantidade no carrinho)
+        expira_em: Data e hora em que a reserva deixa de valer
+    """
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='reservas')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reservas_estoque')
+    quantidade = models.PositiveIntegerField(default=1)
+    expira_em = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.quantidade}x {self.produto.nome} reservado para {self.usuario.username}"
+
+    class Meta:
+        verbose_name = "Reserva de Estoque"
+        verbose_name_plural = "Reservas de Estoque"
+        constraints = [
+            models.UniqueConstraint(fields=['produto', 'usuario'], name='reserva_produto_usuario_unica'),
+        ]
+        indexes = [
+            # Soma das reservas ativas de um produto (estoque disponível)
+            models.Index(fields=['produto', 'expira_em'], name='reserva_produto_expira_idx'),
+            # Varredura de reservas vencidas
+            models.Index(fields=['expira_em'], name='reserva_expira_idx'),
+        ]
+
+
 # ============================================
 # MODELOS DE CARRINHO DE COMPRAS
 # ============================================
@@ -202,6 +330,10 @@ class ItemCarrinho(models.Model):
     class Meta:
         verbose_name = "Item do Carrinho"
         verbose_name_plural = "Itens do Carrinho"
+        constraints = [
+            # Um produto aparece uma única vez por carrinho (permite upsert ao mesclar)
+            models.UniqueConstraint(fields=['carrinho', 'produto'], name='item_carrinho_produto_unico'),
+        ]
 
 
 # ============================================
@@ -279,6 +411,12 @@ class Pedido(models.Model):
         verbose_name = "Pedido"
         verbose_name_plural = "Pedidos"
         ordering = ['-criado_em']  # Mais recentes primeiro
+        indexes = [
+            # Histórico de pedidos do usuário (perfil)
+            models.Index(fields=['usuario', '-criado_em'], name='pedido_usuario_recentes_idx'),
+            # Exportação por período (nucleo/exportacao.py)
+            models.Index(fields=['criado_em', 'id'], name='pedido_criado_idx'),
+        ]
 
 
 class ItemPedido(models.Model):
@@ -308,4 +446,128 @@ class ItemPedido(models.Model):
     
     class Meta:
         verbose_name = "Item do Pedido"
-        verbose_name_plural = "Itens dos Pedidos"
\ No newline at end of file
+        verbose_name_plural = "Itens dos Pedidos"
+
+
+class EstatisticaCliente(models.Model):
+    """
+    Agregados dos pedidos de um usuário, mantidos incrementalmente
+
+    Atualizado na mesma transação do checkout (ver nucleo/clientes.py), para
+    que o perfil e as listas do admin exibam os números do cliente sem
+    percorrer o histórico de pedidos.
+
+    Atributos:
+        usuario: Cliente (OneToOne)
+        total_pedidos: Quantidade de pedidos finalizados
+        total_gasto: Soma dos totais dos pedidos
+        ultimo_pedido_em: Data do pedido mais recente
+        marca_favorita: Marca com mais unidades compradas
+        unidades_por_marca: Dict {marca_id: unidades compradas}, base para
+            escolher a marca favorita sem reler os itens dos pedidos
+    """
+    usuario = models.OneToOneField(User, on_delete=models.CASCADE, related_name='estatistica_cliente')
+    total_pedidos = models.PositiveIntegerField(default=0)
+    total_gasto = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    ultimo_pedido_em = models.DateTimeField(null=True, blank=True)
+    marca_favorita = models.ForeignKey(
+        Marca, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    unidades_por_marca = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.usuario.username}: {self.total_pedidos} pedidos (R$ {self.total_gasto})"
+
+    class Meta:
+        verbose_name = "Estatística de Cliente"
+        verbose_name_plural = "Estatísticas de Clientes"
+        indexes = [
+            # Listas de clientes do admin (maiores compradores primeiro)
+            models.Index(fields=['-total_gasto'], name='cliente_total_gasto_idx'),
+        ]
+
+# ============================================
+# MODELOS DE BUSCA (ÍNDICE INVERTIDO)
+# ============================================
+
+class DocumentoBusca(models.Model):
+    """
+    Estatísticas de um produto no índice de busca
+    
+    Usado para calcular o total de documentos e o comprimento médio
+    exigidos pelo ranking BM25 (ver nucleo/busca.py).
+    
+    Atributos:
+        produto: Produto indexado (OneToOne)
+        comprimento: Soma das frequências ponderadas dos termos do produto
+    """
+    produto = models.OneToOneField(Produto, on_delete=models.CASCADE, related_name='documento_busca')
+    comprimento = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Documento de busca de {self.produto.nome}"
+    
+    class Meta:
+        verbose_name = "Documento de Busca"
+        verbose_name_plural = "Documentos de Busca"
+
+
+class TermoIndice(models.Model):
+    """
+    Entrada do índice invertido: um termo presente em um produto
+    
+    Atributos:
+        termo: Radical normalizado (sem acentos, minúsculo)
+        produto: Produto onde o termo aparece
+        frequencia: Frequência do termo ponderada pelo campo (nome pesa mais)
+        comprimento_documento: Cópia de DocumentoBusca.comprimento, para o
+            BM25 ser calculado sem JOIN
+    """
+    termo = models.CharField(max_length=60, db_index=True)
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='termos_busca')
+    frequencia = models.PositiveIntegerField(default=1)
+    comprimento_documento = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.termo} -> {self.produto_id}"
+    
+    class Meta:
+        verbose_name = "Termo do Índice"
+        verbose_name_plural = "Termos do Índice"
+        constraints = [
+            models.UniqueConstraint(fields=['termo', 'produto'], name='termo_indice_termo_produto_unico'),
+        ]
+
+
+# ============================================
+# MODELOS DE MÍDIA
+# ============================================
+
+class BlobConteudo(models.Model):
+    """
+    Arquivo do armazenamento por conteúdo (ver nucleo/storage.py)
+    
+    Atributos:
+        nome: Caminho no storage (conteudo/<prefixo>/<sha256>.<extensão>)
+        tamanho: Tamanho em bytes
+        referencias: Quantos campos de imagem apontam para o arquivo
+            (mantido pelos sinais de Produto, ImagemProduto e Marca)
+        criado_em: Data da primeira gravação
+        usado_em: Último envio do conteúdo (novo ou reaproveitado); a
+            carência da coleta conta a partir daqui
+    """
+    nome = models.CharField(max_length=120, unique=True)
+    tamanho = models.PositiveBigIntegerField(default=0)
+    referencias = models.IntegerField(default=0)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    usado_em = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.nome} ({self.referencias} refs)"
+    
+    class Meta:
+        verbose_name = "Blob de Conteúdo"
+        verbose_name_plural = "Blobs de Conteúdo"
+        indexes = [
+            models.Index(fields=['referencias', 'usado_em'], name='blob_conteudo_coleta'),
+        ]
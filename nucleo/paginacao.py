@@ -0,0 +1,171 @@
+"""
+Paginação por cursor (keyset) - NerdHub E-commerce
+
+Em vez de OFFSET/LIMIT, cada página guarda os valores das colunas de
+ordenação do último item exibido (o "cursor"). A próxima página é buscada
+com um filtro "depois deste item", o que permite ao banco usar o índice
+da ordenação e faz páginas profundas custarem o mesmo que a primeira.
+"""
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+# Limite máximo de itens por página aceito vindo da URL
+LIMITE_MAXIMO = 100
+
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação malformado, adulterado ou de outra ordenação"""
+
+
+def _serializar_valor(valor):
+    """Converte valores de colunas em tipos aceitos pelo JSON (sem perder precisão)"""
+    if isinstance(valor, (datetime.datetime, datetime.date)):
+        return valor.isoformat()
+    if isinstance(valor, decimal.Decimal):
+        return str(valor)
+    return valor
+
+
+def codificar_cursor(valores):
+    """
+    Codifica a lista de valores de ordenação em um token opaco para URL
+
+    Args:
+        valores: Lista com os valores das colunas de ordenação do último item
+
+    Returns:
+        String base64 (url-safe, sem padding)
+    """
+    bruto = json.dumps([_serializar_valor(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """
+    Decodifica um token gerado por codificar_cursor
+
+    Raises:
+        CursorInvalido: Se o token não puder ser lido
+    """
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorInvalido("Cursor de paginação inválido")
+    if not isinstance(valores, list):
+        raise CursorInvalido("Cursor de paginação inválido")
+    return valores
+
+
+def _converter_valor(modelo, nome, valor):
+    """Converte o valor vindo do cursor para o tipo Python do campo do modelo"""
+    if valor is None:
+        return None
+    # O cursor só carrega escalares; listas e objetos são cursores forjados
+    if not isinstance(valor, (str, int, float, bool)):
+        raise CursorInvalido("Cursor de paginação inválido")
+    try:
+        campo = modelo._meta.get_field(nome)
+    except FieldDoesNotExist:
+        # Campos anotados ou de relacionamentos: usar o valor como veio
+        return valor
+    try:
+        return campo.to_python(valor)
+    except (ValidationError, TypeError, ValueError):
+        raise CursorInvalido("Cursor de paginação inválido")
+
+
+def _valor_do_item(item, nome):
+    """Lê o valor de ordenação de um item (objeto ou dict vindo de .values())"""
+    if isinstance(item, dict):
+        return item[nome]
+    valor = item
+    for parte in nome.split('__'):
+        valor = getattr(valor, parte)
+    return valor
+
+
+def _filtro_apos(campos, valores):
+    """
+    Monta o filtro "depois do cursor" para ordenação lexicográfica
+
+    Para (a DESC, b DESC) gera: a <= x AND (a < x OR (a = x AND b < y)).
+    O primeiro termo é redundante, mas deixa explícito o intervalo do
+    índice de 'a' para o planejador de consultas.
+    """
+    filtro = Q()
+    for posicao, (nome, descendente) in enumerate(campos):
+        operador = 'lt' if descendente else 'gt'
+        condicao = Q(**{f'{nome}__{operador}': valores[posicao]})
+        for (nome_anterior, _), valor_anterior in zip(campos[:posicao], valores[:posicao]):
+            condicao &= Q(**{nome_anterior: valor_anterior})
+        filtro |= condicao
+
+    primeiro_nome, primeiro_descendente = campos[0]
+    limite_indice = Q(**{f"{primeiro_nome}__{'lte' if primeiro_descendente else 'gte'}": valores[0]})
+    return limite_indice & filtro
+
+
+def paginar_por_cursor(queryset, cursor=None, limite=24, ordenacao=('-criado_em', '-id')):
+    """
+    Retorna uma página de resultados usando paginação keyset
+
+    A ordenação precisa ser total (terminar em uma coluna única, como 'id'),
+    senão itens com valores repetidos podem ser pulados entre páginas.
+
+    Args:
+        queryset: QuerySet base (filtros já aplicados)
+        cursor: Token da página anterior (None para a primeira página)
+        limite: Quantidade máxima de itens na página
+        ordenacao: Colunas de ordenação, no formato de order_by()
+
+    Returns:
+        Tupla (itens, proximo_cursor):
+        - itens: Lista com até 'limite' itens
+        - proximo_cursor: Token da próxima página ou None se for a última
+
+    Raises:
+        CursorInvalido: Se o cursor for inválido para esta ordenação
+    """
+    campos = [(campo.lstrip('-'), campo.startswith('-')) for campo in ordenacao]
+    queryset = queryset.order_by(*ordenacao)
+
+    if cursor:
+        valores = decodificar_cursor(cursor)
+        if len(valores) != len(campos):
+            raise CursorInvalido("Cursor de paginação inválido")
+        valores = [
+            _converter_valor(queryset.model, nome, valor)
+            for (nome, _), valor in zip(campos, valores)
+        ]
+        queryset = queryset.filter(_filtro_apos(campos, valores))
+
+    # Buscar um item a mais para saber se existe próxima página
+    itens = list(queryset[:limite + 1])
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        proximo_cursor = codificar_cursor([_valor_do_item(itens[-1], nome) for nome, _ in campos])
+
+    return itens, proximo_cursor
+
+
+def ler_limite(valor, padrao):
+    """
+    Lê o parâmetro de limite vindo da URL, respeitando LIMITE_MAXIMO
+
+    Valores ausentes ou inválidos retornam o padrão.
+    """
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        return padrao
+    return max(1, min(limite, LIMITE_MAXIMO))
@@ -0,0 +1,163 @@
+"""
+Finalização de pedidos - NerdHub E-commerce
+
+Transforma o carrinho do usuário em um Pedido dentro de uma única
+transação:
+
+1. Trava as linhas de Estoque dos produtos do carrinho, sempre na mesma
+   ordem (produto_id), para que dois checkouts simultâneos não entrem em
+   deadlock
+2. Recusa o pedido inteiro se alguma linha não tiver estoque suficiente,
+   descontando as reservas ativas de outros usuários (ver nucleo/reservas.py)
+3. Baixa o estoque com um único UPDATE condicional (F() + quantidade >= pedida)
+4. Cria o Pedido e insere todos os itens com bulk_create
+5. Soma o pedido às estatísticas do cliente (ver nucleo/clientes.py)
+6. Esvazia o carrinho e consome as reservas do usuário
+
+Se qualquer passo falhar, nada é gravado.
+"""
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+
+from . import clientes, condicional, facetas
+from .carrinho import resumir_carrinho
+from .models import Estoque, ItemCarrinho, ItemPedido, Pedido
+from .reservas import anotar_reservado, liberar
+
+
+# Campos do formulário de checkout copiados para o Pedido
+CAMPOS_ENTREGA = [
+    'endereco_destinatario', 'endereco_rua', 'endereco_numero',
+    'endereco_complemento', 'endereco_bairro', 'endereco_cidade',
+    'endereco_estado', 'endereco_cep', 'endereco_telefone',
+    'forma_pagamento',
+]
+
+
+class CarrinhoVazio(Exception):
+    """O carrinho não tem itens para finalizar"""
+
+
+class EstoqueInsuficiente(Exception):
+    """
+    Um ou mais produtos não têm estoque para a quantidade pedida
+
+    Atributos:
+        produtos: Nomes dos produtos sem estoque suficiente
+    """
+    def __init__(self, produtos):
+        self.produtos = produtos
+        super().__init__(f"Estoque insuficiente para: {', '.join(produtos)}")
+
+
+def baixar_estoque(quantidades, usuario=None):
+    """
+    Decrementa o estoque de vários produtos de forma atômica
+
+    Deve ser chamada dentro de uma transação. Produtos sem registro de
+    Estoque não têm controle e são ignorados (comportamento histórico).
+
+    Args:
+        quantidades: Dict {produto_id: quantidade}
+        usuario: Comprador; as reservas ativas dos demais usuários não
+            podem ser vendidas (None = ignorar reservas)
+
+    Returns:
+        Lista de IDs de produtos sem estoque suficiente (vazia se tudo certo)
+    """
+    # Travar as linhas em ordem fixa de produto_id (evita deadlock entre checkouts)
+    estoques = Estoque.objects.select_for_update().filter(produto_id__in=quantidades)
+    if usuario is not None:
+        estoques = anotar_reservado(estoques, excluir_usuario=usuario)
+        linhas = estoques.order_by('produto_id').values_list('produto_id', 'quantidade', 'reservado')
+        disponiveis = {produto_id: quantidade - reservado for produto_id, quantidade, reservado in linhas}
+    else:
+        disponiveis = dict(estoques.order_by('produto_id').values_list('produto_id', 'quantidade'))
+    faltando = [
+        produto_id for produto_id, disponivel in disponiveis.items()
+        if disponivel < quantidades[produto_id]
+    ]
+    if faltando or not disponiveis:
+        return faltando
+
+    # Um único UPDATE para todas as linhas; a condição quantidade >= pedida
+    # protege também bancos sem SELECT ... FOR UPDATE (ex: SQLite)
+    condicao = Q()
+    decremento = []
+    for produto_id in disponiveis:
+        condicao |= Q(produto_id=produto_id, quantidade__gte=quantidades[produto_id])
+        decremento.append(When(produto_id=produto_id, then=quantidades[produto_id]))
+    atualizados = Estoque.objects.filter(condicao).update(
+        quantidade=F('quantidade') - Case(*decremento, default=0)
+    )
+    if atualizados != len(disponiveis):
+        # Outro checkout baixou o estoque entre a leitura e o UPDATE (só
+        # possível sem trava de linha); o chamador desfaz a transação
+        return list(disponiveis)
+    condicional.tocar_produtos(disponiveis)
+    if any(disponiveis[produto_id] <= quantidades[produto_id] for produto_id in disponiveis):
+        # Algum produto pode ter esgotado: o UPDATE em lote não dispara os sinais
+        transaction.on_commit(facetas.invalidar_facetas)
+    return []
+
+
+def finalizar_carrinho(usuario, dados):
+    """
+    Cria um Pedido a partir do carrinho do usuário
+
+    Args:
+        usuario: User dono do carrinho
+        dados: Dict (ex: request.POST) com os campos de CAMPOS_ENTREGA
+
+    Returns:
+        Pedido criado
+
+    Raises:
+        CarrinhoVazio: Se o carrinho não tiver itens
+        EstoqueInsuficiente: Se algum produto não tiver estoque; nenhum
+            dado é gravado nesse caso
+    """
+    with transaction.atomic():
+        resumo = resumir_carrinho(usuario)
+        itens = [linha['item'] for linha in resumo['itens_com_total']]
+        if not itens:
+            raise CarrinhoVazio()
+
+        quantidades = {}
+        for item in itens:
+            quantidades[item.produto_id] = quantidades.get(item.produto_id, 0) + item.quantidade
+
+        faltando = baixar_estoque(quantidades, usuario=usuario)
+        if faltando:
+            nomes = sorted({item.produto.nome for item in itens if item.produto_id in faltando})
+            raise EstoqueInsuficiente(nomes)
+
+        pedido = Pedido.objects.create(
+            usuario=usuario,
+            total=resumo['total'],
+            finalizado=True,
+            **{campo: dados.get(campo, '') for campo in CAMPOS_ENTREGA}
+        )
+
+        # Preço fixado no momento da compra
+        ItemPedido.objects.bulk_create([
+            ItemPedido(
+                pedido=pedido,
+                produto_id=item.produto_id,
+                quantidade=item.quantidade,
+                preco_unitario=item.produto.preco,
+            )
+            for item in itens
+        ])
+
+        unidades_por_marca = {}
+        for item in itens:
+            if item.produto.marca_id is not None:
+                marca_id = item.produto.marca_id
+                unidades_por_marca[marca_id] = unidades_por_marca.get(marca_id, 0) + item.quantidade
+        clientes.registrar_pedido(pedido, unidades_por_marca)
+
+        ItemCarrinho.objects.filter(id__in=[item.id for item in itens]).delete()
+        liberar(usuario, list(quantidades))
+    return pedido
@@ -0,0 +1,200 @@
+"""
+Reservas de estoque - NerdHub E-commerce
+
+Ao colocar um produto no carrinho o usuário recebe uma reserva com prazo
+(settings.RESERVA_ESTOQUE_TTL). Enquanto a reserva vale, aquelas unidades
+não podem ser compradas por outros usuários:
+
+    disponível = Estoque.quantidade - soma das reservas ativas de outros
+
+A soma usa o índice (produto, expira_em) de ReservaEstoque em uma única
+consulta. Reservas vencidas não precisam ser apagadas para deixar de valer
+(basta expira_em <= agora); o comando expirar_reservas faz a limpeza.
+
+Produtos sem registro de Estoque não têm controle e nunca são reservados.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Estoque, ReservaEstoque
+
+
+def prazo_reserva():
+    """Data e hora de expiração de uma reserva feita agora"""
+    return timezone.now() + timedelta(seconds=settings.RESERVA_ESTOQUE_TTL)
+
+
+def reservas_ativas(agora=None):
+    """QuerySet das reservas que ainda não venceram"""
+    return ReservaEstoque.objects.filter(expira_em__gt=agora or timezone.now())
+
+
+def anotar_reservado(estoques, excluir_usuario=None):
+    """
+    Anota em cada Estoque a soma das reservas ativas do produto
+
+    Args:
+        estoques: QuerySet de Estoque
+        excluir_usuario: Usuário cujas reservas não contam (as próprias)
+
+    Returns:
+        QuerySet anotado com 'reservado'
+    """
+    reservas = reservas_ativas().filter(produto_id=OuterRef('produto_id'))
+    if excluir_usuario is not None:
+        reservas = reservas.exclude(usuario=excluir_usuario)
+    soma = reservas.order_by().values('produto_id').annotate(total=Sum('quantidade')).values('total')
+    return estoques.annotate(
+        reservado=Coalesce(Subquery(soma, output_field=IntegerField()), Value(0))
+    )
+
+
+def estoque_disponivel(produto_ids, excluir_usuario=None):
+    """
+    Calcula o estoque livre de vários produtos em uma única consulta
+
+    Args:
+        produto_ids: Lista de IDs de produtos
+        excluir_usuario: Usuário cujas reservas continuam disponíveis para ele
+
+    Returns:
+        Dict {produto_id: quantidade disponível}; produtos sem controle de
+        estoque não aparecem no dict
+    """
+    linhas = anotar_reservado(
+        Estoque.objects.filter(produto_id__in=produto_ids), excluir_usuario
+    ).values_list('produto_id', 'quantidade', 'reservado')
+    return {
+        produto_id: max(quantidade - reservado, 0)
+        for produto_id, quantidade, reservado in linhas
+    }
+
+
+def reservar(usuario, produto_id, quantidade, reduzindo=False):
+    """
+    Define a reserva do usuário para um produto e renova o prazo
+
+    A quantidade é o total desejado (a quantidade do item no carrinho), não
+    um incremento. A linha de Estoque é travada para que duas reservas
+    simultâneas não ultrapassem o estoque.
+
+    Uma redução nunca é recusada: se o estoque livre caiu abaixo da nova
+    quantidade (ex: a reserva venceu e outros compraram), a reserva fica
+    com o que ainda está livre.
+
+    Args:
+        usuario: Usuário dono do carrinho
+        produto_id: ID do produto
+        quantidade: Quantidade total a reservar
+        reduzindo: True se a quantidade do carrinho está diminuindo
+
+    Returns:
+        True se a reserva foi feita (ou o produto não tem controle de
+        estoque), False se não há unidades livres suficientes
+    """
+    with transaction.atomic():
+        estoque = (
+            anotar_reservado(Estoque.objects.select_for_update(), excluir_usuario=usuario)
+            .filter(produto_id=produto_id)
+            .values_list('quantidade', 'reservado')
+            .first()
+        )
+        if estoque is None:
+            return True
+        em_estoque, reservado = estoque
+        livre = max(em_estoque - reservado, 0)
+        if livre < quantidade:
+            if not reduzindo:
+                return False
+            quantidade = livre
+
+        ReservaEstoque.objects.update_or_create(
+            produto_id=produto_id,
+            usuario=usuario,
+            defaults={'quantidade': quantidade, 'expira_em': prazo_reserva()},
+        )
+    return True
+
+
+def reservar_varios(usuario, quantidades, reducoes=()):
+    """
+    Define as reservas do usuário para vários produtos de uma vez
+
+    Trava e confere todas as linhas de Estoque em uma única consulta e grava
+    as reservas com um único upsert. Se algum produto não tiver unidades
+    livres suficientes, nenhuma reserva é alterada. Produtos em 'reducoes'
+    nunca falham (como em reservar(..., reduzindo=True)).
+
+    Args:
+        usuario: Usuário dono do carrinho
+        quantidades: Dict {produto_id: quantidade total a reservar (> 0)}
+        reducoes: IDs de produtos cuja quantidade no carrinho está diminuindo
+
+    Returns:
+        Lista de IDs de produtos sem estoque livre suficiente (vazia se tudo
+        foi reservado)
+    """
+    with transaction.atomic():
+        linhas = (
+            anotar_reservado(
+                Estoque.objects.select_for_update().filter(produto_id__in=quantidades),
+                excluir_usuario=usuario,
+            )
+            .order_by('produto_id')
+            .values_list('produto_id', 'quantidade', 'reservado')
+        )
+        reservadas = {}
+        faltando = []
+        for produto_id, em_estoque, reservado in linhas:
+            livre = max(em_estoque - reservado, 0)
+            if livre >= quantidades[produto_id]:
+                reservadas[produto_id] = quantidades[produto_id]
+            elif produto_id in reducoes:
+                reservadas[produto_id] = livre
+            else:
+                faltando.append(produto_id)
+        if faltando:
+            return faltando
+
+        prazo = prazo_reserva()
+        ReservaEstoque.objects.bulk_create(
+            [
+                ReservaEstoque(produto_id=produto_id, usuario=usuario, quantidade=quantidade, expira_em=prazo)
+                for produto_id, quantidade in reservadas.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['produto', 'usuario'],
+            update_fields=['quantidade', 'expira_em'],
+        )
+    return []
+
+
+def liberar(usuario, produto_ids=None):
+    """
+    Remove as reservas do usuário
+
+    Args:
+        usuario: Usuário dono das reservas
+        produto_ids: Lista de IDs de produtos (None = todas as reservas)
+    """
+    reservas = ReservaEstoque.objects.filter(usuario=usuario)
+    if produto_ids is not None:
+        reservas = reservas.filter(produto_id__in=produto_ids)
+    reservas.delete()
+
+
+def expirar_reservas(agora=None):
+    """
+    Apaga as reservas vencidas
+
+    Returns:
+        Quantidade de reservas removidas
+    """
+    removidas, _ = ReservaEstoque.objects.filter(expira_em__lte=agora or timezone.now()).delete()
+    return removidas
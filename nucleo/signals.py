@@ -0,0 +1,243 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from .models import Produto, Marca, Categoria, Review, EstatisticaAvaliacao, Estoque, ImagemProduto
+from . import busca, avaliacoes, carrinho, condicional, facetas, fragmentos, imagens, slugs, storage
+
+@receiver(post_save, sender=Produto)
+def indexar_produto_busca(sender, instance, raw=False, **kwargs):
+    """
+    Atualiza o índice de busca sempre que um produto é salvo
+    
+    A remoção do produto apaga seus termos via CASCADE.
+    """
+    if raw:
+        return
+    busca.indexar_produto(instance)
+
+@receiver(post_save, sender=Marca)
+def reindexar_produtos_marca(sender, instance, created, raw=False, **kwargs):
+    """
+    Reindexa os produtos da marca quando ela é alterada (o nome faz parte do índice)
+    """
+    if raw or created:
+        return
+    busca.reindexar_queryset(Produto.objects.filter(marca=instance))
+
+@receiver(post_save, sender=Categoria)
+def reindexar_produtos_categoria(sender, instance, created, raw=False, **kwargs):
+    """
+    Reindexa os produtos da categoria quando ela é alterada (o nome faz parte do índice)
+    """
+    if raw or created:
+        return
+    busca.reindexar_queryset(Produto.objects.filter(categoria=instance))
+
+@receiver(pre_delete, sender=Categoria)
+def guardar_produtos_categoria(sender, instance, **kwargs):
+    """
+    Guarda os produtos da categoria antes da remoção (o SET_NULL não dispara sinais de Produto)
+    """
+    instance._produtos_categoria = list(Produto.objects.filter(categoria=instance).values_list('id', flat=True))
+
+@receiver(post_delete, sender=Categoria)
+def reindexar_produtos_categoria_removida(sender, instance, **kwargs):
+    """
+    Reindexa os produtos que perderam a categoria (o nome dela sai do índice)
+    """
+    produto_ids = getattr(instance, '_produtos_categoria', [])
+    if produto_ids:
+        busca.reindexar_queryset(Produto.objects.filter(id__in=produto_ids))
+
+
+@receiver(post_save, sender=Produto)
+def criar_estatistica_avaliacao(sender, instance, created, raw=False, **kwargs):
+    """
+    Cria os agregados de avaliação vazios para cada produto novo
+    """
+    if created and not raw:
+        EstatisticaAvaliacao.objects.get_or_create(produto=instance)
+
+@receiver(pre_save, sender=Review)
+def guardar_nota_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Guarda a nota atual do banco para detectar alterações em post_save
+    """
+    instance._nota_anterior = None
+    if instance.pk and not raw:
+        instance._nota_anterior = (
+            Review.objects.filter(pk=instance.pk).values_list('nota', flat=True).first()
+        )
+
+@receiver(post_save, sender=Review)
+def atualizar_estatistica_review_salva(sender, instance, created, raw=False, **kwargs):
+    """
+    Soma a nota da review nova (ou troca a nota antiga pela nova) nos agregados
+    """
+    if raw:
+        return
+    if created:
+        avaliacoes.ajustar_estatistica(instance.produto_id, instance.nota, 1)
+    elif instance._nota_anterior is not None and instance._nota_anterior != instance.nota:
+        avaliacoes.ajustar_estatistica(instance.produto_id, instance._nota_anterior, -1)
+        avaliacoes.ajustar_estatistica(instance.produto_id, instance.nota, 1)
+
+@receiver(post_delete, sender=Review)
+def atualizar_estatistica_review_removida(sender, instance, **kwargs):
+    """
+    Subtrai a nota da review removida dos agregados
+    """
+    avaliacoes.ajustar_estatistica(instance.produto_id, instance.nota, -1)
+
+@receiver(user_logged_in)
+def mesclar_carrinho_ao_entrar(sender, request, user, **kwargs):
+    """
+    Move o carrinho anônimo da sessão para o carrinho do usuário
+    """
+    if request is not None and hasattr(request, 'session'):
+        carrinho.mesclar_carrinho_sessao(request.session, user)
+
+@receiver(post_save, sender=Produto)
+@receiver(post_delete, sender=Produto)
+def invalidar_card_produto(sender, instance, **kwargs):
+    """
+    Descarta o card em cache do produto salvo ou removido
+
+    A versão só avança depois do commit: antes disso, uma requisição
+    concorrente ainda lê os dados antigos e os gravaria na versão nova.
+    """
+    produto_ids = [instance.id]
+    transaction.on_commit(lambda: fragmentos.invalidar_cards(produto_ids))
+
+@receiver(post_save, sender=Estoque)
+@receiver(post_delete, sender=Estoque)
+@receiver(post_save, sender=ImagemProduto)
+@receiver(post_delete, sender=ImagemProduto)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidar_card_relacionado(sender, instance, **kwargs):
+    """
+    Descarta o card do produto (após o commit) quando seu estoque, imagens ou reviews mudam
+    """
+    produto_ids = [instance.produto_id]
+    transaction.on_commit(lambda: fragmentos.invalidar_cards(produto_ids))
+
+@receiver(post_save, sender=Marca)
+def invalidar_cards_marca(sender, instance, created, **kwargs):
+    """
+    Descarta (após o commit) os cards de todos os produtos da marca alterada
+    
+    A remoção da marca remove os produtos, que disparam seus próprios sinais.
+    """
+    if created:
+        return
+    produto_ids = list(Produto.objects.filter(marca=instance).values_list('id', flat=True))
+    transaction.on_commit(lambda: fragmentos.invalidar_cards(produto_ids))
+
+@receiver(post_save, sender=Produto)
+@receiver(post_save, sender=ImagemProduto)
+def agendar_derivados_imagem(sender, instance, raw=False, **kwargs):
+    """
+    Agenda a geração dos derivados (thumb, card, zoom) quando a imagem muda
+    """
+    if not raw and imagens.precisa_derivados(instance):
+        imagens.agendar(instance)
+
+@receiver(pre_save, sender=Produto)
+@receiver(pre_save, sender=ImagemProduto)
+@receiver(pre_save, sender=Marca)
+def guardar_arquivo_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Guarda o arquivo atual do banco para ajustar as referências em post_save
+    """
+    campo = storage.CAMPOS_REFERENCIA[sender._meta.label]
+    instance._arquivo_anterior = None
+    if instance.pk and not raw and not instance._state.adding:
+        instance._arquivo_anterior = (
+            sender.objects.filter(pk=instance.pk).values_list(campo, flat=True).first()
+        )
+
+@receiver(post_save, sender=Produto)
+@receiver(post_save, sender=ImagemProduto)
+@receiver(post_save, sender=Marca)
+def contar_referencia_arquivo(sender, instance, raw=False, **kwargs):
+    """
+    Soma uma referência ao arquivo novo e subtrai do anterior quando a imagem muda
+    """
+    if raw:
+        return
+    atual = getattr(instance, storage.CAMPOS_REFERENCIA[sender._meta.label]).name
+    anterior = getattr(instance, '_arquivo_anterior', None)
+    if atual != anterior:
+        storage.somar_referencias([atual], 1)
+        storage.somar_referencias([anterior], -1)
+
+@receiver(post_delete, sender=Produto)
+@receiver(post_delete, sender=ImagemProduto)
+@receiver(post_delete, sender=Marca)
+def descontar_referencia_arquivo(sender, instance, **kwargs):
+    """
+    Subtrai a referência do arquivo do objeto removido (o arquivo fica para o coletar_blobs)
+    """
+    storage.somar_referencias([getattr(instance, storage.CAMPOS_REFERENCIA[sender._meta.label]).name], -1)
+
+@receiver(pre_save, sender=Produto)
+@receiver(pre_save, sender=Marca)
+@receiver(pre_save, sender=Categoria)
+def gerar_slug(sender, instance, raw=False, **kwargs):
+    """
+    Gera o slug a partir do nome no primeiro save (depois ele não muda)
+    """
+    if not raw:
+        slugs.preencher_slug(instance)
+
+@receiver(post_save, sender=Produto)
+@receiver(post_save, sender=Marca)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Produto)
+@receiver(post_delete, sender=Marca)
+@receiver(post_delete, sender=Categoria)
+def descartar_slug_cache(sender, instance, **kwargs):
+    """
+    Remove do cache slug -> id deste processo as entradas do objeto alterado
+    """
+    slugs.descartar_slug(sender, objeto_id=instance.pk)
+
+@receiver(post_save, sender=Produto)
+@receiver(post_save, sender=Estoque)
+@receiver(post_save, sender=Marca)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Produto)
+@receiver(post_delete, sender=Estoque)
+@receiver(post_delete, sender=Marca)
+@receiver(post_delete, sender=Categoria)
+def invalidar_facetas(sender, instance, **kwargs):
+    """
+    Descarta as contagens da navegação facetada (preço, marca, categoria ou estoque mudou)
+    """
+    facetas.invalidar_facetas()
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Estoque)
+@receiver(post_delete, sender=Estoque)
+@receiver(post_save, sender=ImagemProduto)
+@receiver(post_delete, sender=ImagemProduto)
+def tocar_produto_relacionado(sender, instance, raw=False, **kwargs):
+    """
+    Atualiza Produto.atualizado_em quando reviews, estoque ou imagens do produto mudam
+    """
+    if not raw:
+        condicional.tocar_produtos([instance.produto_id])
+
+@receiver(post_delete, sender=Produto)
+@receiver(post_save, sender=Marca)
+@receiver(post_delete, sender=Marca)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def invalidar_paginas_catalogo(sender, instance, **kwargs):
+    """
+    Avança a versão do catálogo (remoções e marcas/categorias não mudam atualizado_em)
+    """
+    condicional.invalidar_catalogo()
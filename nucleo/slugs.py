@@ -0,0 +1,147 @@
+"""
+Slugs de marcas, categorias e produtos - NerdHub E-commerce
+
+As páginas públicas usam URLs canônicas por slug (/marca/playstation/,
+/produto/funko-pop-homem-aranha/). O slug é gerado a partir do nome no
+primeiro save (sinal pre_save) e não muda quando o nome muda, para que
+links antigos continuem válidos.
+
+resolver_slug() traduz slug -> id com um cache LRU em memória por
+processo: páginas de marca e produto populares não fazem consulta de
+busca. Os sinais post_save/post_delete descartam as entradas do objeto
+alterado neste processo; nos demais processos uma entrada antiga é
+detectada pela view (o objeto carregado tem outro slug) e descartada.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.text import slugify
+
+
+class CacheSlugs:
+    """LRU slug -> id de um modelo, seguro entre threads"""
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self._ids = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, slug):
+        with self._trava:
+            objeto_id = self._ids.get(slug)
+            if objeto_id is None:
+                self.faltas += 1
+            else:
+                self.acertos += 1
+                self._ids.move_to_end(slug)
+            return objeto_id
+
+    def guardar(self, slug, objeto_id):
+        with self._trava:
+            self._ids[slug] = objeto_id
+            self._ids.move_to_end(slug)
+            while len(self._ids) > self.tamanho:
+                self._ids.popitem(last=False)
+
+    def descartar(self, slug=None, objeto_id=None):
+        """Remove a entrada do slug e/ou todas as que apontam para objeto_id"""
+        with self._trava:
+            if slug is not None:
+                self._ids.pop(slug, None)
+            if objeto_id is not None:
+                for chave in [chave for chave, valor in self._ids.items() if valor == objeto_id]:
+                    del self._ids[chave]
+
+    def limpar(self):
+        with self._trava:
+            self._ids.clear()
+            self.acertos = self.faltas = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+
+_caches = {}
+_trava_caches = threading.Lock()
+
+
+def cache_do_modelo(modelo):
+    """CacheSlugs do modelo (criado no primeiro uso)"""
+    with _trava_caches:
+        if modelo not in _caches:
+            _caches[modelo] = CacheSlugs(getattr(settings, 'SLUGS_CACHE_TAMANHO', 2048))
+        return _caches[modelo]
+
+
+def limpar_caches():
+    """Esvazia os caches de todos os modelos (testes)"""
+    for cache in list(_caches.values()):
+        cache.limpar()
+
+
+def resolver_slug(modelo, slug):
+    """
+    Traduz um slug no id do objeto, consultando o banco só na primeira vez
+
+    Args:
+        modelo: Classe do modelo (Marca, Categoria ou Produto)
+        slug: Slug vindo da URL
+
+    Returns:
+        id do objeto, ou None se não existir (ausências não são guardadas)
+    """
+    cache = cache_do_modelo(modelo)
+    objeto_id = cache.obter(slug)
+    if objeto_id is None:
+        objeto_id = modelo.objects.filter(slug=slug).values_list('id', flat=True).first()
+        if objeto_id is not None:
+            cache.guardar(slug, objeto_id)
+    return objeto_id
+
+
+def descartar_slug(modelo, slug=None, objeto_id=None):
+    """Remove do cache do processo as entradas de um slug e/ou objeto"""
+    cache_do_modelo(modelo).descartar(slug=slug, objeto_id=objeto_id)
+
+
+def slug_disponivel(texto, ocupado, tamanho_maximo=50):
+    """
+    Gera um slug a partir do texto que ainda não esteja em uso
+
+    Slugs só numéricos ganham um prefixo para não se confundirem com os
+    IDs das URLs antigas; repetições ganham o sufixo -2, -3...
+
+    Args:
+        texto: Texto de origem (ex: nome do produto)
+        ocupado: Função slug -> bool indicando se já está em uso
+        tamanho_maximo: max_length do SlugField
+
+    Returns:
+        Slug livre
+    """
+    base = slugify(texto)[:tamanho_maximo - 6].strip('-') or 'item'
+    if base.isdigit():
+        base = f'item-{base}'
+    slug = base
+    sufixo = 2
+    while ocupado(slug):
+        slug = f'{base}-{sufixo}'
+        sufixo += 1
+    return slug
+
+
+def preencher_slug(instancia, origem='nome'):
+    """Define instancia.slug a partir do campo 'origem', se estiver vazio"""
+    if instancia.slug:
+        return
+    modelo = type(instancia)
+    outros = modelo.objects.exclude(pk=instancia.pk) if instancia.pk else modelo.objects.all()
+    instancia.slug = slug_disponivel(
+        getattr(instancia, origem),
+        lambda slug: outros.filter(slug=slug).exists(),
+        modelo._meta.get_field('slug').max_length,
+    )
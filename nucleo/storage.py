@@ -0,0 +1,216 @@
+"""
+Armazenamento endereçado por conteúdo - NerdHub E-commerce
+
+Usado pelos campos de imagem de Produto, ImagemProduto e Marca. Cada
+arquivo é gravado com o hash SHA-256 do conteúdo como nome:
+
+    conteudo/ab/ab12...ef.png
+
+Enviar a mesma imagem de novo (outro produto, nova edição no admin, outro
+nome de arquivo) reaproveita o arquivo existente em vez de criar uma cópia.
+Como o nome muda sempre que o conteúdo muda, as URLs são imutáveis e
+servidas por views.servir_conteudo com cache de longo prazo.
+
+Cada arquivo tem um BlobConteudo com o número de referências; os sinais
+dos três modelos somam e subtraem (ver nucleo/signals.py) e o comando
+coletar_blobs apaga os arquivos sem referência. Nomes antigos
+(produtos/..., marcas/...) continuam funcionando e não são contados; o
+comando importar_midia os converte.
+"""
+
+import hashlib
+import os
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from . import imagens
+
+
+PASTA_CONTEUDO = 'conteudo'
+
+# Nome relativo à PASTA_CONTEUDO: prefixo/hash.extensão
+PADRAO_NOME = re.compile(r'^([0-9a-f]{2})/([0-9a-f]{64})(\.[a-z0-9]+)?$')
+
+# Campos de arquivo que referenciam blobs (rótulo do modelo -> campo)
+CAMPOS_REFERENCIA = {
+    'nucleo.Produto': 'imagem_principal',
+    'nucleo.ImagemProduto': 'imagem',
+    'nucleo.Marca': 'logo',
+}
+
+
+def eh_blob(nome):
+    """Indica se o nome de arquivo pertence ao armazenamento por conteúdo"""
+    return bool(nome) and nome.startswith(f'{PASTA_CONTEUDO}/')
+
+
+def hash_conteudo(arquivo):
+    """Calcula o SHA-256 de um arquivo lendo em blocos (volta ao início ao final)"""
+    arquivo.seek(0)
+    sha = hashlib.sha256()
+    for bloco in arquivo.chunks():
+        sha.update(bloco)
+    arquivo.seek(0)
+    return sha.hexdigest()
+
+
+@deconstructible
+class ArmazenamentoConteudo(FileSystemStorage):
+    """
+    FileSystemStorage que nomeia os arquivos pelo hash do conteúdo
+
+    O nome pedido pelo campo (upload_to + nome do arquivo enviado) só
+    contribui com a extensão. Se o conteúdo já existe, nada é gravado.
+
+    O BlobConteudo é marcado como usado antes de conferir o arquivo: um
+    blob órfão reaproveitado volta a ter carência na coleta, e uma coleta
+    já em andamento (que apaga a linha antes do arquivo, na mesma
+    transação) faz o UPDATE esperar e o arquivo ser gravado de novo.
+    """
+
+    def _save(self, name, content):
+        digest = hash_conteudo(content)
+        extensao = os.path.splitext(name)[1].lower()
+        nome = f'{PASTA_CONTEUDO}/{digest[:2]}/{digest}{extensao}'
+        BlobConteudo = apps.get_model('nucleo', 'BlobConteudo')
+        if not BlobConteudo.objects.filter(nome=nome).update(usado_em=timezone.now()):
+            BlobConteudo.objects.get_or_create(nome=nome, defaults={'tamanho': content.size})
+        if not self.exists(nome):
+            gravado = super()._save(nome, content)
+            if gravado != nome:
+                # Corrida entre dois envios iguais: o FileSystemStorage gravou
+                # uma cópia com sufixo; o conteúdo é o mesmo
+                self.delete(gravado)
+        return nome
+
+    def url(self, name):
+        if eh_blob(name):
+            return reverse('nucleo:servir_conteudo', args=[name[len(PASTA_CONTEUDO) + 1:]])
+        return super().url(name)
+
+
+_armazenamento = ArmazenamentoConteudo()
+
+
+def armazenamento_conteudo():
+    """Instância usada pelos campos de imagem (callable para as migrations)"""
+    return _armazenamento
+
+
+def somar_referencias(nomes, delta):
+    """
+    Soma 'delta' ao contador de referências dos blobs
+
+    Nomes fora do armazenamento por conteúdo são ignorados.
+
+    Args:
+        nomes: Nomes de arquivos (podem repetir; cada ocorrência conta)
+        delta: +1 ao referenciar, -1 ao deixar de referenciar
+    """
+    BlobConteudo = apps.get_model('nucleo', 'BlobConteudo')
+    for nome in nomes:
+        if eh_blob(nome):
+            BlobConteudo.objects.filter(nome=nome).update(referencias=F('referencias') + delta)
+
+
+def contar_referencias():
+    """
+    Conta, direto nos campos de imagem, quantas vezes cada blob é usado
+
+    Returns:
+        Counter {nome: referências}
+    """
+    contagem = Counter()
+    for modelo, campo in CAMPOS_REFERENCIA.items():
+        nomes = apps.get_model(modelo).objects.filter(**{f'{campo}__startswith': f'{PASTA_CONTEUDO}/'})
+        contagem.update(nomes.values_list(campo, flat=True))
+    return contagem
+
+
+def recontar_referencias():
+    """
+    Corrige os contadores de todos os blobs a partir dos campos de imagem
+
+    Returns:
+        Número de blobs cujo contador foi corrigido
+    """
+    BlobConteudo = apps.get_model('nucleo', 'BlobConteudo')
+    contagem = contar_referencias()
+    corrigidos = []
+    for blob in BlobConteudo.objects.only('id', 'nome', 'referencias').iterator():
+        if blob.referencias != contagem.get(blob.nome, 0):
+            blob.referencias = contagem.get(blob.nome, 0)
+            corrigidos.append(blob)
+    BlobConteudo.objects.bulk_update(corrigidos, ['referencias'], batch_size=500)
+    return len(corrigidos)
+
+
+def _apagar_arquivo(nome):
+    """Apaga um blob e os derivados gerados a partir dele"""
+    armazenamento = armazenamento_conteudo()
+    armazenamento.delete(nome)
+    pasta = f'{imagens.PASTA_DERIVADOS}/{os.path.splitext(nome)[0]}'
+    if armazenamento.exists(pasta):
+        for arquivo in armazenamento.listdir(pasta)[1]:
+            armazenamento.delete(f'{pasta}/{arquivo}')
+
+
+def coletar_blobs(carencia=3600, simular=False):
+    """
+    Apaga os blobs sem referências
+
+    Só são apagados blobs não usados (BlobConteudo.usado_em) há mais de
+    'carencia' segundos, e arquivos sem BlobConteudo (ex: de uploads
+    interrompidos) mais antigos que isso, para não remover um arquivo
+    recém-enviado ou reaproveitado cujo objeto ainda não foi salvo.
+
+    Args:
+        carencia: Idade mínima (segundos) para um arquivo ser apagado
+        simular: Se True, apenas conta o que seria apagado
+
+    Returns:
+        Tupla (arquivos apagados, bytes liberados)
+    """
+    BlobConteudo = apps.get_model('nucleo', 'BlobConteudo')
+    armazenamento = armazenamento_conteudo()
+    limite = timezone.now() - timedelta(seconds=carencia)
+    apagados, liberados = 0, 0
+
+    orfaos = BlobConteudo.objects.filter(referencias__lte=0, usado_em__lt=limite)
+    for blob in orfaos.iterator():
+        if simular:
+            apagados += 1
+            liberados += blob.tamanho
+            continue
+        # O DELETE condicional evita apagar um blob referenciado ou reenviado
+        # nesse meio-tempo; o arquivo sai na mesma transação, antes de um
+        # _save concorrente conseguir marcar o blob (ver ArmazenamentoConteudo)
+        with transaction.atomic():
+            if not orfaos.filter(pk=blob.pk).delete()[0]:
+                continue
+            _apagar_arquivo(blob.nome)
+        apagados += 1
+        liberados += blob.tamanho
+
+    # Arquivos no disco sem registro (nem referência)
+    if armazenamento.exists(PASTA_CONTEUDO):
+        conhecidos = set(BlobConteudo.objects.values_list('nome', flat=True)) | set(contar_referencias())
+        for prefixo in armazenamento.listdir(PASTA_CONTEUDO)[0]:
+            for arquivo in armazenamento.listdir(f'{PASTA_CONTEUDO}/{prefixo}')[1]:
+                nome = f'{PASTA_CONTEUDO}/{prefixo}/{arquivo}'
+                if nome in conhecidos or armazenamento.get_modified_time(nome) >= limite:
+                    continue
+                liberados += armazenamento.size(nome)
+                apagados += 1
+                if not simular:
+                    _apagar_arquivo(nome)
+    return apagados, liberados
@@ -0,0 +1,19 @@
+"""
+Template tags de cards de produtos
+
+Uso:
+    {% load cards %}
+    {% cards_produtos produtos 'nucleo/partials/card_produto.html' %}
+"""
+
+from django import template
+
+from nucleo.fragmentos import renderizar_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def cards_produtos(produtos, template_name):
+    """Renderiza os cards dos produtos usando o cache de fragmentos"""
+    return renderizar_cards(produtos, template_name)
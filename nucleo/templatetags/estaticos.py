@@ -0,0 +1,46 @@
+"""
+Template tags do pipeline de estáticos
+
+Uso:
+    {% load estaticos %}
+    {% css_pacote 'perfil' %}
+
+Emite um <link> para o pacote minificado (ver nucleo/estaticos.py). Em
+DEBUG, ou se o pacote ainda não foi gerado, emite um <link> por arquivo de
+origem, para que alterações no CSS apareçam sem reempacotar.
+"""
+
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from nucleo import estaticos
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _pacote_disponivel(nome):
+    """Indica se o pacote foi gerado (conferido uma vez por processo)"""
+    caminho = estaticos.caminho_pacote(nome)
+    return staticfiles_storage.exists(caminho) or finders.find(caminho) is not None
+
+
+@register.simple_tag
+def css_pacote(nome):
+    """
+    Renderiza os <link rel="stylesheet"> de um pacote de CSS
+
+    Args:
+        nome: Chave de PACOTES_CSS (ex: 'perfil')
+    """
+    if settings.DEBUG or not _pacote_disponivel(nome):
+        arquivos = estaticos.PACOTES_CSS[nome]
+    else:
+        arquivos = [estaticos.caminho_pacote(nome)]
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((static(arquivo),) for arquivo in arquivos))
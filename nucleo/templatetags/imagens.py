@@ -0,0 +1,67 @@
+"""
+Template tags de imagens responsivas
+
+Uso:
+    {% load imagens %}
+    {% imagem_responsiva produto.imagem_principal produto.derivados 'card' alt=produto.nome class='funko-img' %}
+
+Emite <picture> com um <source> por formato (AVIF, WebP) e um <img> JPEG
+com srcset, a partir do manifesto gerado por nucleo/imagens.py. Enquanto
+os derivados não existem, emite um <img> simples com a imagem original.
+"""
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from nucleo import imagens
+
+register = template.Library()
+
+# Valor padrão do atributo sizes para cada tamanho
+SIZES_PADRAO = {
+    'thumb': '80px',
+    'card': '(max-width: 600px) 50vw, 300px',
+    'zoom': '(max-width: 768px) 100vw, 50vw',
+}
+
+
+def _atributos(atributos):
+    return format_html_join('', ' {}="{}"', ((nome, valor) for nome, valor in atributos.items() if valor is not None))
+
+
+@register.simple_tag
+def imagem_responsiva(campo, manifesto, tamanho='card', sizes=None, **atributos):
+    """
+    Renderiza a imagem com srcset dos derivados
+
+    Args:
+        campo: ImageField (ex: produto.imagem_principal)
+        manifesto: Manifesto de derivados do objeto (ex: produto.derivados)
+        tamanho: 'thumb', 'card' ou 'zoom' (define o src padrão e o sizes)
+        sizes: Atributo sizes (padrão de SIZES_PADRAO)
+        **atributos: Atributos extras do <img> (alt, class, loading, id...)
+    """
+    if not campo:
+        return ''
+    if not imagens.manifesto_valido(campo, manifesto):
+        return format_html('<img src="{}"{}>', campo.url, _atributos(atributos))
+
+    sizes = sizes or SIZES_PADRAO[tamanho]
+    fontes = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (imagens.TIPOS_MIME[formato], imagens.srcset(manifesto, formato), sizes)
+            for formato in ('avif', 'webp')
+            if formato in manifesto['arquivos'][tamanho]
+        ),
+    )
+    jpeg = manifesto['arquivos'][tamanho]['jpeg']
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        fontes,
+        default_storage.url(jpeg),
+        imagens.srcset(manifesto, 'jpeg'),
+        sizes,
+        _atributos(atributos),
+    )
@@ -5,18 +5,27 @@ app_name = 'nucleo'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('produtos/pagina/', views.produtos_pagina, name='produtos_pagina'),
+    path('produtos/facetas/', views.produtos_facetados, name='produtos_facetados'),
     # path('produto/<int:id>/', views.detalhe_produto, name='detalhe_produto'),
+    path('busca/', views.buscar, name='buscar'),
+    path('busca/sugestoes/', views.autocompletar, name='autocompletar'),
+    path('midia/<path:nome>', views.servir_conteudo, name='servir_conteudo'),
     path('sobre/', views.sobre, name='sobre'),
     path('suporte/', views.suporte, name='suporte'),
     path('usuario/', include('usuarios.urls'), name='usuarios'),
-    path('marca/<str:marca_nome>/', views.produtos_por_marca, name='produtos_por_marca'),
-    path('produto/<int:produto_id>/', views.detalhe_produto, name='detalhe_produto'),
+    path('marca/<str:marca_slug>/', views.produtos_por_marca, name='produtos_por_marca'),
+    # URL antiga por id: redireciona para a canônica por slug (slugs nunca são só números)
+    path('produto/<int:produto_id>/', views.detalhe_produto_legado, name='detalhe_produto_legado'),
+    path('produto/<slug:produto_slug>/', views.detalhe_produto, name='detalhe_produto'),
     path('produto/<int:produto_id>/adicionar_carrinho/', views.adicionar_ao_carrinho, name='adicionar_ao_carrinho'),
     path('produto/<int:produto_id>/adicionar_review/', views.adicionar_review, name='adicionar_review'),
+    path('produto/<int:produto_id>/avaliacoes/', views.avaliacoes_produto, name='avaliacoes_produto'),
 
     path('carrinho/', views.ver_carrinho, name='ver_carrinho'),
     path('carrinho/remover/<int:item_id>/', views.remover_item_carrinho, name='remover_item_carrinho'),
     path('carrinho/alterar_quantidade/<int:item_id>/', views.alterar_quantidade_carrinho, name='alterar_quantidade_carrinho'),
+    path('carrinho/atualizar/', views.atualizar_carrinho, name='atualizar_carrinho'),
     path('checkout/', views.checkout, name='checkout'),
     path('carrinho/finalizar/', views.finalizar_pedido, name='finalizar_pedido'),
     
@@ -25,4 +34,6 @@ urlpatterns = [
     path('gerenciar/produtos/adicionar/', views.admin_produto_adicionar, name='admin_produto_adicionar'),
     path('gerenciar/produtos/editar/<int:produto_id>/', views.admin_produto_editar, name='admin_produto_editar'),
     path('gerenciar/produtos/remover/<int:produto_id>/', views.admin_produto_remover, name='admin_produto_remover'),
+    path('gerenciar/cache/cards/', views.admin_cache_cards, name='admin_cache_cards'),
+    path('gerenciar/pedidos/exportar/', views.admin_exportar_pedidos, name='admin_exportar_pedidos'),
 ]
\ No newline at end of file
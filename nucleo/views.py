@@ -5,44 +5,218 @@ Este arquivo contém todas as views (controladores) do sistema,
 responsáveis por processar requisições e retornar respostas.
 """
 
+import json
+
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Produto, Review, Marca, Carrinho, ItemCarrinho, Pedido, Estoque, ItemPedido, Categoria
+from .models import Produto, Review, Marca, Estoque, Categoria
+from .paginacao import paginar_por_cursor, ler_limite, CursorInvalido
+from .avaliacoes import normalizar_nota
+from .carrinho import QUANTIDADE_MAXIMA, resumir_carrinho, obter_carrinho
+from .pedidos import finalizar_carrinho, CarrinhoVazio, EstoqueInsuficiente
+from . import busca, exportacao, facetas, fragmentos, slugs, storage
+from .condicional import resposta_condicional, carimbo_catalogo, carimbo_marca, carimbo_produto
+from .consultas import orcamento_consultas
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Lower
+from django.http import FileResponse, Http404, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
+
+
+# Quantidade de produtos por página no catálogo
+PRODUTOS_POR_PAGINA = 24
+
+# Ordenações disponíveis no catálogo (valor do parâmetro ?ordem=)
+ORDENACOES_CATALOGO = {
+    'recentes': ('-criado_em', '-id'),
+    'avaliacao': ('-media_avaliacao', '-id'),
+}
+
+
+# Reviews exibidas por página na página de detalhe
+REVIEWS_POR_PAGINA = 10
+
+# Ordenações do feed de reviews (cobertas pelos índices de Review.Meta)
+ORDENACOES_REVIEWS = {
+    'recentes': ('-criado_em', '-id'),
+    'nota': ('-nota', '-criado_em', '-id'),
+}
+
+# Máximo de itens alterados em uma chamada de atualizar_carrinho
+ITENS_POR_ATUALIZACAO = 100
+
+
+def _ler_ordem(request):
+    """Retorna a ordenação pedida em ?ordem= (padrão: 'recentes')"""
+    ordem = request.GET.get('ordem')
+    return ordem if ordem in ORDENACOES_CATALOGO else 'recentes'
+
+
+def _pagina_catalogo(ordem, cursor, limite=PRODUTOS_POR_PAGINA, filtro=None):
+    """
+    Busca uma página do catálogo com os agregados de avaliação já carregados
+    
+    Args:
+        filtro: Q opcional aplicado aos produtos (ex: navegação facetada)
+    
+    Returns:
+        Tupla (produtos, proximo_cursor) de paginar_por_cursor
+        
+    Raises:
+        CursorInvalido: Se o cursor for inválido
+    """
+    produtos = Produto.objects.select_related('estatistica_avaliacao')
+    if filtro is not None:
+        produtos = produtos.filter(filtro)
+    if ordem == 'avaliacao':
+        # Todo produto tem estatística (criada no post_save), então o INNER JOIN não perde itens
+        produtos = produtos.filter(estatistica_avaliacao__isnull=False).annotate(
+            media_avaliacao=F('estatistica_avaliacao__media')
+        )
+    return paginar_por_cursor(produtos, cursor, limite=limite, ordenacao=ORDENACOES_CATALOGO[ordem])
+
+
+def _carimbo_marca(marca_slug):
+    """Carimbo da página da marca para resposta_condicional (None se o slug não existir)"""
+    marca_id = slugs.resolver_slug(Marca, marca_slug)
+    return carimbo_marca(marca_id) if marca_id is not None else None
+
+
+def _carimbo_produto(produto_slug):
+    """Carimbo da página do produto para resposta_condicional (None se o slug não existir)"""
+    produto_id = slugs.resolver_slug(Produto, produto_slug)
+    return carimbo_produto(produto_id) if produto_id is not None else None
 
 
 # ============================================
 # VIEWS PÚBLICAS - CATÁLOGO
 # ============================================
 
+@orcamento_consultas(7)
+@resposta_condicional(carimbo_catalogo)
 def index(request):
     """
     View da página inicial / catálogo de produtos
     
-    Exibe todos os produtos disponíveis em cards.
-    Também passa todas as marcas para o menu dropdown.
+    Exibe a primeira página do catálogo em cards (paginação por cursor).
+    As páginas seguintes são carregadas pelo scroll infinito através de
+    'produtos_pagina'; sem JavaScript, o link "Ver mais" usa ?cursor=.
+    Também passa todas as marcas para o menu dropdown. Visitantes anônimos
+    recebem 304 se o catálogo não mudou (ver nucleo/condicional.py).
     
     Args:
         request: HttpRequest object
+            GET opcional:
+            - cursor: Token da página a exibir
+            - ordem: 'recentes' (padrão) ou 'avaliacao'
         
     Returns:
         Renderiza template 'nucleo/index.html' com:
-        - produtos: QuerySet de todos os produtos
+        - produtos: Lista com uma página de produtos
+        - proximo_cursor: Token da próxima página (None se for a última)
+        - ordem: Ordenação aplicada
         - marcas: QuerySet de todas as marcas
         - page_name: Identificador da página atual
     """
-    produtos = Produto.objects.all()
+    ordem = _ler_ordem(request)
+    try:
+        produtos, proximo_cursor = _pagina_catalogo(ordem, request.GET.get('cursor'))
+    except CursorInvalido:
+        # Cursor adulterado: voltar para a primeira página
+        produtos, proximo_cursor = _pagina_catalogo(ordem, None)
     marcas = Marca.objects.all()
     return render(request, 'nucleo/index.html', {
         'produtos': produtos, 
+        'proximo_cursor': proximo_cursor,
+        'ordem': ordem,
         'marcas': marcas, 
         'page_name': 'index'
     })
 
 
+@require_GET
+def produtos_pagina(request):
+    """
+    Fragmento JSON do catálogo para o scroll infinito
+    
+    Retorna os cards HTML de uma página de produtos a partir do cursor
+    recebido. O custo é o mesmo para qualquer profundidade, pois a busca
+    usa o índice da ordenação (criado_em ou média de avaliação) e não OFFSET.
+    
+    Args:
+        request: HttpRequest object
+            GET esperado:
+            - cursor: Token retornado pela página anterior
+            - ordem: 'recentes' (padrão) ou 'avaliacao'
+            - limite: Quantidade de produtos (opcional, máximo 100)
+        
+    Returns:
+        JsonResponse com:
+        - success: Boolean
+        - html: Cards dos produtos renderizados
+        - proximo_cursor: Token da próxima página (None se for a última)
+    """
+    limite = ler_limite(request.GET.get('limite'), PRODUTOS_POR_PAGINA)
+    try:
+        produtos, proximo_cursor = _pagina_catalogo(_ler_ordem(request), request.GET.get('cursor'), limite)
+    except CursorInvalido:
+        return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
+    
+    html = render_to_string('nucleo/partials/cards_produtos.html', {'produtos': produtos}, request=request)
+    return JsonResponse({'success': True, 'html': html, 'proximo_cursor': proximo_cursor})
+
+
+@require_GET
+@orcamento_consultas(3)
+def produtos_facetados(request):
+    """
+    Catálogo filtrado por marca, categoria, faixa de preço e estoque (JSON)
+    
+    Retorna uma página de cards dos produtos que atendem aos filtros e as
+    contagens de todas as opções de filtro para a barra lateral. As
+    contagens saem de uma única consulta agrupada (em cache), não de um
+    COUNT por opção (ver nucleo/facetas.py).
+    
+    Args:
+        request: HttpRequest object
+            GET opcional (marca, categoria e faixa podem se repetir):
+            - marca: Slug da marca
+            - categoria: Slug da categoria
+            - faixa: Faixa de preço ('ate-50', '50-100', '100-200', '200-500', 'acima-500')
+            - em_estoque: '1' para apenas produtos disponíveis
+            - cursor, ordem, limite: Como em 'produtos_pagina'
+        
+    Returns:
+        JsonResponse com:
+        - success: Boolean
+        - html: Cards dos produtos renderizados
+        - proximo_cursor: Token da próxima página (None se for a última)
+        - facetas: Contagens por opção (ver facetas.contar_facetas)
+    """
+    selecao = facetas.ler_selecao(request.GET)
+    limite = ler_limite(request.GET.get('limite'), PRODUTOS_POR_PAGINA)
+    try:
+        produtos, proximo_cursor = _pagina_catalogo(
+            _ler_ordem(request), request.GET.get('cursor'), limite, filtro=facetas.filtro_produtos(selecao)
+        )
+    except CursorInvalido:
+        return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
+    
+    html = render_to_string('nucleo/partials/cards_produtos.html', {'produtos': produtos}, request=request)
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'proximo_cursor': proximo_cursor,
+        'facetas': facetas.contar_facetas(selecao),
+    })
+
+
 def sobre(request):
     """
     View da página "Sobre"
@@ -73,82 +247,301 @@ def suporte(request):
     return render(request, 'nucleo/suporte.html', {'page_name': 'suporte'})
 
 
-def produtos_por_marca(request, marca_nome):
+@orcamento_consultas(8)
+@resposta_condicional(_carimbo_marca)
+def produtos_por_marca(request, marca_slug):
     """
     View para filtrar produtos por marca específica
     
-    Busca produtos de uma marca específica (case-insensitive).
-    Se a marca não existir, retorna 404.
+    A marca é identificada pelo slug (/marca/star-wars/), traduzido em id
+    pelo cache em memória (nucleo/slugs.py), e vem no JOIN da consulta dos
+    produtos: a página não faz consulta de busca da marca. URLs antigas
+    com o nome da marca (/marca/Star Wars/) redirecionam para a canônica.
+    Visitantes anônimos recebem 304 se nenhum produto da marca mudou.
     
     Args:
         request: HttpRequest object
-        marca_nome: Nome da marca (str) vindo da URL
+        marca_slug: Slug da marca (ou nome, nas URLs antigas) vindo da URL
         
     Returns:
         Renderiza template 'nucleo/por_marca.html' com:
         - marca: Objeto Marca encontrado
-        - produtos: QuerySet de produtos da marca
+        - produtos: Lista de produtos da marca
+        Redirect 301 para a URL canônica se a URL usar o nome da marca
+        
+    Raises:
+        Http404: Se a marca não existir
     """
-    marca = get_object_or_404(Marca, nome__iexact=marca_nome)  # Case-insensitive
-    produtos = Produto.objects.filter(marca=marca)
+    marca_id = slugs.resolver_slug(Marca, marca_slug)
+    if marca_id is None:
+        # Case-insensitive com LOWER() dos dois lados: usa o índice marca_nome_lower_idx
+        marca = (
+            Marca.objects.alias(nome_minusculo=Lower('nome'))
+            .filter(nome_minusculo=Lower(Value(marca_slug))).order_by('id').first()
+        )
+        if marca is None:
+            raise Http404("Marca não encontrada")
+        return redirect(marca, permanent=True)
+    
+    produtos = list(Produto.objects.filter(marca_id=marca_id).select_related('marca', 'estatistica_avaliacao'))
+    marca = produtos[0].marca if produtos else Marca.objects.filter(id=marca_id).first()
+    if marca is None or marca.slug != marca_slug:
+        # Entrada antiga do cache (marca removida ou alterada em outro processo)
+        slugs.descartar_slug(Marca, slug=marca_slug)
+        return redirect(request.path)
+    
     return render(request, 'nucleo/por_marca.html', {
         'marca': marca, 
         'produtos': produtos
     })
 
 
-def detalhe_produto(request, produto_id):
+def detalhe_produto_legado(request, produto_id):
+    """
+    Redireciona a URL antiga por id (/produto/42/) para a canônica por slug
+    
+    A query string (ex: ?ordem_reviews=nota) é preservada.
+    """
+    slug = Produto.objects.filter(id=produto_id).values_list('slug', flat=True).first()
+    if slug is None:
+        raise Http404("Produto não encontrado")
+    url = reverse('nucleo:detalhe_produto', args=[slug])
+    if request.GET:
+        url = f'{url}?{request.GET.urlencode()}'
+    return redirect(url, permanent=True)
+
+
+@orcamento_consultas(11)
+@resposta_condicional(_carimbo_produto)
+def detalhe_produto(request, produto_slug):
     """
     View de detalhes de um produto específico
     
     Exibe informações completas do produto, incluindo:
     - Dados do produto (nome, preço, descrição, imagens)
-    - Reviews de usuários
+    - Primeira página de reviews (as demais vêm de 'avaliacoes_produto')
     - Produtos relacionados da mesma marca
     
+    Visitantes anônimos recebem 304 se nem o produto nem os relacionados
+    mudaram (reviews e estoque atualizam Produto.atualizado_em).
+    
     Args:
         request: HttpRequest object
-        produto_id: ID do produto (int) vindo da URL
+            GET opcional:
+            - ordem_reviews: 'recentes' (padrão) ou 'nota'
+        produto_slug: Slug do produto vindo da URL (traduzido em id pelo
+            cache em memória de nucleo/slugs.py)
         
     Returns:
         Renderiza template 'nucleo/detalhe_produto.html' com:
         - produto: Objeto Produto
         - relacionados: QuerySet de até 4 produtos da mesma marca
-        - reviews: QuerySet de todas as reviews do produto
+        - reviews: Primeira página de reviews (com usuário já carregado)
+        - proximo_cursor_reviews: Token da próxima página de reviews
+        - ordem_reviews: Ordenação aplicada às reviews
     """
-    produto = get_object_or_404(Produto, id=produto_id)
+    produto_id = slugs.resolver_slug(Produto, produto_slug)
+    if produto_id is None:
+        raise Http404("Produto não encontrado")
+    # Estatística de avaliação vem no mesmo SELECT (média e histograma sem consultar reviews)
+    produto = Produto.objects.select_related('estatistica_avaliacao').filter(id=produto_id).first()
+    if produto is None or produto.slug != produto_slug:
+        # Entrada antiga do cache (produto removido ou alterado em outro processo)
+        slugs.descartar_slug(Produto, slug=produto_slug)
+        return redirect(request.get_full_path())
     
     # Buscar produtos relacionados (mesma marca, exceto o atual, limit 4)
-    relacionados = Produto.objects.filter(marca=produto.marca).exclude(id=produto.id)[:4]
-    
-    # Buscar todas as reviews do produto
-    reviews = Review.objects.filter(produto=produto)
+    relacionados = Produto.objects.filter(marca_id=produto.marca_id).exclude(id=produto.id)[:4]
+    
+    # Buscar apenas a primeira página de reviews
+    ordem_reviews = request.GET.get('ordem_reviews')
+    if ordem_reviews not in ORDENACOES_REVIEWS:
+        ordem_reviews = 'recentes'
+    reviews, proximo_cursor_reviews = paginar_por_cursor(
+        Review.objects.filter(produto=produto).select_related('usuario'),
+        limite=REVIEWS_POR_PAGINA,
+        ordenacao=ORDENACOES_REVIEWS[ordem_reviews],
+    )
     
     return render(request, 'nucleo/detalhe_produto.html', {
         'produto': produto,
         'relacionados': relacionados,
-        'reviews': reviews
+        'reviews': reviews,
+        'proximo_cursor_reviews': proximo_cursor_reviews,
+        'ordem_reviews': ordem_reviews
+    })
+
+
+@require_GET
+def avaliacoes_produto(request, produto_id):
+    """
+    Feed JSON de reviews de um produto (paginação por cursor)
+    
+    Usado pelo botão "Carregar mais avaliações" da página de detalhe.
+    O nome do usuário vem no mesmo SELECT (JOIN), sem consulta por review.
+    
+    Args:
+        request: HttpRequest object
+            GET esperado:
+            - cursor: Token da página anterior (vazio para a primeira)
+            - ordem: 'recentes' (padrão) ou 'nota'
+            - limite: Quantidade de reviews (opcional, máximo 100)
+        produto_id: ID do produto (int) vindo da URL
+        
+    Returns:
+        JsonResponse com:
+        - success: Boolean
+        - reviews: Lista de {id, usuario, nota, comentario, criado_em}
+        - proximo_cursor: Token da próxima página (None se for a última)
+    """
+    ordem = request.GET.get('ordem')
+    if ordem not in ORDENACOES_REVIEWS:
+        ordem = 'recentes'
+    limite = ler_limite(request.GET.get('limite'), REVIEWS_POR_PAGINA)
+    
+    reviews = Review.objects.filter(produto_id=produto_id).values(
+        'id', 'nota', 'comentario', 'criado_em', 'usuario__username'
+    )
+    try:
+        pagina, proximo_cursor = paginar_por_cursor(
+            reviews, request.GET.get('cursor'), limite=limite, ordenacao=ORDENACOES_REVIEWS[ordem]
+        )
+    except CursorInvalido:
+        return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'reviews': [
+            {
+                'id': review['id'],
+                'usuario': review['usuario__username'],
+                'nota': review['nota'],
+                'comentario': review['comentario'],
+                'criado_em': review['criado_em'].isoformat(),
+            }
+            for review in pagina
+        ],
+        'proximo_cursor': proximo_cursor
     })
 
 
 # ============================================
-# VIEWS DE CARRINHO - REQUER LOGIN
+# VIEWS DE BUSCA
+# ============================================
+
+@orcamento_consultas(5)
+def buscar(request):
+    """
+    Página de resultados da busca de produtos
+    
+    Consulta o índice invertido (ver nucleo/busca.py) e exibe os produtos
+    ordenados por relevância (BM25).
+    
+    Args:
+        request: HttpRequest object
+            GET esperado:
+            - q: Texto da busca
+        
+    Returns:
+        Renderiza template 'nucleo/busca.html' com:
+        - consulta: Texto buscado
+        - produtos: Lista de produtos encontrados (até 48)
+    """
+    consulta = request.GET.get('q', '').strip()
+    produtos = busca.buscar(consulta) if consulta else []
+    return render(request, 'nucleo/busca.html', {
+        'consulta': consulta,
+        'produtos': produtos,
+        'page_name': 'busca'
+    })
+
+
+@require_GET
+def autocompletar(request):
+    """
+    Sugestões de produtos para o campo de busca (autocompletar)
+    
+    Args:
+        request: HttpRequest object
+            GET esperado:
+            - q: Texto parcial digitado (o último termo é tratado como prefixo)
+        
+    Returns:
+        JsonResponse com:
+        - sugestoes: Lista de {id, nome, url}
+    """
+    produtos = busca.autocompletar(request.GET.get('q', ''))
+    sugestoes = [
+        {
+            'id': produto.id,
+            'nome': produto.nome,
+            'url': reverse('nucleo:detalhe_produto', args=[produto.slug]),
+        }
+        for produto in produtos
+    ]
+    return JsonResponse({'sugestoes': sugestoes})
+
+
+# ============================================
+# VIEWS DE MÍDIA
+# ============================================
+
+# Arquivos endereçados por conteúdo nunca mudam: cache de um ano, imutável
+CACHE_CONTEUDO = 'public, max-age=31536000, immutable'
+
+@require_GET
+def servir_conteudo(request, nome):
+    """
+    Serve um arquivo do armazenamento por conteúdo (ver nucleo/storage.py)
+    
+    O nome contém o hash do conteúdo, então a resposta pode ficar em cache
+    indefinidamente; o hash também serve de ETag.
+    
+    Args:
+        request: HttpRequest object
+        nome: Caminho relativo à pasta de conteúdo (<prefixo>/<sha256>.<ext>)
+        
+    Returns:
+        FileResponse com Cache-Control imutável, ou 304 se o ETag confere
+        
+    Raises:
+        Http404: Se o nome é inválido ou o arquivo não existe
+    """
+    correspondencia = storage.PADRAO_NOME.match(nome)
+    if not correspondencia or correspondencia.group(1) != correspondencia.group(2)[:2]:
+        raise Http404("Arquivo não encontrado")
+    
+    etag = f'"{correspondencia.group(2)}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        resposta = HttpResponseNotModified()
+    else:
+        armazenamento = storage.armazenamento_conteudo()
+        caminho = f'{storage.PASTA_CONTEUDO}/{nome}'
+        if not armazenamento.exists(caminho):
+            raise Http404("Arquivo não encontrado")
+        resposta = FileResponse(armazenamento.open(caminho, 'rb'))
+    resposta['ETag'] = etag
+    resposta['Cache-Control'] = CACHE_CONTEUDO
+    return resposta
+
+
+# ============================================
+# VIEWS DE CARRINHO - USUÁRIOS E VISITANTES
 # ============================================
 
-@login_required
 def adicionar_ao_carrinho(request, produto_id):
     """
-    Adiciona um produto ao carrinho do usuário
+    Adiciona um produto ao carrinho (do usuário ou da sessão, se anônimo)
     
     Lógica:
     1. Verifica se o produto existe
-    2. Verifica disponibilidade em estoque (se houver controle)
-    3. Cria carrinho se não existir
-    4. Se item já existe no carrinho, incrementa quantidade
-    5. Se item novo, adiciona com quantidade 1
+    2. Confere o estoque livre; para usuários autenticados, reserva a nova
+       quantidade por RESERVA_ESTOQUE_TTL segundos (ver nucleo/reservas.py)
+    3. Se item já existe no carrinho, incrementa quantidade
+    4. Se item novo, adiciona com quantidade 1
     
     Args:
-        request: HttpRequest object (deve ter usuário autenticado)
+        request: HttpRequest object
         produto_id: ID do produto (int) vindo da URL
         
     Returns:
@@ -157,37 +550,15 @@ def adicionar_ao_carrinho(request, produto_id):
     """
     produto = get_object_or_404(Produto, id=produto_id)
     
-    # Verificar se o produto tem estoque (opcional)
-    # Se não houver registro de estoque, permitir adicionar ao carrinho
-    estoque = None
-    try:
-        estoque = produto.estoque
-    except:
-        # Se não houver estoque cadastrado, continuar normalmente
-        pass
-    
-    # Obter ou criar carrinho do usuário
-    carrinho, created = Carrinho.objects.get_or_create(usuario=request.user)
-    
-    # Obter ou criar item no carrinho
-    item, created = ItemCarrinho.objects.get_or_create(carrinho=carrinho, produto=produto)
-    
-    if not created:
-        # Item já existe no carrinho, incrementar quantidade
-        # Se houver controle de estoque, verificar disponibilidade
-        if estoque and estoque.quantidade <= item.quantidade:
-            messages.error(request, "Quantidade indisponível em estoque!")
-        else:
-            item.quantidade += 1
-            item.save()
-            messages.success(request, "Quantidade atualizada no carrinho!")
+    nova_quantidade = obter_carrinho(request).adicionar(produto.id)
+    if not nova_quantidade:
+        messages.error(request, "Quantidade indisponível em estoque!")
+    elif nova_quantidade > 1:
+        messages.success(request, "Quantidade atualizada no carrinho!")
     else:
-        # Item novo, definir quantidade inicial
-        item.quantidade = 1
-        item.save()
         messages.success(request, "Produto adicionado ao carrinho!")
     
-    return redirect('nucleo:detalhe_produto', produto_id=produto.id)
+    return redirect(produto)
 
 
 @login_required
@@ -206,42 +577,44 @@ def adicionar_review(request, produto_id):
         Redirect para página de detalhes do produto
         Mensagem: success (review adicionada)
     """
+    produto = get_object_or_404(Produto, id=produto_id)
+    
     if request.method == "POST":
-        produto = get_object_or_404(Produto, id=produto_id)
-        
         # Obter dados do formulário
         texto = request.POST.get("texto")
         nota = request.POST.get("nota")
         
-        # Validar e converter nota para inteiro (default: 5)
-        if nota:
-            nota = int(nota)
-        else:
+        # Validar e converter nota para inteiro entre 1 e 5 (default: 5)
+        try:
+            nota = normalizar_nota(nota) if nota else 5
+        except ValueError:
             nota = 5
         
-        # Criar nova review
-        Review.objects.create(
-            produto=produto, 
-            usuario=request.user, 
-            comentario=texto, 
-            nota=nota
-        )
+        # Criar nova review (a estatística do produto é atualizada pelo
+        # sinal post_save, dentro da mesma transação)
+        with transaction.atomic():
+            Review.objects.create(
+                produto=produto, 
+                usuario=request.user, 
+                comentario=texto, 
+                nota=nota
+            )
         
         messages.success(request, "Review adicionada com sucesso!")
     
-    return redirect('nucleo:detalhe_produto', produto_id=produto_id)
+    return redirect(produto)
 
 
-@login_required
+@orcamento_consultas(7)
 def ver_carrinho(request):
     """
-    Exibe o carrinho de compras do usuário
+    Exibe o carrinho de compras (do usuário ou da sessão, se anônimo)
     
-    Calcula o total de cada item e o total geral do carrinho.
+    Obtém itens, total de cada item e total geral em uma única consulta.
     Também obtém produtos sugeridos para exibir abaixo do carrinho.
     
     Args:
-        request: HttpRequest object (usuário autenticado)
+        request: HttpRequest object
         
     Returns:
         Renderiza template 'nucleo/carrinho.html' com:
@@ -249,62 +622,49 @@ def ver_carrinho(request):
         - total: Total geral do carrinho (Decimal)
         - produtos_sugeridos: Produtos recomendados para exibir sugestões
     """
-    # Obter ou criar carrinho para o usuário
-    carrinho, created = Carrinho.objects.get_or_create(usuario=request.user)
-    itens = carrinho.itens.all()
-    
-    # Calcular o total para cada item e o total geral
-    itens_com_total = []
-    total_geral = 0
-    
-    for item in itens:
-        total_item = item.produto.preco * item.quantidade
-        total_geral += total_item
-        itens_com_total.append({
-            'item': item,
-            'total': total_item
-        })
+    # Itens, subtotais e total geral em uma única consulta
+    resumo = obter_carrinho(request).resumo()
     
     # Obter produtos sugeridos (excluindo os que já estão no carrinho)
-    produtos_no_carrinho = [item.produto.id for item in itens]
+    produtos_no_carrinho = [linha['item'].produto_id for linha in resumo['itens_com_total']]
     produtos_sugeridos = Produto.objects.exclude(id__in=produtos_no_carrinho)[:8]  # Limitar a 8 produtos
     
     return render(request, 'nucleo/carrinho.html', {
-        'itens_com_total': itens_com_total,
-        'total': total_geral,
+        'itens_com_total': resumo['itens_com_total'],
+        'total': resumo['total'],
         'produtos_sugeridos': produtos_sugeridos
     })
 
 
-@login_required
 @require_POST
 def alterar_quantidade_carrinho(request, item_id):
     """
     Altera a quantidade de um item no carrinho
     
     Args:
-        request: HttpRequest object (usuário autenticado)
-        item_id: ID do ItemCarrinho (int) vindo da URL
+        request: HttpRequest object (POST com 'acao': 'aumentar' ou 'diminuir')
+        item_id: ID do ItemCarrinho (ou do produto, no carrinho da sessão)
         
     Returns:
         JsonResponse com status de sucesso ou erro
     """
-    item = get_object_or_404(ItemCarrinho, id=item_id)
+    carrinho = obter_carrinho(request)
+    item = carrinho.obter_item(item_id)
     
     # Verificar se o item pertence ao carrinho do usuário (segurança)
-    if item.carrinho.usuario != request.user:
+    if item is None:
         return JsonResponse({'success': False, 'error': 'Permissão negada'}, status=403)
     
     acao = request.POST.get('acao')
     
     if acao == 'aumentar':
-        item.quantidade += 1
-        item.save()
+        if not carrinho.definir_quantidade(item, item.quantidade + 1):
+            return JsonResponse({'success': False, 'error': 'Quantidade indisponível em estoque'}, status=400)
         return JsonResponse({'success': True, 'nova_quantidade': item.quantidade})
     elif acao == 'diminuir':
         if item.quantidade > 1:
-            item.quantidade -= 1
-            item.save()
+            if not carrinho.definir_quantidade(item, item.quantidade - 1):
+                return JsonResponse({'success': False, 'error': 'Não foi possível alterar a quantidade'}, status=400)
             return JsonResponse({'success': True, 'nova_quantidade': item.quantidade})
         else:
             return JsonResponse({'success': False, 'error': 'Quantidade mínima atingida'}, status=400)
@@ -312,7 +672,66 @@ def alterar_quantidade_carrinho(request, item_id):
         return JsonResponse({'success': False, 'error': 'Ação inválida'}, status=400)
 
 
-@login_required
+@require_POST
+def atualizar_carrinho(request):
+    """
+    Aplica um lote de alterações de quantidade no carrinho (API JSON)
+    
+    Permite ao front-end acumular vários cliques em "+"/"-" e enviá-los
+    em uma única chamada. O estoque é conferido em uma consulta e as
+    quantidades gravadas em lote; se faltar estoque para algum item,
+    nada é alterado.
+    
+    Args:
+        request: HttpRequest object com corpo JSON:
+            {"itens": {"<item_id>": nova_quantidade, ...}} (0 remove o item)
+        
+    Returns:
+        JsonResponse com o resumo recalculado do carrinho:
+        - itens: Lista de {id, quantidade, total}
+        - total: Total geral (string decimal)
+        - quantidade_total: Soma das quantidades
+        Erros: 400 (requisição inválida, quantidade acima de
+        QUANTIDADE_MAXIMA ou sem estoque, com 'itens_sem_estoque') ou 404
+        (item fora do carrinho)
+    """
+    try:
+        dados = json.loads(request.body)
+        novas = {int(item_id): int(quantidade) for item_id, quantidade in dados['itens'].items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Requisição inválida'}, status=400)
+    
+    if (
+        not novas or len(novas) > ITENS_POR_ATUALIZACAO
+        or min(novas.values()) < 0 or max(novas.values()) > QUANTIDADE_MAXIMA
+    ):
+        return JsonResponse({'success': False, 'error': 'Requisição inválida'}, status=400)
+    
+    carrinho = obter_carrinho(request)
+    try:
+        faltando = carrinho.atualizar_quantidades(novas)
+    except Http404:
+        return JsonResponse({'success': False, 'error': 'Item não encontrado no carrinho'}, status=404)
+    
+    if faltando:
+        return JsonResponse({
+            'success': False,
+            'error': 'Quantidade indisponível em estoque',
+            'itens_sem_estoque': faltando,
+        }, status=400)
+    
+    resumo = carrinho.resumo()
+    return JsonResponse({
+        'success': True,
+        'itens': [
+            {'id': linha['item'].id, 'quantidade': linha['item'].quantidade, 'total': f"{linha['total']:.2f}"}
+            for linha in resumo['itens_com_total']
+        ],
+        'total': f"{resumo['total']:.2f}",
+        'quantidade_total': resumo['quantidade_total'],
+    })
+
+
 def remover_item_carrinho(request, item_id):
     """
     Remove um item específico do carrinho
@@ -320,18 +739,19 @@ def remover_item_carrinho(request, item_id):
     Verifica se o item pertence ao carrinho do usuário antes de remover.
     
     Args:
-        request: HttpRequest object (usuário autenticado)
-        item_id: ID do ItemCarrinho (int) vindo da URL
+        request: HttpRequest object
+        item_id: ID do ItemCarrinho (ou do produto, no carrinho da sessão)
         
     Returns:
         Redirect para página do carrinho
         Mensagens: success (item removido) ou error (sem permissão)
     """
-    item = get_object_or_404(ItemCarrinho, id=item_id)
+    carrinho = obter_carrinho(request)
+    item = carrinho.obter_item(item_id)
     
     # Verificar se o item pertence ao carrinho do usuário (segurança)
-    if item.carrinho.usuario == request.user:
-        item.delete()
+    if item is not None:
+        carrinho.remover(item)
         messages.success(request, "Item removido do carrinho!")
     else:
         messages.error(request, "Você não tem permissão para remover este item!")
@@ -343,6 +763,7 @@ def remover_item_carrinho(request, item_id):
 # ============================================
 
 @login_required
+@orcamento_consultas(7)
 def checkout(request):
     """
     Página de checkout - formulário de finalização do pedido
@@ -364,18 +785,14 @@ def checkout(request):
     Redirects:
         - Para 'index' se carrinho estiver vazio
     """
-    # Obter carrinho do usuário
-    carrinho, created = Carrinho.objects.get_or_create(usuario=request.user)
-    itens = carrinho.itens.all()
+    # Itens, subtotais e total geral em uma única consulta
+    resumo = resumir_carrinho(request.user)
     
     # Verificar se carrinho tem itens
-    if not itens.exists():
+    if not resumo['itens_com_total']:
         messages.info(request, "Seu carrinho está vazio!")
         return redirect('nucleo:index')
     
-    # Calcular o total do pedido
-    total_geral = sum(item.produto.preco * item.quantidade for item in itens)
-    
     # Buscar endereços salvos do usuário (se tiver perfil)
     enderecos_salvos = []
     try:
@@ -384,18 +801,9 @@ def checkout(request):
     except:
         pass
     
-    # Preparar lista de itens com totais calculados
-    itens_com_total = []
-    for item in itens:
-        total_item = item.produto.preco * item.quantidade
-        itens_com_total.append({
-            'item': item,
-            'total': total_item
-        })
-    
     return render(request, 'nucleo/checkout.html', {
-        'itens_com_total': itens_com_total,
-        'total': total_geral,
+        'itens_com_total': resumo['itens_com_total'],
+        'total': resumo['total'],
         'enderecos_salvos': enderecos_salvos
     })
 
@@ -405,13 +813,13 @@ def finalizar_pedido(request):
     """
     Processa a finalização do pedido com todos os dados
     
-    Recebe dados do formulário de checkout via POST e:
+    Recebe dados do formulário de checkout via POST e delega para
+    nucleo.pedidos.finalizar_carrinho, que em uma única transação:
     1. Valida que o carrinho não está vazio
-    2. Calcula o total do pedido
+    2. Trava e baixa o estoque (recusando o pedido se faltar algum item)
     3. Cria o pedido com todos os dados (endereço, pagamento, total)
-    4. Cria itens do pedido com preços fixados
-    5. Atualiza estoque (se houver controle)
-    6. Limpa o carrinho
+    4. Cria itens do pedido com preços fixados (bulk_create)
+    5. Limpa o carrinho
     
     Args:
         request: HttpRequest object (POST com dados do formulário)
@@ -423,75 +831,27 @@ def finalizar_pedido(request):
         
     Returns:
         Redirect para 'checkout' se não for POST
+        Redirect para 'ver_carrinho' se faltar estoque
         Redirect para 'index' após finalizar com sucesso
-        Mensagens: success (pedido criado) ou info (carrinho vazio)
+        Mensagens: success (pedido criado), error (sem estoque) ou info (carrinho vazio)
         
     Nota:
         - Preços dos produtos são fixados no momento da compra
         - Estoque é decrementado se houver controle cadastrado
-        - Carrinho é completamente limpo após finalização
+        - Nada é gravado se qualquer item estiver sem estoque
     """
     # Aceitar apenas requisições POST
     if request.method != 'POST':
         return redirect('nucleo:checkout')
     
-    # Obter carrinho e itens
-    carrinho, created = Carrinho.objects.get_or_create(usuario=request.user)
-    itens = carrinho.itens.all()
-    
-    # Verificar se carrinho tem itens
-    if not itens.exists():
+    try:
+        pedido = finalizar_carrinho(request.user, request.POST)
+    except CarrinhoVazio:
         messages.info(request, "Seu carrinho está vazio!")
         return redirect('nucleo:index')
-    
-    # Calcular o total do pedido
-    total_geral = sum(item.produto.preco * item.quantidade for item in itens)
-    
-    # Criar o pedido com dados de endereço e pagamento
-    pedido = Pedido.objects.create(
-        usuario=request.user,
-        total=total_geral,
-        # Dados de endereço vindos do formulário
-        endereco_destinatario=request.POST.get('endereco_destinatario', ''),
-        endereco_rua=request.POST.get('endereco_rua', ''),
-        endereco_numero=request.POST.get('endereco_numero', ''),
-        endereco_complemento=request.POST.get('endereco_complemento', ''),
-        endereco_bairro=request.POST.get('endereco_bairro', ''),
-        endereco_cidade=request.POST.get('endereco_cidade', ''),
-        endereco_estado=request.POST.get('endereco_estado', ''),
-        endereco_cep=request.POST.get('endereco_cep', ''),
-        endereco_telefone=request.POST.get('endereco_telefone', ''),
-        # Dados de pagamento
-        forma_pagamento=request.POST.get('forma_pagamento', ''),
-        finalizado=True
-    )
-    
-    # Processar cada item do carrinho
-    for item in itens:
-        # Atualizar a quantidade no estoque (se houver controle)
-        try:
-            estoque = item.produto.estoque
-            if estoque.quantidade >= item.quantidade:
-                estoque.quantidade -= item.quantidade
-                estoque.save()
-            else:
-                # Não há estoque suficiente, mas continuamos com o pedido
-                pass
-        except:
-            # Produto sem estoque controlado, continuar normalmente
-            pass
-        
-        # Criar item do pedido com preço fixado
-        # (garantindo que mudanças futuras no preço não afetem este pedido)
-        ItemPedido.objects.create(
-            pedido=pedido,
-            produto=item.produto,
-            quantidade=item.quantidade,
-            preco_unitario=item.produto.preco  # Preço no momento da compra
-        )
-    
-    # Limpar o carrinho
-    itens.delete()
+    except EstoqueInsuficiente as erro:
+        messages.error(request, f"Estoque insuficiente para: {', '.join(erro.produtos)}. Ajuste o carrinho e tente novamente.")
+        return redirect('nucleo:ver_carrinho')
     
     messages.success(request, f"Pedido #{pedido.id} finalizado com sucesso!")
     
@@ -503,6 +863,7 @@ def finalizar_pedido(request):
 # ============================================
 
 @login_required
+@orcamento_consultas(8)
 def admin_produtos(request):
     """
     Lista todos os produtos para gerenciamento
@@ -526,8 +887,9 @@ def admin_produtos(request):
     if not request.user.is_superuser:
         raise PermissionDenied
     
-    # Buscar todos os produtos (mais recentes primeiro)
-    produtos = Produto.objects.all().order_by('-criado_em')
+    # Buscar todos os produtos (mais recentes primeiro); marca, categoria e
+    # estoque vêm no mesmo JOIN para a tabela não fazer 3 consultas por linha
+    produtos = Produto.objects.select_related('marca', 'categoria', 'estoque').order_by('-criado_em')
     marcas = Marca.objects.all()
     categorias = Categoria.objects.all()
     
@@ -748,4 +1110,67 @@ def admin_produto_remover(request, produto_id):
     produto.delete()
     
     messages.success(request, f"Produto '{nome_produto}' removido com sucesso!")
-    return redirect('nucleo:admin_produtos')
\ No newline at end of file
+    return redirect('nucleo:admin_produtos')
+
+@login_required
+@require_GET
+def admin_cache_cards(request):
+    """
+    Contadores do cache de cards de produtos (JSON)
+    
+    Args:
+        request: HttpRequest object (superusuário)
+        
+    Returns:
+        JsonResponse com 'acertos', 'faltas' e 'taxa_acerto' (0 a 1)
+        
+    Raises:
+        PermissionDenied: Se o usuário não for superuser
+    """
+    # Verificar permissão de administrador
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    
+    return JsonResponse({'success': True, **fragmentos.estatisticas_cache_cards()})
+
+
+@login_required
+@require_GET
+def admin_exportar_pedidos(request):
+    """
+    Exporta pedidos e itens em CSV ou JSONL, em streaming
+    
+    A resposta é gerada enquanto é enviada: pedidos e itens vêm de uma
+    única consulta lida em lotes (ver nucleo/exportacao.py), sem montar o
+    arquivo na memória e sem uma consulta por pedido.
+    
+    Args:
+        request: HttpRequest object (superusuário)
+            GET opcional:
+            - formato: 'csv' (padrão) ou 'jsonl'
+            - inicio, fim: Intervalo de dias (AAAA-MM-DD, inclusivo)
+            - status: 'finalizado' ou 'aberto' (vazio = todos)
+            
+    Returns:
+        StreamingHttpResponse com o arquivo como anexo, ou JsonResponse
+        400 se algum parâmetro for inválido
+        
+    Raises:
+        PermissionDenied: Se o usuário não for superuser
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    
+    try:
+        filtros = exportacao.ler_filtros(request.GET)
+    except exportacao.FiltroInvalido as erro:
+        return JsonResponse({'success': False, 'error': str(erro)}, status=400)
+    
+    formato = filtros.pop('formato')
+    pedidos = exportacao.filtrar_pedidos(**filtros)
+    response = StreamingHttpResponse(
+        exportacao.exportar(pedidos, formato), content_type=exportacao.FORMATOS[formato]
+    )
+    nome = f"pedidos-{timezone.localdate():%Y%m%d}.{formato}"
+    response['Content-Disposition'] = f'attachment; filename="{nome}"'
+    return response
@@ -0,0 +1,26 @@
+import pytest
+from django.core.cache import cache
+
+from nucleo import slugs
+
+
+@pytest.fixture(autouse=True)
+def orcamento_consultas_estrito(settings):
+    """Any view exceeding its @orcamento_consultas budget fails the test"""
+    settings.CONSULTAS_MODO_ESTRITO = True
+
+
+@pytest.fixture(autouse=True)
+def cache_slugs_vazio():
+    """Test databases are rolled back, so slug -> id entries must not leak"""
+    slugs.limpar_caches()
+    yield
+    slugs.limpar_caches()
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    """Rolled-back tests never run on_commit invalidations, so cached fragments must not leak"""
+    cache.clear()
+    yield
+    cache.clear()
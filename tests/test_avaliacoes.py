@@ -0,0 +1,123 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from nucleo.models import Produto, Marca, Review, EstatisticaAvaliacao
+
+
+class EstatisticaAvaliacaoTestCase(TestCase):
+    def setUp(self):
+        """Create a product (its stats row is created by post_save) and a reviewer"""
+        self.user = User.objects.create_user(username='avaliador', password='testpassword123')
+        self.marca = Marca.objects.create(nome='Marvel')
+        self.produto = Produto.objects.create(
+            nome='Funko Pop Thor',
+            preco='99.90',
+            imagem_principal='produtos/test_image.jpg',
+            marca=self.marca,
+        )
+        self.client = Client()
+
+    def estatistica(self):
+        return EstatisticaAvaliacao.objects.get(produto=self.produto)
+
+    def test_stats_follow_create_update_delete(self):
+        """Count, sum, histogram and mean track review changes incrementally"""
+        r1 = Review.objects.create(produto=self.produto, usuario=self.user, comentario='Ótimo', nota=5)
+        Review.objects.create(produto=self.produto, usuario=self.user, comentario='Ok', nota=2)
+        estatistica = self.estatistica()
+        self.assertEqual((estatistica.total_avaliacoes, estatistica.soma_notas), (2, 7))
+        self.assertEqual((estatistica.notas_5, estatistica.notas_2), (1, 1))
+        self.assertAlmostEqual(estatistica.media, 3.5)
+
+        r1.nota = 4
+        r1.save()
+        estatistica = self.estatistica()
+        self.assertEqual((estatistica.notas_5, estatistica.notas_4), (0, 1))
+        self.assertAlmostEqual(estatistica.media, 3.0)
+
+        Review.objects.all().delete()
+        estatistica = self.estatistica()
+        self.assertEqual((estatistica.total_avaliacoes, estatistica.soma_notas), (0, 0))
+        self.assertEqual(estatistica.media, 0)
+
+    def test_adicionar_review_view_updates_stats(self):
+        """The review form clamps the rating and updates the aggregate"""
+        self.client.login(username='avaliador', password='testpassword123')
+        self.client.post(
+            reverse('nucleo:adicionar_review', args=[self.produto.id]),
+            {'texto': 'Muito bom', 'nota': '9'},
+        )
+        estatistica = self.estatistica()
+        self.assertEqual(estatistica.total_avaliacoes, 1)
+        self.assertEqual(estatistica.notas_5, 1)
+
+    def test_detail_page_reads_stats_without_review_scan(self):
+        """The detail page shows the mean from the aggregate row"""
+        for nota in (5, 4, 3):
+            Review.objects.create(produto=self.produto, usuario=self.user, comentario='x', nota=nota)
+        response = self.client.get(reverse('nucleo:detalhe_produto', args=[self.produto.slug]))
+        self.assertContains(response, '4,0 de 5')
+
+    def test_catalog_sorted_by_rating(self):
+        """?ordem=avaliacao lists best rated products first"""
+        outro = Produto.objects.create(
+            nome='Funko Pop Loki', preco='99.90', imagem_principal='produtos/test_image.jpg', marca=self.marca,
+        )
+        Review.objects.create(produto=self.produto, usuario=self.user, comentario='x', nota=3)
+        Review.objects.create(produto=outro, usuario=self.user, comentario='x', nota=5)
+        response = self.client.get(reverse('nucleo:index'), {'ordem': 'avaliacao'})
+        self.assertEqual([p.id for p in response.context['produtos']], [outro.id, self.produto.id])
+
+
+class FeedReviewsTestCase(TestCase):
+    def setUp(self):
+        """Create a product with reviews from several users"""
+        self.marca = Marca.objects.create(nome='Marvel')
+        self.produto = Produto.objects.create(
+            nome='Funko Pop Hulk', preco='99.90', imagem_principal='produtos/test_image.jpg', marca=self.marca,
+        )
+        for i in range(25):
+            user = User.objects.create(username=f'leitor{i}')
+            Review.objects.create(produto=self.produto, usuario=user, comentario=f'Review {i}', nota=i % 5 + 1)
+        self.client = Client()
+
+    def test_detail_page_query_count_is_bounded(self):
+        """Only the first page is loaded and users come from the same JOIN"""
+        url = reverse('nucleo:detalhe_produto', args=[self.produto.slug])
+        self.client.get(url)  # slug -> id now in the in-process cache
+        with self.assertNumQueries(6):  # includes the conditional-GET stamp
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['reviews']), 10)
+        self.assertIsNotNone(response.context['proximo_cursor_reviews'])
+
+    def test_json_feed_walks_all_reviews_by_rating(self):
+        """The cursor feed returns every review once, best rating first"""
+        url = reverse('nucleo:avaliacoes_produto', args=[self.produto.id])
+        notas = []
+        ids = set()
+        cursor = ''
+        while True:
+            data = self.client.get(url, {'ordem': 'nota', 'cursor': cursor}).json()
+            notas.extend(review['nota'] for review in data['reviews'])
+            ids.update(review['id'] for review in data['reviews'])
+            cursor = data['proximo_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(notas, sorted(notas, reverse=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import django
+import shutil
+import tempfile
+import unittest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from usuarios.models import TarefaAvatar
+from usuarios import avatares
+
+MEDIA_TEMPORARIA = tempfile.mkdtemp()
+
+
+def arquivo_imagem(nome, tamanho, formato, modo='RGB'):
+    """Builds an uploaded image file of the given size"""
+    saida = BytesIO()
+    Image.new(modo, tamanho, (10, 120, 200, 128) if modo == 'RGBA' else (10, 120, 200)).save(saida, format=formato)
+    tipo = 'image/png' if formato == 'PNG' else 'image/jpeg'
+    return SimpleUploadedFile(nome, saida.getvalue(), content_type=tipo)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORARIA, AVATARES_FILA=True)
+class FilaAvatarTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORARIA, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='avatar', password='testpass123')
+        self.client = Client()
+        self.client.login(username='avatar', password='testpass123')
+
+    def enviar(self, arquivo):
+        return self.client.post(reverse('usuario:upload_avatar'), {'avatar': arquivo})
+
+    def test_upload_is_accepted_without_processing(self):
+        """The upload answers 202 with a pending job and leaves the profile untouched"""
+        response = self.enviar(arquivo_imagem('foto.jpg', (3000, 2000), 'JPEG'))
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+
+        tarefa = TarefaAvatar.objects.get(id=data['tarefa_id'])
+        self.assertEqual(tarefa.status, TarefaAvatar.STATUS_PENDENTE)
+        self.assertTrue(default_storage.exists(tarefa.arquivo_original))
+        self.user.perfil.refresh_from_db()
+        self.assertEqual(self.user.perfil.avatar_url, '')
+        self.assertEqual(self.client.get(data['status_url']).json()['status'], 'pendente')
+
+    @override_settings(AVATARES_FILA=False)
+    def test_upload_is_processed_inline_without_queue(self):
+        """Without a queue worker the upload is resized during the request"""
+        response = self.enviar(arquivo_imagem('foto.png', (640, 640), 'PNG'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        status = self.client.get(data['status_url']).json()
+        self.assertEqual(status['status'], 'concluida')
+        self.user.perfil.refresh_from_db()
+        self.assertEqual(self.user.perfil.avatar_url, status['avatar_url'])
+        tarefa = TarefaAvatar.objects.get(id=data['tarefa_id'])
+        self.assertFalse(default_storage.exists(tarefa.arquivo_original))
+
+    def test_invalid_image_is_rejected_up_front(self):
+        """Files whose header is not an image never reach the queue"""
+        falso = SimpleUploadedFile('foto.png', b'not an image', content_type='image/png')
+        data = self.enviar(falso).json()
+        self.assertFalse(data['success'])
+        self.assertFalse(TarefaAvatar.objects.exists())
+
+    def test_worker_command_processes_queue(self):
+        """The worker resizes JPEG and PNG uploads in a process pool and updates the profile"""
+        jpeg = self.enviar(arquivo_imagem('foto.jpg', (3000, 2000), 'JPEG')).json()
+        png = self.enviar(arquivo_imagem('foto.png', (640, 640), 'PNG', 'RGBA')).json()
+
+        saida = StringIO()
+        call_command('processar_avatares', '--uma-vez', '--workers', '1', stdout=saida)
+        self.assertIn('2 avatares processados no total', saida.getvalue())
+
+        status = self.client.get(png['status_url']).json()
+        self.assertEqual(status['status'], 'concluida')
+        self.user.perfil.refresh_from_db()
+        self.assertEqual(self.user.perfil.avatar_url, status['avatar_url'])
+        with default_storage.open(status['avatar_url'].replace('/media/', '', 1)) as arquivo:
+            imagem = Image.open(arquivo)
+            self.assertEqual((imagem.format, imagem.size, imagem.mode), ('PNG', (200, 200), 'RGB'))
+
+        # The older JPEG finished first and its file was replaced by the newer PNG
+        anterior = TarefaAvatar.objects.get(id=jpeg['tarefa_id'])
+        self.assertEqual(anterior.status, TarefaAvatar.STATUS_CONCLUIDA)
+        self.assertFalse(default_storage.exists(anterior.avatar_url.replace('/media/', '', 1)))
+        self.assertFalse(default_storage.exists(anterior.arquivo_original))
+
+    def test_large_jpeg_is_decoded_with_draft(self):
+        """Large JPEGs are reduced while decoding and still come out at 200x200"""
+        original = arquivo_imagem('grande.jpg', (4000, 3000), 'JPEG').read()
+        imagem = Image.open(BytesIO(avatares.redimensionar_avatar(original, 'JPEG')))
+        self.assertEqual((imagem.format, imagem.size), ('JPEG', (200, 200)))
+
+        rascunho = Image.open(BytesIO(original))
+        rascunho.draft('RGB', avatares.TAMANHO_AVATAR)
+        self.assertLess(rascunho.size[0], 4000)
+
+    def test_broken_and_abandoned_jobs(self):
+        """Undecodable images end in error and stale jobs are retried, then given up"""
+        perfil = self.user.perfil
+        default_storage.save('avatars/originais/quebrado.png', BytesIO(b'\x89PNG quebrado'))
+        quebrada = TarefaAvatar.objects.create(perfil=perfil, arquivo_original='avatars/originais/quebrado.png')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(avatares.processar_pendentes(executor), 1)
+        quebrada.refresh_from_db()
+        self.assertEqual(quebrada.status, TarefaAvatar.STATUS_ERRO)
+        self.assertEqual(self.client.get(reverse('usuario:status_avatar', args=[quebrada.id])).json()['status'], 'erro')
+
+        antigo = timezone.now() - timedelta(seconds=avatares.TEMPO_MAXIMO_PROCESSAMENTO + 1)
+        retomada = TarefaAvatar.objects.create(
+            perfil=perfil, arquivo_original='x.png', status=TarefaAvatar.STATUS_PROCESSANDO, iniciado_em=antigo, tentativas=1,
+        )
+        esgotada = TarefaAvatar.objects.create(
+            perfil=perfil, arquivo_original='y.png', status=TarefaAvatar.STATUS_PROCESSANDO,
+            iniciado_em=antigo, tentativas=avatares.MAX_TENTATIVAS,
+        )
+        self.assertEqual([tarefa.id for tarefa in avatares.reivindicar_tarefas(10)], [retomada.id])
+        esgotada.refresh_from_db()
+        self.assertEqual(esgotada.status, TarefaAvatar.STATUS_ERRO)
+
+    def test_status_of_other_users_job_is_hidden(self):
+        """Users cannot poll jobs that belong to someone else"""
+        outro = User.objects.create(username='outro')
+        tarefa = TarefaAvatar.objects.create(perfil=outro.perfil, arquivo_original='z.png')
+        response = self.client.get(reverse('usuario:status_avatar', args=[tarefa.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
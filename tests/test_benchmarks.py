@@ -0,0 +1,72 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from django.test import TestCase
+from nucleo.models import Marca, Categoria, Produto, Review, Pedido, EstatisticaAvaliacao, TermoIndice
+from usuarios.models import Perfil
+from benchmarks import cenarios, gerador
+
+
+class GeradorDadosTestCase(TestCase):
+    def test_generates_consistent_catalog(self):
+        """Bulk-generated data gets the same derived rows signals would create"""
+        totais = gerador.gerar_dados(marcas=3, categorias=2, produtos=40, usuarios=10)
+
+        self.assertEqual(totais['Produto'], 40)
+        self.assertEqual(totais['Review'], 40 * gerador.REVIEWS_POR_PRODUTO)
+        self.assertEqual(totais['Pedido'], 10 * gerador.PEDIDOS_POR_USUARIO)
+        self.assertEqual(Perfil.objects.count(), 10)
+        self.assertEqual(EstatisticaAvaliacao.objects.count(), 40)
+        self.assertEqual(EstatisticaAvaliacao.objects.aggregate(total=Sum('total_avaliacoes'))['total'], Review.objects.count())
+        self.assertTrue(TermoIndice.objects.exists())
+        for pedido in Pedido.objects.prefetch_related('itens')[:5]:
+            self.assertEqual(pedido.total, sum(item.preco_unitario * item.quantidade for item in pedido.itens.all()))
+
+    def test_same_seed_same_data(self):
+        """The seed makes generated catalogs reproducible"""
+        gerador.gerar_dados(marcas=3, categorias=2, produtos=20, usuarios=5, semente=7)
+        primeiro = list(Produto.objects.order_by('id').values_list('nome', 'preco'))
+        User.objects.all().delete()
+        Marca.objects.all().delete()
+        Categoria.objects.all().delete()
+        gerador.gerar_dados(marcas=3, categorias=2, produtos=20, usuarios=5, semente=7)
+        self.assertEqual(list(Produto.objects.order_by('id').values_list('nome', 'preco')), primeiro)
+
+
+class CenariosTestCase(TestCase):
+    def setUp(self):
+        gerador.gerar_dados(marcas=3, categorias=2, produtos=30, usuarios=8)
+        self.contexto = cenarios.Contexto()
+
+    def test_scenarios_report_latency_queries_and_memory(self):
+        """Every scenario runs and reports its metrics within the view budget"""
+        for nome in cenarios.CENARIOS:
+            resultado = cenarios.executar_cenario(nome, self.contexto, repeticoes=3, aquecimento=1)
+            self.assertLessEqual(resultado['p50_ms'], resultado['p95_ms'])
+            self.assertGreater(resultado['consultas'], 0)
+            self.assertGreater(resultado['pico_memoria_kb'], 0)
+            if resultado['orcamento'] is not None:
+                self.assertLessEqual(resultado['consultas'], resultado['orcamento'], nome)
+        self.assertEqual(Pedido.objects.filter(usuario=self.contexto.usuario).count(), 20 + 5)
+
+    def test_comparison_flags_regressions(self):
+        """More queries or a slower p95 than the baseline are regressions"""
+        base = [{'cenario': 'perfil', 'consultas': 8, 'p95_ms': 40.0, 'pico_memoria_kb': 1000.0}]
+        self.assertEqual(cenarios.comparar(base, base), [])
+        pior = [{'cenario': 'perfil', 'consultas': 9, 'p95_ms': 80.0, 'pico_memoria_kb': 1100.0}]
+        self.assertEqual(len(cenarios.comparar(pior, base)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
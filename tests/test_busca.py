@@ -0,0 +1,116 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from nucleo.models import Produto, Marca, Categoria
+from nucleo import busca
+
+
+class BuscaTestCase(TestCase):
+    def setUp(self):
+        """Index a small catalog through the post_save signals"""
+        self.marvel = Marca.objects.create(nome='Marvel')
+        self.disney = Marca.objects.create(nome='Disney')
+        self.funko = Categoria.objects.create(nome='Funko Pop')
+        self.aranha = Produto.objects.create(
+            nome='Funko Pop Homem-Aranha',
+            descricao='Boneco colecionável do herói aracnídeo',
+            preco='99.90',
+            imagem_principal='produtos/test_image.jpg',
+            marca=self.marvel,
+            categoria=self.funko,
+        )
+        self.camiseta = Produto.objects.create(
+            nome='Camiseta Vingadores',
+            descricao='Camiseta com estampa de ação dos heróis, inclui o Homem-Aranha',
+            preco='79.90',
+            imagem_principal='produtos/test_image.jpg',
+            marca=self.marvel,
+        )
+        self.mickey = Produto.objects.create(
+            nome='Caneca Mickey',
+            descricao='Caneca de cerâmica',
+            preco='39.90',
+            imagem_principal='produtos/test_image.jpg',
+            marca=self.disney,
+        )
+
+    def test_accent_folding_and_stemming(self):
+        """Accents and plural forms map to the same term"""
+        self.assertEqual(busca.extrair_termos('Ação'), busca.extrair_termos('acao'))
+        self.assertEqual(busca.extrair_termos('camisetas'), busca.extrair_termos('Camiseta'))
+
+    def test_bm25_ranks_name_matches_first(self):
+        """A match in the product name outranks a match in the description"""
+        resultados = busca.buscar('homem aranha')
+        self.assertEqual(resultados[:2], [self.aranha, self.camiseta])
+        self.assertNotIn(self.mickey, resultados)
+
+    def test_brand_and_category_are_indexed(self):
+        """Brand and category names are searchable"""
+        self.assertEqual(busca.buscar('disney'), [self.mickey])
+        self.assertEqual(busca.buscar('funko pops'), [self.aranha])
+
+    def test_search_does_not_use_infix_like(self):
+        """Neither search nor autocomplete issue LIKE '%...' scans"""
+        with CaptureQueriesContext(connection) as contexto:
+            busca.buscar('caneca')
+            busca.autocompletar('cane')
+        for consulta in contexto.captured_queries:
+            self.assertNotIn("LIKE '%", consulta['sql'])
+
+    def test_autocomplete_prefix(self):
+        """The last typed word is matched as a prefix"""
+        self.assertEqual(busca.autocompletar('cane'), [self.mickey])
+        self.assertEqual(busca.autocompletar('funko ho'), [self.aranha])
+
+    def test_index_updates_on_save_and_delete(self):
+        """Saving and deleting products keeps the index current"""
+        self.mickey.nome = 'Caneca Stitch'
+        self.mickey.save()
+        self.assertEqual(busca.buscar('stitch'), [self.mickey])
+        self.assertEqual(busca.buscar('mickey'), [])
+
+        self.mickey.delete()
+        self.assertEqual(busca.buscar('stitch'), [])
+
+        self.marvel.nome = 'Marvel Studios'
+        self.marvel.save()
+        self.assertEqual(set(busca.buscar('studios')), {self.aranha, self.camiseta})
+
+    def test_deleting_category_reindexes_its_products(self):
+        """Products of a deleted category stop matching its name"""
+        canecas = Categoria.objects.create(nome='Louças')
+        self.mickey.categoria = canecas
+        self.mickey.save()
+        self.assertEqual(busca.buscar('loucas'), [self.mickey])
+
+        canecas.delete()
+        self.assertEqual(busca.buscar('loucas'), [])
+        self.assertEqual(busca.buscar('mickey'), [self.mickey])
+
+    def test_search_views(self):
+        """The results page and the suggestions endpoint respond"""
+        client = Client()
+        response = client.get(reverse('nucleo:buscar'), {'q': 'caneca'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Caneca Mickey')
+
+        response = client.get(reverse('nucleo:autocompletar'), {'q': 'camis'})
+        self.assertEqual(response.json()['sugestoes'][0]['id'], self.camiseta.id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+import os
+import django
+import json
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from nucleo.models import Produto, Marca, Carrinho, ItemCarrinho, Estoque, ReservaEstoque
+from nucleo.carrinho import CHAVE_SESSAO, QUANTIDADE_MAXIMA
+
+
+class CarrinhoSessaoTestCase(TestCase):
+    def setUp(self):
+        marca = Marca.objects.create(nome='Marvel')
+        self.caneca = Produto.objects.create(
+            nome='Caneca', preco='30.00', imagem_principal='produtos/test_image.jpg', marca=marca,
+        )
+        self.boneco = Produto.objects.create(
+            nome='Boneco', preco='100.00', imagem_principal='produtos/test_image.jpg', marca=marca,
+        )
+        Estoque.objects.create(produto=self.boneco, quantidade=1)
+        self.user = User.objects.create_user(username='comprador', password='testpass123')
+        self.client = Client()
+
+    def adicionar(self, produto):
+        return self.client.post(reverse('nucleo:adicionar_ao_carrinho', args=[produto.id]))
+
+    def test_anonymous_cart_never_writes_cart_tables(self):
+        """Anonymous add/view/change/remove only touch the session cookie"""
+        with CaptureQueriesContext(connection) as contexto:
+            self.adicionar(self.caneca)
+            self.adicionar(self.caneca)
+            self.adicionar(self.boneco)
+            response = self.client.get(reverse('nucleo:ver_carrinho'))
+            self.client.post(
+                reverse('nucleo:alterar_quantidade_carrinho', args=[self.caneca.id]), {'acao': 'diminuir'}
+            )
+            self.client.get(reverse('nucleo:remover_item_carrinho', args=[self.boneco.id]))
+
+        self.assertContains(response, 'Caneca')
+        self.assertEqual(float(response.context['total']), 160.0)
+        self.assertEqual(self.client.session[CHAVE_SESSAO], {str(self.caneca.id): 1})
+        self.assertFalse(Carrinho.objects.exists())
+        self.assertFalse(ReservaEstoque.objects.exists())
+        for consulta in contexto.captured_queries:
+            sql = consulta['sql'].upper()
+            if sql.startswith(('INSERT', 'UPDATE', 'DELETE')):
+                self.assertNotIn('NUCLEO_CARRINHO', sql)
+                self.assertNotIn('NUCLEO_ITEMCARRINHO', sql)
+                self.assertNotIn('DJANGO_SESSION', sql)
+
+    def test_anonymous_cart_respects_stock(self):
+        """The session cart cannot exceed the available stock"""
+        self.adicionar(self.boneco)
+        self.adicionar(self.boneco)
+        self.assertEqual(self.client.session[CHAVE_SESSAO], {str(self.boneco.id): 1})
+
+    def test_anonymous_cart_caps_quantity_without_stock_row(self):
+        """Products without an Estoque row still stop at QUANTIDADE_MAXIMA"""
+        sessao = self.client.session
+        sessao[CHAVE_SESSAO] = {str(self.caneca.id): QUANTIDADE_MAXIMA}
+        sessao.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = sessao.session_key
+        self.adicionar(self.caneca)
+        self.assertEqual(self.client.session[CHAVE_SESSAO], {str(self.caneca.id): QUANTIDADE_MAXIMA})
+
+    def test_login_merges_session_cart_with_one_upsert(self):
+        """Quantities are summed into the user's cart in a single INSERT"""
+        carrinho = Carrinho.objects.create(usuario=self.user)
+        ItemCarrinho.objects.create(carrinho=carrinho, produto=self.caneca, quantidade=1)
+        self.adicionar(self.caneca)
+        self.adicionar(self.caneca)
+        self.adicionar(self.boneco)
+
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.login(username='comprador', password='testpass123')
+        insercoes = [
+            q for q in contexto.captured_queries
+            if q['sql'].upper().startswith('INSERT INTO "NUCLEO_ITEMCARRINHO"')
+        ]
+        self.assertEqual(len(insercoes), 1)
+
+        quantidades = dict(carrinho.itens.values_list('produto_id', 'quantidade'))
+        self.assertEqual(quantidades, {self.caneca.id: 3, self.boneco.id: 1})
+        self.assertNotIn(CHAVE_SESSAO, self.client.session)
+
+    def test_authenticated_user_cannot_touch_other_cart(self):
+        """Database cart items of other users are refused"""
+        outro = User.objects.create(username='outro')
+        carrinho = Carrinho.objects.create(usuario=outro)
+        item = ItemCarrinho.objects.create(carrinho=carrinho, produto=self.caneca, quantidade=1)
+        self.client.login(username='comprador', password='testpass123')
+        response = self.client.post(
+            reverse('nucleo:alterar_quantidade_carrinho', args=[item.id]), {'acao': 'aumentar'}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.client.get(reverse('nucleo:remover_item_carrinho', args=[item.id]))
+        self.assertTrue(ItemCarrinho.objects.filter(id=item.id).exists())
+
+
+class AtualizarCarrinhoTestCase(TestCase):
+    def setUp(self):
+        marca = Marca.objects.create(nome='Marvel')
+        self.produtos = [
+            Produto.objects.create(
+                nome=f'Produto {i}', preco='10.00', imagem_principal='produtos/test_image.jpg', marca=marca,
+            )
+            for i in range(3)
+        ]
+        for produto in self.produtos:
+            Estoque.objects.create(produto=produto, quantidade=5)
+        self.user = User.objects.create_user(username='comprador', password='testpass123')
+        carrinho = Carrinho.objects.create(usuario=self.user)
+        self.itens = [
+            ItemCarrinho.objects.create(carrinho=carrinho, produto=produto, quantidade=1)
+            for produto in self.produtos
+        ]
+        self.client = Client()
+        self.client.login(username='comprador', password='testpass123')
+        self.url = reverse('nucleo:atualizar_carrinho')
+
+    def atualizar(self, itens):
+        return self.client.post(self.url, json.dumps({'itens': itens}), content_type='application/json')
+
+    def test_batch_update_returns_summary(self):
+        """Several quantities change in one call and the summary is recomputed"""
+        response = self.atualizar({self.itens[0].id: 4, self.itens[1].id: 2, self.itens[2].id: 0})
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['total'], '60.00')
+        self.assertEqual(data['quantidade_total'], 6)
+        self.assertEqual(
+            dict(ItemCarrinho.objects.values_list('id', 'quantidade')),
+            {self.itens[0].id: 4, self.itens[1].id: 2},
+        )
+        self.assertEqual(
+            dict(ReservaEstoque.objects.values_list('produto_id', 'quantidade')),
+            {self.produtos[0].id: 4, self.produtos[1].id: 2},
+        )
+
+    def test_batch_update_query_count_is_constant(self):
+        """Validation and writes do not grow with the number of items"""
+        def contar(quantidade):
+            with CaptureQueriesContext(connection) as contexto:
+                self.atualizar({item.id: quantidade for item in self.itens})
+            return len(contexto.captured_queries)
+
+        self.assertEqual(contar(2), contar(3))
+        with CaptureQueriesContext(connection) as contexto:
+            self.atualizar({self.itens[0].id: 4})
+        self.assertEqual(len(contexto.captured_queries), contar(4))
+
+    def test_short_stock_rejects_whole_batch(self):
+        """If any item lacks stock nothing is changed"""
+        response = self.atualizar({self.itens[0].id: 2, self.itens[1].id: 6})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['itens_sem_estoque'], [self.itens[1].id])
+        self.assertEqual(set(ItemCarrinho.objects.values_list('quantidade', flat=True)), {1})
+
+    def test_rejects_foreign_items_and_bad_payloads(self):
+        """Items of other carts return 404, malformed bodies 400"""
+        outro = User.objects.create(username='outro')
+        item_alheio = ItemCarrinho.objects.create(
+            carrinho=Carrinho.objects.create(usuario=outro), produto=self.produtos[0], quantidade=1,
+        )
+        self.assertEqual(self.atualizar({item_alheio.id: 3}).status_code, 404)
+        self.assertEqual(self.atualizar({self.itens[0].id: -1}).status_code, 400)
+        response = self.client.post(self.url, 'nao-e-json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_quantities_above_maximum(self):
+        """Huge quantities return 400 even for products without an Estoque row"""
+        Estoque.objects.filter(produto=self.produtos[0]).delete()
+        for quantidade in (QUANTIDADE_MAXIMA + 1, 10**12, 10**20):
+            with self.subTest(quantidade=quantidade):
+                response = self.atualizar({self.itens[0].id: quantidade})
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(ItemCarrinho.objects.values_list('quantidade', flat=True)), {1})
+        self.assertEqual(self.atualizar({self.itens[0].id: QUANTIDADE_MAXIMA}).status_code, 200)
+
+    def test_anonymous_batch_update(self):
+        """The session cart accepts the same batch format keyed by product id"""
+        cliente = Client()
+        for produto in self.produtos[:2]:
+            cliente.post(reverse('nucleo:adicionar_ao_carrinho', args=[produto.id]))
+        response = cliente.post(
+            self.url,
+            json.dumps({'itens': {self.produtos[0].id: 3, self.produtos[1].id: 0}}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['total'], '30.00')
+        self.assertEqual(cliente.session[CHAVE_SESSAO], {str(self.produtos[0].id): 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+import os
+import django
+import unittest
+import sys
+import random
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from unittest import mock
+from nucleo.models import Produto, Marca, Carrinho, ItemCarrinho, Estoque, Pedido, ItemPedido
+from nucleo.pedidos import finalizar_carrinho, CarrinhoVazio, EstoqueInsuficiente
+from nucleo.carrinho import resumir_carrinho
+
+
+DADOS_ENTREGA = {
+    'endereco_destinatario': 'Test User',
+    'endereco_rua': 'Rua Teste',
+    'endereco_numero': '123',
+    'endereco_bairro': 'Centro',
+    'endereco_cidade': 'São Paulo',
+    'endereco_estado': 'SP',
+    'endereco_cep': '01000-000',
+    'endereco_telefone': '11999999999',
+    'forma_pagamento': 'pix',
+}
+
+
+def criar_produto(nome, estoque=None, preco='10.00'):
+    """Create a product, optionally with a stock row"""
+    marca, _ = Marca.objects.get_or_create(nome='Marvel')
+    produto = Produto.objects.create(
+        nome=nome,
+        preco=preco,
+        imagem_principal='produtos/test_image.jpg',
+        marca=marca,
+    )
+    if estoque is not None:
+        Estoque.objects.create(produto=produto, quantidade=estoque)
+    return produto
+
+
+def encher_carrinho(usuario, itens):
+    """Put (produto, quantidade) pairs in the user's cart"""
+    carrinho, _ = Carrinho.objects.get_or_create(usuario=usuario)
+    for produto, quantidade in itens:
+        ItemCarrinho.objects.create(carrinho=carrinho, produto=produto, quantidade=quantidade)
+    return carrinho
+
+
+class CheckoutTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='comprador', password='testpass123')
+        self.caneca = criar_produto('Caneca', estoque=5, preco='30.00')
+        self.boneco = criar_produto('Boneco', estoque=1, preco='100.00')
+        self.poster = criar_produto('Poster', preco='15.00')  # sem controle de estoque
+
+    def test_checkout_creates_order_and_decrements_stock(self):
+        """A successful checkout fixes prices, decrements stock and empties the cart"""
+        carrinho = encher_carrinho(self.user, [(self.caneca, 2), (self.boneco, 1), (self.poster, 3)])
+        pedido = finalizar_carrinho(self.user, DADOS_ENTREGA)
+
+        self.assertEqual(float(pedido.total), 205.00)
+        self.assertEqual(pedido.endereco_cidade, 'São Paulo')
+        self.assertEqual(pedido.itens.count(), 3)
+        self.assertEqual(Estoque.objects.get(produto=self.caneca).quantidade, 3)
+        self.assertEqual(Estoque.objects.get(produto=self.boneco).quantidade, 0)
+        self.assertFalse(carrinho.itens.exists())
+
+    def test_short_stock_rejects_whole_order(self):
+        """If any line is short nothing is written and the cart is kept"""
+        carrinho = encher_carrinho(self.user, [(self.caneca, 2), (self.boneco, 2)])
+        with self.assertRaises(EstoqueInsuficiente) as contexto:
+            finalizar_carrinho(self.user, DADOS_ENTREGA)
+
+        self.assertEqual(contexto.exception.produtos, ['Boneco'])
+        self.assertFalse(Pedido.objects.exists())
+        self.assertFalse(ItemPedido.objects.exists())
+        self.assertEqual(Estoque.objects.get(produto=self.caneca).quantidade, 5)
+        self.assertEqual(Estoque.objects.get(produto=self.boneco).quantidade, 1)
+        self.assertEqual(carrinho.itens.count(), 2)
+
+    def test_empty_cart(self):
+        """Empty carts cannot be finalized"""
+        with self.assertRaises(CarrinhoVazio):
+            finalizar_carrinho(self.user, DADOS_ENTREGA)
+
+    def test_view_redirects_to_cart_on_short_stock(self):
+        """The view reports short stock back on the cart page"""
+        encher_carrinho(self.user, [(self.boneco, 3)])
+        client = Client()
+        client.login(username='comprador', password='testpass123')
+        response = client.post(reverse('nucleo:finalizar_pedido'), DADOS_ENTREGA)
+        self.assertRedirects(response, reverse('nucleo:ver_carrinho'), fetch_redirect_response=False)
+        self.assertFalse(Pedido.objects.exists())
+
+    def test_view_finalizes_order(self):
+        """The view creates the order and redirects home"""
+        encher_carrinho(self.user, [(self.caneca, 1)])
+        client = Client()
+        client.login(username='comprador', password='testpass123')
+        response = client.post(reverse('nucleo:finalizar_pedido'), DADOS_ENTREGA)
+        self.assertRedirects(response, reverse('nucleo:index'), fetch_redirect_response=False)
+        self.assertEqual(Pedido.objects.filter(usuario=self.user).count(), 1)
+
+
+class ResumoCarrinhoTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='comprador', password='testpass123')
+        self.produtos = [criar_produto(f'Produto {i}', preco=f'{i + 1}0.00') for i in range(4)]
+
+    def test_summary_totals_in_one_query(self):
+        """Lines, subtotals and grand total come from a single query"""
+        encher_carrinho(self.user, [(self.produtos[0], 2), (self.produtos[2], 1)])
+        with self.assertNumQueries(1):
+            resumo = resumir_carrinho(self.user)
+            for linha in resumo['itens_com_total']:
+                linha['item'].produto.marca.nome
+        self.assertEqual([float(linha['total']) for linha in resumo['itens_com_total']], [20.0, 30.0])
+        self.assertEqual(float(resumo['total']), 50.0)
+        self.assertEqual(resumo['quantidade_total'], 3)
+
+    def test_empty_summary(self):
+        """Users without a cart get an empty summary and no cart is created"""
+        resumo = resumir_carrinho(self.user)
+        self.assertEqual(resumo['itens_com_total'], [])
+        self.assertEqual(resumo['total'], 0)
+        self.assertFalse(Carrinho.objects.exists())
+
+    def test_cart_pages_query_count_does_not_grow_with_items(self):
+        """ver_carrinho and checkout run the same number of queries for 1 or 4 items"""
+        client = Client()
+        client.login(username='comprador', password='testpass123')
+        encher_carrinho(self.user, [(self.produtos[0], 1)])
+
+        def contar(url):
+            with CaptureQueriesContext(connection) as contexto:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(contexto.captured_queries)
+
+        urls = [reverse('nucleo:ver_carrinho'), reverse('nucleo:checkout')]
+        com_um_item = [contar(url) for url in urls]
+        encher_carrinho(self.user, [(produto, 2) for produto in self.produtos[1:]])
+        self.assertEqual([contar(url) for url in urls], com_um_item)
+
+
+class CheckoutConcorrenteTestCase(TransactionTestCase):
+    COMPRADORES = 10
+    ESTOQUE = 3
+
+    def setUp(self):
+        # Derivative generation would run after each commit and compete for the database
+        agendar = mock.patch('nucleo.imagens.agendar')
+        agendar.start()
+        self.addCleanup(agendar.stop)
+        self.produto = criar_produto('Edição Limitada', estoque=self.ESTOQUE)
+        self.usuarios = []
+        for i in range(self.COMPRADORES):
+            usuario = User.objects.create(username=f'comprador{i}')
+            encher_carrinho(usuario, [(self.produto, 1)])
+            self.usuarios.append(usuario)
+
+    def test_concurrent_checkouts_never_oversell(self):
+        """N buyers racing for the last units produce exactly ESTOQUE orders"""
+        resultados = []
+        largada = threading.Barrier(self.COMPRADORES)
+
+        def comprar(usuario):
+            try:
+                largada.wait()
+                limite = time.monotonic() + 20
+                while time.monotonic() < limite:
+                    try:
+                        finalizar_carrinho(usuario, DADOS_ENTREGA)
+                        resultados.append('ok')
+                        return
+                    except EstoqueInsuficiente:
+                        resultados.append('sem_estoque')
+                        return
+                    except OperationalError:
+                        # SQLite serializa escritores com "database is locked"
+                        time.sleep(random.uniform(0.005, 0.03))
+                resultados.append('desistiu')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=comprar, args=(u,)) for u in self.usuarios]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertNotIn('desistiu', resultados)
+        self.assertEqual(resultados.count('ok'), self.ESTOQUE)
+        self.assertEqual(Pedido.objects.count(), self.ESTOQUE)
+        self.assertEqual(Estoque.objects.get(produto=self.produto).quantidade, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
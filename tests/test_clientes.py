@@ -0,0 +1,109 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from nucleo.models import Produto, Marca, Carrinho, ItemCarrinho, Pedido, ItemPedido, EstatisticaCliente
+from nucleo.pedidos import finalizar_carrinho
+
+
+class EstatisticaClienteTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cliente', 'cliente@nerdhub.com', 'senha123')
+        self.marvel = Marca.objects.create(nome='Marvel')
+        self.dc = Marca.objects.create(nome='DC')
+        self.funko = Produto.objects.create(
+            nome='Funko Thor', preco='50.00', imagem_principal='produtos/test_image.jpg', marca=self.marvel
+        )
+        self.caneca = Produto.objects.create(
+            nome='Caneca Batman', preco='30.00', imagem_principal='produtos/test_image.jpg', marca=self.dc
+        )
+
+    def comprar(self, *itens):
+        carrinho, _ = Carrinho.objects.get_or_create(usuario=self.user)
+        for produto, quantidade in itens:
+            ItemCarrinho.objects.create(carrinho=carrinho, produto=produto, quantidade=quantidade)
+        return finalizar_carrinho(self.user, {'forma_pagamento': 'pix'})
+
+    def test_checkout_updates_stats_incrementally(self):
+        """Each checkout adds to count, spend, last order and favourite brand"""
+        self.comprar((self.funko, 1), (self.caneca, 2))
+        estatistica = EstatisticaCliente.objects.get(usuario=self.user)
+        self.assertEqual(estatistica.total_pedidos, 1)
+        self.assertEqual(estatistica.total_gasto, Decimal('110.00'))
+        self.assertEqual(estatistica.marca_favorita, self.dc)
+
+        # Existing row: the history is not aggregated again
+        with CaptureQueriesContext(connection) as consultas:
+            segundo = self.comprar((self.funko, 3))
+        leituras = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('SELECT')]
+        self.assertFalse(any('"nucleo_pedido"' in sql or '"nucleo_itempedido"' in sql for sql in leituras))
+        estatistica.refresh_from_db()
+        self.assertEqual(estatistica.total_pedidos, 2)
+        self.assertEqual(estatistica.total_gasto, Decimal('260.00'))
+        self.assertEqual(estatistica.ultimo_pedido_em, segundo.criado_em)
+        self.assertEqual(estatistica.marca_favorita, self.marvel)
+        self.assertEqual(estatistica.unidades_por_marca, {str(self.marvel.id): 4, str(self.dc.id): 2})
+        self.user.perfil.refresh_from_db()
+        self.assertEqual(self.user.perfil.last_order_at, segundo.criado_em)
+
+    def test_rebuild_matches_incremental(self):
+        """The rebuild command reproduces the incremental numbers, including bulk-created history"""
+        self.comprar((self.funko, 1))
+        self.comprar((self.caneca, 5))
+        importado = Pedido.objects.create(usuario=self.user, total='30.00', finalizado=True)
+        ItemPedido.objects.bulk_create([
+            ItemPedido(pedido=importado, produto=self.caneca, quantidade=1, preco_unitario='30.00'),
+        ])
+        incremental = EstatisticaCliente.objects.get(usuario=self.user)
+        sem_pedidos = User.objects.create_user('novo', 'novo@nerdhub.com', 'senha123')
+
+        call_command('recalcular_clientes', lote=1, stdout=open(os.devnull, 'w'))
+        estatistica = EstatisticaCliente.objects.get(usuario=self.user)
+        self.assertEqual(estatistica.total_pedidos, incremental.total_pedidos + 1)
+        self.assertEqual(estatistica.total_gasto, incremental.total_gasto + Decimal('30.00'))
+        self.assertEqual(estatistica.unidades_por_marca, {str(self.marvel.id): 1, str(self.dc.id): 6})
+        self.assertEqual(estatistica.marca_favorita, self.dc)
+        self.assertEqual(estatistica.ultimo_pedido_em, importado.criado_em)
+        self.user.perfil.refresh_from_db()
+        self.assertEqual(self.user.perfil.last_order_at, importado.criado_em)
+        vazio = EstatisticaCliente.objects.get(usuario=sem_pedidos)
+        self.assertEqual((vazio.total_pedidos, vazio.total_gasto, vazio.marca_favorita), (0, 0, None))
+
+    def test_profile_header_and_admin_list_read_stats(self):
+        """The profile header shows the precomputed numbers; superusers list top customers"""
+        self.comprar((self.funko, 2))
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('usuario:perfil'))
+        self.assertContains(response, '1 pedido')
+        self.assertContains(response, 'Marca favorita: Marvel')
+
+        self.user.is_superuser = True
+        self.user.save()
+        EstatisticaCliente.objects.create(
+            usuario=User.objects.create_user('pequeno', 'p@nerdhub.com', 'senha123'), total_pedidos=1, total_gasto='5.00'
+        )
+        dados = client.get(reverse('usuario:perfil_admin_lista', args=['clientes'])).json()
+        self.assertEqual([item['usuario_username'] for item in dados['itens']], ['cliente', 'pequeno'])
+        self.assertEqual(dados['itens'][0]['total_gasto'], '100.00')
+        self.assertEqual(dados['itens'][0]['marca_favorita_nome'], 'Marvel')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, Client
+from nucleo.models import Produto, Marca, Estoque, Review
+
+
+class RespostaCondicionalTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.marca = Marca.objects.create(nome='Marvel')
+        self.produto = Produto.objects.create(
+            nome='Funko Pop Hulk', preco='99.90', imagem_principal='produtos/test_image.jpg', marca=self.marca,
+        )
+        self.estoque = Estoque.objects.create(produto=self.produto, quantidade=5)
+
+    def _revalidar(self, url):
+        """GET, then a second GET with the validators from the first response"""
+        primeira = self.client.get(url)
+        self.assertEqual(primeira.status_code, 200)
+        self.assertIn('ETag', primeira)
+        self.assertIn('Last-Modified', primeira)
+        return lambda: self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+
+    def test_unchanged_pages_get_304_without_rendering(self):
+        """Catalog, brand and product pages answer 304 with a single stamp query"""
+        for url in ('/', self.marca.get_absolute_url(), self.produto.get_absolute_url()):
+            revalidar = self._revalidar(url)
+            with self.assertNumQueries(1):
+                response = revalidar()
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        """Last-Modified alone also validates"""
+        primeira = self.client.get(self.produto.get_absolute_url())
+        response = self.client.get(
+            self.produto.get_absolute_url(), HTTP_IF_MODIFIED_SINCE=primeira['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_review_and_stock_changes_update_stamp(self):
+        """Reviews and stock changes bump Produto.atualizado_em"""
+        revalidar = self._revalidar(self.produto.get_absolute_url())
+        usuario = User.objects.create_user('leitor', 'leitor@nerdhub.com', 'senha123')
+        Review.objects.create(produto=self.produto, usuario=usuario, comentario='Ótimo', nota=5)
+        self.assertEqual(revalidar().status_code, 200)
+
+        revalidar = self._revalidar(self.produto.get_absolute_url())
+        self.estoque.quantidade = 0
+        self.estoque.save()
+        self.assertEqual(revalidar().status_code, 200)
+
+    def test_related_product_and_deletion_change_pages(self):
+        """A new related product changes the detail page; deleting one changes the catalog"""
+        revalidar_produto = self._revalidar(self.produto.get_absolute_url())
+        outro = Produto.objects.create(
+            nome='Funko Pop Thor', preco='89.90', imagem_principal='produtos/test_image.jpg', marca=self.marca,
+        )
+        self.assertEqual(revalidar_produto().status_code, 200)
+
+        revalidar_catalogo = self._revalidar('/')
+        outro.delete()
+        self.assertEqual(revalidar_catalogo().status_code, 200)
+
+    def test_query_string_is_part_of_etag(self):
+        """Another ordering of the same page is a different representation"""
+        primeira = self.client.get('/')
+        response = self.client.get('/?ordem=avaliacao', HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_authenticated_users_always_get_full_page(self):
+        """Pages with a personal header are never validated"""
+        usuario = User.objects.create_user('cliente', 'cliente@nerdhub.com', 'senha123')
+        self.client.force_login(usuario)
+        response = self.client.get(self.produto.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+if __name__ == '__main__':
+    unittest.main()
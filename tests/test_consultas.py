@@ -0,0 +1,115 @@
+import os
+import json
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from unittest import mock
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, Client, override_settings
+from nucleo.models import Produto, Marca, Categoria, Estoque
+from nucleo.consultas import (
+    OrcamentoConsultasMiddleware, OrcamentoConsultasExcedido, orcamento_consultas, formato_sql,
+)
+
+
+def registro(logs):
+    return json.loads(logs.records[-1].getMessage())
+
+
+class OrcamentoConsultasTestCase(TestCase):
+    def setUp(self):
+        self.marca = Marca.objects.create(nome='Marvel')
+        for i in range(6):
+            Produto.objects.create(nome=f'Funko {i}', preco='99.90', imagem_principal='produtos/test_image.jpg', marca=self.marca)
+
+    def executar(self, view):
+        """Run a view through the middleware like the URL resolver would"""
+        middleware = OrcamentoConsultasMiddleware(lambda request: middleware.process_view(request, view, (), {}) or view(request))
+        return middleware(RequestFactory().get('/teste/'))
+
+    def test_sql_shape_ignores_literals(self):
+        """Queries differing only in values share one shape"""
+        self.assertEqual(
+            formato_sql("SELECT * FROM p WHERE id = 1 AND nome = 'a''b' AND m IN (1, 2, 3)"),
+            formato_sql("SELECT * FROM p WHERE id = 22 AND nome = 'x' AND m IN (7)"),
+        )
+
+    @override_settings(CONSULTAS_SERVER_TIMING=True)
+    def test_server_timing_and_log_line(self):
+        """Each request reports its query count in Server-Timing and a JSON log line"""
+        def view(request):
+            list(Produto.objects.all())
+            return HttpResponse('ok')
+
+        with self.assertLogs('nucleo.consultas', 'INFO') as logs:
+            response = self.executar(view)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="1 consultas", app;dur=[\d.]+$')
+        self.assertEqual(logs.records[-1].levelname, 'INFO')
+        self.assertEqual(registro(logs)['consultas'], 1)
+        self.assertEqual(registro(logs)['repetidas'], [])
+
+    def test_repeated_queries_are_flagged(self):
+        """A query per row (N+1) is logged as a warning with its SQL shape"""
+        def view(request):
+            for produto in Produto.objects.all():
+                produto.marca.nome
+            return HttpResponse('ok')
+
+        with self.assertLogs('nucleo.consultas', 'INFO') as logs:
+            self.executar(view)
+        self.assertEqual(logs.records[-1].levelname, 'WARNING')
+        [repetida] = registro(logs)['repetidas']
+        self.assertEqual(repetida['vezes'], 6)
+        self.assertIn('nucleo_marca', repetida['sql'])
+
+    def test_budget_exceeded_raises_in_strict_mode(self):
+        """Views over their declared budget fail only in strict mode"""
+        @orcamento_consultas(2)
+        def view(request):
+            for produto in Produto.objects.all():
+                produto.marca.nome
+            return HttpResponse('ok')
+
+        with self.assertLogs('nucleo.consultas'), override_settings(CONSULTAS_MODO_ESTRITO=True):
+            with self.assertRaisesMessage(OrcamentoConsultasExcedido, '7 consultas (orçamento 2)'):
+                self.executar(view)
+        with self.assertLogs('nucleo.consultas') as logs, override_settings(CONSULTAS_MODO_ESTRITO=False):
+            self.assertEqual(self.executar(view).status_code, 200)
+        self.assertEqual(registro(logs)['orcamento'], 2)
+
+
+@override_settings(CONSULTAS_MODO_ESTRITO=True)
+class OrcamentoViewsTestCase(TestCase):
+    def test_admin_product_list_is_constant(self):
+        """The management list stays within budget as the catalog grows"""
+        admin = User.objects.create_superuser('admin', 'admin@nerdhub.com', 'senha123')
+        client = Client()
+        client.force_login(admin)
+        marca = Marca.objects.create(nome='Marvel')
+        categoria = Categoria.objects.create(nome='Funko Pop')
+        with mock.patch('nucleo.imagens.agendar'):
+            for i in range(15):
+                produto = Produto.objects.create(
+                    nome=f'Funko {i}', preco='99.90', imagem_principal='produtos/test_image.jpg',
+                    marca=marca, categoria=categoria,
+                )
+                Estoque.objects.create(produto=produto, quantidade=i)
+
+        with self.assertLogs('nucleo.consultas') as logs:
+            response = client.get('/gerenciar/produtos/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(registro(logs)['view'], 'nucleo:admin_produtos')
+        self.assertEqual(registro(logs)['repetidas'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import django
+import shutil
+import tempfile
+import unittest
+import sys
+from io import StringIO
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, Client, override_settings
+from nucleo import estaticos
+from nucleo.templatetags import estaticos as tags_estaticos
+
+
+class MinificacaoCssTestCase(SimpleTestCase):
+    def test_minify_keeps_meaningful_spaces(self):
+        """Comments and layout whitespace go, descendant and calc() spaces stay"""
+        css = """
+        /* cabeçalho */
+        .menu   a :hover ,
+        .menu > li {
+            width: calc(100% - 2rem);
+            margin : 0 auto;
+        }
+        """
+        self.assertEqual(
+            estaticos.minificar_css(css),
+            '.menu a :hover,.menu>li{width:calc(100% - 2rem);margin :0 auto}',
+        )
+
+    def test_bundle_hoists_imports(self):
+        """@import rules from every file move to the top of the bundle verbatim, once"""
+        arquivos = estaticos.PACOTES_CSS['perfil']
+        importacoes = []
+        for arquivo in arquivos:
+            with open(finders.find(arquivo), encoding='utf-8') as entrada:
+                for linha in entrada:
+                    linha = linha.strip()
+                    if linha.startswith('@import') and linha not in importacoes:
+                        importacoes.append(linha)
+        self.assertIn(
+            "@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=Pacifico&display=swap');",
+            importacoes,
+        )
+
+        css = estaticos.montar_pacote(arquivos)
+        self.assertTrue(css.startswith(''.join(importacoes)))
+        for importacao in importacoes:
+            self.assertEqual(css.count(importacao), 1)
+        self.assertEqual(css.count('@import'), len(importacoes))
+        self.assertNotIn('/*', css)
+
+
+class PipelineEstaticosTestCase(SimpleTestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        tags_estaticos._pacote_disponivel.cache_clear()
+        self.addCleanup(tags_estaticos._pacote_disponivel.cache_clear)
+
+    def test_command_writes_smaller_bundles(self):
+        """empacotar_css writes one minified file per bundle"""
+        call_command('empacotar_css', '--destino', self.pasta, stdout=StringIO())
+        for nome, arquivos in estaticos.PACOTES_CSS.items():
+            caminho = os.path.join(self.pasta, estaticos.caminho_pacote(nome))
+            origem = sum(os.path.getsize(finders.find(arquivo)) for arquivo in arquivos)
+            self.assertLess(os.path.getsize(caminho), origem)
+
+    def test_tag_falls_back_to_source_files(self):
+        """Without a built bundle the tag links every source file"""
+        html = Template("{% load estaticos %}{% css_pacote 'perfil' %}").render(Context())
+        self.assertEqual(html.count('<link rel="stylesheet"'), 4)
+        self.assertIn('css/style_seguranca', html)
+
+    def test_collectstatic_hashes_compresses_and_serves_immutable(self):
+        """Collected bundles get hashed names, .gz variants and far-future caching"""
+        build = os.path.join(self.pasta, 'build')
+        raiz = os.path.join(self.pasta, 'raiz')
+        estaticos.empacotar_css(build)
+        with override_settings(STATICFILES_DIRS=settings.STATICFILES_DIRS + [build], STATIC_ROOT=raiz):
+            call_command('collectstatic', '--noinput', verbosity=0)
+
+            html = Template("{% load estaticos %}{% css_pacote 'perfil' %}").render(Context())
+            self.assertEqual(html.count('<link rel="stylesheet"'), 1)
+            url = html.split('href="')[1].split('"')[0]
+            self.assertRegex(url, r'/static/css/pacotes/perfil\.min\.[0-9a-f]{12}\.css$')
+            self.assertTrue(os.path.exists(os.path.join(raiz, url[len('/static/'):] + '.gz')))
+
+            response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', response['Cache-Control'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from nucleo.models import (
+    Produto, Marca, Pedido, ItemPedido, Review, Carrinho, ItemCarrinho, ReservaEstoque, EstatisticaAvaliacao,
+)
+from usuarios import exclusao_dados
+from usuarios.models import Perfil, Endereco, MetodoPagamento, Sessao, Notificacao, Auditoria, ExportacaoDados
+
+
+class ExclusaoDadosTestCase(TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        configuracao = override_settings(EXPORTACOES_DADOS_ROOT=self.pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+
+        self.produto = Produto.objects.create(
+            nome='Funko Thor', preco='50.00', imagem_principal='produtos/test_image.jpg', marca=Marca.objects.create(nome='Marvel')
+        )
+        self.user = self.criar_cliente('cliente')
+        self.outro = self.criar_cliente('outro')
+
+    def criar_cliente(self, nome):
+        user = User.objects.create_user(nome, f'{nome}@nerdhub.com', 'senha123', first_name=nome.title())
+        perfil = Perfil.objects.get(user=user)
+        endereco = Endereco.objects.create(
+            perfil=perfil, recipient_name=nome, street='Rua A', number='1',
+            neighborhood='Centro', city='São Paulo', state='SP', postal_code='01000-000',
+        )
+        MetodoPagamento.objects.create(perfil=perfil, type='card', card_last4='4242', billing_address=endereco)
+        Sessao.objects.create(perfil=perfil, token_id=f'sessao-{nome}', expires_at=timezone.now(), ip_address='127.0.0.1')
+        Auditoria.objects.create(perfil=perfil, action='login', description='Entrou', ip_address='127.0.0.1')
+        Review.objects.create(produto=self.produto, usuario=user, comentario='Ótimo', nota=5 if nome == 'cliente' else 3)
+        carrinho = Carrinho.objects.create(usuario=user)
+        ItemCarrinho.objects.create(carrinho=carrinho, produto=self.produto, quantidade=1)
+        ReservaEstoque.objects.create(
+            produto=self.produto, usuario=user, quantidade=1, expira_em=timezone.now() + timedelta(minutes=15)
+        )
+        for _ in range(2):
+            pedido = Pedido.objects.create(
+                usuario=user, total='100.00', finalizado=True, endereco_destinatario=nome,
+                endereco_rua='Rua A', endereco_cidade='São Paulo', endereco_estado='SP', endereco_cep='01000-000',
+            )
+            ItemPedido.objects.create(pedido=pedido, produto=self.produto, quantidade=2, preco_unitario='50.00')
+        return user
+
+    def marcar(self, user):
+        Perfil.objects.filter(user=user).update(data_deletion_request=True, data_deletion_request_at=timezone.now())
+
+    def test_lote_remove_dados_pessoais_e_anonimiza_pedidos(self):
+        """Personal rows are deleted, orders are kept without delivery data and the account is anonymized"""
+        self.marcar(self.user)
+        perfil_id = self.user.perfil.id
+
+        resultado = exclusao_dados.excluir_lote()
+
+        self.assertEqual(resultado['perfis'], 1)
+        self.assertEqual(resultado['pedidos_anonimizados'], 2)
+        self.assertFalse(Perfil.objects.filter(user=self.user).exists())
+        for modelo in (Endereco, MetodoPagamento, Sessao, Notificacao, Auditoria):
+            self.assertFalse(modelo.objects.filter(perfil_id=perfil_id).exists(), modelo.__name__)
+        self.assertFalse(Review.objects.filter(usuario=self.user).exists())
+        self.assertFalse(Carrinho.objects.filter(usuario=self.user).exists())
+        self.assertFalse(ItemCarrinho.objects.filter(carrinho__usuario=self.user).exists())
+        self.assertFalse(ReservaEstoque.objects.filter(usuario=self.user).exists())
+
+        pedidos = Pedido.objects.filter(usuario=self.user)
+        self.assertEqual(pedidos.count(), 2)
+        for pedido in pedidos:
+            self.assertEqual(pedido.endereco_destinatario, 'Cliente removido')
+            self.assertEqual(pedido.endereco_rua, '')
+            self.assertEqual(pedido.endereco_cep, '')
+            self.assertEqual(pedido.endereco_estado, 'SP')
+            self.assertEqual(str(pedido.total), '100.00')
+            self.assertEqual(pedido.itens.count(), 1)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.username, f'removido-{self.user.id}')
+        self.assertEqual(self.user.email, '')
+        self.assertEqual(self.user.first_name, '')
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(self.user.has_usable_password())
+
+    def test_lote_nao_afeta_quem_nao_pediu_exclusao(self):
+        """Users without a deletion request keep all their data"""
+        self.marcar(self.user)
+
+        exclusao_dados.excluir_lote()
+
+        self.outro.refresh_from_db()
+        self.assertEqual(self.outro.username, 'outro')
+        self.assertTrue(self.outro.is_active)
+        perfil = Perfil.objects.get(user=self.outro)
+        self.assertEqual(perfil.enderecos.count(), 1)
+        self.assertEqual(perfil.metodos_pagamento.count(), 1)
+        self.assertTrue(Review.objects.filter(usuario=self.outro).exists())
+        self.assertTrue(Pedido.objects.filter(usuario=self.outro, endereco_destinatario='outro').exists())
+
+    def test_lote_recalcula_estatisticas_de_avaliacao(self):
+        """Removing the user's reviews updates the product's rating aggregates"""
+        self.assertEqual(EstatisticaAvaliacao.objects.get(produto=self.produto).total_avaliacoes, 2)
+        self.marcar(self.user)
+
+        exclusao_dados.excluir_lote()
+
+        estatistica = EstatisticaAvaliacao.objects.get(produto=self.produto)
+        self.assertEqual(estatistica.total_avaliacoes, 1)
+        self.assertEqual(estatistica.media, 3)
+
+    def test_lote_respeita_limite_e_mede_etapas(self):
+        """Each batch takes at most 'limite' profiles and reports the duration of each step"""
+        self.marcar(self.user)
+        self.marcar(self.outro)
+
+        primeiro = exclusao_dados.excluir_lote(limite=1)
+        segundo = exclusao_dados.excluir_lote(limite=1)
+        vazio = exclusao_dados.excluir_lote(limite=1)
+
+        self.assertEqual((primeiro['perfis'], segundo['perfis'], vazio['perfis']), (1, 1, 0))
+        self.assertEqual(
+            list(primeiro['etapas_ms']),
+            ['reivindicar', 'levantar', 'dados_perfil', 'reviews', 'carrinho', 'pedidos', 'conta'],
+        )
+        self.assertEqual(primeiro['linhas_removidas']['usuarios_endereco'], 1)
+        self.assertFalse(Perfil.objects.exists())
+
+    def test_lote_espera_exportacao_em_andamento(self):
+        """A profile whose data export is being generated is left for a later batch"""
+        self.marcar(self.user)
+        exportacao = ExportacaoDados.objects.create(
+            perfil=self.user.perfil, status=ExportacaoDados.STATUS_PROCESSANDO, iniciado_em=timezone.now(),
+        )
+
+        self.assertEqual(exclusao_dados.excluir_lote()['perfis'], 0)
+        self.assertTrue(Perfil.objects.filter(user=self.user).exists())
+
+        ExportacaoDados.objects.filter(id=exportacao.id).update(status=ExportacaoDados.STATUS_CONCLUIDA)
+        self.assertEqual(exclusao_dados.excluir_lote()['perfis'], 1)
+        self.assertFalse(ExportacaoDados.objects.exists())
+
+    def test_comando_processa_fila_uma_vez(self):
+        """The processar_exclusoes command drains the queue and exits with --uma-vez"""
+        self.marcar(self.user)
+        saida = io.StringIO()
+
+        call_command('processar_exclusoes', uma_vez=True, stdout=saida)
+
+        self.assertIn('1 pedidos de exclusão atendidos', saida.getvalue())
+        self.assertFalse(Perfil.objects.filter(user=self.user).exists())
+
+    def test_pedido_de_exclusao_pela_conta(self):
+        """Deleting the account from the profile page only flags the profile and logs the user out"""
+        client = Client()
+        client.force_login(self.user)
+
+        response = client.post(reverse('usuario:perfil_conta'), {'delete_account': '1'})
+
+        self.assertRedirects(response, reverse('nucleo:index'), fetch_redirect_response=False)
+        perfil = Perfil.objects.get(user=self.user)
+        self.assertTrue(perfil.data_deletion_request)
+        self.assertIsNotNone(perfil.data_deletion_request_at)
+        self.assertNotIn('_auth_user_id', client.session)
+        self.assertTrue(Endereco.objects.filter(perfil=perfil).exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from nucleo import exportacao
+from nucleo.models import Produto, Marca, Pedido, ItemPedido
+
+
+class ExportacaoPedidosTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@nerdhub.com', 'senha123')
+        self.cliente = User.objects.create_user('cliente', 'cliente@nerdhub.com', 'senha123')
+        self.client = Client()
+        self.client.force_login(self.admin)
+        marca = Marca.objects.create(nome='Marvel')
+        self.produtos = [
+            Produto.objects.create(
+                nome=f'Funko {i}', preco='50.00', imagem_principal='produtos/test_image.jpg', marca=marca
+            )
+            for i in range(3)
+        ]
+        self.pedidos = []
+        for dia in range(1, 6):
+            pedido = Pedido.objects.create(usuario=self.cliente, total='100.00', finalizado=dia != 5, forma_pagamento='pix')
+            Pedido.objects.filter(id=pedido.id).update(criado_em=timezone.make_aware(datetime(2026, 3, dia, 12)))
+            for produto in self.produtos[:dia % 3 + 1]:
+                ItemPedido.objects.create(pedido=pedido, produto=produto, quantidade=2, preco_unitario='50.00')
+            self.pedidos.append(pedido)
+        # Pedido sem itens também é exportado
+        self.vazio = Pedido.objects.create(usuario=self.cliente, total='0.00', finalizado=True)
+
+    def ler_csv(self, response):
+        self.assertTrue(response.streaming)
+        return list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_csv_streams_one_row_per_item_with_filters(self):
+        """CSV has one row per item, honours date range and status and is an attachment"""
+        url = reverse('nucleo:admin_exportar_pedidos')
+        response = self.client.get(url, {'inicio': '2026-03-02', 'fim': '2026-03-04', 'status': 'finalizado'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment;', response['Content-Disposition'])
+        linhas = self.ler_csv(response)
+        esperados = {pedido.id for pedido in self.pedidos[1:4]}
+        self.assertEqual({int(linha['pedido_id']) for linha in linhas}, esperados)
+        self.assertEqual(len(linhas), ItemPedido.objects.filter(pedido_id__in=esperados).count())
+        self.assertEqual(linhas[0]['usuario'], 'cliente')
+        self.assertEqual(linhas[0]['produto'], 'Funko 0')
+        self.assertEqual(linhas[0]['preco_unitario'], '50.00')
+
+        abertos = self.ler_csv(self.client.get(url, {'status': 'aberto'}))
+        self.assertEqual({int(linha['pedido_id']) for linha in abertos}, {self.pedidos[4].id})
+        sem_itens = [linha for linha in self.ler_csv(self.client.get(url)) if int(linha['pedido_id']) == self.vazio.id]
+        self.assertEqual(len(sem_itens), 1)
+        self.assertEqual(sem_itens[0]['produto_id'], '')
+
+    def test_csv_neutralizes_formulas_in_customer_text(self):
+        """Cells starting with =, +, - or @ are prefixed with ' in CSV but kept as-is in JSONL"""
+        Pedido.objects.filter(id=self.vazio.id).update(
+            endereco_destinatario='=HYPERLINK("http://x","clique")', endereco_rua='+55 rua',
+            endereco_bairro='-bairro', endereco_cidade='@cidade', endereco_complemento='apto 1',
+        )
+        pedidos = exportacao.filtrar_pedidos().filter(id=self.vazio.id)
+
+        [linha] = csv.DictReader(io.StringIO(''.join(exportacao.exportar(pedidos, 'csv'))))
+        self.assertEqual(linha['endereco_destinatario'], '\'=HYPERLINK("http://x","clique")')
+        self.assertEqual(linha['endereco_rua'], "'+55 rua")
+        self.assertEqual(linha['endereco_bairro'], "'-bairro")
+        self.assertEqual(linha['endereco_cidade'], "'@cidade")
+        self.assertEqual(linha['endereco_complemento'], 'apto 1')
+        self.assertEqual(linha['total'], '0.00')
+
+        [objeto] = [json.loads(texto) for texto in ''.join(exportacao.exportar(pedidos, 'jsonl')).splitlines()]
+        self.assertEqual(objeto['endereco_destinatario'], '=HYPERLINK("http://x","clique")')
+
+    def test_jsonl_groups_items_in_a_single_query(self):
+        """JSONL has one object per order with nested items, read by one joined query"""
+        pedidos = exportacao.filtrar_pedidos()
+        with CaptureQueriesContext(connection) as consultas:
+            linhas = [json.loads(linha) for linha in ''.join(exportacao.exportar(pedidos, 'jsonl', tamanho_lote=2)).splitlines()]
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual([linha['pedido_id'] for linha in linhas], [pedido.id for pedido in self.pedidos] + [self.vazio.id])
+        primeiro = linhas[0]
+        self.assertEqual(len(primeiro['itens']), 2)
+        self.assertEqual(primeiro['itens'][0], {'produto_id': self.produtos[0].id, 'produto': 'Funko 0', 'quantidade': 2, 'preco_unitario': '50.00'})
+        self.assertTrue(primeiro['criado_em'].startswith('2026-03-01T12:00:00'))
+        self.assertEqual(linhas[-1]['itens'], [])
+
+    def test_permissions_and_invalid_filters(self):
+        """Only superusers can export; bad parameters answer 400"""
+        url = reverse('nucleo:admin_exportar_pedidos')
+        self.assertEqual(self.client.get(url, {'inicio': '03/01/2026'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'formato': 'xlsx'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'inicio': '2026-03-05', 'fim': '2026-03-01'}).status_code, 400)
+        self.client.force_login(self.cliente)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_extreme_dates_do_not_overflow(self):
+        """The first and last representable days are valid bounds"""
+        response = self.client.get(
+            reverse('nucleo:admin_exportar_pedidos'), {'inicio': '0001-01-01', 'fim': '9999-12-31'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({int(linha['pedido_id']) for linha in self.ler_csv(response)}, {p.id for p in Pedido.objects.all()})
+        self.assertEqual(exportacao.filtrar_pedidos(fim=datetime.max.date()).count(), Pedido.objects.count())
+
+    def test_command_writes_file(self):
+        """The management command writes the same export to a file"""
+        with tempfile.NamedTemporaryFile('r', suffix='.jsonl', encoding='utf-8') as arquivo:
+            call_command('exportar_pedidos', formato='jsonl', status='aberto', saida=arquivo.name, stdout=io.StringIO())
+            linhas = [json.loads(linha) for linha in arquivo.read().splitlines()]
+        self.assertEqual([linha['pedido_id'] for linha in linhas], [self.pedidos[4].id])
+
+
+if __name__ == '__main__':
+    unittest.main()
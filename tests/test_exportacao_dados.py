@@ -0,0 +1,167 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from nucleo.models import Produto, Marca, Pedido, ItemPedido, Review
+from usuarios import exportacao_dados
+from usuarios.models import Perfil, Endereco, MetodoPagamento, Sessao, Auditoria, ExportacaoDados
+from benchmarks import exportacao_dados as benchmark_exportacao
+
+
+class ExportacaoDadosTestCase(TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        configuracao = override_settings(EXPORTACOES_DADOS_ROOT=self.pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+
+        self.user = User.objects.create_user('cliente', 'cliente@nerdhub.com', 'senha123')
+        self.perfil = Perfil.objects.get(user=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        produto = Produto.objects.create(
+            nome='Funko Thor', preco='50.00', imagem_principal='produtos/test_image.jpg', marca=Marca.objects.create(nome='Marvel')
+        )
+        Endereco.objects.create(
+            perfil=self.perfil, recipient_name='Cliente', street='Rua A', number='1',
+            neighborhood='Centro', city='São Paulo', state='SP', postal_code='01000-000',
+        )
+        MetodoPagamento.objects.create(perfil=self.perfil, type='card', card_last4='4242', card_token='tok_segredo')
+        Sessao.objects.create(perfil=self.perfil, token_id='sessao-secreta', expires_at=timezone.now(), ip_address='127.0.0.1')
+        Auditoria.objects.create(perfil=self.perfil, action='login', description='Entrou', ip_address='127.0.0.1')
+        Review.objects.create(produto=produto, usuario=self.user, comentario='Ótimo', nota=5)
+        for _ in range(3):
+            pedido = Pedido.objects.create(usuario=self.user, total='100.00', finalizado=True)
+            ItemPedido.objects.create(pedido=pedido, produto=produto, quantidade=2, preco_unitario='50.00')
+
+    def processar(self):
+        return exportacao_dados.processar_pendentes()
+
+    def test_request_is_queued_and_worker_builds_private_zip(self):
+        """Requesting only queues; the worker writes a zip with every kind of personal data"""
+        response = self.client.post(reverse('usuario:solicitar_exportacao_dados'))
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.perfil.refresh_from_db()
+        self.assertTrue(self.perfil.data_export_request)
+        self.assertEqual(self.client.get(status_url).json()['status'], 'pendente')
+        # A second request reuses the open export
+        self.assertEqual(self.client.post(reverse('usuario:solicitar_exportacao_dados')).json()['status_url'], status_url)
+
+        [medicao] = self.processar()
+        self.assertEqual(medicao['registros'], 1 + 1 + 1 + 1 + 1 + 1 + 1 + 3)
+        self.perfil.refresh_from_db()
+        self.assertFalse(self.perfil.data_export_request)
+
+        status = self.client.get(status_url).json()
+        self.assertEqual(status['status'], 'concluida')
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('attachment;', response['Content-Disposition'])
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as arquivo:
+            self.assertEqual(set(arquivo.namelist()), {
+                'perfil.json', 'enderecos.jsonl', 'metodos_pagamento.jsonl', 'sessoes.jsonl',
+                'notificacoes.jsonl', 'auditorias.jsonl', 'reviews.jsonl', 'pedidos.jsonl',
+            })
+            self.assertEqual(json.loads(arquivo.read('perfil.json'))['usuario']['email'], 'cliente@nerdhub.com')
+            pedidos = [json.loads(linha) for linha in arquivo.read('pedidos.jsonl').splitlines()]
+            self.assertEqual(len(pedidos), 3)
+            self.assertEqual(len(pedidos[0]['itens']), 1)
+            conteudo = b''.join(arquivo.read(nome) for nome in arquivo.namelist())
+        self.assertNotIn(b'tok_segredo', conteudo)
+        self.assertNotIn(b'sessao-secreta', conteudo)
+        self.assertTrue(ExportacaoDados.objects.get().arquivo.startswith(f'{self.perfil.id}/'))
+
+    def test_download_is_private_and_expires(self):
+        """Only the owner downloads, and only until the archive expires"""
+        self.client.post(reverse('usuario:solicitar_exportacao_dados'))
+        self.processar()
+        exportacao = ExportacaoDados.objects.get()
+        url = reverse('usuario:baixar_exportacao_dados', args=[exportacao.id])
+
+        outro = Client()
+        outro.force_login(User.objects.create_user('outro', 'outro@nerdhub.com', 'senha123'))
+        self.assertEqual(outro.get(url).status_code, 404)
+        self.assertEqual(outro.get(reverse('usuario:status_exportacao_dados', args=[exportacao.id])).status_code, 404)
+
+        ExportacaoDados.objects.filter(id=exportacao.id).update(expira_em=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(exportacao_dados.remover_expiradas(), 1)
+        self.assertFalse(exportacao_dados.armazenamento().exists(exportacao.arquivo))
+
+    def test_flag_set_elsewhere_is_fulfilled_once(self):
+        """A profile flagged outside the view gets one export, and a failure is not retried forever"""
+        Perfil.objects.filter(id=self.perfil.id).update(data_export_request=True, data_export_request_at=timezone.now())
+        self.assertEqual(exportacao_dados.enfileirar_solicitacoes(), 1)
+        self.assertEqual(exportacao_dados.enfileirar_solicitacoes(), 0)
+        ExportacaoDados.objects.update(status=ExportacaoDados.STATUS_ERRO)
+        self.assertEqual(exportacao_dados.enfileirar_solicitacoes(), 0)
+
+    def test_storage_backend_is_configurable(self):
+        """Archives go to the backend in EXPORTACOES_DADOS_STORAGE, shared by worker and download view"""
+        compartilhada = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, compartilhada, ignore_errors=True)
+        configuracao = {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': compartilhada},
+        }
+        with override_settings(EXPORTACOES_DADOS_STORAGE=configuracao):
+            self.client.post(reverse('usuario:solicitar_exportacao_dados'))
+            self.processar()
+            exportacao = ExportacaoDados.objects.get()
+            self.assertTrue(os.path.exists(os.path.join(compartilhada, exportacao.arquivo)))
+            self.assertFalse(os.path.exists(os.path.join(self.pasta, exportacao.arquivo)))
+            response = self.client.get(reverse('usuario:baixar_exportacao_dados', args=[exportacao.id]))
+            self.assertEqual(response.status_code, 200)
+            response.close()
+
+    def test_task_deleted_during_generation_leaves_no_file(self):
+        """If the task row disappears while the zip is built, the worker drops the file and keeps going"""
+        self.client.post(reverse('usuario:solicitar_exportacao_dados'))
+        gerar_arquivo = exportacao_dados.gerar_arquivo
+
+        def gerar_e_apagar(perfil, destino):
+            registros = gerar_arquivo(perfil, destino)
+            ExportacaoDados.objects.all().delete()
+            return registros
+
+        with mock.patch.object(exportacao_dados, 'gerar_arquivo', gerar_e_apagar):
+            self.assertEqual(self.processar(), [])
+        self.assertEqual(os.listdir(os.path.join(self.pasta, str(self.perfil.id))), [])
+
+        exportacao = ExportacaoDados.objects.create(perfil=self.perfil)
+        exportacao.delete()
+        exportacao_dados.falhar(exportacao, 'erro')
+
+    def test_throughput_benchmark_reports_metrics(self):
+        """The benchmark measures records/s and peak memory of one export"""
+        resultado = benchmark_exportacao.medir_exportacao(self.user)
+        self.assertEqual(resultado['registros'], 10)
+        self.assertGreater(resultado['registros_por_segundo'], 0)
+        self.assertGreater(resultado['pico_memoria_kb'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from nucleo import facetas
+from nucleo.models import Produto, Marca, Categoria, Estoque
+
+
+class FacetasTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.marvel = Marca.objects.create(nome='Marvel')
+        self.dc = Marca.objects.create(nome='DC')
+        self.funko = Categoria.objects.create(nome='Funko Pop')
+        self.caneca = Categoria.objects.create(nome='Caneca')
+
+        def produto(nome, preco, marca, categoria, estoque=None):
+            item = Produto.objects.create(
+                nome=nome, preco=preco, imagem_principal='produtos/test_image.jpg', marca=marca, categoria=categoria
+            )
+            if estoque is not None:
+                Estoque.objects.create(produto=item, quantidade=estoque)
+            return item
+
+        produto('Funko Homem-Aranha', '89.90', self.marvel, self.funko, 5)
+        produto('Funko Thor', '129.90', self.marvel, self.funko, 0)
+        produto('Caneca Vingadores', '39.90', self.marvel, self.caneca)
+        produto('Funko Batman', '99.90', self.dc, self.funko, 3)
+        produto('Caneca Batman', '45.00', self.dc, self.caneca, 0)
+
+    def _facetas(self, **parametros):
+        response = self.client.get('/produtos/facetas/', parametros)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    @staticmethod
+    def _totais(opcoes):
+        return {opcao['valor']: opcao['total'] for opcao in opcoes}
+
+    def test_counts_ignore_own_dimension(self):
+        """Each option counts the other filters but not its own dimension"""
+        dados = self._facetas(marca='marvel', em_estoque='1')
+        contagens = dados['facetas']
+        self.assertEqual(contagens['total'], 2)
+        self.assertEqual(self._totais(contagens['marcas']), {'dc': 1, 'marvel': 2})
+        self.assertEqual(self._totais(contagens['categorias']), {'caneca': 1, 'funko-pop': 1})
+        self.assertEqual(self._totais(contagens['faixas'])['ate-50'], 1)
+        self.assertEqual(contagens['em_estoque'], {'total': 2, 'selecionado': True})
+        self.assertEqual([opcao['valor'] for opcao in contagens['marcas'] if opcao['selecionado']], ['marvel'])
+        self.assertIn('Homem-Aranha', dados['html'])
+        self.assertIn('Caneca Vingadores', dados['html'])
+        self.assertNotIn('Thor', dados['html'])
+
+    def test_filters_combine_or_within_and_across(self):
+        """Repeated values are OR'ed; different dimensions are AND'ed"""
+        response = self.client.get('/produtos/facetas/?faixa=ate-50&faixa=50-100&categoria=funko-pop&faixa=x')
+        dados = response.json()
+        self.assertEqual(dados['facetas']['total'], 2)
+        self.assertIn('Funko Batman', dados['html'])
+        self.assertIn('Funko Homem-Aranha', dados['html'])
+        self.assertNotIn('Thor', dados['html'])
+        self.assertEqual(self._totais(dados['facetas']['faixas'])['100-200'], 1)
+
+    def test_one_grouped_query_then_cached(self):
+        """Facet counts cost one GROUP BY query, then none until something changes"""
+        with self.assertNumQueries(2):  # cube + product page
+            self._facetas()
+        with self.assertNumQueries(1):
+            self.assertEqual(self._facetas()['facetas']['total'], 5)
+
+        Estoque.objects.filter(quantidade=5).get().delete()
+        self.assertIsNone(cache.get(facetas.CHAVE_CUBO))
+        self.assertEqual(self._facetas()['facetas']['em_estoque']['total'], 3)
+
+    def test_invalid_cursor(self):
+        """A tampered cursor is rejected like the plain catalog page"""
+        response = self.client.get('/produtos/facetas/', {'cursor': '!!!'})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from nucleo.models import Produto, Marca, Review, Estoque
+from nucleo import fragmentos
+
+CARD = 'nucleo/partials/card_produto.html'
+
+
+class CacheCardsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.marca = Marca.objects.create(nome='Marvel')
+        self.produtos = [
+            Produto.objects.create(
+                nome=f'Funko {i}', preco='99.90', imagem_principal='produtos/test_image.jpg', marca=self.marca,
+            )
+            for i in range(3)
+        ]
+        self.user = User.objects.create(username='leitor')
+
+    def renderizar(self):
+        produtos = Produto.objects.select_related('estatistica_avaliacao').order_by('id')
+        return fragmentos.renderizar_cards(produtos, CARD)
+
+    def test_second_render_is_served_from_cache(self):
+        """Cards rendered once are reused and counted as hits"""
+        primeiro = self.renderizar()
+        segundo = self.renderizar()
+        self.assertEqual(primeiro, segundo)
+        self.assertEqual(primeiro.count('class="funko-item"'), 3)
+        self.assertEqual(
+            fragmentos.estatisticas_cache_cards(),
+            {'acertos': 3, 'faltas': 3, 'taxa_acerto': 0.5},
+        )
+
+    def test_saving_product_invalidates_only_its_card(self):
+        """Editing a product re-renders that card and keeps the others cached"""
+        self.renderizar()
+        fragmentos.zerar_estatisticas_cache_cards()
+        self.produtos[0].nome = 'Funko Renomeado'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produtos[0].save()
+
+        html = self.renderizar()
+        self.assertIn('Funko Renomeado', html)
+        estatisticas = fragmentos.estatisticas_cache_cards()
+        self.assertEqual((estatisticas['acertos'], estatisticas['faltas']), (2, 1))
+
+    def test_version_bumps_only_after_commit(self):
+        """A card re-cached while the writer's transaction is open is not stored under the new version"""
+        versao = fragmentos.versoes_cards([self.produtos[0].id])
+        self.produtos[0].nome = 'Funko Renomeado'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produtos[0].save()
+            self.assertEqual(fragmentos.versoes_cards([self.produtos[0].id]), versao)
+        self.assertNotEqual(fragmentos.versoes_cards([self.produtos[0].id]), versao)
+
+    def test_related_models_bump_version(self):
+        """Reviews, stock, brand changes and deletions invalidate the cards"""
+        versoes = fragmentos.versoes_cards([p.id for p in self.produtos])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(produto=self.produtos[0], usuario=self.user, comentario='Ótimo', nota=5)
+            Estoque.objects.create(produto=self.produtos[1], quantidade=3)
+        self.assertIn('⭐ 5,0 (1)', self.renderizar())
+
+        novas = fragmentos.versoes_cards([p.id for p in self.produtos])
+        self.assertNotEqual(novas[self.produtos[0].id], versoes[self.produtos[0].id])
+        self.assertNotEqual(novas[self.produtos[1].id], versoes[self.produtos[1].id])
+        self.assertEqual(novas[self.produtos[2].id], versoes[self.produtos[2].id])
+
+        self.marca.nome = 'Marvel Studios'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.marca.save()
+        depois_marca = fragmentos.versoes_cards([p.id for p in self.produtos])
+        for produto in self.produtos:
+            self.assertNotEqual(depois_marca[produto.id], novas[produto.id])
+
+    def test_index_uses_cached_cards(self):
+        """The home page renders the cards through the fragment cache"""
+        client = Client()
+        client.get(reverse('nucleo:index'))
+        response = client.get(reverse('nucleo:index'))
+        self.assertContains(response, 'Funko 1')
+        self.assertEqual(fragmentos.estatisticas_cache_cards()['acertos'], 3)
+
+    def test_stats_endpoint_requires_superuser(self):
+        """Only superusers can read the hit/miss counters"""
+        client = Client()
+        client.force_login(self.user)
+        self.assertEqual(client.get(reverse('nucleo:admin_cache_cards')).status_code, 403)
+
+        admin = User.objects.create(username='admin', is_superuser=True, is_staff=True)
+        client.force_login(admin)
+        self.renderizar()
+        data = client.get(reverse('nucleo:admin_cache_cards')).json()
+        self.assertEqual(data['faltas'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
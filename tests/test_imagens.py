@@ -0,0 +1,162 @@
+import os
+import django
+import shutil
+import tempfile
+import unittest
+import sys
+from io import BytesIO, StringIO
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+from nucleo.models import Produto, Marca, ImagemProduto
+from nucleo import imagens
+
+MEDIA_TEMPORARIA = tempfile.mkdtemp()
+
+
+def salvar_imagem(nome, largura, altura, modo='RGB'):
+    """Saves a generated image into the (temporary) media storage"""
+    saida = BytesIO()
+    Image.new(modo, (largura, altura), (200, 30, 30, 128) if modo == 'RGBA' else (200, 30, 30)).save(
+        saida, format='PNG'
+    )
+    return default_storage.save(nome, ContentFile(saida.getvalue()))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORARIA)
+class DerivadosImagensTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORARIA, ignore_errors=True)
+
+    def setUp(self):
+        self.marca = Marca.objects.create(nome='Marvel')
+
+    def criar_produto(self, nome_arquivo='produtos/grande.png', largura=1600, altura=1200, modo='RGB'):
+        nome = salvar_imagem(nome_arquivo, largura, altura, modo)
+        with self.captureOnCommitCallbacks(execute=False):
+            return Produto.objects.create(nome='Funko', preco='99.90', imagem_principal=nome, marca=self.marca)
+
+    def test_generates_every_size_and_format(self):
+        """Each size is produced in every format, keeping the aspect ratio"""
+        nome = salvar_imagem('produtos/grande.png', 1600, 1200, 'RGBA')
+        manifesto = imagens.gerar_derivados(nome)
+
+        self.assertEqual(manifesto['origem'], nome)
+        self.assertEqual(manifesto['larguras'], {'thumb': 160, 'card': 400, 'zoom': 1200})
+        for tamanho, formatos in manifesto['arquivos'].items():
+            self.assertEqual(list(formatos), imagens.FORMATOS)
+            with default_storage.open(formatos['jpeg']) as arquivo:
+                derivado = Image.open(arquivo)
+                self.assertEqual(derivado.format, 'JPEG')
+                self.assertEqual(derivado.size[0], manifesto['larguras'][tamanho])
+                self.assertEqual(derivado.size[1], manifesto['larguras'][tamanho] * 3 // 4)
+
+    def test_small_images_are_not_upscaled(self):
+        """Sizes larger than the original reuse the original width"""
+        nome = salvar_imagem('produtos/pequena.png', 300, 300)
+        manifesto = imagens.gerar_derivados(nome)
+        self.assertEqual(manifesto['larguras'], {'thumb': 160, 'card': 300, 'zoom': 300})
+        self.assertEqual(imagens.srcset(manifesto, 'webp').count('w,'), 1)
+
+    def test_original_is_read_from_the_field_storage(self):
+        """Originals are opened through the image field's storage, not default_storage"""
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        outra = FileSystemStorage(location=pasta)
+        saida = BytesIO()
+        Image.new('RGB', (500, 400)).save(saida, format='PNG')
+        nome = outra.save('conteudo/so_aqui.png', ContentFile(saida.getvalue()))
+        self.assertFalse(default_storage.exists(nome))
+
+        with mock.patch.object(Produto._meta.get_field('imagem_principal'), 'storage', outra):
+            with self.captureOnCommitCallbacks(execute=False):
+                produto = Produto.objects.create(nome='Funko', preco='99.90', imagem_principal=nome, marca=self.marca)
+            manifesto = imagens.processar('nucleo.Produto', produto.pk)
+        self.assertEqual(manifesto['larguras']['card'], 400)
+
+    def test_save_schedules_processing_after_commit(self):
+        """Saving a product queues one job on commit and processing stores the manifest"""
+        nome = salvar_imagem('produtos/nova.png', 800, 800)
+        with mock.patch.object(imagens, '_pool') as pool, self.captureOnCommitCallbacks(execute=True):
+            produto = Produto.objects.create(nome='Funko', preco='99.90', imagem_principal=nome, marca=self.marca)
+            pool.return_value.submit.assert_not_called()
+        pool.return_value.submit.assert_called_once()
+
+        imagens.processar('nucleo.Produto', produto.pk)
+        produto.refresh_from_db()
+        self.assertTrue(imagens.manifesto_valido(produto.imagem_principal, produto.derivados))
+
+        # Saving again without changing the image does not schedule a new job
+        with mock.patch.object(imagens, '_pool') as pool, self.captureOnCommitCallbacks(execute=True):
+            produto.save()
+        pool.return_value.submit.assert_not_called()
+
+    def test_changed_image_discards_stale_manifest(self):
+        """Replacing the image makes the old manifest stale and schedules a new job"""
+        produto = self.criar_produto()
+        imagens.processar('nucleo.Produto', produto.pk)
+        produto.refresh_from_db()
+
+        produto.imagem_principal = salvar_imagem('produtos/outra.png', 500, 500)
+        with mock.patch.object(imagens, '_pool') as pool, self.captureOnCommitCallbacks(execute=True):
+            produto.save()
+        pool.return_value.submit.assert_called_once()
+        self.assertTrue(imagens.precisa_derivados(produto))
+
+    def test_template_tag_emits_picture_with_srcset(self):
+        """The tag renders <source> per modern format and falls back to the original"""
+        produto = self.criar_produto()
+        template = Template(
+            "{% load imagens %}{% imagem_responsiva produto.imagem_principal produto.derivados 'card' alt=produto.nome %}"
+        )
+
+        html = template.render(Context({'produto': produto}))
+        self.assertEqual(html, f'<img src="{produto.imagem_principal.url}" alt="Funko">')
+
+        imagens.processar('nucleo.Produto', produto.pk)
+        produto.refresh_from_db()
+        html = template.render(Context({'produto': produto}))
+        self.assertTrue(html.startswith('<picture><source type="image/'))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('160w', html)
+        self.assertIn('1200w', html)
+        self.assertIn('card.jpg"', html)
+
+    def test_command_backfills_existing_images(self):
+        """The management command fills missing manifests for products and gallery images"""
+        produto = self.criar_produto()
+        with self.captureOnCommitCallbacks(execute=False):
+            extra = ImagemProduto.objects.create(
+                produto=produto, imagem=salvar_imagem('produtos/extra.png', 640, 480)
+            )
+
+        saida = StringIO()
+        call_command('gerar_derivados_imagens', '--workers', '2', stdout=saida)
+        self.assertIn('2 imagens processadas', saida.getvalue())
+        produto.refresh_from_db()
+        extra.refresh_from_db()
+        self.assertEqual(produto.derivados['larguras']['zoom'], 1200)
+        self.assertEqual(extra.derivados['larguras']['zoom'], 640)
+
+        # Up-to-date images are skipped unless --forcar is given
+        saida = StringIO()
+        call_command('gerar_derivados_imagens', stdout=saida)
+        self.assertIn('0 imagens processadas', saida.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
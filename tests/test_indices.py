@@ -0,0 +1,55 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from nucleo.models import Produto, Marca, Pedido
+from django.contrib.auth.models import User
+from benchmarks import planos
+
+
+class IndicesConsultasTestCase(TestCase):
+    def setUp(self):
+        self.marca = Marca.objects.create(nome='Star Wars')
+        Produto.objects.create(nome='Sabre de luz', preco='199.90', imagem_principal='produtos/test_image.jpg', marca=self.marca)
+
+    def test_legacy_brand_name_lookup_uses_lower(self):
+        """The old by-name lookup compares LOWER() on both sides, matching the functional index"""
+        client = Client()
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.get('/marca/STAR WARS/')
+        sql = next(consulta['sql'] for consulta in consultas if 'LOWER(' in consulta['sql'])
+        self.assertIn('LOWER("nucleo_marca"."nome")', sql)
+        self.assertRedirects(response, '/marca/star-wars/', status_code=301)
+        self.assertEqual(client.get('/marca/Marvel/').status_code, 404)
+
+    def test_hot_queries_use_composite_indexes(self):
+        """EXPLAIN picks the composite indexes instead of sorting in a temp B-tree"""
+        usuario = User.objects.create_user('cliente', 'cliente@nerdhub.com', 'senha123')
+        Pedido.objects.create(usuario=usuario, total='10.00')
+        planos_esperados = {
+            'produto_recentes_idx': Produto.objects.order_by('-criado_em', '-id')[:24],
+            'produto_marca_recentes_idx': Produto.objects.filter(marca=self.marca)[:24],
+            'pedido_usuario_recentes_idx': Pedido.objects.filter(usuario=usuario),
+        }
+        self.assertTrue(set(planos_esperados) <= {nome for _, nome in planos.INDICES})
+        if connection.vendor != 'sqlite':
+            self.skipTest('Formato do EXPLAIN depende do banco')
+        for indice, queryset in planos_esperados.items():
+            plano = queryset.explain()
+            self.assertIn(indice, plano)
+            self.assertNotIn('TEMP B-TREE', plano)
+
+
+if __name__ == '__main__':
+    unittest.main()
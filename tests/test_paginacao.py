@@ -0,0 +1,86 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from nucleo.models import Produto, Marca
+from nucleo.paginacao import paginar_por_cursor, codificar_cursor, CursorInvalido
+
+
+class PaginacaoCursorTestCase(TestCase):
+    def setUp(self):
+        """Create a catalog with repeated timestamps to exercise the id tie-breaker"""
+        self.marca = Marca.objects.create(nome='Marvel')
+        for i in range(7):
+            Produto.objects.create(
+                nome=f'Produto {i}',
+                preco='10.00',
+                imagem_principal='produtos/test_image.jpg',
+                marca=self.marca,
+            )
+        # Same criado_em for every product: ordering must fall back to id
+        Produto.objects.update(criado_em=timezone.now())
+        self.client = Client()
+
+    def test_pages_cover_catalog_without_repeats(self):
+        """Walking every page returns each product exactly once, in order"""
+        vistos = []
+        cursor = None
+        while True:
+            pagina, cursor = paginar_por_cursor(Produto.objects.all(), cursor, limite=3)
+            vistos.extend(p.id for p in pagina)
+            if cursor is None:
+                break
+        esperado = list(Produto.objects.order_by('-criado_em', '-id').values_list('id', flat=True))
+        self.assertEqual(vistos, esperado)
+
+    def test_invalid_cursor_raises(self):
+        """Tampered cursors are rejected"""
+        with self.assertRaises(CursorInvalido):
+            paginar_por_cursor(Produto.objects.all(), 'nao-e-um-cursor', limite=3)
+
+    def test_non_string_cursor_values_raise(self):
+        """Well-formed cursors carrying lists or objects are rejected, not a TypeError"""
+        for valores in ([1, 1], [[1], 1], [{'a': 1}, 1]):
+            with self.subTest(valores=valores):
+                with self.assertRaises(CursorInvalido):
+                    paginar_por_cursor(Produto.objects.all(), codificar_cursor(valores), limite=3)
+
+    def test_fragment_endpoint(self):
+        """The infinite-scroll endpoint returns rendered cards and the next cursor"""
+        url = reverse('nucleo:produtos_pagina')
+        response = self.client.get(url, {'limite': 5})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['html'].count('class="funko-item"'), 5)
+        self.assertIsNotNone(data['proximo_cursor'])
+
+        response = self.client.get(url, {'limite': 5, 'cursor': data['proximo_cursor']})
+        data = response.json()
+        self.assertEqual(data['html'].count('class="funko-item"'), 2)
+        self.assertIsNone(data['proximo_cursor'])
+
+    def test_fragment_endpoint_rejects_bad_cursor(self):
+        """Bad cursors return 400 instead of a server error"""
+        response = self.client.get(reverse('nucleo:produtos_pagina'), {'cursor': '!!!'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(
+            reverse('nucleo:produtos_pagina'), {'cursor': codificar_cursor([[1], 1])}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
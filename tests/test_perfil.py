@@ -0,0 +1,91 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from nucleo.models import Produto, Marca, Pedido, ItemPedido
+
+
+class PerfilAbasTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cliente', 'cliente@nerdhub.com', 'senha123')
+        self.client = Client()
+        self.client.force_login(self.user)
+        marca = Marca.objects.create(nome='Marvel')
+        self.produtos = [
+            Produto.objects.create(
+                nome=f'Funko {i}', preco='50.00', descricao='x' * 5000,
+                imagem_principal='produtos/test_image.jpg', marca=marca,
+            )
+            for i in range(3)
+        ]
+        for i in range(25):
+            pedido = Pedido.objects.create(usuario=self.user, total='100.00', finalizado=True, forma_pagamento='pix')
+            for produto in self.produtos[:i % 3 + 1]:
+                ItemPedido.objects.create(pedido=pedido, produto=produto, quantidade=2, preco_unitario='50.00')
+
+    def test_profile_page_does_not_load_orders(self):
+        """The profile page renders without touching orders or products"""
+        response = self.client.get(reverse('usuario:perfil'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('pedidos', response.context)
+        self.assertNotIn('produtos', response.context)
+        self.assertContains(response, reverse('usuario:perfil_pedidos'))
+
+    def test_orders_endpoint_walks_history_with_slim_projection(self):
+        """Orders come newest first, with item counts from the same query and a cursor"""
+        url = reverse('usuario:perfil_pedidos')
+        vistos = []
+        cursor = ''
+        while True:
+            with self.assertNumQueries(2):  # user, orders page (session is a signed cookie)
+                dados = self.client.get(url, {'cursor': cursor}).json()
+            self.assertTrue(dados['success'])
+            vistos.extend(dados['pedidos'])
+            cursor = dados['proximo_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(vistos), 25)
+        ids = [pedido['id'] for pedido in vistos]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        primeiro = vistos[0]
+        self.assertEqual(set(primeiro), {'id', 'criado_em', 'total', 'quantidade_itens', 'forma_pagamento', 'url'})
+        self.assertEqual(primeiro['quantidade_itens'], ItemPedido.objects.filter(pedido_id=primeiro['id']).count())
+        self.assertEqual(primeiro['forma_pagamento'], 'PIX')
+
+    def test_orders_are_private(self):
+        """Another user sees an empty history"""
+        outro = User.objects.create_user('outro', 'outro@nerdhub.com', 'senha123')
+        self.client.force_login(outro)
+        dados = self.client.get(reverse('usuario:perfil_pedidos')).json()
+        self.assertEqual(dados['pedidos'], [])
+        self.assertIsNone(dados['proximo_cursor'])
+
+    def test_admin_lists_are_superuser_only(self):
+        """Admin lists load on demand and only for superusers"""
+        url = reverse('usuario:perfil_admin_lista', args=['produtos'])
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.user.is_superuser = True
+        self.user.save()
+        dados = self.client.get(url, {'limite': 2}).json()
+        self.assertEqual([item['nome'] for item in dados['itens']], ['Funko 2', 'Funko 1'])
+        self.assertEqual(dados['itens'][0]['marca_nome'], 'Marvel')
+        self.assertNotIn('descricao', dados['itens'][0])
+        self.assertIsNotNone(dados['proximo_cursor'])
+        self.assertEqual(self.client.get(reverse('usuario:perfil_admin_lista', args=['pedidos'])).status_code, 404)
+        self.assertEqual(len(self.client.get(reverse('usuario:perfil_admin_lista', args=['marcas'])).json()['itens']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
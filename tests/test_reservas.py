@@ -0,0 +1,122 @@
+import os
+import django
+import unittest
+import sys
+import json
+from datetime import timedelta
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from nucleo.models import Produto, Marca, Carrinho, ItemCarrinho, Estoque, ReservaEstoque
+from nucleo.pedidos import finalizar_carrinho, EstoqueInsuficiente
+from nucleo import reservas
+
+
+class ReservaEstoqueTestCase(TestCase):
+    def setUp(self):
+        marca = Marca.objects.create(nome='Funko')
+        self.produto = Produto.objects.create(
+            nome='Funko Edição Limitada',
+            preco='120.00',
+            imagem_principal='produtos/test_image.jpg',
+            marca=marca,
+        )
+        Estoque.objects.create(produto=self.produto, quantidade=2)
+        self.ana = User.objects.create_user(username='ana', password='testpass123')
+        self.bia = User.objects.create_user(username='bia', password='testpass123')
+
+    def test_available_stock_subtracts_active_holds(self):
+        """Active holds reduce availability for everyone but their owner"""
+        self.assertTrue(reservas.reservar(self.ana, self.produto.id, 2))
+        self.assertEqual(reservas.estoque_disponivel([self.produto.id]), {self.produto.id: 0})
+        self.assertEqual(
+            reservas.estoque_disponivel([self.produto.id], excluir_usuario=self.ana),
+            {self.produto.id: 2},
+        )
+        self.assertFalse(reservas.reservar(self.bia, self.produto.id, 1))
+
+    def test_available_stock_is_one_query(self):
+        """Availability for many products is a single aggregate query"""
+        with self.assertNumQueries(1):
+            reservas.estoque_disponivel([self.produto.id, 999])
+
+    def test_expired_holds_are_ignored_and_swept(self):
+        """Expired holds stop counting immediately and the sweeper deletes them"""
+        reservas.reservar(self.ana, self.produto.id, 2)
+        ReservaEstoque.objects.update(expira_em=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(reservas.reservar(self.bia, self.produto.id, 2))
+
+        call_command('expirar_reservas', stdout=open(os.devnull, 'w'))
+        self.assertEqual(list(ReservaEstoque.objects.values_list('usuario__username', flat=True)), ['bia'])
+
+    def test_add_to_cart_places_hold(self):
+        """Adding to the cart reserves units and refuses once others hold them"""
+        client = Client()
+        client.login(username='ana', password='testpass123')
+        url = reverse('nucleo:adicionar_ao_carrinho', args=[self.produto.id])
+        client.get(url)
+        client.get(url)
+        self.assertEqual(ReservaEstoque.objects.get(usuario=self.ana).quantidade, 2)
+
+        client.login(username='bia', password='testpass123')
+        client.get(url)
+        self.assertFalse(ItemCarrinho.objects.filter(carrinho__usuario=self.bia).exists())
+
+    def test_checkout_respects_other_holds_and_consumes_own(self):
+        """Checkout cannot sell units held by others and releases the buyer's hold"""
+        for usuario in (self.ana, self.bia):
+            carrinho = Carrinho.objects.create(usuario=usuario)
+            ItemCarrinho.objects.create(carrinho=carrinho, produto=self.produto, quantidade=1)
+        reservas.reservar(self.ana, self.produto.id, 2)
+
+        with self.assertRaises(EstoqueInsuficiente):
+            finalizar_carrinho(self.bia, {})
+
+        finalizar_carrinho(self.ana, {})
+        self.assertFalse(ReservaEstoque.objects.filter(usuario=self.ana).exists())
+        self.assertEqual(Estoque.objects.get(produto=self.produto).quantidade, 1)
+
+    def test_decrease_applies_when_free_stock_dropped(self):
+        """Lowering a cart quantity works even after the hold expired and others took the stock"""
+        carrinho = Carrinho.objects.create(usuario=self.ana)
+        item = ItemCarrinho.objects.create(carrinho=carrinho, produto=self.produto, quantidade=2)
+        reservas.reservar(self.ana, self.produto.id, 2)
+        ReservaEstoque.objects.update(expira_em=timezone.now() - timedelta(seconds=1))
+        reservas.reservar(self.bia, self.produto.id, 2)
+
+        client = Client()
+        client.login(username='ana', password='testpass123')
+        response = client.post(
+            reverse('nucleo:alterar_quantidade_carrinho', args=[item.id]), {'acao': 'diminuir'}
+        )
+        self.assertEqual(response.json(), {'success': True, 'nova_quantidade': 1})
+        item.refresh_from_db()
+        self.assertEqual(item.quantidade, 1)
+        self.assertEqual(ReservaEstoque.objects.get(usuario=self.ana).quantidade, 0)
+
+        response = client.post(
+            reverse('nucleo:atualizar_carrinho'), json.dumps({'itens': {str(item.id): 0}}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_batch_decrease_shrinks_hold_without_stock_check(self):
+        """reservar_varios never refuses a decrease and never holds more than is free"""
+        reservas.reservar(self.bia, self.produto.id, 1)
+        self.assertEqual(reservas.reservar_varios(self.ana, {self.produto.id: 2}), [self.produto.id])
+        self.assertEqual(reservas.reservar_varios(self.ana, {self.produto.id: 2}, reducoes={self.produto.id}), [])
+        self.assertEqual(ReservaEstoque.objects.get(usuario=self.ana).quantidade, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import django
+import unittest
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from nucleo import slugs
+from nucleo.models import Produto, Marca
+
+
+class SlugsTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.marca = Marca.objects.create(nome='Star Wars')
+        self.produto = Produto.objects.create(
+            nome='Sabre de Luz Darth Vader', preco='199.90',
+            imagem_principal='produtos/test_image.jpg', marca=self.marca,
+        )
+
+    def test_slug_generated_unique_and_stable(self):
+        """Slugs come from the name, get -2 on collision and survive renames"""
+        self.assertEqual(self.marca.slug, 'star-wars')
+        self.assertEqual(self.produto.slug, 'sabre-de-luz-darth-vader')
+        outro = Produto.objects.create(nome='Sabre de luz: Darth Vader!', preco='10.00', imagem_principal='produtos/test_image.jpg')
+        self.assertEqual(outro.slug, 'sabre-de-luz-darth-vader-2')
+        self.assertEqual(Marca.objects.create(nome='2077').slug, 'item-2077')
+
+        self.produto.nome = 'Sabre de Luz Vermelho'
+        self.produto.save()
+        self.produto.refresh_from_db()
+        self.assertEqual(self.produto.slug, 'sabre-de-luz-darth-vader')
+
+    def test_legacy_product_url_redirects_with_query_string(self):
+        """/produto/<id>/ answers 301 to the slug URL keeping the query string"""
+        response = self.client.get(f'/produto/{self.produto.id}/?ordem_reviews=nota')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], '/produto/sabre-de-luz-darth-vader/?ordem_reviews=nota')
+        self.assertEqual(self.client.get('/produto/999999/').status_code, 404)
+        self.assertEqual(self.client.get('/produto/nao-existe/').status_code, 404)
+
+    def test_warm_brand_page_skips_lookup_query(self):
+        """With slug -> id cached, the brand page only queries the products (brand comes in the JOIN)"""
+        url = self.marca.get_absolute_url()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('WHERE "nucleo_marca"."slug"' in consulta['sql'] for consulta in consultas))
+        self.assertEqual(slugs.cache_do_modelo(Marca).faltas, 1)
+
+    def test_cache_dropped_on_delete_and_stale_entry(self):
+        """Deleting evicts the entry; an entry pointing to another object is detected by the view"""
+        url = self.produto.get_absolute_url()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        cache = slugs.cache_do_modelo(Produto)
+        self.assertEqual(cache.obter(self.produto.slug), self.produto.id)
+
+        self.produto.delete()
+        self.assertIsNone(cache.obter('sabre-de-luz-darth-vader'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        # Entry left behind by another process: id now belongs to another slug
+        outro = Produto.objects.create(nome='Caneca', preco='30.00', imagem_principal='produtos/test_image.jpg')
+        cache.guardar('sabre-de-luz-darth-vader', outro.id)
+        response = self.client.get(url)
+        self.assertRedirects(response, url, target_status_code=404, fetch_redirect_response=True)
+        self.assertIsNone(cache.obter('sabre-de-luz-darth-vader'))
+
+    def test_lru_evicts_least_recent(self):
+        """The cache keeps at most 'tamanho' entries, dropping the least recently used"""
+        cache = slugs.CacheSlugs(2)
+        cache.guardar('a', 1)
+        cache.guardar('b', 2)
+        cache.obter('a')
+        cache.guardar('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.obter('b'))
+        self.assertEqual(cache.obter('a'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import django
+import shutil
+import tempfile
+import unittest
+import sys
+from datetime import timedelta
+from io import StringIO
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Nerdhub.settings')
+django.setup()
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
+from nucleo.models import Produto, Marca, ImagemProduto, BlobConteudo
+from nucleo import storage
+
+MEDIA_TEMPORARIA = tempfile.mkdtemp()
+
+
+def upload(nome, conteudo):
+    return SimpleUploadedFile(nome, conteudo, content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORARIA)
+class ArmazenamentoConteudoTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORARIA, ignore_errors=True)
+
+    def setUp(self):
+        self.marca = Marca.objects.create(nome='Marvel')
+        self.armazenamento = storage.armazenamento_conteudo()
+
+    def criar_produto(self, arquivo):
+        with self.captureOnCommitCallbacks(execute=False):
+            return Produto.objects.create(nome='Funko', preco='99.90', imagem_principal=arquivo, marca=self.marca)
+
+    def envelhecer_blobs(self):
+        BlobConteudo.objects.update(criado_em=timezone.now() - timedelta(days=1), usado_em=timezone.now() - timedelta(days=1))
+
+    def test_identical_uploads_share_one_file(self):
+        """The same bytes under different names are stored once and counted per reference"""
+        primeiro = self.criar_produto(upload('foto.png', b'mesmo conteudo'))
+        segundo = self.criar_produto(upload('foto_copia.png', b'mesmo conteudo'))
+        with self.captureOnCommitCallbacks(execute=False):
+            extra = ImagemProduto.objects.create(produto=primeiro, imagem=upload('outra.PNG', b'mesmo conteudo'))
+
+        nome = primeiro.imagem_principal.name
+        self.assertRegex(nome, r'^conteudo/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(segundo.imagem_principal.name, nome)
+        self.assertEqual(extra.imagem.name, nome)
+        self.assertEqual(len(self.armazenamento.listdir(os.path.dirname(nome))[1]), 1)
+        self.assertEqual(BlobConteudo.objects.get(nome=nome).referencias, 3)
+
+    def test_references_follow_changes_and_deletes(self):
+        """Replacing or deleting an image releases its reference"""
+        produto = self.criar_produto(upload('a.png', b'versao 1'))
+        antigo = produto.imagem_principal.name
+
+        produto.imagem_principal = upload('a.png', b'versao 2')
+        with self.captureOnCommitCallbacks(execute=False):
+            produto.save()
+        novo = produto.imagem_principal.name
+        self.assertNotEqual(novo, antigo)
+        self.assertEqual(BlobConteudo.objects.get(nome=antigo).referencias, 0)
+        self.assertEqual(BlobConteudo.objects.get(nome=novo).referencias, 1)
+
+        produto.nome = 'Sem troca de imagem'
+        produto.save()
+        self.assertEqual(BlobConteudo.objects.get(nome=novo).referencias, 1)
+
+        produto.delete()
+        self.assertEqual(BlobConteudo.objects.get(nome=novo).referencias, 0)
+
+    def test_garbage_collection_removes_only_old_orphans(self):
+        """coletar_blobs deletes unreferenced blobs past the grace period"""
+        usado = self.criar_produto(upload('usado.png', b'em uso')).imagem_principal.name
+        orfao = self.armazenamento.save('produtos/orfao.png', ContentFile(b'sem dono'))
+        self.assertEqual(BlobConteudo.objects.get(nome=orfao).referencias, 0)
+
+        saida = StringIO()
+        call_command('coletar_blobs', stdout=saida)
+        self.assertIn('0 arquivos apagados', saida.getvalue())
+
+        self.envelhecer_blobs()
+        call_command('coletar_blobs', '--simular', stdout=StringIO())
+        self.assertTrue(self.armazenamento.exists(orfao))
+
+        call_command('coletar_blobs', stdout=saida)
+        self.assertFalse(self.armazenamento.exists(orfao))
+        self.assertFalse(BlobConteudo.objects.filter(nome=orfao).exists())
+        self.assertTrue(self.armazenamento.exists(usado))
+
+    def test_reupload_of_old_orphan_restarts_grace_period(self):
+        """Uploading content an old orphan blob already has protects it until the new object references it"""
+        orfao = self.armazenamento.save('produtos/orfao.png', ContentFile(b'reenviado'))
+        self.envelhecer_blobs()
+
+        # Entre o _save do novo upload e o post_save que soma a referência
+        self.assertEqual(self.armazenamento.save('produtos/outra.png', ContentFile(b'reenviado')), orfao)
+        self.assertEqual(BlobConteudo.objects.get(nome=orfao).referencias, 0)
+        self.assertEqual(storage.coletar_blobs(), (0, 0))
+        self.assertTrue(self.armazenamento.exists(orfao))
+
+    def test_recount_fixes_drifted_counters(self):
+        """--recontar rebuilds counters from the image fields"""
+        nome = self.criar_produto(upload('x.png', b'contado')).imagem_principal.name
+        BlobConteudo.objects.filter(nome=nome).update(referencias=0)
+        self.envelhecer_blobs()
+
+        call_command('coletar_blobs', '--recontar', stdout=StringIO())
+        self.assertEqual(BlobConteudo.objects.get(nome=nome).referencias, 1)
+        self.assertTrue(self.armazenamento.exists(nome))
+
+    def test_content_urls_are_immutable(self):
+        """Blobs are served with far-future caching and revalidate by ETag"""
+        produto = self.criar_produto(upload('y.png', b'servido'))
+        url = produto.imagem_principal.url
+        client = Client()
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'servido')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(client.get(url.replace('.png', '.jpg')).status_code, 404)
+        self.assertEqual(client.get('/midia/../settings.py').status_code, 404)
+
+    def test_import_deduplicates_legacy_files(self):
+        """importar_midia rewrites legacy names, merging identical copies"""
+        legado = storage.FileSystemStorage()
+        nomes = [legado.save(nome, ContentFile(b'copia')) for nome in ('produtos/img.jpg', 'produtos/img.jpg')]
+        self.assertNotEqual(nomes[0], nomes[1])
+        produtos = [self.criar_produto(nome) for nome in nomes]
+
+        call_command('importar_midia', '--remover-antigos', stdout=StringIO())
+        for produto in produtos:
+            produto.refresh_from_db()
+        self.assertEqual(produtos[0].imagem_principal.name, produtos[1].imagem_principal.name)
+        self.assertEqual(BlobConteudo.objects.get(nome=produtos[0].imagem_principal.name).referencias, 2)
+        self.assertFalse(any(legado.exists(nome) for nome in nomes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+"""
+Fila de processamento de avatares - NerdHub E-commerce
+
+O upload (views.upload_avatar) apenas grava o arquivo original e cria uma
+TarefaAvatar pendente, respondendo 202 na hora. O comando
+processar_avatares consome a fila: reivindica tarefas com
+SELECT ... FOR UPDATE SKIP LOCKED (vários workers não pegam a mesma
+tarefa), redimensiona as imagens em um pool de processos e grava o
+resultado no perfil. O cliente acompanha pelo endpoint de status.
+
+Tarefas que ficam em 'processando' por mais de TEMPO_MAXIMO_PROCESSAMENTO
+(worker derrubado no meio) voltam para a fila, até MAX_TENTATIVAS vezes.
+
+O worker lê o original que o web gravou em default_storage, então os dois
+precisam do mesmo MEDIA_ROOT (mesma máquina, ver iniciar.sh, ou um storage
+compartilhado). Só com AVATARES_FILA=false (desenvolvimento e testes) a view
+processa a tarefa na própria requisição (processar_agora).
+"""
+
+import os
+import uuid
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Perfil, TarefaAvatar
+
+
+TAMANHO_AVATAR = (200, 200)
+
+PASTA_AVATARES = 'avatars'
+PASTA_ORIGINAIS = 'avatars/originais'
+
+# Segundos até uma tarefa 'processando' ser considerada abandonada
+TEMPO_MAXIMO_PROCESSAMENTO = 10 * 60
+
+MAX_TENTATIVAS = 3
+
+
+def enfileirar(perfil, arquivo):
+    """
+    Guarda o arquivo enviado e cria a tarefa de processamento
+
+    Args:
+        perfil: Perfil dono do avatar
+        arquivo: UploadedFile já validado (PNG ou JPEG)
+
+    Returns:
+        TarefaAvatar pendente
+    """
+    extensao = os.path.splitext(arquivo.name)[1].lower()
+    nome = default_storage.save(f'{PASTA_ORIGINAIS}/{uuid.uuid4()}{extensao}', arquivo)
+    return TarefaAvatar.objects.create(perfil=perfil, arquivo_original=nome)
+
+
+def redimensionar_avatar(conteudo, formato):
+    """
+    Gera o avatar 200x200 a partir dos bytes do original
+
+    Roda nos processos do pool: recebe e devolve bytes e não acessa o
+    banco nem o storage. JPEGs são decodificados direto em escala
+    reduzida (draft) e as demais imagens passam por reduce() antes do
+    LANCZOS (reducing_gap), então originais grandes nunca são
+    decodificados e filtrados em resolução total.
+
+    Args:
+        conteudo: Bytes da imagem original
+        formato: 'PNG' ou 'JPEG' (formato de saída)
+
+    Returns:
+        Bytes do avatar
+    """
+    imagem = Image.open(BytesIO(conteudo))
+    if imagem.format == 'JPEG':
+        imagem.draft('RGB', TAMANHO_AVATAR)
+    imagem = ImageOps.exif_transpose(imagem)
+    imagem = imagem.resize(TAMANHO_AVATAR, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    # Converter para RGB com fundo branco se houver transparência
+    if imagem.mode in ('RGBA', 'LA', 'P'):
+        if imagem.mode == 'P':
+            imagem = imagem.convert('RGBA')
+        fundo = Image.new('RGB', imagem.size, (255, 255, 255))
+        fundo.paste(imagem, mask=imagem.split()[-1])
+        imagem = fundo
+    elif imagem.mode != 'RGB':
+        imagem = imagem.convert('RGB')
+
+    saida = BytesIO()
+    if formato == 'PNG':
+        imagem.save(saida, format='PNG')
+    else:
+        imagem.save(saida, format='JPEG', quality=85)
+    return saida.getvalue()
+
+
+def reivindicar_tarefas(limite):
+    """
+    Marca até 'limite' tarefas como 'processando' para este worker
+
+    Tarefas travadas por outro worker são puladas (SKIP LOCKED); as
+    abandonadas há mais de TEMPO_MAXIMO_PROCESSAMENTO são retomadas, ou
+    marcadas como erro após MAX_TENTATIVAS.
+
+    Returns:
+        Lista de TarefaAvatar reivindicadas (com perfil carregado)
+    """
+    agora = timezone.now()
+    abandonada = Q(status=TarefaAvatar.STATUS_PROCESSANDO, iniciado_em__lt=agora - timedelta(seconds=TEMPO_MAXIMO_PROCESSAMENTO))
+
+    with transaction.atomic():
+        TarefaAvatar.objects.filter(abandonada, tentativas__gte=MAX_TENTATIVAS).update(
+            status=TarefaAvatar.STATUS_ERRO, erro="Tempo de processamento esgotado", concluido_em=agora,
+        )
+        ids = list(
+            TarefaAvatar.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=TarefaAvatar.STATUS_PENDENTE) | abandonada)
+            .order_by('criado_em')
+            .values_list('id', flat=True)[:limite]
+        )
+        TarefaAvatar.objects.filter(id__in=ids).update(
+            status=TarefaAvatar.STATUS_PROCESSANDO, iniciado_em=agora, tentativas=F('tentativas') + 1,
+        )
+    return list(TarefaAvatar.objects.filter(id__in=ids).select_related('perfil').order_by('criado_em'))
+
+
+def _caminho_no_storage(url):
+    """Converte uma URL de avatar (MEDIA_URL/...) no caminho do storage"""
+    return url.replace(settings.MEDIA_URL, '', 1)
+
+
+def remover_arquivo_avatar(url):
+    """Apaga do storage o arquivo de um avatar antigo (se existir)"""
+    if url:
+        caminho = _caminho_no_storage(url)
+        if default_storage.exists(caminho):
+            default_storage.delete(caminho)
+
+
+def concluir(tarefa, conteudo):
+    """
+    Grava o avatar gerado e atualiza o perfil
+
+    Se uma tarefa mais recente do mesmo perfil já foi concluída (uploads
+    seguidos), o resultado desta é descartado.
+
+    Args:
+        tarefa: TarefaAvatar em processamento
+        conteudo: Bytes retornados por redimensionar_avatar
+    """
+    extensao = os.path.splitext(tarefa.arquivo_original)[1].lower()
+    with transaction.atomic():
+        perfil = Perfil.objects.select_for_update().get(pk=tarefa.perfil_id)
+        mais_recente_concluida = TarefaAvatar.objects.filter(
+            perfil_id=tarefa.perfil_id, id__gt=tarefa.id, status=TarefaAvatar.STATUS_CONCLUIDA,
+        ).exists()
+        if not mais_recente_concluida:
+            nome = default_storage.save(f'{PASTA_AVATARES}/{uuid.uuid4()}{extensao}', ContentFile(conteudo))
+            remover_arquivo_avatar(perfil.avatar_url)
+            perfil.avatar_url = default_storage.url(nome)
+            perfil.save(update_fields=['avatar_url', 'updated_at'])
+            tarefa.avatar_url = perfil.avatar_url
+
+        tarefa.status = TarefaAvatar.STATUS_CONCLUIDA
+        tarefa.concluido_em = timezone.now()
+        tarefa.save(update_fields=['status', 'avatar_url', 'concluido_em'])
+    default_storage.delete(tarefa.arquivo_original)
+
+
+def falhar(tarefa, erro):
+    """Marca a tarefa como erro (imagem inválida) e apaga o original"""
+    tarefa.status = TarefaAvatar.STATUS_ERRO
+    tarefa.erro = str(erro)
+    tarefa.concluido_em = timezone.now()
+    tarefa.save(update_fields=['status', 'erro', 'concluido_em'])
+    if default_storage.exists(tarefa.arquivo_original):
+        default_storage.delete(tarefa.arquivo_original)
+
+
+def _ler_original(tarefa):
+    """Bytes do original e formato de saída ('PNG' ou 'JPEG')"""
+    with default_storage.open(tarefa.arquivo_original, 'rb') as arquivo:
+        conteudo = arquivo.read()
+    formato = 'PNG' if tarefa.arquivo_original.lower().endswith('.png') else 'JPEG'
+    return conteudo, formato
+
+
+def processar_agora(tarefa):
+    """
+    Processa uma tarefa recém-criada no próprio processo (sem worker)
+
+    Args:
+        tarefa: TarefaAvatar pendente
+    """
+    tarefa.status = TarefaAvatar.STATUS_PROCESSANDO
+    tarefa.iniciado_em = timezone.now()
+    tarefa.tentativas = 1
+    tarefa.save(update_fields=['status', 'iniciado_em', 'tentativas'])
+    try:
+        conteudo = redimensionar_avatar(*_ler_original(tarefa))
+    except Exception as erro:
+        falhar(tarefa, erro)
+    else:
+        concluir(tarefa, conteudo)
+
+
+def processar_pendentes(executor, limite=20):
+    """
+    Reivindica um lote de tarefas e processa as imagens no executor
+
+    A leitura do original e a gravação do resultado ficam neste processo;
+    o executor só recebe e devolve bytes.
+
+    Args:
+        executor: concurrent.futures.Executor (ProcessPoolExecutor no worker)
+        limite: Máximo de tarefas do lote
+
+    Returns:
+        Número de tarefas processadas (concluídas ou com erro)
+    """
+    tarefas = reivindicar_tarefas(limite)
+    futuros = []
+    for tarefa in tarefas:
+        try:
+            conteudo, formato = _ler_original(tarefa)
+        except OSError as erro:
+            falhar(tarefa, erro)
+            continue
+        futuros.append((tarefa, executor.submit(redimensionar_avatar, conteudo, formato)))
+
+    for tarefa, futuro in futuros:
+        try:
+            conteudo = futuro.result()
+        except Exception as erro:
+            falhar(tarefa, erro)
+        else:
+            concluir(tarefa, conteudo)
+    return len(tarefas)
@@ -0,0 +1,205 @@
+"""
+Exclusão de dados pessoais (LGPD) - NerdHub E-commerce
+
+O pedido do usuário (views.perfil_conta) só marca
+Perfil.data_deletion_request. O comando processar_exclusoes atende os
+pedidos em lotes, cada lote em uma transação:
+
+1. Reivindica até 'lote' perfis marcados com SELECT ... FOR UPDATE SKIP
+   LOCKED (vários workers não pegam o mesmo perfil). Perfis com uma
+   exportação sendo gerada (processar_exportacoes) ficam para um próximo
+   lote, senão o zip seria gravado depois da exclusão.
+2. Apaga os dados pessoais (endereços, métodos de pagamento, sessões,
+   notificações, auditorias, tarefas de avatar e exportações, reviews,
+   carrinho e reservas) com um DELETE por tabela para o lote inteiro.
+3. Anonimiza os pedidos no lugar, com um UPDATE: o histórico financeiro
+   (valores, itens, datas, forma de pagamento e UF de entrega) é mantido,
+   os dados de entrega não.
+4. Apaga o Perfil e anonimiza o User (nome de usuário "removido-<id>",
+   sem e-mail, sem senha utilizável, inativo). A conta continua existindo
+   só como dona dos pedidos anonimizados.
+
+Os DELETEs vão direto ao banco, sem o coletor de cascata do ORM (que
+carrega e apaga objeto por objeto) e sem sinais. O que os sinais de Review
+fariam é refeito em lote para os produtos afetados: agregados de
+avaliação, cards em cache e carimbo das respostas condicionais. Arquivos
+(avatar, originais de avatar e zips de exportação) são apagados depois do
+commit.
+"""
+
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+from nucleo import condicional, fragmentos
+from nucleo.avaliacoes import recalcular_estatisticas
+from nucleo.models import Carrinho, ItemCarrinho, Pedido, ReservaEstoque, Review
+
+from . import avatares, exportacao_dados
+from .models import (
+    Auditoria, Endereco, ExportacaoDados, MetodoPagamento, Notificacao, Perfil, Sessao, TarefaAvatar,
+)
+
+
+# Perfis atendidos por transação
+TAMANHO_LOTE = 100
+
+# Valores gravados nos pedidos anonimizados (endereco_estado é mantido)
+PEDIDO_ANONIMO = {
+    'endereco_destinatario': 'Cliente removido',
+    'endereco_rua': '',
+    'endereco_numero': '',
+    'endereco_complemento': '',
+    'endereco_bairro': '',
+    'endereco_cidade': '',
+    'endereco_cep': '',
+    'endereco_telefone': '',
+}
+
+
+def _apagar(queryset):
+    """
+    DELETE direto no banco, sem coletor de cascata nem sinais
+
+    Só pode ser usado quando as tabelas que apontam para o modelo já foram
+    limpas (a ordem das etapas em excluir_lote garante isso).
+
+    Returns:
+        Quantidade de linhas removidas
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def reivindicar_lote(limite):
+    """
+    Trava até 'limite' perfis com pedido de exclusão (os mais antigos primeiro)
+
+    Deve ser chamada dentro da transação que vai processar o lote. As
+    exportações dos perfis também são travadas: um worker de exportação
+    não consegue mais reivindicá-las (SKIP LOCKED), e os perfis cuja
+    exportação já está sendo gerada são deixados de fora.
+
+    Returns:
+        Lista de (perfil_id, user_id)
+    """
+    lote = list(
+        Perfil.objects.select_for_update(skip_locked=True)
+        .filter(data_deletion_request=True)
+        .exclude(exportacoes_dados__in=ExportacaoDados.objects.filter(exportacao_dados.em_processamento()))
+        .order_by('data_deletion_request_at', 'id')
+        .values_list('id', 'user_id')[:limite]
+    )
+    perfil_ids = [perfil_id for perfil_id, _ in lote]
+    exportacoes = ExportacaoDados.objects.filter(perfil_id__in=perfil_ids)
+    list(exportacoes.select_for_update().order_by('id').values_list('id', flat=True))
+    # Reivindicadas por um worker entre a primeira consulta e a trava
+    ocupados = set(exportacoes.filter(exportacao_dados.em_processamento()).values_list('perfil_id', flat=True))
+    return [(perfil_id, user_id) for perfil_id, user_id in lote if perfil_id not in ocupados]
+
+
+def _apagar_arquivos(avatares_url, originais, exportacoes):
+    for url in avatares_url:
+        avatares.remover_arquivo_avatar(url)
+    for nome in originais:
+        if default_storage.exists(nome):
+            default_storage.delete(nome)
+    armazenamento = exportacao_dados.armazenamento()
+    for nome in exportacoes:
+        armazenamento.delete(nome)
+
+
+def excluir_lote(limite=TAMANHO_LOTE):
+    """
+    Atende um lote de pedidos de exclusão em uma transação
+
+    Args:
+        limite: Máximo de perfis do lote
+
+    Returns:
+        Dict com:
+        - perfis: Perfis atendidos (0 = nenhum pedido pendente)
+        - pedidos_anonimizados: Pedidos mantidos sem dados de entrega
+        - linhas_removidas: Dict {tabela: linhas apagadas}
+        - etapas_ms: Dict {etapa: duração em ms}
+        - segundos: Duração total do lote
+    """
+    inicio = time.perf_counter()
+    etapas_ms = {}
+    removidas = {}
+    marco = [inicio]
+
+    def medir(etapa):
+        agora = time.perf_counter()
+        etapas_ms[etapa] = round((agora - marco[0]) * 1000, 2)
+        marco[0] = agora
+
+    with transaction.atomic():
+        lote = reivindicar_lote(limite)
+        if not lote:
+            return {'perfis': 0, 'pedidos_anonimizados': 0, 'linhas_removidas': {}, 'etapas_ms': {}, 'segundos': 0.0}
+        perfil_ids = [perfil_id for perfil_id, _ in lote]
+        user_ids = [user_id for _, user_id in lote]
+        medir('reivindicar')
+
+        # Arquivos só são apagados se a transação for confirmada
+        avatares_url = [
+            url for url in Perfil.objects.filter(id__in=perfil_ids).values_list('avatar_url', flat=True) if url
+        ]
+        originais = list(TarefaAvatar.objects.filter(perfil_id__in=perfil_ids).values_list('arquivo_original', flat=True))
+        exportacoes = list(
+            ExportacaoDados.objects.filter(perfil_id__in=perfil_ids).exclude(arquivo='').values_list('arquivo', flat=True)
+        )
+        produtos_avaliados = list(
+            Review.objects.filter(usuario_id__in=user_ids).order_by().values_list('produto_id', flat=True).distinct()
+        )
+        medir('levantar')
+
+        # Métodos de pagamento antes dos endereços (billing_address aponta para Endereco)
+        for modelo in (MetodoPagamento, Endereco, Sessao, Notificacao, Auditoria, TarefaAvatar, ExportacaoDados):
+            removidas[modelo._meta.db_table] = _apagar(modelo.objects.filter(perfil_id__in=perfil_ids))
+        medir('dados_perfil')
+
+        removidas[Review._meta.db_table] = _apagar(Review.objects.filter(usuario_id__in=user_ids))
+        recalcular_estatisticas(produtos_avaliados)
+        condicional.tocar_produtos(produtos_avaliados)
+        medir('reviews')
+
+        removidas[ItemCarrinho._meta.db_table] = _apagar(ItemCarrinho.objects.filter(carrinho__usuario_id__in=user_ids))
+        removidas[Carrinho._meta.db_table] = _apagar(Carrinho.objects.filter(usuario_id__in=user_ids))
+        removidas[ReservaEstoque._meta.db_table] = _apagar(ReservaEstoque.objects.filter(usuario_id__in=user_ids))
+        medir('carrinho')
+
+        pedidos_anonimizados = Pedido.objects.filter(usuario_id__in=user_ids).update(**PEDIDO_ANONIMO)
+        medir('pedidos')
+
+        removidas[Perfil._meta.db_table] = _apagar(Perfil.objects.filter(id__in=perfil_ids))
+        for relacao in (User.groups.through, User.user_permissions.through):
+            _apagar(relacao.objects.filter(user_id__in=user_ids))
+        User.objects.filter(id__in=user_ids).update(
+            username=Concat(Value('removido-'), Cast('id', CharField())),
+            email='',
+            first_name='',
+            last_name='',
+            password=make_password(None),
+            is_active=False,
+            is_staff=False,
+            is_superuser=False,
+            last_login=None,
+        )
+        medir('conta')
+
+        transaction.on_commit(lambda: fragmentos.invalidar_cards(produtos_avaliados))
+        transaction.on_commit(lambda: _apagar_arquivos(avatares_url, originais, exportacoes))
+
+    return {
+        'perfis': len(lote),
+        'pedidos_anonimizados': pedidos_anonimizados,
+        'linhas_removidas': removidas,
+        'etapas_ms': etapas_ms,
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
@@ -0,0 +1,315 @@
+"""
+Exportação de dados pessoais (LGPD) - NerdHub E-commerce
+
+O pedido do usuário (views.solicitar_exportacao_dados) só marca
+Perfil.data_export_request e cria uma ExportacaoDados pendente, respondendo
+202 na hora. O comando processar_exportacoes consome a fila: reivindica
+tarefas com SELECT ... FOR UPDATE SKIP LOCKED e monta um zip com um
+arquivo por tipo de dado:
+
+- perfil.json: conta (User) e Perfil;
+- enderecos, metodos_pagamento, sessoes, notificacoes, auditorias,
+  reviews e pedidos (com itens), em JSON Lines.
+
+Cada tabela é lida com .iterator(chunk_size=TAMANHO_LOTE) e escrita direto
+na entrada do zip, que fica em um arquivo temporário em disco: a memória
+não cresce com o histórico do usuário. Os pedidos reaproveitam a geração
+da exportação do admin (nucleo/exportacao.py), uma consulta com os itens
+no JOIN. O zip vai para o armazenamento privado (EXPORTACOES_DADOS_STORAGE,
+por padrão a pasta EXPORTACOES_DADOS_ROOT, fora de MEDIA_ROOT), que o
+worker e o web precisam compartilhar, e só é entregue ao dono pela view
+de download até 'expira_em'; depois disso o comando apaga o arquivo.
+
+Credenciais (token do cartão, token da sessão) nunca entram no arquivo.
+"""
+
+import json
+import tempfile
+import time
+import uuid
+import zipfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from nucleo import exportacao
+from nucleo.models import Pedido, Review
+
+from .models import Auditoria, Endereco, ExportacaoDados, MetodoPagamento, Notificacao, Perfil, Sessao
+
+
+# Linhas lidas do banco por vez
+TAMANHO_LOTE = 1000
+
+# Segundos até uma tarefa 'processando' ser considerada abandonada
+TEMPO_MAXIMO_PROCESSAMENTO = 30 * 60
+
+MAX_TENTATIVAS = 3
+
+# Campos que dão acesso à conta ou ao meio de pagamento: nunca exportados
+CAMPOS_OCULTOS = {'card_token', 'token_id'}
+
+CAMPOS_USUARIO = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined', 'last_login']
+
+ABERTAS = Q(status__in=[ExportacaoDados.STATUS_PENDENTE, ExportacaoDados.STATUS_PROCESSANDO])
+
+
+def em_processamento(agora=None):
+    """Q das exportações sendo geradas agora por um worker (não abandonadas)"""
+    agora = agora or timezone.now()
+    return Q(
+        status=ExportacaoDados.STATUS_PROCESSANDO,
+        iniciado_em__gte=agora - timedelta(seconds=TEMPO_MAXIMO_PROCESSAMENTO),
+    )
+
+
+def armazenamento():
+    """
+    Armazenamento privado das exportações (sem URL pública)
+
+    Backend e opções vêm de settings.EXPORTACOES_DADOS_STORAGE; no disco
+    local, a pasta padrão é EXPORTACOES_DADOS_ROOT.
+    """
+    configuracao = settings.EXPORTACOES_DADOS_STORAGE
+    classe = import_string(configuracao['BACKEND'])
+    opcoes = dict(configuracao.get('OPTIONS') or {})
+    if issubclass(classe, FileSystemStorage):
+        opcoes.setdefault('location', settings.EXPORTACOES_DADOS_ROOT)
+    return classe(**opcoes)
+
+
+def solicitar(perfil):
+    """
+    Registra o pedido de exportação do usuário
+
+    Se já houver uma exportação pendente ou em andamento, ela é reaproveitada.
+
+    Args:
+        perfil: Perfil do usuário
+
+    Returns:
+        ExportacaoDados pendente (ou a que já estava aberta)
+    """
+    with transaction.atomic():
+        perfil = Perfil.objects.select_for_update().get(pk=perfil.pk)
+        aberta = perfil.exportacoes_dados.filter(ABERTAS).order_by('-criado_em').first()
+        perfil.data_export_request = True
+        perfil.data_export_request_at = timezone.now()
+        perfil.save(update_fields=['data_export_request', 'data_export_request_at', 'updated_at'])
+        return aberta or ExportacaoDados.objects.create(perfil=perfil)
+
+
+def enfileirar_solicitacoes():
+    """
+    Cria tarefas para perfis marcados com data_export_request sem exportação aberta
+
+    Cobre pedidos registrados fora de 'solicitar' (ex: pelo admin). Um
+    pedido que já teve uma tarefa criada depois dele (mesmo com erro) não é
+    enfileirado de novo, para que uma falha não se repita a cada ciclo.
+
+    Returns:
+        Número de tarefas criadas
+    """
+    perfis = (
+        Perfil.objects.filter(data_export_request=True)
+        .exclude(exportacoes_dados__in=ExportacaoDados.objects.filter(ABERTAS))
+        .exclude(exportacoes_dados__criado_em__gte=F('data_export_request_at'))
+        .values_list('id', flat=True)
+    )
+    criadas = ExportacaoDados.objects.bulk_create([ExportacaoDados(perfil_id=perfil_id) for perfil_id in perfis])
+    return len(criadas)
+
+
+def reivindicar_tarefas(limite):
+    """
+    Marca até 'limite' exportações como 'processando' para este worker
+
+    Tarefas travadas por outro worker são puladas (SKIP LOCKED); as
+    abandonadas há mais de TEMPO_MAXIMO_PROCESSAMENTO são retomadas, ou
+    marcadas como erro após MAX_TENTATIVAS.
+
+    Returns:
+        Lista de ExportacaoDados reivindicadas (com perfil e usuário carregados)
+    """
+    agora = timezone.now()
+    abandonada = Q(
+        status=ExportacaoDados.STATUS_PROCESSANDO,
+        iniciado_em__lt=agora - timedelta(seconds=TEMPO_MAXIMO_PROCESSAMENTO),
+    )
+
+    with transaction.atomic():
+        ExportacaoDados.objects.filter(abandonada, tentativas__gte=MAX_TENTATIVAS).update(
+            status=ExportacaoDados.STATUS_ERRO, erro="Tempo de processamento esgotado", concluido_em=agora,
+        )
+        ids = list(
+            ExportacaoDados.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=ExportacaoDados.STATUS_PENDENTE) | abandonada)
+            .order_by('criado_em')
+            .values_list('id', flat=True)[:limite]
+        )
+        ExportacaoDados.objects.filter(id__in=ids).update(
+            status=ExportacaoDados.STATUS_PROCESSANDO, iniciado_em=agora, tentativas=F('tentativas') + 1,
+        )
+    return list(
+        ExportacaoDados.objects.filter(id__in=ids).select_related('perfil__user').order_by('criado_em')
+    )
+
+
+def _linha_json(valores):
+    return json.dumps(valores, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _escrever_jsonl(zip_saida, nome, queryset):
+    """Grava as linhas do queryset (dicts) como JSON Lines; retorna quantas foram escritas"""
+    campos = [campo.name if not campo.is_relation else campo.attname for campo in queryset.model._meta.concrete_fields]
+    campos = [campo for campo in campos if campo not in CAMPOS_OCULTOS]
+    total = 0
+    with zip_saida.open(nome, 'w', force_zip64=True) as entrada:
+        for linha in queryset.order_by('pk').values(*campos).iterator(chunk_size=TAMANHO_LOTE):
+            entrada.write(_linha_json(linha).encode())
+            total += 1
+    return total
+
+
+def gerar_arquivo(perfil, destino):
+    """
+    Escreve o zip com todos os dados pessoais do usuário
+
+    Args:
+        perfil: Perfil (com user carregado)
+        destino: Arquivo binário aberto para escrita (com seek)
+
+    Returns:
+        Quantidade de registros exportados
+    """
+    usuario = perfil.user
+    registros = 0
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as zip_saida:
+        dados_perfil = Perfil.objects.filter(pk=perfil.pk).values().get()
+        zip_saida.writestr('perfil.json', json.dumps(
+            {'usuario': {campo: getattr(usuario, campo) for campo in CAMPOS_USUARIO}, 'perfil': dados_perfil},
+            cls=DjangoJSONEncoder, ensure_ascii=False, indent=2,
+        ))
+        registros += 1
+
+        for nome, queryset in (
+            ('enderecos.jsonl', Endereco.objects.filter(perfil=perfil)),
+            ('metodos_pagamento.jsonl', MetodoPagamento.objects.filter(perfil=perfil)),
+            ('sessoes.jsonl', Sessao.objects.filter(perfil=perfil)),
+            ('notificacoes.jsonl', Notificacao.objects.filter(perfil=perfil)),
+            ('auditorias.jsonl', Auditoria.objects.filter(perfil=perfil)),
+            ('reviews.jsonl', Review.objects.filter(usuario=usuario)),
+        ):
+            registros += _escrever_jsonl(zip_saida, nome, queryset)
+
+        # Um pedido por linha, com os itens (mesma geração da exportação do admin)
+        with zip_saida.open('pedidos.jsonl', 'w', force_zip64=True) as entrada:
+            pedidos = Pedido.objects.filter(usuario=usuario)
+            for bloco in exportacao.exportar(pedidos, 'jsonl', tamanho_lote=TAMANHO_LOTE):
+                entrada.write(bloco.encode())
+                registros += bloco.count('\n')
+    return registros
+
+
+def concluir(tarefa):
+    """
+    Gera o zip da tarefa, guarda no armazenamento privado e atende o pedido do perfil
+
+    Se a tarefa sumiu durante a geração (ex: o perfil foi excluído), o
+    arquivo recém-gravado é apagado.
+
+    Args:
+        tarefa: ExportacaoDados em processamento (com perfil e usuário carregados)
+
+    Returns:
+        True se concluída, False se a tarefa não existe mais
+    """
+    with tempfile.TemporaryFile() as temporario:
+        registros = gerar_arquivo(tarefa.perfil, temporario)
+        temporario.seek(0)
+        nome = armazenamento().save(f'{tarefa.perfil_id}/{uuid.uuid4().hex}.zip', File(temporario))
+
+    agora = timezone.now()
+    tarefa.status = ExportacaoDados.STATUS_CONCLUIDA
+    tarefa.arquivo = nome
+    tarefa.registros = registros
+    tarefa.tamanho = armazenamento().size(nome)
+    tarefa.concluido_em = agora
+    tarefa.expira_em = agora + timedelta(days=settings.EXPORTACAO_DADOS_VALIDADE_DIAS)
+    with transaction.atomic():
+        atualizadas = ExportacaoDados.objects.filter(pk=tarefa.pk).update(
+            status=tarefa.status, arquivo=nome, registros=registros, tamanho=tarefa.tamanho,
+            concluido_em=agora, expira_em=tarefa.expira_em,
+        )
+        if not atualizadas:
+            armazenamento().delete(nome)
+            return False
+        # Pedidos feitos durante a geração continuam abertos (nova tarefa na fila)
+        if not ExportacaoDados.objects.filter(ABERTAS, perfil_id=tarefa.perfil_id).exists():
+            Perfil.objects.filter(pk=tarefa.perfil_id).update(data_export_request=False)
+    return True
+
+
+def falhar(tarefa, erro):
+    """Marca a exportação como erro (nada a fazer se a tarefa não existe mais)"""
+    tarefa.status = ExportacaoDados.STATUS_ERRO
+    tarefa.erro = str(erro)
+    tarefa.concluido_em = timezone.now()
+    ExportacaoDados.objects.filter(pk=tarefa.pk).update(
+        status=tarefa.status, erro=tarefa.erro, concluido_em=tarefa.concluido_em,
+    )
+
+
+def processar_pendentes(limite=5):
+    """
+    Enfileira os pedidos marcados no perfil, reivindica um lote e gera os arquivos
+
+    Args:
+        limite: Máximo de exportações do lote
+
+    Returns:
+        Lista de dicts com 'tarefa', 'registros', 'bytes' e 'segundos' de
+        cada exportação concluída (vazia se a fila estava vazia)
+    """
+    enfileirar_solicitacoes()
+    medicoes = []
+    for tarefa in reivindicar_tarefas(limite):
+        inicio = time.monotonic()
+        try:
+            if not concluir(tarefa):
+                continue
+        except Exception as erro:
+            falhar(tarefa, erro)
+            continue
+        medicoes.append({
+            'tarefa': tarefa,
+            'registros': tarefa.registros,
+            'bytes': tarefa.tamanho,
+            'segundos': time.monotonic() - inicio,
+        })
+    return medicoes
+
+
+def remover_expiradas():
+    """
+    Apaga os arquivos das exportações cujo prazo de download acabou
+
+    Returns:
+        Número de arquivos removidos
+    """
+    expiradas = ExportacaoDados.objects.filter(
+        status=ExportacaoDados.STATUS_CONCLUIDA, expira_em__lt=timezone.now(),
+    ).exclude(arquivo='')
+    removidos = 0
+    for tarefa in expiradas.only('id', 'arquivo').iterator(chunk_size=TAMANHO_LOTE):
+        armazenamento().delete(tarefa.arquivo)
+        ExportacaoDados.objects.filter(pk=tarefa.pk).update(arquivo='')
+        removidos += 1
+    return removidos
@@ -0,0 +1,49 @@
+"""
+Worker que processa a fila de avatares enviados
+
+Uso:
+    python manage.py processar_avatares
+    python manage.py processar_avatares --workers 4 --intervalo 2
+    python manage.py processar_avatares --uma-vez
+
+Roda ao lado do gunicorn (ver procfile). Cada ciclo reivindica um lote de
+tarefas pendentes e redimensiona as imagens em um pool de processos; sem
+tarefas, espera --intervalo segundos. Vários workers podem rodar ao mesmo
+tempo (SKIP LOCKED). Com --uma-vez processa a fila atual e termina.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from usuarios import avatares
+
+
+class Command(BaseCommand):
+    help = "Processa os avatares enviados (fila TarefaAvatar)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Processos redimensionando imagens")
+        parser.add_argument('--lote', type=int, default=20, help="Tarefas reivindicadas por ciclo")
+        parser.add_argument('--intervalo', type=float, default=1.0, help="Espera (s) quando a fila está vazia")
+        parser.add_argument('--uma-vez', action='store_true', help="Esvazia a fila e termina")
+
+    def handle(self, *args, **options):
+        total = 0
+        # django.setup nos filhos: necessário quando o método de início não é fork
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+            try:
+                while True:
+                    processadas = avatares.processar_pendentes(executor, options['lote'])
+                    total += processadas
+                    if processadas:
+                        self.stdout.write(f"{processadas} avatares processados")
+                    elif options['uma_vez']:
+                        break
+                    else:
+                        time.sleep(options['intervalo'])
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(self.style.SUCCESS(f"{total} avatares processados no total"))
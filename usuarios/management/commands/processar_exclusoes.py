@@ -0,0 +1,50 @@
+"""
+Worker que atende os pedidos de exclusão de dados pessoais (LGPD)
+
+Uso:
+    python manage.py processar_exclusoes
+    python manage.py processar_exclusoes --lote 500 --intervalo 60
+    python manage.py processar_exclusoes --uma-vez
+
+Cada ciclo reivindica um lote de perfis com data_deletion_request,
+apaga os dados pessoais e anonimiza pedidos e conta em uma transação (ver
+usuarios/exclusao_dados.py), exibindo o tempo de cada etapa do lote. Sem
+pedidos, espera --intervalo segundos. Vários workers podem rodar ao mesmo
+tempo (SKIP LOCKED). Com --uma-vez atende os pedidos atuais e termina.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from usuarios import exclusao_dados
+
+
+class Command(BaseCommand):
+    help = "Atende os pedidos de exclusão de dados pessoais (Perfil.data_deletion_request)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=exclusao_dados.TAMANHO_LOTE, help="Perfis atendidos por transação")
+        parser.add_argument('--intervalo', type=float, default=30.0, help="Espera (s) quando não há pedidos")
+        parser.add_argument('--uma-vez', action='store_true', help="Atende os pedidos atuais e termina")
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                resultado = exclusao_dados.excluir_lote(options['lote'])
+                if resultado['perfis']:
+                    total += resultado['perfis']
+                    etapas = ', '.join(f"{etapa} {ms}ms" for etapa, ms in resultado['etapas_ms'].items())
+                    self.stdout.write(
+                        f"Lote: {resultado['perfis']} perfis, {sum(resultado['linhas_removidas'].values())} linhas "
+                        f"removidas, {resultado['pedidos_anonimizados']} pedidos anonimizados em "
+                        f"{resultado['segundos']:.2f}s ({etapas})"
+                    )
+                elif options['uma_vez']:
+                    break
+                else:
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} pedidos de exclusão atendidos no total"))
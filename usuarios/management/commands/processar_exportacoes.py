@@ -0,0 +1,53 @@
+"""
+Worker que gera as exportações de dados pessoais (LGPD)
+
+Uso:
+    python manage.py processar_exportacoes
+    python manage.py processar_exportacoes --lote 2 --intervalo 30
+    python manage.py processar_exportacoes --uma-vez
+
+Roda ao lado do gunicorn (ver procfile). Cada ciclo enfileira os perfis
+marcados com data_export_request, reivindica um lote de exportações e
+gera os arquivos zip; sem tarefas, apaga os arquivos expirados e espera
+--intervalo segundos. Vários workers podem rodar ao mesmo tempo (SKIP
+LOCKED). Para cada exportação é exibida a vazão (registros/s e KB/s).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from usuarios import exportacao_dados
+
+
+class Command(BaseCommand):
+    help = "Gera os arquivos de exportação de dados pessoais (fila ExportacaoDados)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5, help="Exportações reivindicadas por ciclo")
+        parser.add_argument('--intervalo', type=float, default=10.0, help="Espera (s) quando a fila está vazia")
+        parser.add_argument('--uma-vez', action='store_true', help="Esvazia a fila e termina")
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                medicoes = exportacao_dados.processar_pendentes(options['lote'])
+                for medicao in medicoes:
+                    segundos = max(medicao['segundos'], 1e-6)
+                    self.stdout.write(
+                        f"Exportação #{medicao['tarefa'].id}: {medicao['registros']} registros, "
+                        f"{medicao['bytes'] / 1024:.1f} KB em {segundos:.2f}s "
+                        f"({medicao['registros'] / segundos:.0f} registros/s)"
+                    )
+                total += len(medicoes)
+                if not medicoes:
+                    removidos = exportacao_dados.remover_expiradas()
+                    if removidos:
+                        self.stdout.write(f"{removidos} arquivos expirados removidos")
+                    if options['uma_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} exportações geradas no total"))
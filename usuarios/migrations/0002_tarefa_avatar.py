@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaAvatar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arquivo_original', models.CharField(max_length=255, verbose_name='Arquivo original')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='pendente', max_length=15, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('avatar_url', models.CharField(blank=True, max_length=255, verbose_name='URL do avatar gerado')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('perfil', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarefas_avatar', to='usuarios.perfil')),
+            ],
+            options={
+                'verbose_name': 'Tarefa de avatar',
+                'verbose_name_plural': 'Tarefas de avatar',
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='tarefa_avatar_fila')],
+            },
+        ),
+    ]
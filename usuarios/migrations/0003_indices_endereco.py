@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0002_tarefa_avatar'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='endereco',
+            options={'ordering': ['-is_default_shipping', '-created_at'], 'verbose_name': 'Endereço', 'verbose_name_plural': 'Endereços'},
+        ),
+        migrations.AddIndex(
+            model_name='endereco',
+            index=models.Index(fields=['perfil', '-is_default_shipping', '-created_at'], name='endereco_perfil_ordem_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_indices_endereco'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacaoDados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='pendente', max_length=15, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('arquivo', models.CharField(blank=True, max_length=255, verbose_name='Arquivo')),
+                ('registros', models.PositiveIntegerField(default=0, verbose_name='Registros exportados')),
+                ('tamanho', models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('expira_em', models.DateTimeField(blank=True, null=True, verbose_name='Disponível até')),
+                ('perfil', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exportacoes_dados', to='usuarios.perfil')),
+            ],
+            options={
+                'verbose_name': 'Exportação de dados',
+                'verbose_name_plural': 'Exportações de dados',
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='exportacao_dados_fila')],
+            },
+        ),
+    ]
@@ -207,6 +207,10 @@ class Endereco(models.Model):
     class Meta:
         verbose_name = "Endereço"
         verbose_name_plural = "Endereços"
+        ordering = ['-is_default_shipping', '-created_at']  # Padrão primeiro, depois os mais recentes
+        indexes = [
+            models.Index(fields=['perfil', '-is_default_shipping', '-created_at'], name='endereco_perfil_ordem_idx'),
+        ]
 
 class MetodoPagamento(models.Model):
     """
@@ -304,4 +308,88 @@ class Auditoria(models.Model):
     
     class Meta:
         verbose_name = "Auditoria"
-        verbose_name_plural = "Auditorias"
\ No newline at end of file
+        verbose_name_plural = "Auditorias"
+
+class TarefaAvatar(models.Model):
+    """
+    Processamento pendente de um avatar enviado pelo usuário
+
+    O upload só grava o arquivo original e cria a tarefa; o redimensionamento
+    é feito pelo comando processar_avatares (ver usuarios/avatares.py).
+    """
+    STATUS_PENDENTE = 'pendente'
+    STATUS_PROCESSANDO = 'processando'
+    STATUS_CONCLUIDA = 'concluida'
+    STATUS_ERRO = 'erro'
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_PROCESSANDO, 'Processando'),
+        (STATUS_CONCLUIDA, 'Concluída'),
+        (STATUS_ERRO, 'Erro'),
+    ]
+
+    perfil = models.ForeignKey(Perfil, on_delete=models.CASCADE, related_name='tarefas_avatar')
+
+    arquivo_original = models.CharField(max_length=255, verbose_name="Arquivo original")  # Caminho no storage
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default=STATUS_PENDENTE, verbose_name="Status")
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    avatar_url = models.CharField(max_length=255, blank=True, verbose_name="URL do avatar gerado")
+    erro = models.TextField(blank=True, verbose_name="Erro")
+
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    iniciado_em = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado em")
+    concluido_em = models.DateTimeField(null=True, blank=True, verbose_name="Concluído em")
+
+    def __str__(self):
+        return f"Avatar de {self.perfil.user.username} - {self.get_status_display()}"
+
+    class Meta:
+        verbose_name = "Tarefa de avatar"
+        verbose_name_plural = "Tarefas de avatar"
+        indexes = [
+            models.Index(fields=['status', 'criado_em'], name='tarefa_avatar_fila'),
+        ]
+
+class ExportacaoDados(models.Model):
+    """
+    Exportação dos dados pessoais de um usuário (LGPD)
+
+    Criada quando o usuário pede a exportação (Perfil.data_export_request);
+    o arquivo zip é montado pelo comando processar_exportacoes (ver
+    usuarios/exportacao_dados.py) e guardado fora da pasta de mídia pública,
+    disponível para download até 'expira_em'.
+    """
+    STATUS_PENDENTE = 'pendente'
+    STATUS_PROCESSANDO = 'processando'
+    STATUS_CONCLUIDA = 'concluida'
+    STATUS_ERRO = 'erro'
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_PROCESSANDO, 'Processando'),
+        (STATUS_CONCLUIDA, 'Concluída'),
+        (STATUS_ERRO, 'Erro'),
+    ]
+
+    perfil = models.ForeignKey(Perfil, on_delete=models.CASCADE, related_name='exportacoes_dados')
+
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default=STATUS_PENDENTE, verbose_name="Status")
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    arquivo = models.CharField(max_length=255, blank=True, verbose_name="Arquivo")  # Caminho no armazenamento privado
+    registros = models.PositiveIntegerField(default=0, verbose_name="Registros exportados")
+    tamanho = models.PositiveBigIntegerField(default=0, verbose_name="Tamanho (bytes)")
+    erro = models.TextField(blank=True, verbose_name="Erro")
+
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    iniciado_em = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado em")
+    concluido_em = models.DateTimeField(null=True, blank=True, verbose_name="Concluído em")
+    expira_em = models.DateTimeField(null=True, blank=True, verbose_name="Disponível até")
+
+    def __str__(self):
+        return f"Exportação de {self.perfil.user.username} - {self.get_status_display()}"
+
+    class Meta:
+        verbose_name = "Exportação de dados"
+        verbose_name_plural = "Exportações de dados"
+        indexes = [
+            models.Index(fields=['status', 'criado_em'], name='exportacao_dados_fila'),
+        ]
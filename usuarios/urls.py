@@ -9,7 +9,13 @@ urlpatterns = [
     path('cadastro/', views.cadastro, name='cadastro'),
     path('sair/', views.user_logout, name='logout'),
     path('perfil/', views.perfil, name='perfil'),
+    path('perfil/pedidos/', views.perfil_pedidos, name='perfil_pedidos'),
+    path('perfil/gerenciar/<str:lista>/', views.perfil_admin_lista, name='perfil_admin_lista'),
     path('perfil/avatar/', views.upload_avatar, name='upload_avatar'),  # Added avatar upload endpoint
+    path('perfil/avatar/status/<int:tarefa_id>/', views.status_avatar, name='status_avatar'),
+    path('perfil/dados/exportar/', views.solicitar_exportacao_dados, name='solicitar_exportacao_dados'),
+    path('perfil/dados/exportar/<int:exportacao_id>/', views.status_exportacao_dados, name='status_exportacao_dados'),
+    path('perfil/dados/exportar/<int:exportacao_id>/baixar/', views.baixar_exportacao_dados, name='baixar_exportacao_dados'),
     path('perfil/seguranca/', views.perfil_seguranca, name='perfil_seguranca'),
     path('perfil/endereco/', views.perfil_endereco, name='perfil_endereco'),
     path('perfil/preferencias/', views.perfil_preferencias, name='perfil_preferencias'),
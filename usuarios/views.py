@@ -6,23 +6,47 @@ gerenciamento de perfis de usuários.
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, JsonResponse
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count
 from django.utils import timezone
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
+from django.views.decorators.http import require_GET, require_POST
 import os
-import uuid
-from PIL import Image
-from io import BytesIO
-from .models import Perfil, Endereco
-from nucleo.models import Produto, Marca, Categoria, Pedido
+from PIL import Image, UnidentifiedImageError
+from .models import Perfil, Endereco, TarefaAvatar, ExportacaoDados
+from . import avatares, exportacao_dados
+from nucleo.models import Produto, Marca, Categoria, Pedido, EstatisticaCliente
+from nucleo.consultas import orcamento_consultas
+from nucleo.paginacao import paginar_por_cursor, ler_limite, CursorInvalido
+
+
+# Pedidos por página na aba "Pedidos" do perfil
+PEDIDOS_POR_PAGINA = 10
+
+# Listas da aba "Gerenciar" do perfil (superuser):
+# nome na URL -> (modelo, campos retornados, rota de edição, ordenação)
+LISTAS_ADMIN = {
+    'produtos': (Produto, ('id', 'nome', 'preco', 'marca__nome'), 'nucleo:admin_produto_editar', ('-id',)),
+    'marcas': (Marca, ('id', 'nome', 'slug'), 'admin:nucleo_marca_change', ('-id',)),
+    'categorias': (Categoria, ('id', 'nome', 'slug'), 'admin:nucleo_categoria_change', ('-id',)),
+    # Maiores compradores primeiro (índice cliente_total_gasto_idx)
+    'clientes': (
+        EstatisticaCliente,
+        ('id', 'usuario__username', 'total_pedidos', 'total_gasto', 'ultimo_pedido_em', 'marca_favorita__nome'),
+        'admin:nucleo_estatisticacliente_change',
+        ('-total_gasto', '-id'),
+    ),
+}
+ITENS_ADMIN_POR_PAGINA = 20
 
 
 # ============================================
@@ -173,6 +197,7 @@ def user_logout(request):
 # ============================================
 
 @login_required
+@orcamento_consultas(7)
 def perfil(request):
     """
     View principal do perfil do usuário
@@ -184,7 +209,9 @@ def perfil(request):
     - Visualizar histórico de pedidos
     - [Superuser] Gerenciar produtos, marcas e categorias
     
-    GET: Exibe página de perfil com todas as abas
+    GET: Exibe página de perfil com todas as abas; o histórico de pedidos e
+    as listas administrativas são carregados só quando a aba é aberta
+    (ver 'perfil_pedidos' e 'perfil_admin_lista')
     POST: Processa atualizações de perfil ou alteração de senha
     
     Args:
@@ -196,13 +223,11 @@ def perfil(request):
     Returns:
         Renderiza 'usuarios/perfil.html' com:
         - perfil: Objeto Perfil do usuário
-        - pedidos: QuerySet de pedidos do usuário (com prefetch de itens)
         - enderecos: QuerySet de endereços do usuário
-        - [Se superuser] marcas, categorias, produtos
+        - estatistica: EstatisticaCliente do usuário (None se nunca comprou)
         
     Nota:
         - Cria perfil automaticamente se não existir
-        - Usa prefetch_related para otimizar consultas de pedidos
         - Mantém usuário logado após alteração de senha (update_session_auth_hash)
     """
     # Obter ou criar perfil para usuários que não têm um
@@ -283,23 +308,118 @@ def perfil(request):
     # Buscar endereços do usuário
     enderecos = perfil.enderecos.all()
     
-    # Buscar pedidos do usuário (otimizado com prefetch)
-    pedidos = Pedido.objects.filter(usuario=request.user).order_by('-criado_em').prefetch_related('itens__produto')
+    # Resumo de compras do cabeçalho: uma linha pré-calculada (ver nucleo/clientes.py)
+    estatistica = EstatisticaCliente.objects.select_related('marca_favorita').filter(usuario=request.user).first()
     
-    # Montar contexto base
-    context = {
+    return render(request, 'usuarios/perfil.html', {
         'perfil': perfil,
-        'pedidos': pedidos,
-        'enderecos': enderecos
-    }
+        'enderecos': enderecos,
+        'estatistica': estatistica
+    })
+
+
+@login_required
+@require_GET
+@orcamento_consultas(4)
+def perfil_pedidos(request):
+    """
+    Histórico de pedidos do usuário para a aba "Pedidos" (JSON)
+    
+    Paginado por cursor (índice pedido_usuario_recentes_idx) e com uma
+    projeção enxuta: a quantidade de itens vem de um COUNT agrupado na
+    mesma consulta, sem carregar itens nem produtos.
     
-    # Adicionar dados administrativos se usuário for superuser
-    if request.user.is_superuser:
-        context['marcas'] = Marca.objects.all()
-        context['categorias'] = Categoria.objects.all()
-        context['produtos'] = Produto.objects.all().order_by('-criado_em')
+    Args:
+        request: HttpRequest object (usuário autenticado)
+            GET opcional:
+            - cursor: Token da página anterior (vazio para a primeira)
+            - limite: Quantidade de pedidos (máximo 100)
+            
+    Returns:
+        JsonResponse com:
+        - success: Boolean
+        - pedidos: Lista de {id, criado_em, total, quantidade_itens, forma_pagamento, url}
+        - proximo_cursor: Token da próxima página (None se for a última)
+    """
+    limite = ler_limite(request.GET.get('limite'), PEDIDOS_POR_PAGINA)
+    pedidos = Pedido.objects.filter(usuario=request.user).values(
+        'id', 'criado_em', 'total', 'forma_pagamento'
+    ).annotate(quantidade_itens=Count('itens'))
+    try:
+        pagina, proximo_cursor = paginar_por_cursor(
+            pedidos, request.GET.get('cursor'), limite=limite, ordenacao=('-criado_em', '-id')
+        )
+    except CursorInvalido:
+        return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
     
-    return render(request, 'usuarios/perfil.html', context)
+    formas_pagamento = dict(Pedido.FORMA_PAGAMENTO_CHOICES)
+    return JsonResponse({
+        'success': True,
+        'pedidos': [
+            {
+                'id': pedido['id'],
+                'criado_em': pedido['criado_em'].isoformat(),
+                'total': str(pedido['total']),
+                'quantidade_itens': pedido['quantidade_itens'],
+                'forma_pagamento': formas_pagamento.get(pedido['forma_pagamento'], ''),
+                'url': reverse('usuario:pedido_detalhe', args=[pedido['id']]),
+            }
+            for pedido in pagina
+        ],
+        'proximo_cursor': proximo_cursor
+    })
+
+
+@login_required
+@require_GET
+@orcamento_consultas(4)
+def perfil_admin_lista(request, lista):
+    """
+    Listas da aba "Gerenciar" do perfil (produtos, marcas, categorias ou clientes)
+    
+    Carregadas só quando a aba é aberta, em páginas por cursor (mais
+    recentes primeiro; clientes pelo total gasto) e apenas com as colunas
+    exibidas. Os números dos clientes vêm de EstatisticaCliente, sem
+    agregar pedidos.
+    
+    Args:
+        request: HttpRequest object (superuser)
+            GET opcional: cursor, limite (como em 'perfil_pedidos')
+        lista: Chave de LISTAS_ADMIN vinda da URL
+            
+    Returns:
+        JsonResponse com:
+        - success: Boolean
+        - itens: Lista de dicts com os campos da lista e 'url' de edição
+        - proximo_cursor: Token da próxima página (None se for a última)
+        
+    Raises:
+        PermissionDenied: Se o usuário não for superuser
+        Http404: Se a lista não existir
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    if lista not in LISTAS_ADMIN:
+        raise Http404("Lista não encontrada")
+    modelo, campos, rota_edicao, ordenacao = LISTAS_ADMIN[lista]
+    
+    limite = ler_limite(request.GET.get('limite'), ITENS_ADMIN_POR_PAGINA)
+    try:
+        pagina, proximo_cursor = paginar_por_cursor(
+            modelo.objects.values(*campos), request.GET.get('cursor'), limite=limite, ordenacao=ordenacao
+        )
+    except CursorInvalido:
+        return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
+    
+    itens = []
+    for item in pagina:
+        item = {campo.replace('__', '_'): valor for campo, valor in item.items()}
+        for campo in ('preco', 'total_gasto'):
+            if campo in item:
+                item[campo] = str(item[campo])
+        item['url'] = reverse(rota_edicao, args=[item['id']])
+        itens.append(item)
+    return JsonResponse({'success': True, 'itens': itens, 'proximo_cursor': proximo_cursor})
 
 
 @login_required
@@ -477,14 +597,19 @@ def perfil_conta(request):
         
         # Verificar se é uma requisição de exclusão de conta
         if 'delete_account' in request.POST:
-            # Lógica para excluir conta
-            messages.success(request, "Conta excluída com sucesso!")
+            # A exclusão é feita em lotes pelo comando processar_exclusoes
+            perfil.data_deletion_request = True
+            perfil.data_deletion_request_at = timezone.now()
+            perfil.save(update_fields=['data_deletion_request', 'data_deletion_request_at', 'updated_at'])
+            logout(request)
+            messages.success(request, "Recebemos seu pedido de exclusão. Seus dados pessoais serão removidos em breve.")
             return redirect('nucleo:index')
     
     return render(request, 'usuarios/perfil_conta.html', {'perfil': perfil})
 
 
 @login_required
+@orcamento_consultas(7)
 def enderecos(request):
     """
     View para gerenciar endereços do usuário
@@ -572,7 +697,11 @@ def upload_avatar(request):
     """
     View para upload de avatar do usuário
     
-    Processa o upload de uma imagem de perfil/avatar para o usuário.
+    Recebe uma imagem de perfil/avatar e cria a tarefa de processamento.
+    O redimensionamento é feito fora da requisição pelo comando
+    processar_avatares (ver usuarios/avatares.py); só com AVATARES_FILA=false
+    (desenvolvimento e testes) é feito aqui mesmo. O cliente acompanha pela
+    URL de status.
     
     Args:
         request: HttpRequest object (POST com arquivo de imagem)
@@ -583,7 +712,9 @@ def upload_avatar(request):
         JsonResponse com:
         - success: Boolean indicando sucesso
         - message: Mensagem de sucesso ou erro
-        - avatar_url: URL da nova imagem (se sucesso)
+        - tarefa_id: ID da tarefa de processamento (se aceito; status 202
+          quando fica na fila, 200 quando já foi processada)
+        - status_url: URL para consultar o andamento (se aceito)
         
     Validations:
         - Apenas usuários autenticados
@@ -657,58 +788,30 @@ def upload_avatar(request):
                     'message': 'Tipo de arquivo inválido. Apenas imagens PNG e JPEG são permitidas.'
                 })
             
+            # Conferir o cabeçalho da imagem (não decodifica os pixels)
+            try:
+                Image.open(avatar_file)
+            except (UnidentifiedImageError, OSError):
+                return JsonResponse({
+                    'success': False,
+                    'message': 'O arquivo enviado não é uma imagem válida.'
+                })
+            avatar_file.seek(0)
+            
             # Obter ou criar perfil
             perfil, created = Perfil.objects.get_or_create(user=request.user)
             
-            # Se já existir um avatar, remover o arquivo antigo
-            if perfil.avatar_url:
-                # Extrair o caminho do arquivo do avatar_url
-                old_avatar_path = perfil.avatar_url.replace(settings.MEDIA_URL, '')
-                old_avatar_full_path = os.path.join(settings.MEDIA_ROOT, old_avatar_path)
-                if os.path.exists(old_avatar_full_path):
-                    os.remove(old_avatar_full_path)
-            
-            # Gerar nome único para o arquivo
-            filename = f"{uuid.uuid4()}{file_extension}"
-            
-            # Criar diretório se não existir
-            avatar_dir = os.path.join(settings.MEDIA_ROOT, 'avatars')
-            os.makedirs(avatar_dir, exist_ok=True)
-            
-            # Abrir e redimensionar a imagem para 200x200
-            image = Image.open(avatar_file)
-            image = image.resize((200, 200), Image.Resampling.LANCZOS)
-            
-            # Converter para RGB se for PNG com transparência
-            if image.mode in ('RGBA', 'LA', 'P'):
-                # Criar fundo branco para PNGs com transparência
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
-            
-            # Salvar a imagem redimensionada
-            image_io = BytesIO()
-            if file_extension == '.png':
-                image.save(image_io, format='PNG')
-            else:
-                image.save(image_io, format='JPEG', quality=85)
-            
-            # Salvar no disco
-            avatar_path = os.path.join(avatar_dir, filename)
-            with open(avatar_path, 'wb') as f:
-                f.write(image_io.getvalue())
-            
-            # Atualizar o campo avatar_url no perfil
-            perfil.avatar_url = f"{settings.MEDIA_URL}avatars/{filename}"
-            perfil.save()
+            # Guardar o original e enfileirar o processamento
+            tarefa = avatares.enfileirar(perfil, avatar_file)
+            if not settings.AVATARES_FILA:
+                avatares.processar_agora(tarefa)
             
             return JsonResponse({
                 'success': True,
-                'message': 'Avatar atualizado com sucesso!',
-                'avatar_url': perfil.avatar_url
-            })
+                'message': 'Avatar recebido! Estamos processando sua imagem.',
+                'tarefa_id': tarefa.id,
+                'status_url': reverse('usuario:status_avatar', args=[tarefa.id]),
+            }, status=202 if settings.AVATARES_FILA else 200)
             
         except Exception as e:
             return JsonResponse({
@@ -722,6 +825,130 @@ def upload_avatar(request):
     })
 
 
+@login_required
+def status_avatar(request, tarefa_id):
+    """
+    View para consultar o processamento de um avatar enviado
+    
+    Args:
+        request: HttpRequest object
+        tarefa_id: ID da TarefaAvatar retornado pelo upload
+        
+    Returns:
+        JsonResponse com:
+        - success: Boolean indicando sucesso
+        - status: 'pendente', 'processando', 'concluida' ou 'erro'
+        - avatar_url: URL do avatar gerado (quando concluída)
+        - message: Mensagem para o usuário (quando concluída ou com erro)
+    """
+    tarefa = get_object_or_404(TarefaAvatar, id=tarefa_id, perfil__user=request.user)
+    
+    resposta = {'success': True, 'status': tarefa.status}
+    if tarefa.status == TarefaAvatar.STATUS_CONCLUIDA:
+        resposta['avatar_url'] = tarefa.avatar_url or request.user.perfil.avatar_url
+        resposta['message'] = 'Avatar atualizado com sucesso!'
+    elif tarefa.status == TarefaAvatar.STATUS_ERRO:
+        resposta['message'] = 'Não foi possível processar a imagem. Tente outro arquivo.'
+    return JsonResponse(resposta)
+
+
+@login_required
+@require_POST
+def solicitar_exportacao_dados(request):
+    """
+    Pedido de exportação dos dados pessoais do usuário (LGPD)
+    
+    Só registra o pedido e responde na hora; o arquivo é montado fora da
+    requisição pelo comando processar_exportacoes (ver
+    usuarios/exportacao_dados.py). O cliente acompanha pela URL de status.
+    
+    Args:
+        request: HttpRequest object (POST, usuário autenticado)
+        
+    Returns:
+        JsonResponse (status 202) com:
+        - success: Boolean
+        - message: Mensagem para o usuário
+        - exportacao_id: ID da ExportacaoDados (reaproveitada se já houver uma aberta)
+        - status_url: URL para consultar o andamento
+    """
+    perfil, created = Perfil.objects.get_or_create(user=request.user)  # type: ignore
+    exportacao = exportacao_dados.solicitar(perfil)
+    return JsonResponse({
+        'success': True,
+        'message': 'Pedido recebido! Avisaremos quando o arquivo estiver pronto.',
+        'exportacao_id': exportacao.id,
+        'status_url': reverse('usuario:status_exportacao_dados', args=[exportacao.id]),
+    }, status=202)
+
+
+@login_required
+@require_GET
+def status_exportacao_dados(request, exportacao_id):
+    """
+    Andamento de uma exportação de dados pessoais
+    
+    Args:
+        request: HttpRequest object
+        exportacao_id: ID retornado por 'solicitar_exportacao_dados'
+        
+    Returns:
+        JsonResponse com:
+        - success: Boolean
+        - status: 'pendente', 'processando', 'concluida' ou 'erro'
+        - download_url e expira_em: Quando o arquivo está disponível
+        - message: Mensagem para o usuário (quando expirada ou com erro)
+    """
+    exportacao = get_object_or_404(ExportacaoDados, id=exportacao_id, perfil__user=request.user)
+    
+    resposta = {'success': True, 'status': exportacao.status}
+    if exportacao.status == ExportacaoDados.STATUS_CONCLUIDA:
+        if exportacao.arquivo and exportacao.expira_em > timezone.now():
+            resposta['download_url'] = reverse('usuario:baixar_exportacao_dados', args=[exportacao.id])
+            resposta['expira_em'] = exportacao.expira_em.isoformat()
+        else:
+            resposta['message'] = 'O prazo para baixar este arquivo acabou. Faça um novo pedido.'
+    elif exportacao.status == ExportacaoDados.STATUS_ERRO:
+        resposta['message'] = 'Não foi possível gerar o arquivo. Tente novamente mais tarde.'
+    return JsonResponse(resposta)
+
+
+@login_required
+@require_GET
+def baixar_exportacao_dados(request, exportacao_id):
+    """
+    Download do zip de uma exportação concluída (somente o dono, dentro do prazo)
+    
+    Args:
+        request: HttpRequest object
+        exportacao_id: ID da ExportacaoDados
+        
+    Returns:
+        FileResponse com o zip como anexo
+        
+    Raises:
+        Http404: Se a exportação não for do usuário, não estiver concluída
+            ou o prazo tiver acabado
+    """
+    exportacao = get_object_or_404(
+        ExportacaoDados, id=exportacao_id, perfil__user=request.user, status=ExportacaoDados.STATUS_CONCLUIDA,
+    )
+    if not exportacao.arquivo or exportacao.expira_em <= timezone.now():
+        raise Http404("Exportação expirada")
+    
+    armazenamento = exportacao_dados.armazenamento()
+    if not armazenamento.exists(exportacao.arquivo):
+        raise Http404("Arquivo não encontrado")
+    resposta = FileResponse(
+        armazenamento.open(exportacao.arquivo, 'rb'),
+        as_attachment=True,
+        filename=f"nerdhub-dados-{exportacao.concluido_em:%Y%m%d}.zip",
+        content_type='application/zip',
+    )
+    resposta['Cache-Control'] = 'private, no-store'
+    return resposta
+
+
 # ============================================
 # VIEWS DE GERENCIAMENTO DE ENDEREÇOS
 # ============================================